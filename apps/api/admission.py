@@ -0,0 +1,163 @@
+"""
+Size-aware admission control for analyze requests.
+
+The bundle size is checked before anything is loaded. Requests are admitted
+into a small or a large pool (separate concurrency limits) under a global
+in-flight byte budget. Nothing queues: a request that does not fit is refused
+right away with 429 (pool full) or 503 (byte budget exhausted) and a
+Retry-After hint, and bundles that could never fit get 413. Large bundles
+can run in a niced worker process pool (AdmissionController.run) so they do not compete
+with small requests for the API process's GIL.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+from apps.api.settings import AdmissionSettings, admission_settings
+from packages.ingest.compression import compression_of
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status: int, code: str, message: str, retry_after: Optional[int], detail: dict) -> None:
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+        self.retry_after = retry_after
+        self.detail = detail
+
+
+class AdmissionTicket:
+    __slots__ = ("pool", "cost")
+
+    def __init__(self, pool: str, cost: int) -> None:
+        self.pool = pool
+        self.cost = cost
+
+
+def bundle_cost(path: Path, settings: AdmissionSettings) -> int:
+    """Bytes charged for a bundle: its size on disk, scaled up when compressed."""
+    size = path.stat().st_size
+    if compression_of(path):
+        return int(size * settings.compressed_expansion)
+    return size
+
+
+def _lower_priority(nice: int) -> None:
+    if nice > 0 and hasattr(os, "nice"):
+        os.nice(nice)
+
+
+class AdmissionController:
+    def __init__(self, settings: AdmissionSettings) -> None:
+        self.settings = settings
+        self._lock = threading.Lock()
+        self._active = {"small": 0, "large": 0}
+        self._bytes = {"small": 0, "large": 0}
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def admit(self, cost: int) -> AdmissionTicket:
+        """Reserve a slot for a bundle of `cost` bytes or raise AdmissionRejected."""
+        settings = self.settings
+        pool = "large" if cost >= settings.large_bundle_bytes else "small"
+        if not settings.enabled:
+            return AdmissionTicket(pool, 0)
+        limit = settings.bundle_limit(pool)
+        if cost > limit:
+            raise AdmissionRejected(
+                413, "bundle_too_large", "bundle exceeds the admission limit", None,
+                {"bytes": cost, "limit_bytes": limit},
+            )
+        retry_after = settings.large_retry_after_s if pool == "large" else settings.retry_after_s
+        with self._lock:
+            capacity = settings.large_concurrency if pool == "large" else settings.small_concurrency
+            if self._active[pool] >= capacity:
+                raise AdmissionRejected(
+                    429, "too_many_requests", f"{pool} bundle pool is full", retry_after,
+                    {"pool": pool, "active": self._active[pool], "capacity": capacity},
+                )
+            budget = settings.large_byte_budget() if pool == "large" else settings.inflight_byte_budget
+            in_use = self._bytes["large"] if pool == "large" else sum(self._bytes.values())
+            if in_use + cost > budget:
+                raise AdmissionRejected(
+                    503, "over_capacity", "in-flight byte budget exhausted", retry_after,
+                    {"pool": pool, "bytes": cost, "in_flight_bytes": in_use, "budget_bytes": budget},
+                )
+            self._active[pool] += 1
+            self._bytes[pool] += cost
+        return AdmissionTicket(pool, cost)
+
+    def release(self, ticket: AdmissionTicket) -> None:
+        if not self.settings.enabled:
+            return
+        with self._lock:
+            self._active[ticket.pool] -= 1
+            self._bytes[ticket.pool] -= ticket.cost
+
+    @contextmanager
+    def slot(self, path: Path) -> Iterator[AdmissionTicket]:
+        ticket = self.admit(bundle_cost(path, self.settings))
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def run(self, ticket: AdmissionTicket, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run `fn(*args)` for an admitted request; large ones go to the worker processes when enabled.
+
+        `fn` and its arguments must be picklable for the process pool.
+        """
+        settings = self.settings
+        if ticket.pool != "large" or not (settings.enabled and settings.large_process_pool):
+            return fn(*args)
+        with self._lock:
+            if self._executor is None:
+                # spawn: the API process is multi-threaded, so forking it is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=max(1, settings.large_concurrency),
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_lower_priority,
+                    initargs=(settings.large_nice,),
+                )
+            executor = self._executor
+        try:
+            return executor.submit(fn, *args).result()
+        except BrokenProcessPool:
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False)
+            raise
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"active": dict(self._active), "in_flight_bytes": dict(self._bytes)}
+
+
+@lru_cache(maxsize=1)
+def get_admission_controller() -> AdmissionController:
+    """Process-wide controller built from the environment (shutdown() and cache_clear() to reload)."""
+    return AdmissionController(admission_settings())
+
+
+__all__ = [
+    "AdmissionController",
+    "AdmissionRejected",
+    "AdmissionTicket",
+    "bundle_cost",
+    "get_admission_controller",
+]
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from fastapi.responses import Response
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_CHART_DB = REPO_ROOT / "artifacts" / "charts.db"
+
+
+def chart_db_path() -> Path:
+    """Chart store location: CHART_DB_PATH env var or artifacts/charts.db."""
+    value = os.getenv("CHART_DB_PATH")
+    return Path(value) if value else DEFAULT_CHART_DB
+
+
+def json_bytes_response(body: bytes, status_code: int = 200) -> Response:
+    """Send already-encoded JSON as is (no re-serialization)."""
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+
+__all__ = ["chart_db_path", "json_bytes_response"]
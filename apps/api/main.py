@@ -1,13 +1,31 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 from fastapi.responses import JSONResponse
 
+from apps.api.admission import get_admission_controller
 from apps.api.routers.analyze import router as analyze_router
+from apps.api.routers.patients import router as patients_router
+from apps.api.tracing import TracingMiddleware
+from apps.api.warmup import warm_up, warmup_enabled
 from packages.risklib.rules import discover_rules
 
-app = FastAPI(title="Patient Chart Agent API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Pay one-off costs before serving so the first request runs at steady-state speed.
+    app.state.warmup = warm_up() if warmup_enabled() else None
+    yield
+    get_admission_controller().shutdown()
+
+
+app = FastAPI(title="Patient Chart Agent API", lifespan=lifespan)
+app.add_middleware(TracingMiddleware)
 app.include_router(analyze_router)
+app.include_router(patients_router)
 
 @app.get("/")
 def root() -> dict:
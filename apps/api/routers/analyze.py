@@ -1,19 +1,20 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Literal, Optional
+from typing import List, Literal, Optional
 
 from fastapi import APIRouter
-from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
 
+from apps.api.admission import AdmissionRejected, get_admission_controller
+from apps.api.dependencies import json_bytes_response
+from packages.core.render.compact import compact_result
+from packages.core.render.result_json import payload_json_bytes, result_json_bytes
 from packages.core.schemas.result import PatientAnalysisResult
-from packages.ingest.synthea.loader import load_patient_dir
-from packages.ingest.synthea.normalizer import normalize_to_patient_chart
-from packages.ingest.synthea.parser import parse_fhir_resources
+from packages.core.tracing import current_traceparent, span
 from packages.pipeline.agent_pipeline import run_agent_pipeline
-from packages.pipeline.evidence_enrich import enrich_result_evidence
+from packages.pipeline.sections import Section
 
 router = APIRouter(prefix="/v1")
 
@@ -22,6 +23,8 @@ class AnalyzeRequest(BaseModel):
     path: str
     mode: Literal["mock", "llm"] = "mock"
     enable_agents: bool = False
+    compact: bool = False
+    sections: Optional[List[Section]] = None
 
 
 def _serialize_risks(risks: list[dict]) -> list[dict]:
@@ -50,13 +53,39 @@ def _serialize_risks(risks: list[dict]) -> list[dict]:
     return serialized
 
 
-def _error(status: int, code: str, message: str, detail: Optional[dict] = None) -> JSONResponse:
+def _error(
+    status: int,
+    code: str,
+    message: str,
+    detail: Optional[dict] = None,
+    headers: Optional[dict] = None,
+) -> JSONResponse:
     payload = {"error": {"code": code, "message": message, "detail": detail or {}}}
-    return JSONResponse(status_code=status, content=payload)
+    return JSONResponse(status_code=status, content=payload, headers=headers)
+
+
+def analyze_bytes(
+    path: str,
+    mode: Literal["mock", "llm"],
+    enable_agents: bool,
+    sections: Optional[List[str]],
+    compact: bool,
+    traceparent: Optional[str] = None,
+) -> bytes:
+    """Run the pipeline and encode the response body (picklable for the large-bundle worker pool).
+
+    `traceparent` continues the request's trace when this runs in a worker process.
+    """
+    with span("analyze", {"path": path, "mode": mode}, traceparent=traceparent):
+        result = run_agent_pipeline(path, enable_agents=enable_agents, mode=mode, sections=sections)
+        with span("encode_result", {"compact": compact}):
+            if compact:
+                return payload_json_bytes(compact_result(result))
+            return result_json_bytes(result)
 
 
 @router.post("/analyze", response_model=PatientAnalysisResult)
-def analyze(request: AnalyzeRequest) -> JSONResponse:
+def analyze(request: AnalyzeRequest) -> Response:
     path = Path(request.path)
     if not request.path:
         return _error(400, "invalid_input", "path is required")
@@ -65,16 +94,24 @@ def analyze(request: AnalyzeRequest) -> JSONResponse:
     if not path.is_file():
         return _error(400, "invalid_input", "path must be a file", {"path": request.path})
 
+    controller = get_admission_controller()
     try:
-        result = run_agent_pipeline(
-            request.path, enable_agents=request.enable_agents, mode=request.mode
-        )
-        resources = load_patient_dir(path)
-        grouped = parse_fhir_resources(resources)
-        chart = normalize_to_patient_chart(grouped)
-        enrich_result_evidence(result, chart, request.path)
-        return JSONResponse(status_code=200, content=jsonable_encoder(result))
+        with controller.slot(path) as ticket:
+            body = controller.run(
+                ticket,
+                analyze_bytes,
+                request.path,
+                request.mode,
+                request.enable_agents,
+                request.sections,
+                request.compact,
+                current_traceparent(),
+            )
+        return json_bytes_response(body)
+    except AdmissionRejected as exc:
+        headers = None if exc.retry_after is None else {"Retry-After": str(exc.retry_after)}
+        return _error(exc.status, exc.code, exc.message, exc.detail, headers=headers)
     except RuntimeError as exc:
         return _error(500, "runtime_error", str(exc))
     except Exception as exc:
-        return _error(500, "internal_error", "unexpected error", {"error": str(exc)})
\ No newline at end of file
+        return _error(500, "internal_error", "unexpected error", {"error": str(exc)})
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+from apps.api.dependencies import chart_db_path, json_bytes_response
+from packages.core.render.compact import compact_result
+from packages.core.render.result_json import payload_json_bytes
+from packages.ingest.store import (
+    connect,
+    count_patients,
+    get_chart,
+    get_result_json,
+    list_patients,
+    patients_with_term,
+)
+from packages.pipeline.agents.timeline_agent import run_timeline_agent, timeline_cursor
+
+router = APIRouter(prefix="/v1")
+
+
+def _error(status: int, code: str, message: str, detail: Optional[dict] = None) -> JSONResponse:
+    payload = {"error": {"code": code, "message": message, "detail": detail or {}}}
+    return JSONResponse(status_code=status, content=payload)
+
+
+def _open() -> sqlite3.Connection | JSONResponse:
+    path = chart_db_path()
+    try:
+        return connect(path, readonly=True)
+    except FileNotFoundError:
+        return _error(503, "store_unavailable", "chart store not built", {"path": str(path)})
+
+
+@router.get("/patients")
+def patients(
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+) -> JSONResponse:
+    conn = _open()
+    if isinstance(conn, JSONResponse):
+        return conn
+    try:
+        payload = {
+            "total": count_patients(conn),
+            "limit": limit,
+            "offset": offset,
+            "patients": list_patients(conn, limit=limit, offset=offset),
+        }
+        return JSONResponse(status_code=200, content=payload)
+    finally:
+        conn.close()
+
+
+@router.get("/patients/search")
+def patient_search(
+    code: Optional[str] = None,
+    text: Optional[str] = None,
+) -> JSONResponse:
+    if bool(code) == bool(text):
+        return _error(400, "invalid_input", "exactly one of code or text is required")
+    query = f"code={code}" if code else f"text={text}"
+    conn = _open()
+    if isinstance(conn, JSONResponse):
+        return conn
+    try:
+        try:
+            patient_ids = patients_with_term(conn, query)
+        except ValueError as exc:
+            return _error(400, "invalid_input", str(exc))
+    finally:
+        conn.close()
+    return JSONResponse(status_code=200, content={"query": query, "patients": patient_ids})
+
+
+@router.get("/patients/{patient_id}")
+def patient_chart(patient_id: str) -> JSONResponse:
+    conn = _open()
+    if isinstance(conn, JSONResponse):
+        return conn
+    try:
+        chart = get_chart(conn, patient_id)
+    finally:
+        conn.close()
+    if chart is None:
+        return _error(404, "not_found", "patient not found", {"patient_id": patient_id})
+    return JSONResponse(status_code=200, content=jsonable_encoder(chart))
+
+
+@router.get("/patients/{patient_id}/timeline")
+def patient_timeline(
+    patient_id: str,
+    limit: int = Query(20, ge=1, le=500),
+    before_date: Optional[str] = None,
+    before_id: Optional[str] = None,
+) -> JSONResponse:
+    if (before_date is None) != (before_id is None):
+        return _error(400, "invalid_input", "before_date and before_id must be given together")
+    conn = _open()
+    if isinstance(conn, JSONResponse):
+        return conn
+    try:
+        chart = get_chart(conn, patient_id)
+    finally:
+        conn.close()
+    if chart is None:
+        return _error(404, "not_found", "patient not found", {"patient_id": patient_id})
+    cursor = (before_date, before_id) if before_date is not None else None
+    try:
+        entries = run_timeline_agent(chart, max_entries=limit, cursor=cursor)
+    except ValueError as exc:
+        return _error(400, "invalid_input", str(exc))
+    next_cursor = None
+    if len(entries) == limit:
+        date, entry_id = timeline_cursor(entries[-1])
+        next_cursor = {"before_date": date, "before_id": entry_id}
+    payload = {"patient_id": patient_id, "entries": jsonable_encoder(entries), "next_cursor": next_cursor}
+    return JSONResponse(status_code=200, content=payload)
+
+
+@router.get("/patients/{patient_id}/result")
+def patient_result(
+    patient_id: str,
+    mode: Literal["mock", "llm"] = "mock",
+    enable_agents: bool = True,
+    compact: bool = False,
+) -> Response:
+    conn = _open()
+    if isinstance(conn, JSONResponse):
+        return conn
+    try:
+        stored = get_result_json(conn, patient_id, mode=mode, enable_agents=enable_agents)
+    finally:
+        conn.close()
+    if stored is None:
+        return _error(
+            404,
+            "not_found",
+            "no stored result",
+            {"patient_id": patient_id, "mode": mode, "enable_agents": enable_agents},
+        )
+    if compact:
+        return json_bytes_response(payload_json_bytes(compact_result(json.loads(stored))))
+    return json_bytes_response(stored.encode("utf-8"))
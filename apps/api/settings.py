@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+from pydantic import BaseModel
+
+MIB = 1024 * 1024
+
+
+class AdmissionSettings(BaseModel):
+    """Size-aware admission control for /v1/analyze (sizes are bundle bytes on disk).
+
+    Bundles of at least `large_bundle_bytes` use the large pool, the rest the
+    small pool. Bytes in flight across both pools are capped by
+    `inflight_byte_budget`, of which `small_concurrency * large_bundle_bytes`
+    is held back for small requests so large bundles cannot starve them.
+    Compressed inputs are charged `compressed_expansion` times their size.
+    With `large_process_pool`, large bundles are analyzed in worker
+    processes niced by `large_nice`, so they do not hold the API process's
+    GIL and the OS scheduler favours small requests.
+    """
+    enabled: bool = True
+    large_bundle_bytes: int = 8 * MIB
+    small_concurrency: int = 8
+    large_concurrency: int = 2
+    inflight_byte_budget: int = 256 * MIB
+    max_bundle_bytes: Optional[int] = None
+    compressed_expansion: float = 10.0
+    large_process_pool: bool = True
+    large_nice: int = 10
+    retry_after_s: int = 1
+    large_retry_after_s: int = 5
+
+    def small_reserve_bytes(self) -> int:
+        return self.small_concurrency * self.large_bundle_bytes
+
+    def large_byte_budget(self) -> int:
+        return max(0, self.inflight_byte_budget - self.small_reserve_bytes())
+
+    def bundle_limit(self, pool: str = "large") -> int:
+        """Largest admissible bundle in `pool`; bigger ones could never fit its budget."""
+        limit = self.large_byte_budget() if pool == "large" else self.inflight_byte_budget
+        return limit if self.max_bundle_bytes is None else min(limit, self.max_bundle_bytes)
+
+
+_ENV = {
+    "enabled": "ANALYZE_ADMISSION",
+    "large_bundle_bytes": "ANALYZE_LARGE_BUNDLE_BYTES",
+    "small_concurrency": "ANALYZE_SMALL_CONCURRENCY",
+    "large_concurrency": "ANALYZE_LARGE_CONCURRENCY",
+    "inflight_byte_budget": "ANALYZE_INFLIGHT_BYTE_BUDGET",
+    "max_bundle_bytes": "ANALYZE_MAX_BUNDLE_BYTES",
+    "compressed_expansion": "ANALYZE_COMPRESSED_EXPANSION",
+    "large_process_pool": "ANALYZE_LARGE_PROCESS_POOL",
+    "large_nice": "ANALYZE_LARGE_NICE",
+    "retry_after_s": "ANALYZE_RETRY_AFTER_S",
+    "large_retry_after_s": "ANALYZE_LARGE_RETRY_AFTER_S",
+}
+
+
+def admission_settings() -> AdmissionSettings:
+    """Admission settings from ANALYZE_* environment variables (unset = default)."""
+    values: dict[str, object] = {}
+    for field, env_name in _ENV.items():
+        raw = os.getenv(env_name)
+        if raw is None or raw.strip() == "":
+            continue
+        if field in ("enabled", "large_process_pool"):
+            values[field] = raw.strip().lower() not in {"0", "false", "no", "off"}
+        else:
+            values[field] = raw.strip()
+    return AdmissionSettings(**values)
+
+
+__all__ = ["AdmissionSettings", "MIB", "admission_settings"]
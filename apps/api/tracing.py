@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from typing import Any, Awaitable, Callable
+
+from packages.core.tracing import span, tracing_enabled
+
+Scope = dict
+Receive = Callable[[], Awaitable[dict]]
+Send = Callable[[dict], Awaitable[None]]
+
+
+class TracingMiddleware:
+    """Wrap each HTTP request in a root span (parented to an incoming W3C `traceparent`).
+
+    Pipeline spans opened while the request is handled become its children,
+    and the response carries the request span's `traceparent`. When tracing is
+    off requests pass straight through.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not tracing_enabled():
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        incoming = headers.get(b"traceparent")
+        method = scope.get("method", "")
+        attributes = {"http.method": method, "http.target": scope.get("path", "")}
+        traceparent = incoming.decode("latin-1") if incoming else None
+        with span(f"{method} {scope.get('path', '')}", attributes, traceparent=traceparent) as request_span:
+
+            async def send_with_trace(message: dict) -> None:
+                if message["type"] == "http.response.start":
+                    request_span.set_attribute("http.status_code", message["status"])
+                    outgoing = request_span.traceparent
+                    if outgoing:
+                        message = {
+                            **message,
+                            "headers": [*message.get("headers", []), (b"traceparent", outgoing.encode("latin-1"))],
+                        }
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace)
+            route = scope.get("route")
+            if route is not None and getattr(route, "path", None):
+                request_span.update_name(f"{method} {route.path}")
+
+
+__all__ = ["TracingMiddleware"]
@@ -0,0 +1,154 @@
+"""
+Startup warm-up for the API.
+
+Everything a first /v1/analyze request would otherwise pay for once is done
+before the app starts serving: importing and compiling the rule registry,
+pushing a tiny in-memory bundle through parse -> normalize -> pipeline ->
+serialization (lazy module imports, pydantic validators and serializers,
+lru caches), creating the admission controller and opening the chart store
+when one exists. Each step is timed; a failing step is recorded and does not
+stop startup.
+"""
+from __future__ import annotations
+
+import os
+import time
+from typing import Callable
+
+from apps.api.admission import get_admission_controller
+from apps.api.dependencies import chart_db_path
+
+_LOINC = "http://loinc.org"
+
+
+def _observation(index: int, code: str, when: str, value: float, unit: str, **extra: object) -> dict:
+    resource = {
+        "resourceType": "Observation",
+        "id": f"warmup-obs-{index}",
+        "status": "final",
+        "code": {"coding": [{"system": _LOINC, "code": code, "display": code}]},
+        "effectiveDateTime": when,
+        "valueQuantity": {"value": value, "unit": unit},
+    }
+    resource.update(extra)
+    return resource
+
+
+def _blood_pressure(index: int, when: str, systolic: float, diastolic: float) -> dict:
+    components = [
+        {"code": {"coding": [{"system": _LOINC, "code": code}]}, "valueQuantity": {"value": value, "unit": "mm[Hg]"}}
+        for code, value in (("8480-6", systolic), ("8462-4", diastolic))
+    ]
+    resource = _observation(index, "85354-9", when, systolic, "mm[Hg]", component=components)
+    del resource["valueQuantity"]
+    return resource
+
+
+def warmup_bundle() -> dict:
+    """A tiny synthetic FHIR bundle that exercises the rules and every agent."""
+    resources = [
+        {"resourceType": "Patient", "id": "warmup", "gender": "female", "birthDate": "1960-01-01"},
+        {
+            "resourceType": "Encounter",
+            "id": "warmup-enc",
+            "status": "finished",
+            "type": [{"coding": [{"code": "185349003", "display": "Encounter for check up"}]}],
+            "period": {"start": "2024-01-10T09:00:00Z", "end": "2024-01-10T09:30:00Z"},
+        },
+        {
+            "resourceType": "Condition",
+            "id": "warmup-cond",
+            "code": {"coding": [{"code": "44054006", "display": "Diabetes mellitus type 2"}]},
+            "clinicalStatus": {"coding": [{"code": "active"}]},
+            "onsetDateTime": "2020-05-01T00:00:00Z",
+        },
+        {
+            "resourceType": "MedicationRequest",
+            "id": "warmup-med",
+            "status": "active",
+            "medicationCodeableConcept": {"coding": [{"code": "860975", "display": "metformin 500 MG"}]},
+            "authoredOn": "2020-05-01T00:00:00Z",
+        },
+        _observation(1, "4548-4", "2023-06-01T09:00:00Z", 7.1, "%"),
+        _observation(2, "4548-4", "2024-01-10T09:00:00Z", 8.4, "%"),
+        _observation(3, "2160-0", "2023-06-01T09:00:00Z", 1.0, "mg/dL"),
+        _observation(4, "2160-0", "2024-01-10T09:00:00Z", 1.6, "mg/dL"),
+        _observation(5, "6298-4", "2024-01-10T09:00:00Z", 5.9, "mmol/L"),
+        _observation(6, "39156-5", "2024-01-10T09:00:00Z", 31.2, "kg/m2"),
+        _blood_pressure(7, "2024-01-10T09:00:00Z", 152, 96),
+    ]
+    return {"resourceType": "Bundle", "type": "collection", "entry": [{"resource": item} for item in resources]}
+
+
+def _warm_rules() -> None:
+    from packages.risklib.rules import discover_rules, rule_manifests
+
+    discover_rules()
+    rule_manifests()
+
+
+def _warm_pipeline() -> None:
+    from packages.core.render.compact import compact_result
+    from packages.core.render.result_json import result_json_bytes
+    from packages.ingest.synthea.normalizer import normalize_to_patient_chart
+    from packages.ingest.synthea.parser import parse_fhir_resources
+    from packages.pipeline.agent_pipeline import run_chart_pipeline
+
+    resources = [{"file_path": "warmup.json", "payload": warmup_bundle(), "input_kind": "file"}]
+    chart = normalize_to_patient_chart(parse_fhir_resources(resources))
+    result = run_chart_pipeline(chart, "warmup.json", enable_agents=True)
+    result_json_bytes(result)
+    compact_result(result)
+
+
+def _warm_chart_store() -> None:
+    path = chart_db_path()
+    if not path.exists():
+        return
+    from packages.ingest.store import connect, count_patients
+
+    conn = connect(path, readonly=True)
+    try:
+        count_patients(conn)
+    finally:
+        conn.close()
+
+
+def _warm_llm() -> None:
+    # Only worth the SDK import when llm mode can actually be used.
+    if os.getenv("OPENAI_API_KEY"):
+        from packages.core.llm import _openai_client_class
+
+        _openai_client_class()
+
+
+WARMUP_STEPS: dict[str, Callable[[], None]] = {
+    "rules": _warm_rules,
+    "pipeline": _warm_pipeline,
+    "admission": get_admission_controller,
+    "chart_store": _warm_chart_store,
+    "llm": _warm_llm,
+}
+
+
+def warm_up() -> dict:
+    """Run every warm-up step; returns {"steps": {name: seconds}, "errors": {name: message}, "total_s": ...}."""
+    steps: dict[str, float] = {}
+    errors: dict[str, str] = {}
+    start = time.perf_counter()
+    for name, step in WARMUP_STEPS.items():
+        step_start = time.perf_counter()
+        try:
+            step()
+        except Exception as exc:
+            errors[name] = f"{type(exc).__name__}: {exc}"
+        steps[name] = time.perf_counter() - step_start
+    return {"steps": steps, "errors": errors, "total_s": time.perf_counter() - start}
+
+
+def warmup_enabled() -> bool:
+    """API_WARMUP=0 (or false/no/off) skips the warm-up."""
+    return os.getenv("API_WARMUP", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+__all__ = ["WARMUP_STEPS", "warm_up", "warmup_bundle", "warmup_enabled"]
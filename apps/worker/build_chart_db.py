@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+from packages.core.schemas.chart import PatientChart
+from packages.ingest.store import (
+    DEFAULT_BATCH_SIZE,
+    connect,
+    count_patients,
+    iter_directory_charts,
+    put_charts,
+    put_results,
+)
+from packages.pipeline.agent_pipeline import run_chart_pipeline
+
+DEFAULT_DB = Path("artifacts/charts.db")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load Synthea bundles into the SQLite chart store.")
+    parser.add_argument("path", type=Path, help="Directory of Synthea bundle JSON files.")
+    parser.add_argument("--db", type=Path, default=DEFAULT_DB, help="SQLite database path.")
+    parser.add_argument("--limit", type=int, default=0, help="Max files to load (0 = no limit).")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Charts per transaction.")
+    parser.add_argument(
+        "--analyze",
+        action="store_true",
+        help="Also run the mock pipeline with agents and store the results (batched like the charts).",
+    )
+    return parser.parse_args()
+
+
+def _load_with_results(
+    conn: sqlite3.Connection, charts: Iterator[tuple[PatientChart, Optional[str]]], batch_size: int
+) -> int:
+    """Load charts and their mock-pipeline results, one transaction each per batch of patients."""
+    loaded = 0
+    batch: list[tuple[PatientChart, Optional[str]]] = []
+    for item in charts:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            loaded += _write_batch(conn, batch)
+            batch = []
+    if batch:
+        loaded += _write_batch(conn, batch)
+    return loaded
+
+
+def _write_batch(conn: sqlite3.Connection, batch: list[tuple[PatientChart, Optional[str]]]) -> int:
+    results = [
+        run_chart_pipeline(chart, source_path or "", mode="mock", enable_agents=True)
+        for chart, source_path in batch
+    ]
+    loaded = put_charts(conn, batch, batch_size=len(batch))
+    put_results(conn, results, enable_agents=True, batch_size=len(batch))
+    return loaded
+
+
+def main() -> int:
+    args = parse_args()
+    if not args.path.exists() or not args.path.is_dir():
+        print(f"Directory not found: {args.path}", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    conn = connect(args.db)
+    try:
+        charts = iter_directory_charts(args.path, limit=args.limit)
+        if args.analyze:
+            loaded = _load_with_results(conn, charts, max(1, args.batch_size))
+        else:
+            loaded = put_charts(conn, charts, batch_size=args.batch_size)
+        total = count_patients(conn)
+    finally:
+        conn.close()
+    print(f"charts loaded: {loaded}")
+    print(f"patients in store: {total}")
+    print(f"database: {args.db} ({time.perf_counter() - start:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from packages.ingest.columnar import build_chart_store
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compile Synthea bundles into a columnar chart store.")
+    parser.add_argument("path", type=Path, help="Directory of Synthea bundle JSON files.")
+    parser.add_argument("out", type=Path, help="Output store directory (replaced if present).")
+    parser.add_argument("--limit", type=int, default=0, help="Max files to compile (0 = no limit).")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if not args.path.exists() or not args.path.is_dir():
+        print(f"Directory not found: {args.path}", file=sys.stderr)
+        return 1
+    start = time.perf_counter()
+    meta = build_chart_store(args.path, args.out, limit=args.limit)
+    elapsed = time.perf_counter() - start
+    print(f"patients: {meta['patients']}")
+    print(f"observations: {meta['observations']}")
+    print(f"components: {meta['components']}")
+    print(f"terms: {meta['terms']}")
+    print(f"store written to {args.out} in {elapsed:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
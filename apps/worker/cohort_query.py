@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from packages.cohort.features import materialize_store
+from packages.cohort.query import GROUP_BY, aggregate_cohort, parse_filter, select_cohort
+from packages.ingest.store import connect
+
+DEFAULT_DB = Path("artifacts/charts.db")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Query patient cohorts from materialized features in the SQLite chart store."
+    )
+    parser.add_argument("--db", type=Path, default=DEFAULT_DB, help="SQLite database path.")
+    parser.add_argument(
+        "--materialize",
+        action="store_true",
+        help="Rebuild the feature tables from the stored charts before querying.",
+    )
+    parser.add_argument(
+        "--where",
+        action="append",
+        default=[],
+        help="Filter expression, repeatable (e.g. lab:4548-4>8/365d, no-lab:85354-9/180d, risk:vitals_bp_elevated).",
+    )
+    parser.add_argument("--as-of", help="Reference date for windows and age (ISO date; default now, UTC).")
+    parser.add_argument("--group-by", choices=sorted(GROUP_BY), help="Count cohort members per group.")
+    parser.add_argument("--stat", help="LOINC code to summarize (latest values) over the cohort.")
+    parser.add_argument("--list", action="store_true", help="Print matching patient ids.")
+    parser.add_argument("--json", action="store_true", help="Emit JSON.")
+    return parser.parse_args()
+
+
+def _as_of(value: str | None) -> datetime:
+    if not value:
+        return datetime.now(timezone.utc)
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def main() -> int:
+    args = parse_args()
+    if not args.db.exists():
+        print(f"Database not found: {args.db}", file=sys.stderr)
+        return 1
+    try:
+        filters = [parse_filter(text) for text in args.where]
+        as_of = _as_of(args.as_of)
+    except ValueError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 2
+
+    conn = connect(args.db)
+    try:
+        if args.materialize:
+            start = time.perf_counter()
+            count = materialize_store(conn)
+            print(f"features materialized: {count} ({time.perf_counter() - start:.2f}s)", file=sys.stderr)
+        start = time.perf_counter()
+        summary = aggregate_cohort(
+            conn, filters, as_of=as_of, group_by=args.group_by, stat_code=args.stat
+        )
+        if args.list:
+            summary["patients"] = select_cohort(conn, filters, as_of=as_of)
+        elapsed = time.perf_counter() - start
+    except ValueError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 2
+    finally:
+        conn.close()
+
+    if args.json:
+        print(json.dumps(summary, indent=2, sort_keys=True))
+        return 0
+    print(f"patients: {summary['count']} ({elapsed * 1000:.1f} ms)")
+    for group, count in (summary.get("groups") or {}).items():
+        print(f"  {group}: {count}")
+    stat = summary.get("stat")
+    if stat and stat["count"]:
+        print(
+            f"{stat['code']}: n={stat['count']} mean={stat['mean']:.2f} "
+            f"min={stat['min']:.2f} max={stat['max']:.2f}"
+        )
+    for patient_id in summary.get("patients") or []:
+        print(patient_id)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
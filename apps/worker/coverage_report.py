@@ -6,6 +6,8 @@ from collections import Counter
 from pathlib import Path
 from typing import Any, Iterable, Optional
 
+from packages.ingest.columnar import ChartStore
+from packages.ingest.compression import list_bundle_files
 from packages.ingest.synthea.loader import load_patient_dir
 from packages.ingest.synthea.normalizer import normalize_to_patient_chart
 from packages.ingest.synthea.parser import parse_fhir_resources
@@ -13,8 +15,16 @@ from packages.ingest.synthea.parser import parse_fhir_resources
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Synthea dataset coverage report.")
-    parser.add_argument("path", type=Path, help="Directory of Synthea bundle JSON files.")
+    parser.add_argument("path", type=Path, help="Directory of Synthea bundle JSON files (.json, .json.gz, .json.zst).")
     parser.add_argument("--limit", type=int, default=0, help="Max files to scan (0 = no limit).")
+    parser.add_argument(
+        "--store",
+        action="store_true",
+        help=(
+            "Treat path as a compiled chart store. Counts come from normalized fields; "
+            "medication coding stats are only available from bundles."
+        ),
+    )
     return parser.parse_args()
 
 
@@ -77,7 +87,7 @@ def main() -> int:
         print(f"Directory not found: {args.path}", file=sys.stderr)
         return 1
 
-    files = sorted(args.path.glob("*.json"))
+    files = [] if args.store else list_bundle_files(args.path)
     if args.limit > 0:
         files = files[: args.limit]
 
@@ -98,6 +108,45 @@ def main() -> int:
     encounter_total = 0
     encounter_display_counts: Counter[str] = Counter()
 
+    if args.store:
+        with ChartStore(args.path) as store:
+            count = len(store) if args.limit <= 0 else min(args.limit, len(store))
+            total_scanned = count
+            code_col = store.column("obs_code")
+            system_col = store.column("obs_system")
+            display_col = store.column("obs_display")
+            code_ids: Counter[tuple[int, int]] = Counter()
+            display_ids: Counter[int] = Counter()
+            end = store.observation_range(count - 1).stop if count else 0
+            for row in range(end):
+                code_id = code_col[row]
+                system_id = system_col[row]
+                if code_id >= 0 and system_id >= 0:
+                    obs_with_coding += 1
+                if code_id >= 0:
+                    code_ids[(system_id, code_id)] += 1
+                if display_col[row] >= 0:
+                    display_ids[display_col[row]] += 1
+            obs_total = end
+            for (system_id, code_id), hits in code_ids.items():
+                system = store.term(system_id)
+                code = store.term(code_id)
+                obs_code_counts[f"{system}|{code}" if system else code] += hits
+            for display_id, hits in display_ids.items():
+                obs_display_counts[store.term(display_id)] += hits
+            for index in range(count):
+                chart = store.chart_without_observations(index)
+                med_total += len(chart.medications)
+                for medication in chart.medications:
+                    if medication.name and medication.name != "Unknown medication":
+                        med_display_counts[medication.name] += 1
+                allergy_total += len(chart.allergies)
+                encounter_total += len(chart.encounters)
+                for encounter in chart.encounters:
+                    for display in (encounter.reason, encounter.type):
+                        if display:
+                            encounter_display_counts[display] += 1
+
     for file_path in files:
         total_scanned += 1
         try:
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Iterator
+
+from packages.ingest.bulk.ndjson import iter_ndjson, patient_key
+from packages.ingest.compression import logical_suffix, open_text
+from packages.ingest.store import connect
+from packages.pipeline.incremental import reanalyze_stored
+
+DEFAULT_DB = Path("artifacts/charts.db")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Append new FHIR resources to charts in the SQLite store and patch their stored "
+            "results, re-running only the rules and agents the new resources touch."
+        )
+    )
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        type=Path,
+        help="Delta files: a Bundle or resource (.json) or NDJSON (.ndjson), optionally .gz/.zst.",
+    )
+    parser.add_argument("--db", type=Path, default=DEFAULT_DB, help="SQLite database path.")
+    parser.add_argument("--mode", choices=["mock", "llm"], default="mock")
+    parser.add_argument("--no-agents", action="store_true", help="Patch results stored without agents.")
+    return parser.parse_args()
+
+
+def _iter_resources(path: Path) -> Iterator[dict]:
+    if logical_suffix(path) == ".ndjson":
+        yield from iter_ndjson(path)
+        return
+    with open_text(path) as handle:
+        payload = json.load(handle)
+    items = payload if isinstance(payload, list) else [payload]
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        if item.get("resourceType") == "Bundle":
+            for entry in item.get("entry") or []:
+                resource = entry.get("resource") if isinstance(entry, dict) else None
+                if isinstance(resource, dict):
+                    yield resource
+        else:
+            yield item
+
+
+def main() -> int:
+    args = parse_args()
+    by_patient: dict[str, list[dict]] = {}
+    unscoped = 0
+    for path in args.paths:
+        if not path.is_file():
+            print(f"File not found: {path}", file=sys.stderr)
+            return 1
+        for resource in _iter_resources(path):
+            key = patient_key(resource)
+            if key is None:
+                unscoped += 1
+                continue
+            by_patient.setdefault(key, []).append(resource)
+    if unscoped:
+        print(f"skipped {unscoped} resources without a patient reference", file=sys.stderr)
+
+    try:
+        conn = connect(args.db, readonly=False)
+    except OSError as exc:
+        print(f"Cannot open {args.db}: {exc}", file=sys.stderr)
+        return 1
+    missing = 0
+    try:
+        for patient_id, resources in sorted(by_patient.items()):
+            report = reanalyze_stored(
+                conn, patient_id, resources, mode=args.mode, enable_agents=not args.no_agents
+            )
+            if report is None:
+                missing += 1
+                print(f"patient not in store: {patient_id}", file=sys.stderr)
+                continue
+            print(json.dumps(report, sort_keys=True))
+    finally:
+        conn.close()
+    return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
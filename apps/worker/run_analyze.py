@@ -1,18 +1,27 @@
 from __future__ import annotations
 
 import argparse
+import glob
+import os
 import sys
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
 
+from packages.core.render.compact import compact_result
 from packages.core.render.markdown import render_patient_report_md
+from packages.core.render.result_json import payload_json_bytes, result_json_bytes
 from packages.core.schemas.result import PatientAnalysisResult
+from packages.ingest.compression import list_bundle_files, logical_stem
 from packages.ingest.synthea.loader import load_patient_dir
 from packages.ingest.synthea.normalizer import normalize_to_patient_chart
 from packages.ingest.synthea.parser import parse_fhir_resources
 from packages.pipeline.agent_pipeline import run_agent_pipeline
-from packages.pipeline.evidence_enrich import enrich_evidence, enrich_result_evidence
+from packages.pipeline.evidence_enrich import enrich_evidence
+from packages.pipeline.sections import parse_sections, resolve_stages
 from packages.pipeline.steps.risks import run_risk_rules
-from packages.pipeline.steps.snapshot import build_snapshot_from_chart
+from packages.pipeline.steps.snapshot import build_snapshot_model
 
 
 def _serialize_risks(risks: list[dict]) -> list[dict]:
@@ -41,10 +50,20 @@ def _serialize_risks(risks: list[dict]) -> list[dict]:
     return serialized
 
 
-def _result_to_json(result: PatientAnalysisResult) -> str:
-    if hasattr(result, "model_dump_json"):
-        return result.model_dump_json()
-    return result.json()
+def _result_to_json(result: PatientAnalysisResult, *, compact: bool = False) -> bytes:
+    if compact:
+        return payload_json_bytes(compact_result(result))
+    return result_json_bytes(result)
+
+
+def _emit_json(data: bytes) -> None:
+    stream = getattr(sys.stdout, "buffer", None)
+    if stream is None:
+        print(data.decode("utf-8"))
+        return
+    sys.stdout.flush()
+    stream.write(data + b"\n")
+    stream.flush()
 
 
 def _write_markdown_report(path: Path, result: PatientAnalysisResult) -> None:
@@ -62,27 +81,203 @@ def _normalize_patient_path(path: Path) -> Path:
     return path
 
 
+def analyze_path(
+    path: Path,
+    *,
+    mode: str = "mock",
+    phase5: bool = False,
+    sections: Optional[list[str]] = None,
+    llm_debug: bool = False,
+    require_llm: bool = False,
+) -> PatientAnalysisResult:
+    if phase5 or sections is not None:
+        return run_agent_pipeline(
+            path,
+            enable_agents=phase5,
+            mode=mode,
+            llm_debug=llm_debug,
+            require_llm=require_llm,
+            sections=sections,
+        )
+
+    resources = load_patient_dir(path)
+    grouped = parse_fhir_resources(resources)
+    chart = normalize_to_patient_chart(grouped)
+
+    risks = run_risk_rules(chart)
+    enrich_evidence(risks, chart, str(path))
+    snapshot = build_snapshot_model(chart)
+    result = PatientAnalysisResult(
+        snapshot=snapshot.text,
+        risks=_serialize_risks(risks),
+        narrative=None,
+        meta={"patient_id": chart.patient_id, "source_path": str(path), "mode": mode},
+    )
+    result.attach_snapshot_model(snapshot)
+    return result
+
+
+def _is_glob(value: str) -> bool:
+    return any(char in value for char in "*?[")
+
+
+def expand_inputs(values: Iterable[str]) -> list[Union[Path, str]]:
+    """Batch inputs in order: files as given, directories as their bundle files, globs expanded.
+
+    Values that match nothing are returned as plain strings (reported as not found).
+    """
+    inputs: list[Union[Path, str]] = []
+    for value in values:
+        if _is_glob(value):
+            matches = sorted(glob.glob(value, recursive=True))
+            candidates = [Path(match) for match in matches]
+        else:
+            candidates = [Path(value)]
+        if not candidates:
+            inputs.append(value)
+        for candidate in candidates:
+            if candidate.is_dir():
+                inputs.extend(list_bundle_files(candidate))
+            elif candidate.is_file():
+                inputs.append(candidate)
+            else:
+                inputs.append(str(candidate))
+    return inputs
+
+
+def _error_record(path: str, code: str, exc: BaseException) -> bytes:
+    return payload_json_bytes(
+        {"path": path, "error": {"code": code, "message": str(exc), "detail": {"type": type(exc).__name__}}}
+    )
+
+
+def _batch_item(item: Union[Path, str], options: dict) -> tuple[bool, bytes, int]:
+    """Analyze one batch input; returns (ok, output line, input bytes). Never raises."""
+    if not isinstance(item, Path):
+        return False, _error_record(item, "not_found", FileNotFoundError(f"Patient path not found: {item}")), 0
+    try:
+        size = item.stat().st_size
+        result = analyze_path(
+            item,
+            mode=options["mode"],
+            phase5=options["phase5"],
+            sections=options["sections"],
+            llm_debug=options["llm_debug"],
+            require_llm=options["require_llm"],
+        )
+        out_dir = options["out_dir"]
+        if out_dir is None:
+            return True, _result_to_json(result, compact=options["compact"]), size
+        report = Path(out_dir) / f"{logical_stem(item)}.md"
+        _write_markdown_report(report, result)
+        record = {"path": str(item), "patient_id": result.meta.get("patient_id"), "report": str(report)}
+        return True, payload_json_bytes(record), size
+    except Exception as exc:
+        return False, _error_record(str(item), "analysis_failed", exc), 0
+
+
+def _ordered_map(
+    executor: Optional[ProcessPoolExecutor], items: list, options: dict, window: int
+) -> Iterator[tuple[bool, bytes, int]]:
+    """Batch results in input order, keeping at most `window` inputs in flight."""
+    if executor is None:
+        for item in items:
+            yield _batch_item(item, options)
+        return
+    pending: list[Future] = []
+    for item in items:
+        pending.append(executor.submit(_batch_item, item, options))
+        if len(pending) >= window:
+            yield pending.pop(0).result()
+    for future in pending:
+        yield future.result()
+
+
+def run_batch(inputs: list[Union[Path, str]], options: dict, *, workers: int = 1) -> int:
+    """Stream one JSONL line per input to stdout and a throughput summary to stderr."""
+    workers = max(1, workers)
+    start = time.perf_counter()
+    ok = errors = total_bytes = 0
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for succeeded, line, size in _ordered_map(executor, inputs, options, window=workers * 4):
+            _emit_json(line)
+            ok += succeeded
+            errors += not succeeded
+            total_bytes += size
+    except BrokenPipeError:
+        # The reader went away (e.g. `| head`): stop quietly.
+        sys.stdout = open(os.devnull, "w")
+        return 1
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(
+        f"batch: {ok + errors} inputs, {ok} ok, {errors} errors in {elapsed:.2f}s "
+        f"({(ok + errors) / elapsed:.1f} inputs/s, {total_bytes / elapsed / 1e6:.1f} MB/s, workers={workers})",
+        file=sys.stderr,
+    )
+    return 1 if errors else 0
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Run risk analysis.")
-    parser.add_argument("path", type=Path, help="Path to patient JSON bundle.")
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        metavar="path",
+        help=(
+            "Patient JSON bundle or directory. Several paths, globs, --jsonl, --out-dir or --workers "
+            "switch to batch mode: every bundle file is one patient and one JSONL line."
+        ),
+    )
     parser.add_argument("--mode", choices=["mock", "llm"], default="mock")
     parser.add_argument("--format", choices=["json", "md"], default="json")
     parser.add_argument("--out", type=Path, help="Output path for markdown report.")
     parser.add_argument("--json", action="store_true", help="Emit JSON output.")
     parser.add_argument("--phase5", action="store_true", help="Enable phase 5 agents.")
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Emit JSON with a shared evidence table (see packages.core.render.compact).",
+    )
+    parser.add_argument(
+        "--sections",
+        help="Comma-separated result sections to compute (e.g. risks,timeline); runs only the stages they need.",
+    )
     parser.add_argument("--llm-debug", action="store_true", help="Emit LLM diagnostics.")
     parser.add_argument(
         "--require-llm",
         action="store_true",
         help="Fail if LLM narrative is unavailable.",
     )
+    parser.add_argument("--jsonl", action="store_true", help="Batch mode even for a single path.")
+    parser.add_argument(
+        "--out-dir",
+        type=Path,
+        help="Batch mode: write <bundle>.md reports here (stdout gets one record per input).",
+    )
+    parser.add_argument("--workers", type=int, help="Batch mode: analyze in this many worker processes.")
     args = parser.parse_args()
 
-    path = _normalize_patient_path(args.path)
+    batch = (
+        len(args.paths) > 1
+        or any(_is_glob(value) for value in args.paths)
+        or args.jsonl
+        or args.out_dir is not None
+        or args.workers is not None
+    )
     output_format = args.format
     if args.json:
         output_format = "json"
-    if output_format == "md" and args.out is None:
+    if batch and args.out is not None:
+        print("Error: --out takes a single patient; use --out-dir in batch mode.", file=sys.stderr)
+        return 2
+    if batch and output_format == "md" and args.out_dir is None:
+        print("Error: --out-dir is required for markdown reports in batch mode.", file=sys.stderr)
+        return 2
+    if not batch and output_format == "md" and args.out is None:
         print("Error: --out is required when --format md is used.", file=sys.stderr)
         return 2
 
@@ -94,48 +289,43 @@ def main() -> int:
         print("Error: --require-llm requires --phase5 to generate a narrative.", file=sys.stderr)
         return 2
 
-    if args.phase5:
-        result = run_agent_pipeline(
-            path,
-            enable_agents=True,
-            mode=args.mode,
-            llm_debug=args.llm_debug,
-            require_llm=args.require_llm,
-        )
-        resources = load_patient_dir(path)
-        grouped = parse_fhir_resources(resources)
-        chart = normalize_to_patient_chart(grouped)
-        enrich_result_evidence(result, chart, str(path))
-        if output_format == "json":
-            print(_result_to_json(result))
-            return 0
-        if output_format == "md":
-            _write_markdown_report(args.out, result)
-            print(f"Markdown report written to {args.out}")
-        return 0
+    sections = parse_sections(args.sections)
+    if sections is not None:
+        try:
+            resolve_stages(sections)
+        except ValueError as exc:
+            print(f"Error: {exc}", file=sys.stderr)
+            return 2
 
-    resources = load_patient_dir(path)
-    grouped = parse_fhir_resources(resources)
-    chart = normalize_to_patient_chart(grouped)
+    if batch:
+        options = {
+            "mode": args.mode,
+            "phase5": args.phase5,
+            "sections": sections,
+            "llm_debug": args.llm_debug,
+            "require_llm": args.require_llm,
+            "compact": args.compact,
+            "out_dir": None if args.out_dir is None else str(args.out_dir),
+        }
+        return run_batch(expand_inputs(args.paths), options, workers=args.workers or 1)
 
-    risks = run_risk_rules(chart)
-    enrich_evidence(risks, chart, str(path))
-    snapshot_text = build_snapshot_from_chart(chart)
-    result = PatientAnalysisResult(
-        snapshot=snapshot_text,
-        risks=_serialize_risks(risks),
-        narrative=None,
-        meta={"patient_id": chart.patient_id, "source_path": str(path), "mode": args.mode},
+    path = _normalize_patient_path(Path(args.paths[0]))
+    result = analyze_path(
+        path,
+        mode=args.mode,
+        phase5=args.phase5,
+        sections=sections,
+        llm_debug=args.llm_debug,
+        require_llm=args.require_llm,
     )
     if output_format == "json":
-        print(_result_to_json(result))
+        _emit_json(_result_to_json(result, compact=args.compact))
         return 0
     if output_format == "md":
         _write_markdown_report(args.out, result)
         print(f"Markdown report written to {args.out}")
-
     return 0
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
\ No newline at end of file
+    raise SystemExit(main())
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+from packages.core.schemas.result import PatientAnalysisResult
+from packages.ingest.bulk.ndjson import DEFAULT_MAX_MEMORY_BYTES, iter_bulk_charts
+from packages.pipeline.agent_pipeline import run_chart_pipeline
+
+
+def _result_to_json(result: PatientAnalysisResult) -> str:
+    if hasattr(result, "model_dump_json"):
+        return result.model_dump_json()
+    return result.json()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Analyze every patient in a FHIR Bulk Data NDJSON export (one JSON line per patient)."
+    )
+    parser.add_argument("path", type=Path, help="Directory of <ResourceType>.ndjson files.")
+    parser.add_argument("--mode", choices=["mock", "llm"], default="mock")
+    parser.add_argument("--phase5", action="store_true", help="Enable phase 5 agents.")
+    parser.add_argument("--limit", type=int, default=0, help="Max patients to analyze (0 = no limit).")
+    parser.add_argument(
+        "--max-memory-mb",
+        type=int,
+        default=DEFAULT_MAX_MEMORY_BYTES // (1024 * 1024),
+        help="Exports larger than this are partitioned on disk before grouping.",
+    )
+    parser.add_argument("--work-dir", type=Path, help="Directory for temporary partition files.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if not args.path.exists() or not args.path.is_dir():
+        print(f"Directory not found: {args.path}", file=sys.stderr)
+        return 1
+
+    analyzed = 0
+    charts = iter_bulk_charts(
+        args.path,
+        max_memory_bytes=args.max_memory_mb * 1024 * 1024,
+        work_dir=args.work_dir,
+    )
+    for chart in charts:
+        result = run_chart_pipeline(
+            chart,
+            str(args.path),
+            mode=args.mode,
+            enable_agents=args.phase5,
+        )
+        print(_result_to_json(result))
+        analyzed += 1
+        if args.limit > 0 and analyzed >= args.limit:
+            break
+    print(f"patients analyzed: {analyzed}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
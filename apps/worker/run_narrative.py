@@ -14,7 +14,7 @@ from packages.ingest.synthea.parser import parse_fhir_resources
 from packages.pipeline.steps.narrative import generate_narrative
 from packages.pipeline.evidence_enrich import enrich_evidence
 from packages.pipeline.steps.risks import run_risk_rules
-from packages.pipeline.steps.snapshot import build_snapshot_from_chart
+from packages.pipeline.steps.snapshot import build_snapshot_model
 
 
 def parse_args() -> argparse.Namespace:
@@ -95,22 +95,22 @@ def main() -> int:
     grouped = parse_fhir_resources(resources)
     chart = normalize_to_patient_chart(grouped)
 
-    snapshot_text = build_snapshot_from_chart(chart)
+    snapshot = build_snapshot_model(chart)
     patient_id = chart.patient_id
     llm = LLMClient() if args.mode == "llm" else None
     if llm is not None:
         print(f"LLM mode enabled: model={llm.model} base_url={llm.base_url}")
     try:
-        narrative = generate_narrative(snapshot_text, patient_id, llm)
+        narrative = generate_narrative(snapshot, patient_id, llm)
     except Exception as exc:
         print(f"LLM failed: {type(exc).__name__}: {exc}", file=sys.stderr)
         print("Falling back to mock mode.", file=sys.stderr)
-        narrative = generate_narrative(snapshot_text, patient_id, None)
+        narrative = generate_narrative(snapshot, patient_id, None)
     if args.json:
         risks = run_risk_rules(chart)
         enrich_evidence(risks, chart, str(args.path))
         result = PatientAnalysisResult(
-            snapshot=snapshot_text,
+            snapshot=snapshot.text,
             risks=_serialize_risks(risks),
             narrative=narrative,
             meta={"patient_id": patient_id, "source_path": str(args.path), "mode": "narrative"},
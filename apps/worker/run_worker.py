@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Optional
+
+from packages.pipeline.spool import (
+    DEFAULT_MAX_ATTEMPTS,
+    ClaimedJob,
+    Spool,
+    SpoolJob,
+    error_body,
+    error_path,
+    result_path,
+    run_job,
+    write_atomic,
+)
+
+
+def _log(event: str, **fields: object) -> None:
+    print(json.dumps({"event": event, **fields}, sort_keys=True), file=sys.stderr, flush=True)
+
+
+def _init_pool_process() -> None:
+    # Ctrl-C reaches the whole process group; let the parent decide when to stop.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Forked processes inherit the parent's graceful-stop handler; the pool must be able to terminate them.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    from packages.risklib.rules import discover_rules
+
+    discover_rules()
+
+
+def _execute(job: SpoolJob) -> tuple[bytes, float]:
+    start = time.perf_counter()
+    body = run_job(job)
+    return body, time.perf_counter() - start
+
+
+class Worker:
+    """Claims jobs from a spool and writes their results to `out_dir` (inline or in a process pool)."""
+
+    def __init__(
+        self,
+        spool: Spool,
+        out_dir: Path,
+        *,
+        workers: int = 1,
+        poll_interval: float = 0.5,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    ) -> None:
+        self.spool = spool
+        self.out_dir = out_dir
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.stop = threading.Event()
+        self.counts = {"done": 0, "failed": 0}
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+    def _next(self) -> Optional[tuple[ClaimedJob, SpoolJob]]:
+        """Claim the next job that parses; unreadable ones fail straight away."""
+        while not self.stop.is_set():
+            claimed = self.spool.claim()
+            if claimed is None:
+                return None
+            try:
+                return claimed, self.spool.load(claimed)
+            except (OSError, ValueError) as exc:
+                self._finish(claimed, None, exc, 0.0, "invalid_job")
+        return None
+
+    def _finish(
+        self,
+        claimed: ClaimedJob,
+        body: Optional[bytes],
+        error: Optional[BaseException],
+        run_s: float,
+        code: str = "job_failed",
+    ) -> None:
+        write_start = time.perf_counter()
+        if error is None and body is not None:
+            write_atomic(result_path(self.out_dir, claimed.job_id), body)
+            error_path(self.out_dir, claimed.job_id).unlink(missing_ok=True)
+            self.spool.ack(claimed)
+            status = "done"
+        else:
+            message = f"{type(error).__name__}: {error}"
+            write_atomic(error_path(self.out_dir, claimed.job_id), error_body(code, message))
+            self.spool.fail(claimed)
+            status = "failed"
+        self.counts[status] += 1
+        _log(
+            "job",
+            job=claimed.job_id,
+            status=status,
+            worker=self.spool.worker_id,
+            queue_s=round(max(0.0, claimed.claimed_at - claimed.queued_at), 4),
+            run_s=round(run_s, 4),
+            write_s=round(time.perf_counter() - write_start, 4),
+            total_s=round(time.time() - claimed.claimed_at, 4),
+            bytes=len(body) if status == "done" and body is not None else 0,
+        )
+
+    def _run_inline(self, drain: bool) -> None:
+        while not self.stop.is_set():
+            claimed = self._next()
+            if claimed is None:
+                if drain:
+                    return
+                self.stop.wait(self.poll_interval)
+                continue
+            start = time.perf_counter()
+            try:
+                body, error = run_job(claimed[1]), None
+            except Exception as exc:
+                body, error = None, exc
+            self._finish(claimed[0], body, error, time.perf_counter() - start)
+
+    def _lost(self, claimed: ClaimedJob, error: BaseException) -> None:
+        """A pool process died with this job in flight: requeue it, or fail it after max_attempts."""
+        if self.spool.retry(claimed, self.max_attempts):
+            _log("job", job=claimed.job_id, status="requeued", worker=self.spool.worker_id, error=str(error))
+            return
+        message = f"{type(error).__name__}: {error}"
+        write_atomic(error_path(self.out_dir, claimed.job_id), error_body("worker_crashed", message))
+        self.counts["failed"] += 1
+        _log("job", job=claimed.job_id, status="failed", worker=self.spool.worker_id, error=str(error))
+
+    def _collect(self, future: Future, claimed: ClaimedJob) -> None:
+        try:
+            body, run_s = future.result()
+        except BrokenProcessPool as exc:
+            self._lost(claimed, exc)
+        except Exception as exc:
+            self._finish(claimed, None, exc, time.time() - claimed.claimed_at)
+        else:
+            self._finish(claimed, body, None, run_s)
+
+    def _executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_pool_process)
+
+    def _run_pool(self, drain: bool) -> None:
+        in_flight: dict[Future, ClaimedJob] = {}
+        executor = self._executor()
+        try:
+            while True:
+                while len(in_flight) < self.workers and not self.stop.is_set():
+                    claimed = self._next()
+                    if claimed is None:
+                        break
+                    try:
+                        future = executor.submit(_execute, claimed[1])
+                    except BrokenProcessPool as exc:
+                        future = Future()
+                        future.set_exception(exc)
+                    in_flight[future] = claimed[0]
+                if not in_flight:
+                    if self.stop.is_set() or drain:
+                        break
+                    self.stop.wait(self.poll_interval)
+                    continue
+                # Graceful stop: no new claims, but finish what is running.
+                timeout = None if self.stop.is_set() else self.poll_interval
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                if any(isinstance(future.exception(), BrokenProcessPool) for future in done):
+                    # A process died: every job still in the pool is lost with it.
+                    done, _ = wait(in_flight)
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    executor = self._executor()
+                for future in done:
+                    self._collect(future, in_flight.pop(future))
+        except BaseException:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+
+    def serve(self, *, drain: bool = False) -> dict:
+        """Process jobs until stopped (or, with `drain`, until the queue is empty)."""
+        if self.workers == 1:
+            self._run_inline(drain)
+        else:
+            self._run_pool(drain)
+        return dict(self.counts)
+
+
+def _install_signal_handlers(worker: Worker) -> None:
+    def _handle(signum: int, frame: object) -> None:
+        if worker.stop.is_set():
+            raise KeyboardInterrupt  # second signal: stop now, claimed jobs are recovered on restart
+        _log("stopping", signal=signal.Signals(signum).name, worker=worker.spool.worker_id)
+        worker.stop.set()
+
+    signal.signal(signal.SIGTERM, _handle)
+    signal.signal(signal.SIGINT, _handle)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Resident analysis worker: process jobs dropped into a spool directory."
+    )
+    parser.add_argument("spool", type=Path, help="Spool root (incoming/, processing/, failed/).")
+    parser.add_argument("--out-dir", type=Path, help="Result directory (default: <spool>/results).")
+    parser.add_argument("--workers", type=int, default=1, help="Concurrent jobs (>1 uses worker processes).")
+    parser.add_argument(
+        "--worker-id",
+        default=os.getenv("WORKER_ID", "worker"),
+        help="Stable name for this worker's claims; jobs it left claimed are requeued on start.",
+    )
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="Seconds between spool scans when idle.")
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=DEFAULT_MAX_ATTEMPTS,
+        help="Claims after which a job that keeps stopping the worker is moved to failed/.",
+    )
+    parser.add_argument("--drain", action="store_true", help="Exit once the queue is empty.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    spool = Spool(args.spool, worker_id=args.worker_id)
+    out_dir = args.out_dir or args.spool / "results"
+    recovered = spool.recover(max_attempts=args.max_attempts)
+    worker = Worker(
+        spool, out_dir, workers=args.workers, poll_interval=args.poll_interval, max_attempts=args.max_attempts
+    )
+    _install_signal_handlers(worker)
+    _log("started", worker=args.worker_id, workers=worker.workers, spool=str(args.spool), **recovered)
+    try:
+        counts = worker.serve(drain=args.drain)
+    except KeyboardInterrupt:
+        _log("aborted", worker=args.worker_id, **worker.counts)
+        return 130
+    _log("stopped", worker=args.worker_id, **counts)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,19 +1,27 @@
 from __future__ import annotations
 
 import argparse
+import json
 import sys
+import time
+from functools import partial
 from pathlib import Path
+from typing import Callable
 
+from packages.core.schemas.chart import PatientChart
+from packages.ingest.columnar import ChartStore
+from packages.ingest.compression import list_bundle_files
 from packages.ingest.synthea.loader import load_patient_dir
 from packages.ingest.synthea.normalizer import normalize_to_patient_chart
 from packages.ingest.synthea.parser import parse_fhir_resources
-from packages.pipeline.steps.risks import run_risk_rules
+from packages.pipeline.rule_costs import RuleCosts, format_cost_report
+from packages.pipeline.steps.risks import run_risk_rules, summarize_rule_reasons
 from packages.risklib.rules import discover_rules
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Scan Synthea bundles for risk rules.")
-    parser.add_argument("path", type=Path, help="Directory of Synthea bundle JSON files.")
+    parser.add_argument("path", type=Path, help="Directory of Synthea bundle JSON files (.json, .json.gz, .json.zst).")
     parser.add_argument("--limit", type=int, default=0, help="Max files to scan (0 = no limit).")
     parser.add_argument(
         "--max-per-rule",
@@ -22,44 +30,64 @@ def parse_args() -> argparse.Namespace:
         help="Max example patient_ids to keep per rule.",
     )
     parser.add_argument("--verbose", action="store_true", help="Print per-file errors.")
-    parser.add_argument("--debug", action="store_true", help="Summarize rule debug reasons.")
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        help="Summarize rule debug reasons and per-rule cost (slowest rules and patients).",
+    )
+    parser.add_argument("--top", type=int, default=10, help="Rows in the --debug slowest rules/patients tables.")
+    parser.add_argument("--cost-json", type=Path, help="With --debug, write the per-rule cost report here as JSON.")
+    parser.add_argument(
+        "--store",
+        action="store_true",
+        help="Treat path as a compiled chart store (apps/worker/build_chart_store.py).",
+    )
     return parser.parse_args()
 
 
-def main() -> int:
-    args = parse_args()
-    if not args.path.exists() or not args.path.is_dir():
-        print(f"Directory not found: {args.path}", file=sys.stderr)
-        return 1
+def _load_chart(path: Path) -> PatientChart:
+    resources = load_patient_dir(path)
+    grouped = parse_fhir_resources(resources)
+    return normalize_to_patient_chart(grouped)
 
-    files = sorted(args.path.glob("*.json"))
-    if args.limit > 0:
-        files = files[: args.limit]
 
+def _scan(args: argparse.Namespace, sources: list[tuple[str, Callable[[], PatientChart]]]) -> int:
     total_scanned = 0
     patients_with_risks = 0
     failures = 0
     rule_counts: dict[str, int] = {}
     rule_examples: dict[str, list[str]] = {}
     debug_counts: dict[str, dict[str, int]] = {}
+    run_counts = {"executed": 0, "skipped": 0}
     rule_names: list[str] = []
+    costs = RuleCosts() if args.debug else None
     if args.debug:
         runners = discover_rules()
         rule_names = sorted(runners.keys())
         print(f"rules loaded: {len(rule_names)}")
         print(f"rules: {', '.join(rule_names)}")
 
-    for file_path in files:
+    for file_path, load_chart in sources:
         total_scanned += 1
         try:
-            resources = load_patient_dir(file_path)
-            grouped = parse_fhir_resources(resources)
-            chart = normalize_to_patient_chart(grouped)
-            if args.debug:
-                risks, debug_info = run_risk_rules(chart, debug=True)
+            started = time.perf_counter()
+            chart = load_chart()
+            if costs is not None:
+                loaded = time.perf_counter()
+                timings: dict[str, float] = {}
+                risks, debug_info = run_risk_rules(chart, debug=True, timings=timings)
+                costs.add(
+                    chart.patient_id,
+                    file_path,
+                    ingest_s=loaded - started,
+                    rules_s=time.perf_counter() - loaded,
+                    timings=timings,
+                )
                 for rule_id, reason in sorted(debug_info.items()):
                     rule_reasons = debug_counts.setdefault(rule_id, {})
                     rule_reasons[reason] = rule_reasons.get(reason, 0) + 1
+                for key, value in summarize_rule_reasons(debug_info).items():
+                    run_counts[key] += value
             else:
                 risks = run_risk_rules(chart)
         except Exception as exc:
@@ -92,17 +120,49 @@ def main() -> int:
         print(f"{rule_id}: {count} (examples: {examples})")
 
     if args.debug:
+        print(f"rule runs executed: {run_counts['executed']}, skipped: {run_counts['skipped']}")
         for rule_id in rule_ids:
             reason_counts = debug_counts.get(rule_id, {})
             sorted_reasons = sorted(
                 reason_counts.items(), key=lambda item: (-item[1], item[0])
             )[:3]
             reasons_text = ", ".join([f"{reason} ({count})" for reason, count in sorted_reasons])
+            skipped = sum(count for reason, count in reason_counts.items() if reason.startswith("skipped:"))
+            executed = sum(reason_counts.values()) - skipped
             print(f"{rule_id} reasons: {reasons_text}")
-            print(f"{rule_id} executed=True, hits={rule_counts.get(rule_id, 0)}")
+            print(
+                f"{rule_id} executed={executed}, skipped={skipped}, hits={rule_counts.get(rule_id, 0)}"
+            )
+
+    if costs is not None:
+        report = costs.report(top=args.top)
+        for line in format_cost_report(report, top=args.top):
+            print(line)
+        if args.cost_json is not None:
+            args.cost_json.parent.mkdir(parents=True, exist_ok=True)
+            args.cost_json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+            print(f"cost report written to {args.cost_json}")
 
     return 0
 
 
+def main() -> int:
+    args = parse_args()
+    if not args.path.exists() or not args.path.is_dir():
+        print(f"Directory not found: {args.path}", file=sys.stderr)
+        return 1
+
+    if args.store:
+        # Closing the store releases its mmaps and file handles, also when the scan fails.
+        with ChartStore(args.path) as store:
+            count = len(store) if args.limit <= 0 else min(args.limit, len(store))
+            sources = [(f"{args.path}#{index}", partial(store.to_chart, index)) for index in range(count)]
+            return _scan(args, sources)
+    files = list_bundle_files(args.path)
+    if args.limit > 0:
+        files = files[: args.limit]
+    return _scan(args, [(str(path), partial(_load_chart, path)) for path in files])
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
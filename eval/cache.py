@@ -0,0 +1,186 @@
+"""
+Persisted per-patient eval cache.
+
+Entries are keyed by (bundle content hash, manifest expects entry, hash of the
+packages/ source tree and the eval/ modules that load the manifest and score
+results, mode, enable_agents). A hit returns the stored
+_score_result metrics so the pipeline is not re-run; gates are still evaluated
+fresh by the caller, so tightening a gate never needs a cache flush.
+
+Only deterministic modes are cached; llm results depend on an external service.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+from packages.ingest.compression import list_bundle_files
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_CACHE_PATH = REPO_ROOT / "artifacts" / "eval_cache.json"
+CACHE_VERSION = 1
+CACHEABLE_MODES = {"mock"}
+
+# (directory under the repo root, glob) for the code a cached entry depends on
+SOURCE_ROOTS = (("packages", "*"), ("eval", "*.py"))
+
+_SKIP_DIRS = {"__pycache__"}
+_SKIP_SUFFIXES = {".pyc", ".pyo"}
+
+
+def _hash_file(path: Path, digest: Any) -> None:
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+
+
+def _source_files(base: Path, pattern: str) -> list[Path]:
+    files = [
+        path
+        for path in base.rglob(pattern)
+        if path.is_file()
+        and not any(part in _SKIP_DIRS for part in path.relative_to(base).parts)
+        and path.suffix not in _SKIP_SUFFIXES
+    ]
+    return sorted(files, key=lambda item: item.relative_to(base).as_posix())
+
+
+def source_tree_hash(root: str | Path | None = None) -> str:
+    """Hash the source files cached metrics depend on (paths and contents).
+
+    By default that is everything under packages/ plus the eval/ Python
+    modules (scoring and manifest handling); `root` hashes one directory.
+    """
+    if root is not None:
+        roots = [(Path(root), "*", "")]
+    else:
+        roots = [(REPO_ROOT / name, pattern, name + "/") for name, pattern in SOURCE_ROOTS]
+    digest = hashlib.sha256()
+    for base, pattern, prefix in roots:
+        for path in _source_files(base, pattern):
+            digest.update((prefix + path.relative_to(base).as_posix()).encode("utf-8"))
+            digest.update(b"\0")
+            _hash_file(path, digest)
+            digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def bundle_hash(path: str | Path) -> str | None:
+    """Content hash of a bundle file (or every JSON file in a patient dir)."""
+    path_obj = Path(path)
+    digest = hashlib.sha256()
+    if path_obj.is_file():
+        _hash_file(path_obj, digest)
+        return digest.hexdigest()
+    if path_obj.is_dir():
+        for file_path in list_bundle_files(path_obj):
+            digest.update(file_path.name.encode("utf-8"))
+            digest.update(b"\0")
+            _hash_file(file_path, digest)
+        return digest.hexdigest()
+    return None
+
+
+def cache_key(
+    *,
+    bundle_digest: str,
+    expects: dict,
+    tree_digest: str,
+    mode: str,
+    enable_agents: bool,
+) -> str:
+    payload = json.dumps(
+        {
+            "bundle": bundle_digest,
+            "expects": expects,
+            "tree": tree_digest,
+            "mode": mode,
+            "enable_agents": enable_agents,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class EvalCache:
+    """JSON-file backed map of cache_key -> per-patient metrics."""
+
+    def __init__(self, path: str | Path | None = None) -> None:
+        self.path = Path(path) if path is not None else DEFAULT_CACHE_PATH
+        self.entries: dict[str, dict] = {}
+        self._tree_digest: str | None = None
+        self._dirty = False
+        self.load()
+
+    def load(self) -> None:
+        if not self.path.exists():
+            self.entries = {}
+            return
+        try:
+            with self.path.open("r", encoding="utf-8") as handle:
+                payload = json.load(handle)
+        except (OSError, json.JSONDecodeError):
+            self.entries = {}
+            return
+        if not isinstance(payload, dict) or payload.get("version") != CACHE_VERSION:
+            self.entries = {}
+            return
+        entries = payload.get("entries")
+        self.entries = entries if isinstance(entries, dict) else {}
+
+    def tree_digest(self) -> str:
+        if self._tree_digest is None:
+            self._tree_digest = source_tree_hash()
+        return self._tree_digest
+
+    def key_for(
+        self, path: str | Path, expects: dict, *, mode: str, enable_agents: bool
+    ) -> str | None:
+        if mode not in CACHEABLE_MODES:
+            return None
+        digest = bundle_hash(path)
+        if digest is None:
+            return None
+        return cache_key(
+            bundle_digest=digest,
+            expects=expects,
+            tree_digest=self.tree_digest(),
+            mode=mode,
+            enable_agents=enable_agents,
+        )
+
+    def get(self, key: str | None) -> dict | None:
+        if key is None:
+            return None
+        metrics = self.entries.get(key)
+        return dict(metrics) if isinstance(metrics, dict) else None
+
+    def put(self, key: str | None, metrics: dict[str, Any]) -> None:
+        if key is None:
+            return
+        self.entries[key] = dict(metrics)
+        self._dirty = True
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".partial")
+        with tmp_path.open("w", encoding="utf-8") as handle:
+            json.dump({"version": CACHE_VERSION, "entries": self.entries}, handle, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+
+__all__ = [
+    "CACHEABLE_MODES",
+    "DEFAULT_CACHE_PATH",
+    "EvalCache",
+    "SOURCE_ROOTS",
+    "bundle_hash",
+    "cache_key",
+    "source_tree_hash",
+]
@@ -15,6 +15,10 @@ and red-herring expectations to stress precision.
 allow_extra_* controls whether extra detections are tolerated or treated
 as strict failures for precision.
 
+--cache reuses per-patient metrics from a persisted eval cache (see
+eval/cache.py) when neither the bundle, its expects entry, the packages/
+source tree, the eval/ modules nor the mode changed; recomputed patients are listed in the summary.
+
 Exit codes:
 - 0: overall_pass is True
 - 1: overall_pass is False (or failures when --fail-on-warn)
@@ -31,6 +35,7 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Iterable
 
+from eval.cache import DEFAULT_CACHE_PATH, EvalCache
 from packages.core.llm import LLMClient, load_dotenv
 from packages.core.schemas.result import PatientAnalysisResult
 from packages.ingest.synthea.loader import load_patient_dir
@@ -66,6 +71,7 @@ def evaluate_manifest(
     require_llm: bool = False,
     llm_timeout_seconds: int = 60,
     llm_retries: int = 1,
+    cache: EvalCache | None = None,
 ) -> dict:
     manifest = load_manifest(path)
     patients = manifest.get("patients", [])
@@ -116,44 +122,59 @@ def evaluate_manifest(
         }
     results = []
     llm_retried = 0
-    for patient in patients:
-        name = patient.get("name", "unknown")
-        rel_path = patient.get("path", "")
-        expects = patient.get("expects", {}) or {}
-        path_obj = REPO_ROOT / rel_path
-        if mode == "llm":
-            outcome, metrics, retries_used = _run_llm_patient(
-                path_obj,
-                expects,
-                enable_agents=enable_agents,
-                timeout_seconds=llm_timeout_seconds,
-                retries=llm_retries,
-            )
-            llm_retried += retries_used
-            gate_result = {"patient_pass": True, "failures": []}
-            if outcome.status == "ok" and metrics is not None:
+    try:
+        for patient in patients:
+            name = patient.get("name", "unknown")
+            rel_path = patient.get("path", "")
+            expects = patient.get("expects", {}) or {}
+            path_obj = REPO_ROOT / rel_path
+            if mode == "llm":
+                outcome, metrics, retries_used = _run_llm_patient(
+                    path_obj,
+                    expects,
+                    enable_agents=enable_agents,
+                    timeout_seconds=llm_timeout_seconds,
+                    retries=llm_retries,
+                )
+                llm_retried += retries_used
+                gate_result = {"patient_pass": True, "failures": []}
+                if outcome.status == "ok" and metrics is not None:
+                    gate_result = evaluate_gates(metrics, gates)
+                patient_metrics = metrics or _empty_metrics()
+                patient_metrics["name"] = name
+                patient_metrics["path"] = rel_path
+                patient_metrics.update(gate_result)
+                patient_metrics.update(_llm_fields(outcome))
+                patient_metrics = _apply_llm_overrides(
+                    patient_metrics, outcome, require_llm=require_llm
+                )
+                results.append(patient_metrics)
+            else:
+                key = (
+                    cache.key_for(path_obj, expects, mode=mode, enable_agents=enable_agents)
+                    if cache is not None
+                    else None
+                )
+                metrics = cache.get(key) if cache is not None else None
+                cached = metrics is not None
+                if metrics is None:
+                    result = _run_pipeline(path_obj, mode=mode, enable_agents=enable_agents)
+                    metrics = _score_result(result, expects)
+                    if cache is not None:
+                        cache.put(key, metrics)
                 gate_result = evaluate_gates(metrics, gates)
-            patient_metrics = metrics or _empty_metrics()
-            patient_metrics["name"] = name
-            patient_metrics["path"] = rel_path
-            patient_metrics.update(gate_result)
-            patient_metrics.update(_llm_fields(outcome))
-            patient_metrics = _apply_llm_overrides(
-                patient_metrics, outcome, require_llm=require_llm
-            )
-            results.append(patient_metrics)
-        else:
-            result = _run_pipeline(path_obj, mode=mode, enable_agents=enable_agents)
-            metrics = _score_result(result, expects)
-            gate_result = evaluate_gates(metrics, gates)
-            metrics["name"] = name
-            metrics["path"] = rel_path
-            gate_result["failures"] = _sorted_failures(gate_result.get("failures") or [])
-            metrics.update(gate_result)
-            metrics["status"] = "ok"
-            metrics["reason"] = None
-            metrics["errors"] = []
-            results.append(metrics)
+                metrics["name"] = name
+                metrics["path"] = rel_path
+                gate_result["failures"] = _sorted_failures(gate_result.get("failures") or [])
+                metrics.update(gate_result)
+                metrics["status"] = "ok"
+                metrics["reason"] = None
+                metrics["errors"] = []
+                metrics["cached"] = cached
+                results.append(metrics)
+    finally:
+        if cache is not None:
+            cache.save()
     if mode == "llm":
         llm_ok_rate = _llm_ok_rate(results)
     llm_ok_rate, llm_rate_failure = _apply_llm_ok_rate_gate(
@@ -183,6 +204,11 @@ def evaluate_manifest(
         "llm_ok_rate_failure": llm_rate_failure,
         "llm_retried": llm_retried,
         "require_llm": require_llm,
+        "cache_enabled": cache is not None,
+        "cache_hits": len([item for item in results if item.get("cached")]),
+        "recomputed": [
+            item.get("name", "unknown") for item in results if not item.get("cached")
+        ],
     }
 
 
@@ -280,6 +306,17 @@ def print_summary(report: dict) -> None:
         ordered = _failure_counts_sorted(failure_counts)
         counts_display = ", ".join([f"{name}={count}" for name, count in ordered])
         print(f"failure_counts: {counts_display}")
+    if report.get("cache_enabled"):
+        print(_cache_line(report))
+
+
+def _cache_line(report: dict) -> str:
+    recomputed = report.get("recomputed") or []
+    names = ", ".join(recomputed) if recomputed else "[]"
+    return (
+        f"cache: hits={report.get('cache_hits', 0)} "
+        f"recomputed={len(recomputed)} ({names})"
+    )
 
 
 def _run_pipeline(
@@ -560,6 +597,8 @@ def _print_quiet(report: dict) -> None:
     print(f"overall_pass: {overall_pass} | patients_failed: {patients_failed}")
     if report.get("mode") == "llm" and report.get("llm_skipped", 0) > 0:
         print(LLM_SKIP_MESSAGE)
+    if report.get("cache_enabled"):
+        print(_cache_line(report))
     for patient in report.get("patients", []):
         failures = patient.get("failures") or []
         if failures:
@@ -611,6 +650,16 @@ def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         action="store_true",
         help="Exit non-zero if any patient failures.",
     )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Reuse per-patient metrics when bundle, expects and packages/ are unchanged.",
+    )
+    parser.add_argument(
+        "--cache-path",
+        default=str(DEFAULT_CACHE_PATH),
+        help="Path to the persisted eval cache JSON.",
+    )
     return parser.parse_args(argv)
 
 
@@ -906,6 +955,8 @@ def _mode_summary(report: dict) -> dict:
         "llm_ok_rate": report.get("llm_ok_rate"),
         "llm_retried": report.get("llm_retried", 0),
         "require_llm": report.get("require_llm", False),
+        "cache_hits": report.get("cache_hits", 0),
+        "recomputed": list(report.get("recomputed") or []),
     }
 
 
@@ -985,6 +1036,7 @@ def main(argv: list[str] | None = None) -> int:
     _load_env_if_available()
     args = _parse_args(argv)
     modes = _parse_modes(args.modes)
+    cache = EvalCache(args.cache_path) if args.cache else None
     try:
         reports = [
             evaluate_manifest(
@@ -993,6 +1045,7 @@ def main(argv: list[str] | None = None) -> int:
                 require_llm=args.require_llm,
                 llm_timeout_seconds=args.llm_timeout_seconds,
                 llm_retries=args.llm_retries,
+                cache=cache,
             )
             for mode in modes
         ]
@@ -5,6 +5,8 @@ import hashlib
 import os
 from pathlib import Path
 
+from packages.ingest.compression import list_bundle_files
+
 
 def _selection_key(filename: str, seed: str) -> str:
     payload = f"{seed}:{filename}".encode("utf-8")
@@ -23,11 +25,7 @@ def select_patients(data_dir: str | Path, n: int, seed: str = "phase8") -> list[
     base_dir = _normalize_root(data_dir)
     if not base_dir.exists():
         return []
-    candidates = [
-        path
-        for path in base_dir.iterdir()
-        if path.is_file() and path.suffix.lower() == ".json"
-    ]
+    candidates = list_bundle_files(base_dir)
     ordered = sorted(candidates, key=lambda path: (_selection_key(path.name, seed), path.name))
     selected = ordered[:n]
     return [path.relative_to(base_dir).as_posix() for path in selected]
@@ -0,0 +1,234 @@
+"""
+Per-patient cohort features, materialized into the SQLite chart store.
+
+Features follow the conventions the risk rules use: LOINC-coded observations
+only, dated by effective_dt or effective, and the trend test of the
+lab_trend_* rules (last three values strictly increasing or decreasing).
+Risk hits come from run_risk_rules itself. Rows are written once per dataset
+and read by packages.cohort.query.
+"""
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, Optional
+
+from packages.core.schemas.chart import PatientChart
+from packages.ingest.store import get_chart
+from packages.pipeline.steps.risks import run_risk_rules
+
+LOINC_SYSTEM = "http://loinc.org"
+DEFAULT_BATCH_SIZE = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cohort_patients (
+    patient_id TEXT PRIMARY KEY,
+    gender TEXT,
+    birth_date TEXT
+);
+CREATE TABLE IF NOT EXISTS cohort_observations (
+    patient_id TEXT NOT NULL,
+    code TEXT NOT NULL,
+    latest_value REAL,
+    latest_at TEXT,
+    value_count INTEGER NOT NULL,
+    trend TEXT,
+    PRIMARY KEY (patient_id, code)
+);
+CREATE INDEX IF NOT EXISTS idx_cohort_obs_code_value ON cohort_observations (code, latest_value);
+CREATE INDEX IF NOT EXISTS idx_cohort_obs_code_at ON cohort_observations (code, latest_at);
+CREATE TABLE IF NOT EXISTS cohort_conditions (
+    patient_id TEXT NOT NULL,
+    code TEXT NOT NULL,
+    active INTEGER NOT NULL,
+    PRIMARY KEY (patient_id, code)
+);
+CREATE INDEX IF NOT EXISTS idx_cohort_conditions_code ON cohort_conditions (code, active);
+CREATE TABLE IF NOT EXISTS cohort_risks (
+    patient_id TEXT NOT NULL,
+    rule_id TEXT NOT NULL,
+    severity TEXT,
+    PRIMARY KEY (patient_id, rule_id)
+);
+CREATE INDEX IF NOT EXISTS idx_cohort_risks_rule ON cohort_risks (rule_id);
+"""
+_TABLES = ("cohort_patients", "cohort_observations", "cohort_conditions", "cohort_risks")
+
+
+def utc_iso(value: Optional[datetime]) -> Optional[str]:
+    """UTC ISO string so stored timestamps compare correctly as text (naive = UTC)."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
+
+def trend_of(values: list[float]) -> Optional[str]:
+    """Direction of the last three values: rising, falling or flat (None if fewer than three)."""
+    if len(values) < 3:
+        return None
+    a, b, c = values[-3:]
+    if a < b < c:
+        return "rising"
+    if a > b > c:
+        return "falling"
+    return "flat"
+
+
+def _obs_date(obs) -> Optional[datetime]:
+    return obs.effective_dt or obs.effective
+
+
+def patient_features(chart: PatientChart) -> dict:
+    """Feature row for one chart: demographics, per-code observations, conditions, risks."""
+    series: dict[str, list[tuple[datetime, Optional[float]]]] = {}
+    for obs in chart.observations:
+        date = _obs_date(obs)
+        if not date:
+            continue
+        if obs.code_system == LOINC_SYSTEM and obs.code:
+            series.setdefault(obs.code, []).append((date, obs.value))
+        for component in obs.components or []:
+            value = component.get("value")
+            code = component.get("code")
+            if component.get("code_system") == LOINC_SYSTEM and code:
+                series.setdefault(code, []).append(
+                    (date, float(value) if isinstance(value, (int, float)) else None)
+                )
+
+    observations = {}
+    for code, points in series.items():
+        points.sort(key=lambda item: item[0])
+        numeric = [value for _, value in points if value is not None]
+        latest_at = points[-1][0]
+        latest_value = None
+        for _, value in reversed(points):
+            if value is not None:
+                latest_value = value
+                break
+        observations[code] = {
+            "latest_value": latest_value,
+            "latest_at": utc_iso(latest_at),
+            "value_count": len(numeric),
+            "trend": trend_of(numeric),
+        }
+
+    conditions: dict[str, bool] = {}
+    for condition in chart.conditions:
+        if not condition.code:
+            continue
+        active = condition.abatement is None and (condition.clinical_status or "active") == "active"
+        conditions[condition.code] = conditions.get(condition.code, False) or active
+
+    risks: dict[str, str] = {}
+    for risk in run_risk_rules(chart):
+        rule_id = risk.get("rule_id", "unknown")
+        risks.setdefault(rule_id, risk.get("severity", "medium"))
+
+    demographics = chart.demographics or {}
+    return {
+        "patient_id": chart.patient_id,
+        "gender": demographics.get("gender"),
+        "birth_date": demographics.get("birth_date"),
+        "observations": observations,
+        "conditions": conditions,
+        "risks": risks,
+    }
+
+
+def ensure_schema(conn: sqlite3.Connection) -> None:
+    conn.executescript(_SCHEMA)
+
+
+def _write_rows(conn: sqlite3.Connection, rows: list[dict]) -> None:
+    ids = [(row["patient_id"],) for row in rows]
+    with conn:
+        for table in _TABLES:
+            conn.executemany(f"DELETE FROM {table} WHERE patient_id = ?", ids)
+        conn.executemany(
+            "INSERT INTO cohort_patients (patient_id, gender, birth_date) VALUES (?, ?, ?)",
+            [(row["patient_id"], row["gender"], row["birth_date"]) for row in rows],
+        )
+        conn.executemany(
+            "INSERT INTO cohort_observations "
+            "(patient_id, code, latest_value, latest_at, value_count, trend) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    row["patient_id"],
+                    code,
+                    item["latest_value"],
+                    item["latest_at"],
+                    item["value_count"],
+                    item["trend"],
+                )
+                for row in rows
+                for code, item in row["observations"].items()
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO cohort_conditions (patient_id, code, active) VALUES (?, ?, ?)",
+            [
+                (row["patient_id"], code, 1 if active else 0)
+                for row in rows
+                for code, active in row["conditions"].items()
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO cohort_risks (patient_id, rule_id, severity) VALUES (?, ?, ?)",
+            [
+                (row["patient_id"], rule_id, severity)
+                for row in rows
+                for rule_id, severity in row["risks"].items()
+            ],
+        )
+
+
+def materialize_features(
+    conn: sqlite3.Connection,
+    charts: Iterable[PatientChart],
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """Compute and upsert feature rows for charts. Returns the number of patients written."""
+    ensure_schema(conn)
+    batch: list[dict] = []
+    total = 0
+    for chart in charts:
+        batch.append(patient_features(chart))
+        if len(batch) >= batch_size:
+            _write_rows(conn, batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        _write_rows(conn, batch)
+        total += len(batch)
+    return total
+
+
+def iter_store_charts(conn: sqlite3.Connection) -> Iterator[PatientChart]:
+    """Every chart held in the SQLite chart store, by patient_id."""
+    ids = [row[0] for row in conn.execute("SELECT patient_id FROM patients ORDER BY patient_id")]
+    for patient_id in ids:
+        chart = get_chart(conn, patient_id)
+        if chart is not None:
+            yield chart
+
+
+def materialize_store(conn: sqlite3.Connection, *, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Rebuild the feature tables from the charts already in the store."""
+    ensure_schema(conn)
+    with conn:
+        for table in _TABLES:
+            conn.execute(f"DELETE FROM {table}")
+    return materialize_features(conn, iter_store_charts(conn), batch_size=batch_size)
+
+
+__all__ = [
+    "ensure_schema",
+    "materialize_features",
+    "materialize_store",
+    "patient_features",
+    "trend_of",
+    "utc_iso",
+]
@@ -0,0 +1,220 @@
+"""
+Cohort filters and aggregates over the materialized feature tables.
+
+A filter is a plain dict; parse_filter builds one from the CLI form:
+
+    lab:4548-4>8/365d       latest A1c > 8, measured within 365 days of as_of
+    has-lab:85354-9/180d    any BP panel within 180 days
+    no-lab:85354-9/180d     no BP panel within 180 days
+    trend:2160-0=rising     last three creatinine values strictly increasing
+    condition:44054006      condition coded 44054006 (add "active-" to require active)
+    no-condition:44054006
+    risk:lab_a1c_elevated   rule hit (no-risk: to exclude)
+    gender:female
+    age>=65
+
+Filters are ANDed and compiled to one SQL statement over indexed tables.
+"""
+from __future__ import annotations
+
+import re
+import sqlite3
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from packages.cohort.features import utc_iso
+
+OPERATORS = {">": ">", ">=": ">=", "<": "<", "<=": "<=", "=": "=", "==": "=", "!=": "!="}
+GROUP_BY = {"gender", "risk", "condition"}
+
+_OP = r"(>=|<=|!=|==|>|<|=)"
+_WINDOW = r"(?:/(\d+)d)?"
+_LAB_RE = re.compile(rf"^lab:([^<>=!/]+){_OP}(-?\d+(?:\.\d+)?){_WINDOW}$")
+_SEEN_RE = re.compile(rf"^(has-lab|no-lab):([^/]+){_WINDOW}$")
+_TREND_RE = re.compile(r"^trend:([^=]+)=(rising|falling|flat)$")
+_CONDITION_RE = re.compile(r"^(no-)?(active-)?condition:(.+)$")
+_RISK_RE = re.compile(r"^(no-)?risk:(.+)$")
+_GENDER_RE = re.compile(r"^gender:(.+)$")
+_AGE_RE = re.compile(rf"^age{_OP}(\d+)$")
+
+
+def parse_filter(text: str) -> dict:
+    """Parse one CLI filter expression into a filter dict; ValueError if malformed."""
+    text = text.strip()
+    match = _LAB_RE.match(text)
+    if match:
+        code, op, value, days = match.groups()
+        return {"kind": "lab", "code": code, "op": OPERATORS[op], "value": float(value), "within_days": _days(days)}
+    match = _SEEN_RE.match(text)
+    if match:
+        kind, code, days = match.groups()
+        return {"kind": "seen", "code": code, "negate": kind == "no-lab", "within_days": _days(days)}
+    match = _TREND_RE.match(text)
+    if match:
+        return {"kind": "trend", "code": match.group(1), "trend": match.group(2)}
+    match = _CONDITION_RE.match(text)
+    if match:
+        negate, active, code = match.groups()
+        return {"kind": "condition", "code": code, "negate": bool(negate), "active": bool(active)}
+    match = _RISK_RE.match(text)
+    if match:
+        return {"kind": "risk", "rule_id": match.group(2), "negate": bool(match.group(1))}
+    match = _GENDER_RE.match(text)
+    if match:
+        return {"kind": "gender", "value": match.group(1)}
+    match = _AGE_RE.match(text)
+    if match:
+        return {"kind": "age", "op": OPERATORS[match.group(1)], "value": int(match.group(2))}
+    raise ValueError(f"Unrecognized cohort filter: {text!r}")
+
+
+def _days(value: Optional[str]) -> Optional[int]:
+    return int(value) if value else None
+
+
+def _since(as_of: datetime, within_days: Optional[int]) -> Optional[str]:
+    if within_days is None:
+        return None
+    return utc_iso(as_of - timedelta(days=within_days))
+
+
+def _birth_cutoff(as_of: datetime, years: int) -> str:
+    day = as_of.date()
+    try:
+        return day.replace(year=day.year - years).isoformat()
+    except ValueError:
+        return date(day.year - years, day.month, day.day - 1).isoformat()
+
+
+def _compile_filter(item: dict, as_of: datetime) -> tuple[str, list]:
+    kind = item.get("kind")
+    if kind == "lab":
+        sql = (
+            "p.patient_id IN (SELECT patient_id FROM cohort_observations "
+            f"WHERE code = ? AND latest_value {OPERATORS[item['op']]} ?"
+        )
+        params: list = [item["code"], item["value"]]
+        since = _since(as_of, item.get("within_days"))
+        if since:
+            sql += " AND latest_at >= ?"
+            params.append(since)
+        return sql + ")", params
+    if kind == "seen":
+        sql = "SELECT patient_id FROM cohort_observations WHERE code = ?"
+        params = [item["code"]]
+        since = _since(as_of, item.get("within_days"))
+        if since:
+            sql += " AND latest_at >= ?"
+            params.append(since)
+        return f"p.patient_id {'NOT IN' if item.get('negate') else 'IN'} ({sql})", params
+    if kind == "trend":
+        return (
+            "p.patient_id IN (SELECT patient_id FROM cohort_observations WHERE code = ? AND trend = ?)",
+            [item["code"], item["trend"]],
+        )
+    if kind == "condition":
+        sql = "SELECT patient_id FROM cohort_conditions WHERE code = ?"
+        if item.get("active"):
+            sql += " AND active = 1"
+        return f"p.patient_id {'NOT IN' if item.get('negate') else 'IN'} ({sql})", [item["code"]]
+    if kind == "risk":
+        sql = "SELECT patient_id FROM cohort_risks WHERE rule_id = ?"
+        return f"p.patient_id {'NOT IN' if item.get('negate') else 'IN'} ({sql})", [item["rule_id"]]
+    if kind == "gender":
+        return "p.gender = ?", [item["value"]]
+    if kind == "age":
+        # age >= N  <=>  born on or before as_of minus N years
+        years = item["value"]
+        at_least = _birth_cutoff(as_of, years)
+        above = _birth_cutoff(as_of, years + 1)
+        clauses = {
+            ">=": ("p.birth_date <= ?", [at_least]),
+            ">": ("p.birth_date <= ?", [above]),
+            "<": ("p.birth_date > ?", [at_least]),
+            "<=": ("p.birth_date > ?", [above]),
+            "=": ("p.birth_date > ? AND p.birth_date <= ?", [above, at_least]),
+            "!=": ("NOT (p.birth_date > ? AND p.birth_date <= ?)", [above, at_least]),
+        }
+        return clauses[item["op"]]
+    raise ValueError(f"Unknown filter kind: {kind!r}")
+
+
+def compile_cohort(filters: list[dict], *, as_of: Optional[datetime] = None) -> tuple[str, list]:
+    """SQL selecting matching patient_ids (ordered) and its parameters."""
+    as_of = as_of or datetime.now(timezone.utc)
+    clauses = []
+    params: list = []
+    for item in filters:
+        clause, clause_params = _compile_filter(item, as_of)
+        clauses.append(clause)
+        params.extend(clause_params)
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    return f"SELECT p.patient_id FROM cohort_patients p{where}", params
+
+
+def select_cohort(
+    conn: sqlite3.Connection, filters: list[dict], *, as_of: Optional[datetime] = None
+) -> list[str]:
+    sql, params = compile_cohort(filters, as_of=as_of)
+    return [row[0] for row in conn.execute(sql + " ORDER BY p.patient_id", params)]
+
+
+def aggregate_cohort(
+    conn: sqlite3.Connection,
+    filters: list[dict],
+    *,
+    as_of: Optional[datetime] = None,
+    group_by: Optional[str] = None,
+    stat_code: Optional[str] = None,
+    top: int = 20,
+) -> dict:
+    """Count the cohort, optionally grouped, with latest-value stats for one code."""
+    sql, params = compile_cohort(filters, as_of=as_of)
+    cohort = f"WITH cohort AS ({sql})"
+    summary: dict = {
+        "count": conn.execute(f"{cohort} SELECT COUNT(*) FROM cohort", params).fetchone()[0]
+    }
+    if group_by:
+        if group_by not in GROUP_BY:
+            raise ValueError(f"group_by must be one of {sorted(GROUP_BY)}")
+        if group_by == "gender":
+            query = (
+                f"{cohort} SELECT COALESCE(p.gender, 'unknown'), COUNT(*) FROM cohort c "
+                "JOIN cohort_patients p ON p.patient_id = c.patient_id GROUP BY 1"
+            )
+        elif group_by == "risk":
+            query = (
+                f"{cohort} SELECT r.rule_id, COUNT(*) FROM cohort c "
+                "JOIN cohort_risks r ON r.patient_id = c.patient_id GROUP BY 1"
+            )
+        else:
+            query = (
+                f"{cohort} SELECT k.code, COUNT(*) FROM cohort c "
+                "JOIN cohort_conditions k ON k.patient_id = c.patient_id GROUP BY 1"
+            )
+        rows = conn.execute(f"{query} ORDER BY 2 DESC, 1 LIMIT ?", params + [top]).fetchall()
+        summary["groups"] = {row[0]: row[1] for row in rows}
+    if stat_code:
+        row = conn.execute(
+            f"{cohort} SELECT COUNT(o.latest_value), AVG(o.latest_value), MIN(o.latest_value), "
+            "MAX(o.latest_value) FROM cohort c JOIN cohort_observations o "
+            "ON o.patient_id = c.patient_id AND o.code = ?",
+            params + [stat_code],
+        ).fetchone()
+        summary["stat"] = {
+            "code": stat_code,
+            "count": row[0],
+            "mean": row[1],
+            "min": row[2],
+            "max": row[3],
+        }
+    return summary
+
+
+__all__ = [
+    "GROUP_BY",
+    "aggregate_cohort",
+    "compile_cohort",
+    "parse_filter",
+    "select_cohort",
+]
@@ -4,7 +4,11 @@ import os
 from pathlib import Path
 from typing import Optional
 
-from openai import OpenAI
+from packages.core.tracing import span
+
+# openai.OpenAI, imported on first use: the SDK takes about half a second to
+# import and mock-mode runs never need it.
+OpenAI = None
 
 DEFAULT_BASE_URL = "https://api.openai.com/v1"
 DEFAULT_MODEL = "gpt-4o"
@@ -44,6 +48,15 @@ def ensure_openai_api_key(env_path: Optional[Path] = None) -> bool:
     return bool(os.getenv("OPENAI_API_KEY"))
 
 
+def _openai_client_class():
+    global OpenAI
+    if OpenAI is None:
+        from openai import OpenAI as client_class
+
+        OpenAI = client_class
+    return OpenAI
+
+
 def _extract_response_text(response: object) -> str:
     try:
         output = getattr(response, "output", None) or []
@@ -72,27 +85,27 @@ class LLMClient:
         if not api_key:
             raise RuntimeError("OPENAI_API_KEY not set (env or .env)")
 
-        client = OpenAI(api_key=api_key, base_url=self.base_url)
-        try:
-            response = client.responses.create(
-                model=self.model,
-                input=[
-                    {"role": "system", "content": "You are a careful clinical summarizer."},
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0,
-            )
-        except Exception as exc:
-            error = RuntimeError(f"OpenAI request failed: {type(exc).__name__}: {exc}")
-            status = getattr(exc, "status_code", None)
-            if status is not None:
-                error.status_code = status
-            raise error from exc
-
-        text = getattr(response, "output_text", None)
-        if text:
+        client = _openai_client_class()(api_key=api_key, base_url=self.base_url)
+        with span("llm.complete", {"llm.model": self.model, "llm.prompt_chars": len(prompt)}) as call:
+            try:
+                response = client.responses.create(
+                    model=self.model,
+                    input=[
+                        {"role": "system", "content": "You are a careful clinical summarizer."},
+                        {"role": "user", "content": prompt},
+                    ],
+                    temperature=0,
+                )
+            except Exception as exc:
+                error = RuntimeError(f"OpenAI request failed: {type(exc).__name__}: {exc}")
+                status = getattr(exc, "status_code", None)
+                if status is not None:
+                    error.status_code = status
+                raise error from exc
+
+            text = getattr(response, "output_text", None) or _extract_response_text(response)
+            call.set_attribute("llm.response_chars", len(text))
             return text
-        return _extract_response_text(response)
 
 
 __all__ = ["LLMClient", "ensure_openai_api_key", "load_dotenv"]
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from packages.core.render.compact import compact_result, expand_result
 from packages.core.render.markdown import render_patient_report_md
 
-__all__ = ["render_patient_report_md"]
+__all__ = ["compact_result", "expand_result", "render_patient_report_md"]
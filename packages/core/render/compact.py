@@ -0,0 +1,154 @@
+"""
+Opt-in compact encoding of PatientAnalysisResult payloads.
+
+Citations are moved into one top-level evidence table and every `evidence`
+list (risks, timeline, missing_info, contradictions) holds integer row
+indexes instead. Rows are arrays in EVIDENCE_FIELDS order with the file path
+replaced by an index into `files`; doc_id is only stored (as a fifth element)
+when it is not "<resource_type>/<resource_id>". Evidence entries that are not
+plain citation dicts stay inline. expand_result restores today's schema
+exactly, so expand_result(compact_result(payload)) == payload.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Optional
+
+from packages.core.schemas.result import PatientAnalysisResult
+
+ENCODING = "compact"
+ENCODING_VERSION = 1
+EVIDENCE_FIELDS = ("resource_type", "resource_id", "file", "timestamp", "doc_id")
+_CITATION_KEYS = ("doc_id", "resource_type", "resource_id", "file_path", "timestamp")
+_SECTIONS = ("risks", "timeline", "missing_info", "contradictions")
+
+
+def result_payload(result: PatientAnalysisResult | dict) -> dict:
+    """JSON-mode dict of a result (dicts are returned unchanged)."""
+    if isinstance(result, dict):
+        return result
+    if hasattr(result, "model_dump"):
+        return result.model_dump(mode="json")
+    return json.loads(result.json())
+
+
+def is_compact(payload: dict) -> bool:
+    return isinstance(payload, dict) and payload.get("encoding") == ENCODING
+
+
+def _is_citation(entry: Any) -> bool:
+    return (
+        isinstance(entry, dict)
+        and len(entry) == len(_CITATION_KEYS)
+        and all(key in entry for key in _CITATION_KEYS)
+        and all(value is None or isinstance(value, str) for value in entry.values())
+    )
+
+
+class _EvidenceTable:
+    def __init__(self) -> None:
+        self.rows: list[list] = []
+        self.files: list[str] = []
+        self._row_index: dict[tuple, int] = {}
+        self._file_index: dict[str, int] = {}
+
+    def add(self, entry: dict) -> int:
+        key = tuple(entry[name] for name in _CITATION_KEYS)
+        index = self._row_index.get(key)
+        if index is not None:
+            return index
+        file_path = entry["file_path"]
+        file_ref: Optional[int] = None
+        if file_path is not None:
+            file_ref = self._file_index.get(file_path)
+            if file_ref is None:
+                file_ref = self._file_index[file_path] = len(self.files)
+                self.files.append(file_path)
+        row = [entry["resource_type"], entry["resource_id"], file_ref, entry["timestamp"]]
+        if entry["doc_id"] != f"{entry['resource_type']}/{entry['resource_id']}":
+            row.append(entry["doc_id"])
+        index = self._row_index[key] = len(self.rows)
+        self.rows.append(row)
+        return index
+
+
+def compact_result(result: PatientAnalysisResult | dict) -> dict:
+    """Compact encoding of a result or of its JSON-mode payload (the input is not modified)."""
+    payload = result_payload(result)
+    if is_compact(payload):
+        return payload
+    table = _EvidenceTable()
+    compact = dict(payload)
+    for section in _SECTIONS:
+        items = payload.get(section)
+        if not isinstance(items, list):
+            continue
+        encoded = []
+        for item in items:
+            evidence = item.get("evidence") if isinstance(item, dict) else None
+            if isinstance(evidence, list):
+                item = {
+                    **item,
+                    "evidence": [table.add(entry) if _is_citation(entry) else entry for entry in evidence],
+                }
+            encoded.append(item)
+        compact[section] = encoded
+    compact["encoding"] = ENCODING
+    compact["encoding_version"] = ENCODING_VERSION
+    compact["evidence_table"] = {"fields": list(EVIDENCE_FIELDS), "files": table.files, "rows": table.rows}
+    return compact
+
+
+def _expand_row(row: list, files: list[str]) -> dict:
+    resource_type, resource_id, file_ref, timestamp = row[:4]
+    doc_id = row[4] if len(row) > 4 else f"{resource_type}/{resource_id}"
+    return {
+        "doc_id": doc_id,
+        "resource_type": resource_type,
+        "resource_id": resource_id,
+        "file_path": None if file_ref is None else files[file_ref],
+        "timestamp": timestamp,
+    }
+
+
+def expand_result(payload: dict) -> dict:
+    """Today's result schema from a compact payload (non-compact payloads pass through)."""
+    if not is_compact(payload):
+        return payload
+    version = payload.get("encoding_version")
+    if version != ENCODING_VERSION:
+        raise ValueError(f"unsupported compact encoding version: {version!r}")
+    table = payload.get("evidence_table") or {}
+    files = table.get("files") or []
+    rows = [_expand_row(row, files) for row in table.get("rows") or []]
+    expanded = {
+        key: value
+        for key, value in payload.items()
+        if key not in ("encoding", "encoding_version", "evidence_table")
+    }
+    for section in _SECTIONS:
+        items = payload.get(section)
+        if not isinstance(items, list):
+            continue
+        decoded = []
+        for item in items:
+            evidence = item.get("evidence") if isinstance(item, dict) else None
+            if isinstance(evidence, list):
+                item = {
+                    **item,
+                    "evidence": [dict(rows[entry]) if isinstance(entry, int) else entry for entry in evidence],
+                }
+            decoded.append(item)
+        expanded[section] = decoded
+    return expanded
+
+
+__all__ = [
+    "ENCODING",
+    "ENCODING_VERSION",
+    "EVIDENCE_FIELDS",
+    "compact_result",
+    "expand_result",
+    "is_compact",
+    "result_payload",
+]
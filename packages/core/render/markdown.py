@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 import re
-from datetime import datetime
+from datetime import date, datetime
 from typing import Iterable, Optional
 
 from packages.core.schemas.result import PatientAnalysisResult
+from packages.core.schemas.snapshot import Snapshot, format_snapshot_date
 
 _SEVERITY_ORDER = {"critical": 4, "high": 3, "medium": 2, "low": 1}
 
@@ -158,6 +159,29 @@ def _dedupe_recent_problems(snapshot_text: str) -> list[str]:
     return output
 
 
+def _snapshot_lines(snapshot: Snapshot) -> list[str]:
+    """Snapshot lines with recent problems deduplicated by label, read from the structure."""
+    order: list[str] = []
+    grouped: dict[str, tuple[Optional[date], str]] = {}
+    for entry in snapshot.problems:
+        label = entry.label.strip() or "unknown"
+        date_value = entry.date.date() if entry.date else None
+        date_text = format_snapshot_date(entry.date)
+        if label not in grouped:
+            grouped[label] = (date_value, date_text)
+            order.append(label)
+            continue
+        current_date, _ = grouped[label]
+        if date_value is not None and (current_date is None or date_value > current_date):
+            grouped[label] = (date_value, date_text)
+
+    lines = [snapshot.header_line(), "Recent problems:"]
+    lines.extend(f"- {label} (most recent: {grouped[label][1]})" for label in order)
+    problem_count = 2 + len(snapshot.problems)
+    lines.extend(snapshot.lines()[problem_count:])
+    return lines
+
+
 def _narrative_sentences(narrative: object) -> list[str]:
     parts: list[str] = []
     for key in ("summary_bullets", "risk_bullets", "followup_questions"):
@@ -177,7 +201,10 @@ def _narrative_sentences(narrative: object) -> list[str]:
     return [sentence.strip() for sentence in sentences if sentence.strip()]
 
 
-def render_patient_report_md(result: PatientAnalysisResult) -> str:
+def render_patient_report_md(result: PatientAnalysisResult, *, snapshot: Optional[Snapshot] = None) -> str:
+    """Markdown report; the snapshot section uses the structured Snapshot when one is
+    given or attached to the result, and falls back to parsing `result.snapshot`."""
+    snapshot = snapshot or result.snapshot_model()
     patient_id = result.meta.get("patient_id", "unknown")
     mode = result.meta.get("mode", "mock")
 
@@ -195,7 +222,10 @@ def render_patient_report_md(result: PatientAnalysisResult) -> str:
         "",
         "## Snapshot",
     ]
-    snapshot_lines = _dedupe_recent_problems(result.snapshot or "")
+    if snapshot is not None:
+        snapshot_lines = _snapshot_lines(snapshot)
+    else:
+        snapshot_lines = _dedupe_recent_problems(result.snapshot or "")
     if snapshot_lines:
         lines.extend(snapshot_lines)
     else:
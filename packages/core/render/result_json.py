@@ -0,0 +1,33 @@
+"""
+Direct-to-bytes JSON for analysis results and plain response payloads.
+
+result_json_bytes writes a PatientAnalysisResult straight to UTF-8 bytes with
+the model's compiled serializer, skipping the jsonable_encoder walk and the
+second json.dumps pass. The bytes are the same as model_dump_json() and as the
+API's previous JSONResponse(jsonable_encoder(result)) body. payload_json_bytes
+renders plain dicts exactly as JSONResponse does, including its NaN and key handling.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from packages.core.schemas.result import PatientAnalysisResult
+
+
+def result_json_bytes(result: PatientAnalysisResult) -> bytes:
+    """Compact UTF-8 JSON for a result (same bytes as model_dump_json())."""
+    serializer = getattr(type(result), "__pydantic_serializer__", None)
+    if serializer is not None:
+        return serializer.to_json(result)
+    return result.json(ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def payload_json_bytes(payload: Any) -> bytes:
+    """Compact UTF-8 JSON for JSON-compatible data, as JSONResponse renders it."""
+    return json.dumps(
+        payload, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+__all__ = ["payload_json_bytes", "result_json_bytes"]
@@ -2,10 +2,11 @@ from __future__ import annotations
 
 from typing import Dict, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 from packages.core.schemas.chart import SourceRef
 from packages.core.schemas.output import NarrativeSummary
+from packages.core.schemas.snapshot import Snapshot
 
 
 Evidence = SourceRef
@@ -41,6 +42,15 @@ class PatientAnalysisResult(BaseModel):
     missing_info: Optional[List[MissingInfoItem]] = None
     contradictions: Optional[List[ContradictionItem]] = None
 
+    # Structure behind `snapshot` when the result was built in-process; not serialized.
+    _snapshot_model: Optional[Snapshot] = PrivateAttr(default=None)
+
+    def snapshot_model(self) -> Optional[Snapshot]:
+        return self._snapshot_model
+
+    def attach_snapshot_model(self, snapshot: Optional[Snapshot]) -> None:
+        self._snapshot_model = snapshot
+
 
 __all__ = [
     "Evidence",
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+def format_snapshot_date(value: Optional[datetime]) -> str:
+    return value.date().isoformat() if value else "unknown"
+
+
+class SnapshotEntry(BaseModel):
+    """A dated problem or medication line."""
+    date: Optional[datetime] = None
+    label: str
+
+    def line(self) -> str:
+        return f"{format_snapshot_date(self.date)} | {self.label}"
+
+
+class SnapshotMeasurement(BaseModel):
+    """Latest value of a key vital/lab, already formatted (e.g. "128/82" or "5.9 %")."""
+    label: str
+    code: str
+    value_text: str
+    date: Optional[datetime] = None
+    source: str
+
+    def text(self) -> str:
+        return f"{self.label} ({self.code}): {self.value_text} on {format_snapshot_date(self.date)}"
+
+    def line(self) -> str:
+        return f"{self.text()} | src: {self.source}"
+
+
+class SnapshotRisk(BaseModel):
+    rule_id: str
+    severity: str
+    message: str
+    sources: List[str] = Field(default_factory=list)
+
+    def line(self) -> str:
+        return f"{self.rule_id} | {self.severity} | {self.message}"
+
+
+class Snapshot(BaseModel):
+    """Deterministic chart snapshot; `text` renders the snapshot text format on demand."""
+    patient_id: str
+    sex: str = "unknown"
+    age: Optional[int] = None
+    last_seen: Optional[datetime] = None
+    problems: List[SnapshotEntry] = Field(default_factory=list)
+    medications: List[SnapshotEntry] = Field(default_factory=list)
+    measurements: List[SnapshotMeasurement] = Field(default_factory=list)
+    risks: List[SnapshotRisk] = Field(default_factory=list)
+
+    def header_line(self) -> str:
+        age_text = "unknown" if self.age is None else str(self.age)
+        return (
+            f"Patient: {self.patient_id} | sex={self.sex} | "
+            f"age={age_text} | last_seen={format_snapshot_date(self.last_seen)}"
+        )
+
+    def lines(self) -> list[str]:
+        lines = [self.header_line(), "Recent problems:"]
+        lines.extend(entry.line() for entry in self.problems)
+        lines.append("Medications:")
+        lines.extend(entry.line() for entry in self.medications)
+        lines.append("Key vitals/labs:")
+        lines.extend(measurement.line() for measurement in self.measurements)
+        lines.append("Risks:")
+        for risk in self.risks:
+            lines.append(risk.line())
+            lines.extend(f"  - src: {source}" for source in risk.sources)
+        return lines
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines())
+
+    def __str__(self) -> str:
+        return self.text
+
+
+__all__ = [
+    "Snapshot",
+    "SnapshotEntry",
+    "SnapshotMeasurement",
+    "SnapshotRisk",
+    "format_snapshot_date",
+]
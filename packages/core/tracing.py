@@ -0,0 +1,312 @@
+"""
+Lightweight tracing spans, off by default.
+
+`span(name, attributes)` times a block; spans nest through a context variable
+(so they follow FastAPI's threadpool hand-off) and carry W3C trace context
+(`traceparent`) across process boundaries. `traced()` wraps a function in a
+span and `current_span()` lets the function add attributes to it.
+
+The exporter comes from TRACE_EXPORTER (or configure_tracing()):
+
+  (unset)/none   no-op: span() returns a shared object that records nothing
+  console        one JSON line per finished span on stderr
+  file[:path]    one JSON line per finished span appended to path
+                 (default TRACE_FILE or artifacts/traces/spans.jsonl)
+  otel           hand spans to the OpenTelemetry SDK when it is installed
+                 (configure its exporter the usual OTEL_* way)
+
+Span records use OpenTelemetry field names (trace_id, span_id,
+parent_span_id, start/end_time_unix_nano, attributes, status), so they can be
+replayed into a collector later.
+"""
+from __future__ import annotations
+
+import functools
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Optional, TypeVar
+
+try:  # optional: only needed for TRACE_EXPORTER=otel
+    from opentelemetry import trace as otel_trace
+except ImportError:  # pragma: no cover - depends on the environment
+    otel_trace = None
+
+DEFAULT_TRACE_FILE = Path(__file__).resolve().parents[2] / "artifacts" / "traces" / "spans.jsonl"
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "patient-chart-agent")
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_span_id", "start_ns", "end_ns", "attributes", "status")
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str], attributes: dict) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.status = "OK"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def update_name(self, name: str) -> None:
+        self.name = name
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.status = "ERROR"
+        self.attributes["exception.type"] = type(exc).__name__
+        self.attributes["exception.message"] = str(exc)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> dict:
+        end_ns = self.end_ns or time.time_ns()
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": end_ns,
+            "duration_ms": round((end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "status": self.status,
+            "resource": {"service.name": SERVICE_NAME, "process.pid": os.getpid()},
+        }
+
+
+class _NoopSpan:
+    """Stands in for a span when tracing is off (and is its own context manager)."""
+    traceparent = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def update_name(self, name: str) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        return None
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class JsonLinesExporter:
+    """Writes finished spans as JSON lines to a stream or file (thread-safe)."""
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock:
+            if self.path is None:
+                sys.stderr.write(line)
+                sys.stderr.flush()
+            else:
+                with open(self.path, "a", encoding="utf-8") as handle:
+                    handle.write(line)
+
+
+class _OtelSpan:
+    """Adapts an OpenTelemetry span to the Span interface used by the call sites."""
+
+    def __init__(self, span: Any) -> None:
+        self._span = span
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self._span.set_attribute(key, value)
+
+    def update_name(self, name: str) -> None:
+        self._span.update_name(name)
+
+    def record_exception(self, exc: BaseException) -> None:
+        self._span.record_exception(exc)
+        self._span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR))
+
+    @property
+    def traceparent(self) -> Optional[str]:
+        context = self._span.get_span_context()
+        if not context.is_valid:
+            return None
+        return f"00-{context.trace_id:032x}-{context.span_id:016x}-01"
+
+
+_exporter: Optional[JsonLinesExporter] = None
+_use_otel = False
+_current: ContextVar[Optional[Any]] = ContextVar("current_span", default=None)
+
+
+def configure_tracing(exporter: Optional[str] = None) -> None:
+    """Select the exporter (see module doc); None reads TRACE_EXPORTER."""
+    global _exporter, _use_otel
+    value = (os.getenv("TRACE_EXPORTER", "") if exporter is None else exporter).strip()
+    kind, _, target = value.partition(":")
+    kind = kind.lower()
+    _exporter, _use_otel = None, False
+    if kind in ("", "none", "off", "0"):
+        return
+    if kind == "console":
+        _exporter = JsonLinesExporter()
+    elif kind == "file":
+        _exporter = JsonLinesExporter(Path(target or os.getenv("TRACE_FILE") or DEFAULT_TRACE_FILE))
+    elif kind == "otel":
+        if otel_trace is None:
+            raise RuntimeError("TRACE_EXPORTER=otel needs the opentelemetry-sdk package")
+        _use_otel = True
+    else:
+        raise ValueError(f"unknown TRACE_EXPORTER: {value!r}")
+
+
+def tracing_enabled() -> bool:
+    return _exporter is not None or _use_otel
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[tuple[str, str]]:
+    """(trace_id, parent span_id) from a W3C traceparent header, or None if malformed."""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    trace_id, span_id = parts[1].lower(), parts[2].lower()
+    try:
+        int(trace_id, 16), int(span_id, 16)
+    except ValueError:
+        return None
+    if trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return trace_id, span_id
+
+
+class _SpanScope:
+    __slots__ = ("span", "_token")
+
+    def __init__(self, name: str, attributes: Optional[dict], traceparent: Optional[str]) -> None:
+        parent = _current.get()
+        remote = parse_traceparent(traceparent) if parent is None else None
+        if remote is not None:
+            trace_id, parent_id = remote
+        elif parent is not None:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        else:
+            trace_id, parent_id = secrets.token_hex(16), None
+        self.span = Span(name, trace_id, parent_id, dict(attributes or {}))
+
+    def __enter__(self) -> Span:
+        self._token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type: object, exc: Optional[BaseException], tb: object) -> None:
+        _current.reset(self._token)
+        if exc is not None:
+            self.span.record_exception(exc)
+        self.span.end_ns = time.time_ns()
+        exporter = _exporter
+        if exporter is not None:
+            exporter.export(self.span)
+
+
+class _OtelScope:
+    def __init__(self, name: str, attributes: Optional[dict], traceparent: Optional[str]) -> None:
+        context = None
+        if traceparent and _current.get() is None:
+            from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+
+            context = TraceContextTextMapPropagator().extract({"traceparent": traceparent})
+        tracer = otel_trace.get_tracer("patient_chart_agent")
+        self._manager = tracer.start_as_current_span(name, context=context, attributes=attributes or None)
+
+    def __enter__(self) -> _OtelSpan:
+        self.span = _OtelSpan(self._manager.__enter__())
+        self._token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, *exc_info: Any) -> None:
+        _current.reset(self._token)
+        self._manager.__exit__(*exc_info)
+
+
+def span(name: str, attributes: Optional[dict] = None, *, traceparent: Optional[str] = None) -> Any:
+    """Context manager timing a block as a span (the no-op span when tracing is off).
+
+    `traceparent` (W3C header value) parents a root span to a remote caller;
+    it is ignored when a span is already active.
+    """
+    if _exporter is not None:
+        return _SpanScope(name, attributes, traceparent)
+    if _use_otel:
+        return _OtelScope(name, attributes, traceparent)
+    return NOOP_SPAN
+
+
+def current_span() -> Any:
+    """The active span, or the no-op span outside any span."""
+    active = _current.get()
+    return NOOP_SPAN if active is None else active
+
+
+def current_traceparent() -> Optional[str]:
+    """W3C traceparent for the active span (to continue the trace in another process)."""
+    active = _current.get()
+    return None if active is None else active.traceparent
+
+
+def traced(name: Optional[str] = None) -> Callable[[F], F]:
+    """Decorator: run the function inside span(name or the function's name)."""
+
+    def decorate(func: F) -> F:
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _exporter is None and not _use_otel:
+                return func(*args, **kwargs)
+            with span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+try:
+    configure_tracing()
+except (RuntimeError, ValueError) as exc:
+    print(f"Tracing disabled: {exc}", file=sys.stderr)
+
+
+__all__ = [
+    "JsonLinesExporter",
+    "NOOP_SPAN",
+    "Span",
+    "configure_tracing",
+    "current_span",
+    "current_traceparent",
+    "parse_traceparent",
+    "span",
+    "traced",
+    "tracing_enabled",
+]
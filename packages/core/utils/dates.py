@@ -0,0 +1,195 @@
+"""
+Per-chart time index: sorted event dates and a condition interval tree.
+
+Event dates follow the conventions already used by the timeline and rules:
+encounters by start (else end), conditions by onset (else abatement),
+medications by authored_on, observations by effective_dt (else effective) and
+notes by authored. Window and latest-event queries bisect per-kind (and
+per-code) sorted arrays; "active conditions at t" stabs a centered interval
+tree over [onset, abatement). Both answer in O(log n + k) after one
+O(n log n) build, so a single index can be shared by the snapshot, rules and
+agents for one chart.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Any, Iterator, Optional
+
+from packages.core.schemas.chart import Condition, PatientChart
+
+EVENT_KINDS = ("encounter", "condition", "medication", "observation", "note")
+
+# (kind, code_system, code); code_system/code are None for the whole kind
+SeriesKey = tuple[str, Optional[str], Optional[str]]
+
+
+def observation_date(obs) -> Optional[datetime]:
+    return obs.effective_dt or obs.effective
+
+
+def _chart_events(chart: PatientChart) -> Iterator[tuple[str, Optional[str], Optional[str], datetime, Any]]:
+    for encounter in chart.encounters:
+        date = encounter.start or encounter.end
+        if date:
+            yield "encounter", None, None, date, encounter
+    for condition in chart.conditions:
+        date = condition.onset or condition.abatement
+        if date:
+            yield "condition", None, condition.code, date, condition
+    for medication in chart.medications:
+        if medication.authored_on:
+            yield "medication", None, None, medication.authored_on, medication
+    for obs in chart.observations:
+        date = observation_date(obs)
+        if date:
+            yield "observation", obs.code_system, obs.code, date, obs
+    for note in chart.notes:
+        if note.authored:
+            yield "note", None, None, note.authored, note
+
+
+class _Series:
+    """Items sorted by date (stable, so ties keep chart order)."""
+
+    __slots__ = ("dates", "items")
+
+    def __init__(self, pairs: list[tuple[datetime, Any]]) -> None:
+        pairs.sort(key=lambda pair: pair[0])
+        self.dates = [date for date, _ in pairs]
+        self.items = [item for _, item in pairs]
+
+    def window(self, start: Optional[datetime], end: Optional[datetime]) -> list[tuple[datetime, Any]]:
+        lo = bisect_left(self.dates, start) if start is not None else 0
+        hi = bisect_right(self.dates, end) if end is not None else len(self.dates)
+        return list(zip(self.dates[lo:hi], self.items[lo:hi]))
+
+    def last(self) -> Optional[tuple[datetime, Any]]:
+        if not self.dates:
+            return None
+        return self.dates[-1], self.items[-1]
+
+
+class _IntervalNode:
+    """Centered interval tree node over half-open [start, end) intervals (end None = open)."""
+
+    __slots__ = ("center", "by_start", "by_end", "left", "right")
+
+    def __init__(self, intervals: list[tuple[datetime, Optional[datetime], int]]) -> None:
+        starts = sorted(start for start, _, _ in intervals)
+        self.center = starts[len(starts) // 2]
+        here, left, right = [], [], []
+        for interval in intervals:
+            start, end, _ = interval
+            if start > self.center:
+                right.append(interval)
+            elif end is not None and end <= self.center:
+                left.append(interval)
+            else:
+                here.append(interval)
+        self.by_start = sorted(here, key=lambda interval: interval[0])
+        self.by_end = [i for i in here if i[1] is None] + sorted(
+            (i for i in here if i[1] is not None), key=lambda interval: interval[1], reverse=True
+        )
+        self.left = _IntervalNode(left) if left else None
+        self.right = _IntervalNode(right) if right else None
+
+    def stab(self, at: datetime, out: list[int]) -> None:
+        node: Optional[_IntervalNode] = self
+        while node is not None:
+            if at < node.center:
+                for start, _, position in node.by_start:
+                    if start > at:
+                        break
+                    out.append(position)
+                node = node.left
+            else:
+                for _, end, position in node.by_end:
+                    if end is not None and end <= at:
+                        break
+                    out.append(position)
+                node = node.right if at > node.center else None
+
+
+class ChartTimeIndex:
+    """Time-window, latest-event and active-condition queries over one chart."""
+
+    def __init__(self, chart: PatientChart) -> None:
+        buckets: dict[SeriesKey, list[tuple[datetime, Any]]] = {}
+        for kind, system, code, date, item in _chart_events(chart):
+            buckets.setdefault((kind, None, None), []).append((date, item))
+            if code:
+                buckets.setdefault((kind, system, code), []).append((date, item))
+        self._series = {key: _Series(pairs) for key, pairs in buckets.items()}
+
+        self._conditions: list[Condition] = []
+        intervals: list[tuple[datetime, Optional[datetime], int]] = []
+        for condition in chart.conditions:
+            if condition.onset is None:
+                continue
+            if condition.abatement is None or condition.abatement > condition.onset:
+                intervals.append((condition.onset, condition.abatement, len(self._conditions)))
+            self._conditions.append(condition)
+        self._onset_order = sorted(range(len(self._conditions)), key=lambda i: self._conditions[i].onset)
+        self._tree = _IntervalNode(intervals) if intervals else None
+
+    def _get(self, kind: str, code: Optional[str], system: Optional[str]) -> Optional[_Series]:
+        return self._series.get((kind, system, code) if code else (kind, None, None))
+
+    def events(
+        self,
+        kind: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        *,
+        code: Optional[str] = None,
+        system: Optional[str] = None,
+    ) -> list[tuple[datetime, Any]]:
+        """(date, resource) of `kind` (optionally one code) dated in [start, end], oldest first."""
+        series = self._get(kind, code, system)
+        return series.window(start, end) if series else []
+
+    def latest_event(
+        self,
+        kind: Optional[str] = None,
+        *,
+        code: Optional[str] = None,
+        system: Optional[str] = None,
+    ) -> Optional[tuple[datetime, Any]]:
+        """Most recent (date, resource) of `kind`, or across every kind when kind is None."""
+        if kind is not None:
+            series = self._get(kind, code, system)
+            return series.last() if series else None
+        best: Optional[tuple[datetime, Any]] = None
+        for name in EVENT_KINDS:
+            series = self._series.get((name, None, None))
+            last = series.last() if series else None
+            if last and (best is None or last[0] > best[0]):
+                best = last
+        return best
+
+    def latest(
+        self,
+        kind: Optional[str] = None,
+        *,
+        code: Optional[str] = None,
+        system: Optional[str] = None,
+    ) -> Optional[datetime]:
+        event = self.latest_event(kind, code=code, system=system)
+        return event[0] if event else None
+
+    def active_conditions(self, at: datetime) -> list[Condition]:
+        """Conditions with onset <= at < abatement (no abatement = still open), by onset."""
+        if self._tree is None:
+            return []
+        positions: list[int] = []
+        self._tree.stab(at, positions)
+        positions.sort(key=lambda i: (self._conditions[i].onset, i))
+        return [self._conditions[i] for i in positions]
+
+    def conditions_by_onset(self) -> list[Condition]:
+        """Conditions with an onset, oldest first (ties in chart order)."""
+        return [self._conditions[i] for i in self._onset_order]
+
+
+__all__ = ["ChartTimeIndex", "EVENT_KINDS", "observation_date"]
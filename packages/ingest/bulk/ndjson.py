@@ -0,0 +1,192 @@
+"""
+FHIR Bulk Data (NDJSON) ingest.
+
+A Bulk Data export is one `<ResourceType>.ndjson` file per resource type, each
+covering every patient (optionally `.ndjson.gz` / `.ndjson.zst`). Resources are grouped per patient by their Patient
+reference (`subject` / `patient`) and handed to the normalizer one patient at
+a time.
+
+Exports up to `max_memory_bytes` are grouped in memory. Larger exports are
+first partitioned on disk by a hash of the patient id, so only one partition
+is held in memory at a time. Compressed files count at their estimated decoded
+size (see compression.estimated_size), which also sets the partition count.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import tempfile
+from pathlib import Path
+from typing import Iterator, Optional, TextIO
+
+from packages.core.schemas.chart import PatientChart
+from packages.ingest.compression import (
+    DEFAULT_COMPRESSED_EXPANSION,
+    estimated_size,
+    list_inputs,
+    logical_stem,
+    open_text,
+)
+from packages.ingest.synthea.normalizer import normalize_to_patient_chart
+from packages.ingest.synthea.parser import KNOWN_TYPES
+
+DEFAULT_MAX_MEMORY_BYTES = 256 * 1024 * 1024
+MAX_PARTITIONS = 256
+INPUT_KIND = "ndjson"
+_PATIENT_REF_KEYS = ("subject", "patient")
+
+
+def list_ndjson_files(export_dir: Path) -> list[Path]:
+    """Export files whose resource type the parser understands, sorted by name."""
+    if not export_dir.exists() or not export_dir.is_dir():
+        raise FileNotFoundError(f"Bulk export directory not found: {export_dir}")
+    return [path for path in list_inputs(export_dir, ".ndjson") if logical_stem(path) in KNOWN_TYPES]
+
+
+def _reference_id(reference: object) -> Optional[str]:
+    if not isinstance(reference, str) or not reference:
+        return None
+    if reference.startswith("urn:uuid:"):
+        return reference[len("urn:uuid:") :] or None
+    if "?" in reference or reference.startswith("#"):
+        return None
+    return reference.rpartition("/")[2] or None
+
+
+def patient_key(resource: dict) -> Optional[str]:
+    """Patient id a resource belongs to, or None when it is not patient-scoped."""
+    if resource.get("resourceType") == "Patient":
+        resource_id = resource.get("id")
+        return resource_id if isinstance(resource_id, str) and resource_id else None
+    for key in _PATIENT_REF_KEYS:
+        value = resource.get(key)
+        if isinstance(value, dict):
+            found = _reference_id(value.get("reference"))
+            if found:
+                return found
+    return None
+
+
+def iter_ndjson(path: Path) -> Iterator[dict]:
+    """Stream resources from one NDJSON file, skipping blank lines."""
+    with open_text(path) as handle:
+        for line_no, line in enumerate(handle, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                resource = json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ValueError(f"{path}:{line_no}: invalid JSON ({exc.msg})") from exc
+            if isinstance(resource, dict):
+                yield resource
+
+
+def _add(groups: dict[str, dict[str, list[dict]]], key: str, resource: dict, file_path: str) -> None:
+    grouped = groups.setdefault(key, {})
+    grouped.setdefault(resource["resourceType"], []).append(
+        {"resource": resource, "file_path": file_path, "input_kind": INPUT_KIND}
+    )
+
+
+def _drain(groups: dict[str, dict[str, list[dict]]]) -> Iterator[tuple[str, dict[str, list[dict]]]]:
+    for key in sorted(groups):
+        grouped = groups[key]
+        if grouped.get("Patient"):
+            yield key, grouped
+
+
+def _partition_index(key: str, partitions: int) -> int:
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % partitions
+
+
+def partition_export(files: list[Path], work_dir: Path, partitions: int) -> list[Path]:
+    """Split an export into `partitions` files of `<file index>\\t<ndjson line>` by patient."""
+    work_dir.mkdir(parents=True, exist_ok=True)
+    paths = [work_dir / f"part-{index:04d}.tsv" for index in range(partitions)]
+    handles: list[TextIO] = [path.open("w", encoding="utf-8") for path in paths]
+    try:
+        for file_index, path in enumerate(files):
+            for resource in iter_ndjson(path):
+                key = patient_key(resource)
+                if key is None:
+                    continue
+                line = json.dumps(resource, separators=(",", ":"))
+                handles[_partition_index(key, partitions)].write(f"{file_index}\t{line}\n")
+    finally:
+        for handle in handles:
+            handle.close()
+    return paths
+
+
+def _group_partition(path: Path, files: list[Path]) -> dict[str, dict[str, list[dict]]]:
+    groups: dict[str, dict[str, list[dict]]] = {}
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            file_index, _, payload = line.rstrip("\n").partition("\t")
+            resource = json.loads(payload)
+            key = patient_key(resource)
+            if key is not None:
+                _add(groups, key, resource, str(files[int(file_index)]))
+    return groups
+
+
+def iter_bulk_groups(
+    export_dir: str | Path,
+    *,
+    max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+    work_dir: str | Path | None = None,
+    compressed_expansion: float = DEFAULT_COMPRESSED_EXPANSION,
+) -> Iterator[tuple[str, dict[str, list[dict]]]]:
+    """Yield (patient_id, grouped resources) in the shape parse_fhir_resources returns.
+
+    Patients are yielded in id order within each partition; groups without a
+    Patient resource are dropped.
+    """
+    files = list_ndjson_files(Path(export_dir))
+    total_bytes = sum(estimated_size(path, compressed_expansion) for path in files)
+    if total_bytes <= max_memory_bytes:
+        groups: dict[str, dict[str, list[dict]]] = {}
+        for path in files:
+            for resource in iter_ndjson(path):
+                key = patient_key(resource)
+                if key is not None:
+                    _add(groups, key, resource, str(path))
+        yield from _drain(groups)
+        return
+
+    partitions = min(MAX_PARTITIONS, max(2, -(-total_bytes // max(1, max_memory_bytes)) * 2))
+    with tempfile.TemporaryDirectory(dir=work_dir, prefix="bulk-ndjson-") as tmp:
+        for part in partition_export(files, Path(tmp), partitions):
+            yield from _drain(_group_partition(part, files))
+            part.unlink()
+
+
+def iter_bulk_charts(
+    export_dir: str | Path,
+    *,
+    max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+    work_dir: str | Path | None = None,
+    compressed_expansion: float = DEFAULT_COMPRESSED_EXPANSION,
+) -> Iterator[PatientChart]:
+    """Yield one normalized PatientChart per patient in a Bulk Data export."""
+    for _, grouped in iter_bulk_groups(
+        export_dir,
+        max_memory_bytes=max_memory_bytes,
+        work_dir=work_dir,
+        compressed_expansion=compressed_expansion,
+    ):
+        yield normalize_to_patient_chart(grouped)
+
+
+__all__ = [
+    "DEFAULT_MAX_MEMORY_BYTES",
+    "MAX_PARTITIONS",
+    "iter_bulk_charts",
+    "iter_bulk_groups",
+    "iter_ndjson",
+    "list_ndjson_files",
+    "partition_export",
+    "patient_key",
+]
@@ -0,0 +1,269 @@
+"""
+Inverted index over condition, medication and observation codes/displays.
+
+Terms are either whole codes (`code=44054006`) or lowercase alphanumeric words
+from display/name text (`text=diabetes`). Postings map each term to patient ids
+and the resource ids that carry it, so lookups cost O(postings) rather than a
+scan over every resource. Indexes are built incrementally with `add_chart`, one
+chart at a time as ingest produces them; the SQLite chart store keeps the same
+entries in its `code_terms` table for dataset-level search.
+
+Substring matches (`match`) reproduce `fragment in text` semantics: each of
+the fragment's words is a prefix lookup (bisect) in a sorted table of term
+suffixes, built on first use after the index changes, and phrase hits are
+confirmed against the indexed text of the candidate resources only.
+"""
+from __future__ import annotations
+
+import json
+import re
+from bisect import bisect_left
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from packages.core.schemas.chart import PatientChart
+
+FIELDS = ("code", "text")
+RESOURCE_TYPES = ("Condition", "MedicationRequest", "Observation")
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# (resource_type, resource_id) within one patient
+ResourceKey = tuple[str, str]
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    """Lowercase alphanumeric words of text, in order (duplicates kept)."""
+    return _WORD_RE.findall(text.lower()) if text else []
+
+
+def _resource_texts(chart: PatientChart) -> Iterator[tuple[str, str, Optional[str], str]]:
+    """(resource_type, resource_id, code, text) for every indexed resource in the chart."""
+    for condition in chart.conditions:
+        yield "Condition", condition.id, condition.code, condition.display or ""
+    for medication in chart.medications:
+        yield "MedicationRequest", medication.id, None, medication.name or ""
+    for obs in chart.observations:
+        yield "Observation", obs.id, obs.code, obs.display or ""
+        for component in obs.components or []:
+            code = component.get("code")
+            if code:
+                yield "Observation", obs.id, code, component.get("display") or ""
+
+
+def index_entries(chart: PatientChart) -> Iterator[tuple[str, str, str, str]]:
+    """Distinct (field, term, resource_type, resource_id) entries for one chart."""
+    seen: set[tuple[str, str, str, str]] = set()
+    for resource_type, resource_id, code, text in _resource_texts(chart):
+        terms = [("code", code)] if code else []
+        terms.extend(("text", word) for word in tokenize(text))
+        for field, term in terms:
+            entry = (field, term, resource_type, resource_id)
+            if entry not in seen:
+                seen.add(entry)
+                yield entry
+
+
+def parse_term(query: str) -> tuple[str, str]:
+    """Parse `code=X` or `text=word` (a bare word means text)."""
+    field, sep, value = query.partition("=")
+    if not sep:
+        field, value = "text", query
+    field = field.strip().lower()
+    value = value.strip()
+    if field not in FIELDS or not value:
+        raise ValueError(f"Invalid index term {query!r}; expected code=<code> or text=<word>")
+    return field, value.lower() if field == "text" else value
+
+
+class CodeIndex:
+    """In-memory inverted index: (field, term) -> patient_id -> resource keys."""
+
+    def __init__(self) -> None:
+        self._postings: dict[tuple[str, str], dict[str, set[ResourceKey]]] = {}
+        self._texts: dict[tuple[str, ResourceKey], str] = {}
+        self._patients: dict[str, list[tuple[str, str]]] = {}
+        # (lowercased term suffix, (field, term)), sorted; None until match() needs it
+        self._suffixes: Optional[list[tuple[str, tuple[str, str]]]] = None
+
+    def __len__(self) -> int:
+        return len(self._patients)
+
+    def add_chart(self, chart: PatientChart) -> None:
+        """Index (or re-index) one chart."""
+        patient_id = chart.patient_id
+        if patient_id in self._patients:
+            self.remove_patient(patient_id)
+        self._suffixes = None
+        terms: list[tuple[str, str]] = []
+        for field, term, resource_type, resource_id in index_entries(chart):
+            key = (field, term)
+            self._postings.setdefault(key, {}).setdefault(patient_id, set()).add(
+                (resource_type, resource_id)
+            )
+            terms.append(key)
+        for resource_type, resource_id, code, text in _resource_texts(chart):
+            lowered = " ".join([text, code or ""]).lower()
+            slot = (patient_id, (resource_type, resource_id))
+            existing = self._texts.get(slot)
+            self._texts[slot] = lowered if existing is None else existing + " " + lowered
+        self._patients[patient_id] = terms
+
+    def add_charts(self, charts: Iterable[PatientChart]) -> int:
+        count = 0
+        for chart in charts:
+            self.add_chart(chart)
+            count += 1
+        return count
+
+    def remove_patient(self, patient_id: str) -> None:
+        self._suffixes = None
+        for key in self._patients.pop(patient_id, []):
+            posting = self._postings.get(key)
+            if posting is None:
+                continue
+            posting.pop(patient_id, None)
+            if not posting:
+                del self._postings[key]
+        for slot in [slot for slot in self._texts if slot[0] == patient_id]:
+            del self._texts[slot]
+
+    def vocabulary(self, field: str = "text") -> list[str]:
+        return sorted(term for f, term in self._postings if f == field)
+
+    def lookup(self, field: str, term: str) -> dict[str, set[ResourceKey]]:
+        """Postings for an exact term: patient_id -> {(resource_type, resource_id)}."""
+        if field == "text":
+            term = term.lower()
+        return self._postings.get((field, term), {})
+
+    def patients(self, query: str) -> list[str]:
+        """Patient ids for a `code=X` / `text=word` query."""
+        field, term = parse_term(query)
+        return sorted(self.lookup(field, term))
+
+    def resources(
+        self, field: str, term: str, *, patient_id: str, resource_type: Optional[str] = None
+    ) -> list[str]:
+        keys = self.lookup(field, term).get(patient_id, set())
+        return sorted(rid for rtype, rid in keys if resource_type is None or rtype == resource_type)
+
+    def _terms_containing(self, word: str) -> list[tuple[str, str]]:
+        """Vocabulary keys (codes and text terms) whose lowercased term contains word."""
+        if self._suffixes is None:
+            self._suffixes = sorted(
+                (term.lower()[start:], (field, term))
+                for field, term in self._postings
+                for start in range(len(term))
+            )
+        table = self._suffixes
+        keys: list[tuple[str, str]] = []
+        for position in range(bisect_left(table, (word,)), len(table)):
+            suffix, key = table[position]
+            if not suffix.startswith(word):
+                break
+            keys.append(key)
+        return keys
+
+    def match(
+        self, fragment: str, *, resource_type: Optional[str] = None
+    ) -> dict[str, set[ResourceKey]]:
+        """Resources whose lowercased "display code" text contains fragment.
+
+        Each word of the fragment is looked up in the term-suffix table (codes
+        and text terms); only multi-word or punctuated fragments need a
+        confirmation pass over the candidate resources' text.
+        """
+        fragment = fragment.lower()
+        words = tokenize(fragment)
+        if not words:
+            return {}
+        candidates: Optional[dict[str, set[ResourceKey]]] = None
+        for word in words:
+            hits: dict[str, set[ResourceKey]] = {}
+            for key in self._terms_containing(word):
+                for patient_id, keys in self._postings[key].items():
+                    hits.setdefault(patient_id, set()).update(keys)
+            if candidates is None:
+                candidates = hits
+            else:
+                candidates = {
+                    patient_id: keys & hits[patient_id]
+                    for patient_id, keys in candidates.items()
+                    if patient_id in hits and keys & hits[patient_id]
+                }
+            if not candidates:
+                return {}
+        exact_word = fragment == words[0]
+        result: dict[str, set[ResourceKey]] = {}
+        for patient_id, keys in (candidates or {}).items():
+            kept = {
+                key
+                for key in keys
+                if (resource_type is None or key[0] == resource_type)
+                and (exact_word or fragment in self._texts.get((patient_id, key), ""))
+            }
+            if kept:
+                result[patient_id] = kept
+        return result
+
+    def to_dict(self) -> dict:
+        return {
+            "patients": sorted(self._patients),
+            "postings": [
+                {
+                    "field": field,
+                    "term": term,
+                    "patients": {pid: sorted(map(list, keys)) for pid, keys in sorted(posting.items())},
+                }
+                for (field, term), posting in sorted(self._postings.items())
+            ],
+            "texts": [
+                [patient_id, rtype, rid, text]
+                for (patient_id, (rtype, rid)), text in sorted(self._texts.items())
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> "CodeIndex":
+        index = cls()
+        for patient_id in payload.get("patients", []):
+            index._patients[patient_id] = []
+        for item in payload.get("postings", []):
+            key = (item["field"], item["term"])
+            posting = index._postings.setdefault(key, {})
+            for patient_id, keys in item["patients"].items():
+                posting[patient_id] = {tuple(entry) for entry in keys}
+                index._patients.setdefault(patient_id, []).append(key)
+        for patient_id, rtype, rid, text in payload.get("texts", []):
+            index._texts[(patient_id, (rtype, rid))] = text
+        return index
+
+    def save(self, path: str | Path) -> None:
+        out = Path(path)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        tmp = out.with_suffix(out.suffix + ".partial")
+        tmp.write_text(json.dumps(self.to_dict()), encoding="utf-8")
+        tmp.replace(out)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "CodeIndex":
+        return cls.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+def build_chart_index(chart: PatientChart) -> CodeIndex:
+    """Index of a single chart, for agents resolving tokens to its resources."""
+    index = CodeIndex()
+    index.add_chart(chart)
+    return index
+
+
+__all__ = [
+    "CodeIndex",
+    "FIELDS",
+    "RESOURCE_TYPES",
+    "build_chart_index",
+    "index_entries",
+    "parse_term",
+    "tokenize",
+]
@@ -0,0 +1,457 @@
+"""
+Columnar on-disk chart store.
+
+A compiled, memory-mapped representation of a normalized dataset. Layout of a
+store directory:
+
+- meta.json: format version, row counts, byte order
+- terms.json: shared dictionary for codes, code systems, displays, units,
+  categories, resource types and file paths (loaded eagerly; small)
+- text.bin + text.q: append-only UTF-8 blob and offsets for high-cardinality
+  strings (observation ids, value_text, source doc/resource ids), decoded lazily
+- <column>.<typecode>: one fixed-width array per column (array module typecodes)
+- charts.bin: per-patient JSON for everything except observations (offsets in
+  the patient_chart column)
+
+Observations are stored column-wise (code/unit ids, epoch-microsecond
+timestamps, float values) with per-patient offsets, so scans over codes and
+values never decode JSON. Conversion back to PatientChart is lossless for the
+observation fields rules read (code, code_system, display, value, value_text,
+unit, effective, effective_dt, category, components, sources); each
+observation may carry at most one SourceRef, as the normalizer produces.
+"""
+from __future__ import annotations
+
+import json
+import math
+import mmap
+import os
+import shutil
+import sys
+from array import array
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+from packages.core.schemas.chart import Observation, PatientChart, SourceRef
+from packages.ingest.compression import list_bundle_files
+from packages.ingest.synthea.loader import load_patient_dir
+from packages.ingest.synthea.normalizer import normalize_to_patient_chart
+from packages.ingest.synthea.parser import parse_fhir_resources
+
+STORE_VERSION = 1
+NONE_ID = -1
+DERIVED_ID = -2
+NO_TIME = -(2**63)
+NAIVE_TZ = -32768
+_FLUSH_ROWS = 1 << 16
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_EPOCH_NAIVE = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+PATIENT_COLUMNS = {"patient_obs": "q", "patient_chart": "q", "patient_id": "i"}
+OBSERVATION_COLUMNS = {
+    "obs_id": "i",
+    "obs_code": "i",
+    "obs_system": "i",
+    "obs_display": "i",
+    "obs_unit": "i",
+    "obs_category": "i",
+    "obs_value": "d",
+    "obs_value_text": "i",
+    "obs_effective": "q",
+    "obs_effective_tz": "h",
+    "obs_effective_dt": "q",
+    "obs_effective_dt_tz": "h",
+    "obs_comp": "q",
+    "obs_src_doc": "i",
+    "obs_src_type": "i",
+    "obs_src_rid": "i",
+    "obs_src_file": "i",
+    "obs_src_time": "q",
+    "obs_src_tz": "h",
+}
+COMPONENT_COLUMNS = {
+    "comp_code": "i",
+    "comp_system": "i",
+    "comp_display": "i",
+    "comp_unit": "i",
+    "comp_value": "d",
+}
+ALL_COLUMNS = {**PATIENT_COLUMNS, **OBSERVATION_COLUMNS, **COMPONENT_COLUMNS}
+
+
+def _dump_json(model: Any, exclude: set[str]) -> str:
+    if hasattr(model, "model_dump_json"):
+        return model.model_dump_json(exclude=exclude)
+    return model.json(exclude=exclude)
+
+
+def _load_chart_json(text: str) -> PatientChart:
+    if hasattr(PatientChart, "model_validate_json"):
+        return PatientChart.model_validate_json(text)
+    return PatientChart.parse_raw(text)
+
+
+def _construct(cls: Any, **fields: Any) -> Any:
+    if hasattr(cls, "model_construct"):
+        return cls.model_construct(**fields)
+    return cls.construct(**fields)
+
+
+def encode_time(value: Optional[datetime]) -> tuple[int, int]:
+    """datetime -> (epoch microseconds, utc offset minutes | NAIVE_TZ)."""
+    if value is None:
+        return NO_TIME, NAIVE_TZ
+    if value.tzinfo is None:
+        return (value - _EPOCH_NAIVE) // _MICROSECOND, NAIVE_TZ
+    offset = value.utcoffset() or timedelta(0)
+    return (value - _EPOCH_UTC) // _MICROSECOND, int(offset.total_seconds() // 60)
+
+
+def decode_time(micros: int, tz_minutes: int) -> Optional[datetime]:
+    if micros == NO_TIME:
+        return None
+    if tz_minutes == NAIVE_TZ:
+        return _EPOCH_NAIVE + timedelta(microseconds=micros)
+    value = _EPOCH_UTC + timedelta(microseconds=micros)
+    if tz_minutes == 0:
+        return value
+    return value.astimezone(timezone(timedelta(minutes=tz_minutes)))
+
+
+def _number(value: Optional[float]) -> float:
+    return math.nan if value is None else float(value)
+
+
+class _StoreWriter:
+    def __init__(self, out_dir: Path) -> None:
+        self.out_dir = out_dir
+        self.arrays = {name: array(code) for name, code in ALL_COLUMNS.items()}
+        self.handles = {
+            name: (out_dir / f"{name}.{code}").open("wb") for name, code in ALL_COLUMNS.items()
+        }
+        self.text_handle = (out_dir / "text.bin").open("wb")
+        self.text_offsets = array("q", [0])
+        self.text_offsets_handle = (out_dir / "text.q").open("wb")
+        self.text_size = 0
+        self.text_count = 0
+        self.charts_handle = (out_dir / "charts.bin").open("wb")
+        self.charts_size = 0
+        self.terms: list[str] = []
+        self.term_ids: dict[str, int] = {}
+        self.patients = 0
+        self.observations = 0
+        self.components = 0
+        self.arrays["patient_obs"].append(0)
+        self.arrays["patient_chart"].append(0)
+        self.arrays["obs_comp"].append(0)
+
+    def term(self, value: Optional[str]) -> int:
+        if value is None:
+            return NONE_ID
+        found = self.term_ids.get(value)
+        if found is None:
+            found = len(self.terms)
+            self.terms.append(value)
+            self.term_ids[value] = found
+        return found
+
+    def text(self, value: Optional[str]) -> int:
+        if value is None:
+            return NONE_ID
+        data = value.encode("utf-8")
+        self.text_handle.write(data)
+        self.text_size += len(data)
+        self.text_offsets.append(self.text_size)
+        self.text_count += 1
+        if len(self.text_offsets) >= _FLUSH_ROWS:
+            self.text_offsets.tofile(self.text_offsets_handle)
+            self.text_offsets = array("q")
+        return self.text_count - 1
+
+    def _source(self, obs: Observation) -> None:
+        cols = self.arrays
+        sources = obs.sources or []
+        if len(sources) > 1:
+            raise ValueError(
+                f"Observation {obs.id} has {len(sources)} sources; the columnar store keeps one."
+            )
+        if not sources:
+            for name in ("obs_src_doc", "obs_src_type", "obs_src_rid", "obs_src_file"):
+                cols[name].append(NONE_ID)
+            cols["obs_src_time"].append(NO_TIME)
+            cols["obs_src_tz"].append(NAIVE_TZ)
+            return
+        source = sources[0]
+        if source.resource_id is not None and source.resource_id == obs.id:
+            rid = DERIVED_ID
+        else:
+            rid = self.text(source.resource_id)
+        derived_doc = (
+            source.resource_type is not None
+            and source.resource_id is not None
+            and source.doc_id == f"{source.resource_type}/{source.resource_id}"
+        )
+        cols["obs_src_doc"].append(DERIVED_ID if derived_doc else self.text(source.doc_id))
+        cols["obs_src_type"].append(self.term(source.resource_type))
+        cols["obs_src_rid"].append(rid)
+        cols["obs_src_file"].append(self.term(source.file_path))
+        micros, tz = encode_time(source.timestamp)
+        cols["obs_src_time"].append(micros)
+        cols["obs_src_tz"].append(tz)
+
+    def add(self, chart: PatientChart) -> None:
+        cols = self.arrays
+        for obs in chart.observations:
+            cols["obs_id"].append(self.text(obs.id))
+            cols["obs_code"].append(self.term(obs.code))
+            cols["obs_system"].append(self.term(obs.code_system))
+            cols["obs_display"].append(self.term(obs.display))
+            cols["obs_unit"].append(self.term(obs.unit))
+            cols["obs_category"].append(self.term(obs.category))
+            cols["obs_value"].append(_number(obs.value))
+            cols["obs_value_text"].append(self.text(obs.value_text))
+            micros, tz = encode_time(obs.effective)
+            cols["obs_effective"].append(micros)
+            cols["obs_effective_tz"].append(tz)
+            micros, tz = encode_time(obs.effective_dt)
+            cols["obs_effective_dt"].append(micros)
+            cols["obs_effective_dt_tz"].append(tz)
+            for component in obs.components or []:
+                cols["comp_code"].append(self.term(component.get("code")))
+                cols["comp_system"].append(self.term(component.get("code_system")))
+                cols["comp_display"].append(self.term(component.get("display")))
+                cols["comp_unit"].append(self.term(component.get("unit")))
+                value = component.get("value")
+                cols["comp_value"].append(_number(value if isinstance(value, (int, float)) else None))
+                self.components += 1
+            cols["obs_comp"].append(self.components)
+            self._source(obs)
+            self.observations += 1
+
+        data = _dump_json(chart, {"observations"}).encode("utf-8")
+        self.charts_handle.write(data)
+        self.charts_size += len(data)
+        cols["patient_chart"].append(self.charts_size)
+        cols["patient_obs"].append(self.observations)
+        cols["patient_id"].append(self.text(chart.patient_id))
+        self.patients += 1
+        if len(cols["obs_id"]) >= _FLUSH_ROWS or len(cols["patient_id"]) >= _FLUSH_ROWS:
+            self.flush()
+
+    def flush(self) -> None:
+        for name, values in self.arrays.items():
+            if values:
+                values.tofile(self.handles[name])
+                self.arrays[name] = array(values.typecode)
+        if self.text_offsets:
+            self.text_offsets.tofile(self.text_offsets_handle)
+            self.text_offsets = array("q")
+
+    def close(self) -> dict:
+        self.flush()
+        for handle in self.handles.values():
+            handle.close()
+        self.text_handle.close()
+        self.text_offsets_handle.close()
+        self.charts_handle.close()
+        (self.out_dir / "terms.json").write_text(json.dumps(self.terms), encoding="utf-8")
+        meta = {
+            "version": STORE_VERSION,
+            "byteorder": sys.byteorder,
+            "patients": self.patients,
+            "observations": self.observations,
+            "components": self.components,
+            "texts": self.text_count,
+            "terms": len(self.terms),
+        }
+        (self.out_dir / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        return meta
+
+
+def write_chart_store(charts: Iterable[PatientChart], out_dir: str | Path) -> dict:
+    """Compile charts into a columnar store at out_dir (replaced atomically). Returns meta."""
+    target = Path(out_dir)
+    partial = target.with_name(target.name + ".partial")
+    if partial.exists():
+        shutil.rmtree(partial)
+    partial.mkdir(parents=True)
+    writer = _StoreWriter(partial)
+    try:
+        for chart in charts:
+            writer.add(chart)
+    finally:
+        meta = writer.close()
+    if target.exists():
+        shutil.rmtree(target)
+    os.replace(partial, target)
+    return meta
+
+
+class ChartStore:
+    """Read-only, memory-mapped view of a compiled chart store."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        meta_path = self.path / "meta.json"
+        if not meta_path.exists():
+            raise FileNotFoundError(f"Chart store not found: {self.path}")
+        self.meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if self.meta.get("version") != STORE_VERSION:
+            raise ValueError(f"Unsupported chart store version: {self.meta.get('version')}")
+        if self.meta.get("byteorder") != sys.byteorder:
+            raise ValueError("Chart store was written with a different byte order.")
+        self.terms: list[str] = json.loads((self.path / "terms.json").read_text(encoding="utf-8"))
+        self._term_ids = {term: index for index, term in enumerate(self.terms)}
+        self._maps: list[mmap.mmap] = []
+        self.columns = {name: self._map(f"{name}.{code}", code) for name, code in ALL_COLUMNS.items()}
+        self._text = self._map("text.bin", "B")
+        self._text_offsets = self._map("text.q", "q")
+        self._charts = self._map("charts.bin", "B")
+
+    def _map(self, name: str, typecode: str) -> memoryview:
+        path = self.path / name
+        if path.stat().st_size == 0:
+            return memoryview(array(typecode))
+        with path.open("rb") as handle:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        view = memoryview(mapped)
+        return view if typecode == "B" else view.cast(typecode)
+
+    def close(self) -> None:
+        for view in list(self.columns.values()) + [self._text, self._text_offsets, self._charts]:
+            view.release()
+        for mapped in self._maps:
+            mapped.close()
+        self._maps = []
+
+    def __enter__(self) -> "ChartStore":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return int(self.meta["patients"])
+
+    def column(self, name: str) -> memoryview:
+        return self.columns[name]
+
+    def term(self, index: int) -> Optional[str]:
+        return None if index < 0 else self.terms[index]
+
+    def term_id(self, value: str) -> int:
+        """Dictionary id for a code/display/unit string, or NONE_ID when absent."""
+        return self._term_ids.get(value, NONE_ID)
+
+    def text(self, index: int) -> Optional[str]:
+        if index < 0:
+            return None
+        start = self._text_offsets[index]
+        end = self._text_offsets[index + 1]
+        return bytes(self._text[start:end]).decode("utf-8")
+
+    def patient_id(self, patient: int) -> str:
+        return self.text(self.columns["patient_id"][patient]) or ""
+
+    def patient_ids(self) -> list[str]:
+        return [self.patient_id(index) for index in range(len(self))]
+
+    def observation_range(self, patient: int) -> range:
+        offsets = self.columns["patient_obs"]
+        return range(offsets[patient], offsets[patient + 1])
+
+    def _source(self, row: int, obs_id: Optional[str]) -> list[SourceRef]:
+        cols = self.columns
+        doc = cols["obs_src_doc"][row]
+        if doc == NONE_ID:
+            return []
+        rid_index = cols["obs_src_rid"][row]
+        resource_id = obs_id if rid_index == DERIVED_ID else self.text(rid_index)
+        resource_type = self.term(cols["obs_src_type"][row])
+        doc_id = f"{resource_type}/{resource_id}" if doc == DERIVED_ID else self.text(doc)
+        return [
+            _construct(
+                SourceRef,
+                doc_id=doc_id,
+                resource_type=resource_type,
+                resource_id=resource_id,
+                file_path=self.term(cols["obs_src_file"][row]),
+                timestamp=decode_time(cols["obs_src_time"][row], cols["obs_src_tz"][row]),
+            )
+        ]
+
+    def observation(self, row: int) -> Observation:
+        cols = self.columns
+        term = self.term
+        obs_id = self.text(cols["obs_id"][row]) or ""
+        components = []
+        for comp in range(cols["obs_comp"][row], cols["obs_comp"][row + 1]):
+            value = cols["comp_value"][comp]
+            components.append(
+                {
+                    "code": term(cols["comp_code"][comp]),
+                    "code_system": term(cols["comp_system"][comp]),
+                    "display": term(cols["comp_display"][comp]),
+                    "value": None if math.isnan(value) else value,
+                    "unit": term(cols["comp_unit"][comp]),
+                }
+            )
+        value = cols["obs_value"][row]
+        return _construct(
+            Observation,
+            id=obs_id,
+            code=term(cols["obs_code"][row]),
+            code_system=term(cols["obs_system"][row]),
+            display=term(cols["obs_display"][row]),
+            value=None if math.isnan(value) else value,
+            value_text=self.text(cols["obs_value_text"][row]),
+            unit=term(cols["obs_unit"][row]),
+            effective=decode_time(cols["obs_effective"][row], cols["obs_effective_tz"][row]),
+            effective_dt=decode_time(cols["obs_effective_dt"][row], cols["obs_effective_dt_tz"][row]),
+            category=term(cols["obs_category"][row]),
+            components=components,
+            sources=self._source(row, obs_id),
+        )
+
+    def chart_without_observations(self, patient: int) -> PatientChart:
+        offsets = self.columns["patient_chart"]
+        raw = bytes(self._charts[offsets[patient] : offsets[patient + 1]]).decode("utf-8")
+        return _load_chart_json(raw)
+
+    def to_chart(self, patient: int) -> PatientChart:
+        chart = self.chart_without_observations(patient)
+        chart.observations = [self.observation(row) for row in self.observation_range(patient)]
+        return chart
+
+    def iter_charts(self, limit: int = 0) -> Iterator[PatientChart]:
+        count = len(self) if limit <= 0 else min(limit, len(self))
+        for patient in range(count):
+            yield self.to_chart(patient)
+
+
+def build_chart_store(data_dir: str | Path, out_dir: str | Path, *, limit: int = 0) -> dict:
+    """Normalize every bundle in data_dir and compile the charts into a store."""
+    files = list_bundle_files(Path(data_dir))
+    if limit > 0:
+        files = files[:limit]
+
+    def _charts() -> Iterator[PatientChart]:
+        for path in files:
+            grouped = parse_fhir_resources(load_patient_dir(path))
+            yield normalize_to_patient_chart(grouped)
+
+    return write_chart_store(_charts(), out_dir)
+
+
+__all__ = [
+    "ChartStore",
+    "NONE_ID",
+    "STORE_VERSION",
+    "build_chart_store",
+    "decode_time",
+    "encode_time",
+    "write_chart_store",
+]
@@ -0,0 +1,133 @@
+"""
+Transparent gzip/zstd input handling.
+
+`open_text` returns a text stream that decompresses while it is read, so
+compressed bundles and NDJSON exports are parsed without an uncompressed copy
+on disk. zstd needs the optional `zstandard` package (`pip install -e .[zstd]`).
+Memory budgets use `estimated_size`: compressed files count at an expansion
+factor times their size, or at the decoded size recorded in a gzip trailer
+when that is larger, without decompressing anything up front.
+"""
+from __future__ import annotations
+
+import gzip
+import io
+import os
+from pathlib import Path
+from typing import TextIO
+
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".zst": "zstd"}
+# Assumed decoded-to-compressed ratio for budgets (FHIR JSON compresses well).
+DEFAULT_COMPRESSED_EXPANSION = 10.0
+# Which copy of an input to read when several are present; zstd needs an optional package.
+_VARIANT_ORDER = (None, "gzip", "zstd")
+
+
+def compression_of(path: Path) -> str | None:
+    """Return "gzip", "zstd" or None based on the file suffix."""
+    return COMPRESSION_SUFFIXES.get(path.suffix.lower())
+
+
+def _gzip_trailer_size(path: Path) -> int:
+    """ISIZE from the gzip trailer: the last member's decoded size, modulo 2**32."""
+    try:
+        with path.open("rb") as handle:
+            handle.seek(-4, os.SEEK_END)
+            return int.from_bytes(handle.read(4), "little")
+    except OSError:
+        return 0
+
+
+def estimated_size(path: Path, expansion: float = DEFAULT_COMPRESSED_EXPANSION) -> int:
+    """Decoded size estimate: bytes on disk, times `expansion` for compressed files.
+
+    For gzip the trailer's recorded size is used when it is larger; it is exact
+    for the usual single-member file under 4 GiB.
+    """
+    size = path.stat().st_size
+    kind = compression_of(path)
+    if kind is None:
+        return size
+    scaled = int(size * expansion)
+    if kind == "gzip":
+        return max(scaled, _gzip_trailer_size(path))
+    return scaled
+
+
+def logical_suffix(path: Path) -> str:
+    """Suffix of the payload with any compression suffix removed (".json", ".ndjson")."""
+    if compression_of(path):
+        return Path(path.stem).suffix.lower()
+    return path.suffix.lower()
+
+
+def logical_stem(path: Path) -> str:
+    """File name without payload or compression suffixes ("Observation.ndjson.zst" -> "Observation")."""
+    name = path.stem if compression_of(path) else path.name
+    return Path(name).stem
+
+
+def _open_zstd(path: Path) -> TextIO:
+    try:
+        import zstandard
+    except ImportError as exc:
+        raise RuntimeError(
+            f"Reading {path} requires the 'zstandard' package (pip install -e .[zstd])."
+        ) from exc
+    raw = path.open("rb")
+    try:
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+    except Exception:
+        raw.close()
+        raise
+    return io.TextIOWrapper(io.BufferedReader(reader), encoding="utf-8")
+
+
+def open_text(path: Path) -> TextIO:
+    """Open a plain, .gz or .zst file for streaming UTF-8 text reads."""
+    kind = compression_of(path)
+    if kind == "gzip":
+        return gzip.open(path, "rt", encoding="utf-8")
+    if kind == "zstd":
+        return _open_zstd(path)
+    return path.open("r", encoding="utf-8")
+
+
+def _variant_rank(path: Path) -> tuple[int, str]:
+    return _VARIANT_ORDER.index(compression_of(path)), path.name
+
+
+def list_inputs(directory: Path, suffix: str) -> list[Path]:
+    """Files in `directory` whose payload suffix is `suffix`, compressed or not, sorted by name.
+
+    When one input is present in several forms (X.json and X.json.gz), only one
+    is listed: the uncompressed file, else gzip, else zstd.
+    """
+    suffix = suffix.lower()
+    chosen: dict[str, Path] = {}
+    for path in directory.iterdir():
+        if not path.is_file() or logical_suffix(path) != suffix:
+            continue
+        stem = logical_stem(path)
+        current = chosen.get(stem)
+        if current is None or _variant_rank(path) < _variant_rank(current):
+            chosen[stem] = path
+    return sorted(chosen.values())
+
+
+def list_bundle_files(directory: Path) -> list[Path]:
+    """Bundle inputs in a directory: *.json, *.json.gz and *.json.zst."""
+    return list_inputs(directory, ".json")
+
+
+__all__ = [
+    "COMPRESSION_SUFFIXES",
+    "DEFAULT_COMPRESSED_EXPANSION",
+    "compression_of",
+    "estimated_size",
+    "list_bundle_files",
+    "list_inputs",
+    "logical_stem",
+    "logical_suffix",
+    "open_text",
+]
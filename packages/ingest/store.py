@@ -0,0 +1,446 @@
+"""
+Embedded SQLite store for normalized charts and analysis results.
+
+Charts are stored whole (JSON) for round-tripping, plus narrow index tables
+(observations, conditions, result risks) for lookups by patient_id, LOINC code
++ effective date, condition code and rule_id. `code_terms` holds the
+packages.ingest.code_index postings (code and display words -> resources),
+written in the same transaction as each chart. The database runs in WAL mode so
+API readers are not blocked by a bulk load.
+"""
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from packages.core.schemas.chart import PatientChart
+from packages.core.schemas.result import PatientAnalysisResult
+from packages.ingest.code_index import index_entries, parse_term
+from packages.ingest.compression import list_bundle_files
+from packages.ingest.synthea.loader import load_patient_dir
+from packages.ingest.synthea.normalizer import normalize_to_patient_chart
+from packages.ingest.synthea.parser import parse_fhir_resources
+
+SCHEMA_VERSION = 1
+DEFAULT_BATCH_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS patients (
+    patient_id TEXT PRIMARY KEY,
+    source_path TEXT,
+    name TEXT,
+    gender TEXT,
+    birth_date TEXT,
+    loaded_at TEXT NOT NULL,
+    chart_json TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS observations (
+    patient_id TEXT NOT NULL,
+    obs_id TEXT NOT NULL,
+    code TEXT,
+    code_system TEXT,
+    display TEXT,
+    effective TEXT,
+    value REAL,
+    unit TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_observations_patient ON observations (patient_id);
+CREATE INDEX IF NOT EXISTS idx_observations_code_effective ON observations (code, effective);
+CREATE TABLE IF NOT EXISTS conditions (
+    patient_id TEXT NOT NULL,
+    condition_id TEXT NOT NULL,
+    code TEXT,
+    display TEXT,
+    clinical_status TEXT,
+    onset TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_conditions_patient ON conditions (patient_id);
+CREATE INDEX IF NOT EXISTS idx_conditions_code ON conditions (code);
+CREATE TABLE IF NOT EXISTS code_terms (
+    field TEXT NOT NULL,
+    term TEXT NOT NULL,
+    patient_id TEXT NOT NULL,
+    resource_type TEXT NOT NULL,
+    resource_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_code_terms_term ON code_terms (field, term, patient_id);
+CREATE INDEX IF NOT EXISTS idx_code_terms_patient ON code_terms (patient_id);
+CREATE TABLE IF NOT EXISTS results (
+    patient_id TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    enable_agents INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    result_json TEXT NOT NULL,
+    PRIMARY KEY (patient_id, mode, enable_agents)
+);
+CREATE TABLE IF NOT EXISTS result_risks (
+    patient_id TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    enable_agents INTEGER NOT NULL,
+    rule_id TEXT NOT NULL,
+    severity TEXT,
+    message TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_result_risks_rule ON result_risks (rule_id);
+CREATE INDEX IF NOT EXISTS idx_result_risks_patient ON result_risks (patient_id, mode, enable_agents);
+"""
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _model_json(model: object) -> str:
+    if hasattr(model, "model_dump_json"):
+        return model.model_dump_json()
+    return model.json()
+
+
+def _chart_from_json(text: str) -> PatientChart:
+    if hasattr(PatientChart, "model_validate_json"):
+        return PatientChart.model_validate_json(text)
+    return PatientChart.parse_raw(text)
+
+
+def _result_from_json(text: str) -> PatientAnalysisResult:
+    if hasattr(PatientAnalysisResult, "model_validate_json"):
+        return PatientAnalysisResult.model_validate_json(text)
+    return PatientAnalysisResult.parse_raw(text)
+
+
+def connect(path: str | Path, *, readonly: bool = False) -> sqlite3.Connection:
+    """Open a store connection (WAL, NORMAL sync); creates the schema unless readonly."""
+    db_path = Path(path)
+    if readonly:
+        if not db_path.exists():
+            raise FileNotFoundError(f"Chart database not found: {db_path}")
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+    else:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _delete_patient_rows(conn: sqlite3.Connection, patient_ids: list[str]) -> None:
+    rows = [(patient_id,) for patient_id in patient_ids]
+    conn.executemany("DELETE FROM observations WHERE patient_id = ?", rows)
+    conn.executemany("DELETE FROM conditions WHERE patient_id = ?", rows)
+    conn.executemany("DELETE FROM code_terms WHERE patient_id = ?", rows)
+
+
+def _write_charts(conn: sqlite3.Connection, batch: list[tuple[PatientChart, Optional[str]]]) -> None:
+    loaded_at = _now()
+    patient_rows = []
+    observation_rows = []
+    condition_rows = []
+    term_rows = []
+    for chart, source_path in batch:
+        demographics = chart.demographics or {}
+        patient_rows.append(
+            (
+                chart.patient_id,
+                source_path,
+                demographics.get("name"),
+                demographics.get("gender"),
+                demographics.get("birth_date"),
+                loaded_at,
+                _model_json(chart),
+            )
+        )
+        for obs in chart.observations:
+            observation_rows.append(
+                (
+                    chart.patient_id,
+                    obs.id,
+                    obs.code,
+                    obs.code_system,
+                    obs.display,
+                    _iso(obs.effective_dt or obs.effective),
+                    obs.value,
+                    obs.unit,
+                )
+            )
+        for condition in chart.conditions:
+            condition_rows.append(
+                (
+                    chart.patient_id,
+                    condition.id,
+                    condition.code,
+                    condition.display,
+                    condition.clinical_status,
+                    _iso(condition.onset),
+                )
+            )
+        term_rows.extend(
+            (field, term, chart.patient_id, resource_type, resource_id)
+            for field, term, resource_type, resource_id in index_entries(chart)
+        )
+    with conn:
+        _delete_patient_rows(conn, [row[0] for row in patient_rows])
+        conn.executemany(
+            "INSERT OR REPLACE INTO patients "
+            "(patient_id, source_path, name, gender, birth_date, loaded_at, chart_json) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            patient_rows,
+        )
+        conn.executemany(
+            "INSERT INTO observations "
+            "(patient_id, obs_id, code, code_system, display, effective, value, unit) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            observation_rows,
+        )
+        conn.executemany(
+            "INSERT INTO conditions "
+            "(patient_id, condition_id, code, display, clinical_status, onset) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            condition_rows,
+        )
+        conn.executemany(
+            "INSERT INTO code_terms (field, term, patient_id, resource_type, resource_id) "
+            "VALUES (?, ?, ?, ?, ?)",
+            term_rows,
+        )
+
+
+def put_charts(
+    conn: sqlite3.Connection,
+    charts: Iterable[tuple[PatientChart, Optional[str]]],
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """Upsert (chart, source_path) pairs, one transaction per batch. Returns the count."""
+    batch: list[tuple[PatientChart, Optional[str]]] = []
+    total = 0
+    for item in charts:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            _write_charts(conn, batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        _write_charts(conn, batch)
+        total += len(batch)
+    return total
+
+
+def iter_directory_charts(
+    data_dir: str | Path, *, limit: int = 0
+) -> Iterator[tuple[PatientChart, Optional[str]]]:
+    """Normalize each bundle in data_dir; bundles without a Patient resource are skipped."""
+    files = list_bundle_files(Path(data_dir))
+    if limit > 0:
+        files = files[:limit]
+    for path in files:
+        grouped = parse_fhir_resources(load_patient_dir(path))
+        if not grouped.get("Patient"):
+            continue
+        yield normalize_to_patient_chart(grouped), str(path)
+
+
+def load_directory(
+    conn: sqlite3.Connection,
+    data_dir: str | Path,
+    *,
+    limit: int = 0,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """Bulk-load every patient bundle in data_dir."""
+    return put_charts(conn, iter_directory_charts(data_dir, limit=limit), batch_size=batch_size)
+
+
+def _write_results(conn: sqlite3.Connection, batch: list[PatientAnalysisResult], *, enable_agents: bool) -> None:
+    created_at = _now()
+    flag = 1 if enable_agents else 0
+    latest: dict[tuple[str, str], PatientAnalysisResult] = {}
+    for result in batch:  # a later result for the same patient and mode replaces an earlier one
+        meta = result.meta or {}
+        latest[(meta.get("patient_id") or "unknown", meta.get("mode") or "mock")] = result
+    result_rows = []
+    risk_rows = []
+    for (patient_id, mode), result in latest.items():
+        result_rows.append((patient_id, mode, flag, created_at, _model_json(result)))
+        risk_rows.extend(
+            (patient_id, mode, flag, risk.get("rule_id", "unknown"), risk.get("severity"), risk.get("message"))
+            for risk in result.risks or []
+        )
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO results (patient_id, mode, enable_agents, created_at, result_json) "
+            "VALUES (?, ?, ?, ?, ?)",
+            result_rows,
+        )
+        conn.executemany(
+            "DELETE FROM result_risks WHERE patient_id = ? AND mode = ? AND enable_agents = ?",
+            [(patient_id, mode, flag) for patient_id, mode in latest],
+        )
+        conn.executemany(
+            "INSERT INTO result_risks (patient_id, mode, enable_agents, rule_id, severity, message) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            risk_rows,
+        )
+
+
+def put_result(conn: sqlite3.Connection, result: PatientAnalysisResult, *, enable_agents: bool) -> None:
+    _write_results(conn, [result], enable_agents=enable_agents)
+
+
+def put_results(
+    conn: sqlite3.Connection,
+    results: Iterable[PatientAnalysisResult],
+    *,
+    enable_agents: bool,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """Upsert analysis results, one transaction per batch. Returns the count."""
+    batch: list[PatientAnalysisResult] = []
+    total = 0
+    for result in results:
+        batch.append(result)
+        if len(batch) >= batch_size:
+            _write_results(conn, batch, enable_agents=enable_agents)
+            total += len(batch)
+            batch = []
+    if batch:
+        _write_results(conn, batch, enable_agents=enable_agents)
+        total += len(batch)
+    return total
+
+
+def count_patients(conn: sqlite3.Connection) -> int:
+    return int(conn.execute("SELECT COUNT(*) FROM patients").fetchone()[0])
+
+
+def list_patients(conn: sqlite3.Connection, *, limit: int = 100, offset: int = 0) -> list[dict]:
+    rows = conn.execute(
+        "SELECT patient_id, name, gender, birth_date, source_path FROM patients "
+        "ORDER BY patient_id LIMIT ? OFFSET ?",
+        (limit, offset),
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def get_chart(conn: sqlite3.Connection, patient_id: str) -> Optional[PatientChart]:
+    row = conn.execute(
+        "SELECT chart_json FROM patients WHERE patient_id = ?", (patient_id,)
+    ).fetchone()
+    return _chart_from_json(row["chart_json"]) if row else None
+
+
+def get_source_path(conn: sqlite3.Connection, patient_id: str) -> Optional[str]:
+    row = conn.execute("SELECT source_path FROM patients WHERE patient_id = ?", (patient_id,)).fetchone()
+    return row["source_path"] if row else None
+
+
+def get_result(
+    conn: sqlite3.Connection, patient_id: str, *, mode: str = "mock", enable_agents: bool = True
+) -> Optional[PatientAnalysisResult]:
+    row = conn.execute(
+        "SELECT result_json FROM results WHERE patient_id = ? AND mode = ? AND enable_agents = ?",
+        (patient_id, mode, 1 if enable_agents else 0),
+    ).fetchone()
+    return _result_from_json(row["result_json"]) if row else None
+
+
+def get_result_json(
+    conn: sqlite3.Connection, patient_id: str, *, mode: str = "mock", enable_agents: bool = True
+) -> Optional[str]:
+    """The stored result JSON exactly as written by put_result (no parse/re-encode)."""
+    row = conn.execute(
+        "SELECT result_json FROM results WHERE patient_id = ? AND mode = ? AND enable_agents = ?",
+        (patient_id, mode, 1 if enable_agents else 0),
+    ).fetchone()
+    return row["result_json"] if row else None
+
+
+def patients_with_observation(
+    conn: sqlite3.Connection,
+    code: str,
+    *,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> list[str]:
+    """Patients with an observation of `code` effective in [since, until].
+
+    Effective times are stored as ISO strings, so bounds should be UTC-aware
+    datetimes to compare correctly against Synthea's +00:00 timestamps.
+    """
+    query = "SELECT DISTINCT patient_id FROM observations WHERE code = ?"
+    params: list[object] = [code]
+    if since is not None:
+        query += " AND effective >= ?"
+        params.append(since.isoformat())
+    if until is not None:
+        query += " AND effective <= ?"
+        params.append(until.isoformat())
+    rows = conn.execute(query + " ORDER BY patient_id", params).fetchall()
+    return [row[0] for row in rows]
+
+
+def patients_with_condition(conn: sqlite3.Connection, code: str) -> list[str]:
+    rows = conn.execute(
+        "SELECT DISTINCT patient_id FROM conditions WHERE code = ? ORDER BY patient_id", (code,)
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def patients_with_term(conn: sqlite3.Connection, query: str) -> list[str]:
+    """Patients indexed under `code=X` or `text=word` (see packages.ingest.code_index)."""
+    field, term = parse_term(query)
+    rows = conn.execute(
+        "SELECT DISTINCT patient_id FROM code_terms WHERE field = ? AND term = ? ORDER BY patient_id",
+        (field, term),
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def term_resources(conn: sqlite3.Connection, query: str, *, patient_id: str) -> list[dict]:
+    """Resources of one patient indexed under `code=X` or `text=word`."""
+    field, term = parse_term(query)
+    rows = conn.execute(
+        "SELECT resource_type, resource_id FROM code_terms "
+        "WHERE field = ? AND term = ? AND patient_id = ? ORDER BY resource_type, resource_id",
+        (field, term, patient_id),
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def patients_with_rule(conn: sqlite3.Connection, rule_id: str, *, mode: str = "mock") -> list[str]:
+    rows = conn.execute(
+        "SELECT DISTINCT patient_id FROM result_risks WHERE rule_id = ? AND mode = ? ORDER BY patient_id",
+        (rule_id, mode),
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+__all__ = [
+    "DEFAULT_BATCH_SIZE",
+    "SCHEMA_VERSION",
+    "connect",
+    "count_patients",
+    "get_chart",
+    "get_result",
+    "get_result_json",
+    "get_source_path",
+    "iter_directory_charts",
+    "list_patients",
+    "load_directory",
+    "patients_with_condition",
+    "patients_with_observation",
+    "patients_with_rule",
+    "patients_with_term",
+    "put_charts",
+    "put_result",
+    "put_results",
+    "term_resources",
+]
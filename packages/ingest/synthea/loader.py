@@ -3,23 +3,28 @@ from __future__ import annotations
 import json
 from pathlib import Path
 
+from packages.core.tracing import current_span, traced
+from packages.ingest.compression import list_bundle_files, open_text
 
+
+@traced()
 def load_patient_dir(path: Path) -> list[dict]:
-    """Load JSON resources from a Synthea patient directory or bundle file."""
+    """Load JSON resources from a Synthea patient directory or bundle file (.json, .json.gz, .json.zst)."""
+    current_span().set_attribute("path", str(path))
     if not path.exists():
         raise FileNotFoundError(f"Patient path not found: {path}")
 
     if path.is_file():
-        with path.open("r", encoding="utf-8") as handle:
+        with open_text(path) as handle:
             return [{"file_path": str(path), "payload": json.load(handle), "input_kind": "file"}]
 
     if not path.is_dir():
         raise FileNotFoundError(f"Patient directory not found: {path}")
 
     resources: list[dict] = []
-    for file_path in sorted(path.glob("*.json")):
-        with file_path.open("r", encoding="utf-8") as handle:
+    for file_path in list_bundle_files(path):
+        with open_text(file_path) as handle:
             resources.append(
                 {"file_path": str(file_path), "payload": json.load(handle), "input_kind": "dir"}
             )
-    return resources
\ No newline at end of file
+    return resources
@@ -13,6 +13,7 @@ from packages.core.schemas.chart import (
     PatientChart,
     SourceRef,
 )
+from packages.core.tracing import traced
 
 
 def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
@@ -125,6 +126,7 @@ def _source_ref(resource: dict, file_path: Optional[str]) -> SourceRef:
     )
 
 
+@traced()
 def normalize_to_patient_chart(grouped: dict[str, list[dict]]) -> PatientChart:
     """Normalize grouped FHIR resources into a minimal PatientChart."""
     meta_items = grouped.get("__meta__", [])
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from typing import Iterable
 
+from packages.core.tracing import traced
+
 KNOWN_TYPES = {
     "Patient",
     "Condition",
@@ -41,6 +43,7 @@ def _flatten_resources(resources: list[dict]) -> Iterable[dict]:
             yield {"resource": payload, "file_path": file_path, "input_kind": input_kind}
 
 
+@traced()
 def parse_fhir_resources(resources: list[dict]) -> dict[str, list[dict]]:
     """Group FHIR resources by resourceType, ignoring unknown types."""
     grouped: dict[str, list[dict]] = {}
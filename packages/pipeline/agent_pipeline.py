@@ -1,10 +1,20 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Literal, Optional
+from typing import Iterable, Literal, Optional
 
 from packages.core.llm import LLMClient
-from packages.core.schemas.result import PatientAnalysisResult
+from packages.core.schemas.chart import PatientChart
+from packages.core.schemas.output import NarrativeSummary
+from packages.core.schemas.result import (
+    ContradictionItem,
+    MissingInfoItem,
+    PatientAnalysisResult,
+    TimelineEntry,
+)
+from packages.core.schemas.snapshot import Snapshot
+from packages.core.tracing import traced
+from packages.core.utils.dates import ChartTimeIndex
 from packages.ingest.synthea.loader import load_patient_dir
 from packages.ingest.synthea.normalizer import normalize_to_patient_chart
 from packages.ingest.synthea.parser import parse_fhir_resources
@@ -13,9 +23,16 @@ from packages.pipeline.agents.missing_info_agent import run_missing_info_agent
 from packages.pipeline.agents.timeline_agent import run_timeline_agent
 from packages.pipeline.agents.verifier_agent import verify_result
 from packages.pipeline.evidence_enrich import enrich_evidence, enrich_result_evidence
+from packages.pipeline.sections import (
+    AGENT_STAGES,
+    STAGES,
+    TIME_INDEX_STAGES,
+    default_sections,
+    resolve_stages,
+)
 from packages.pipeline.steps.narrative import generate_narrative
 from packages.pipeline.steps.risks import run_risk_rules
-from packages.pipeline.steps.snapshot import build_snapshot_from_chart
+from packages.pipeline.steps.snapshot import build_snapshot_model
 
 
 def _serialize_risks(risks: list[dict]) -> list[dict]:
@@ -44,6 +61,7 @@ def _serialize_risks(risks: list[dict]) -> list[dict]:
     return serialized
 
 
+@traced()
 def run_agent_pipeline(
     path: str | Path,
     *,
@@ -52,51 +70,142 @@ def run_agent_pipeline(
     llm_client: Optional[LLMClient] = None,
     llm_debug: bool = False,
     require_llm: bool = False,
+    sections: Optional[Iterable[str]] = None,
 ) -> PatientAnalysisResult:
     path_obj = Path(path)
     resources = load_patient_dir(path_obj)
     grouped = parse_fhir_resources(resources)
     chart = normalize_to_patient_chart(grouped)
-    snapshot_text = build_snapshot_from_chart(chart)
-    risks = run_risk_rules(chart)
-    enrich_evidence(risks, chart, str(path_obj))
-    llm = llm_client or (LLMClient() if mode == "llm" else None)
-    narrative = generate_narrative(
-        snapshot_text,
-        chart.patient_id,
-        llm,
-        require_llm=require_llm,
+    return run_chart_pipeline(
+        chart,
+        str(path_obj),
+        mode=mode,
+        enable_agents=enable_agents,
+        llm_client=llm_client,
         llm_debug=llm_debug,
+        require_llm=require_llm,
+        sections=sections,
     )
 
-    timeline = None
-    missing_info = None
-    contradictions = None
-    if enable_agents:
-        timeline = run_timeline_agent(chart)
-        missing_info = run_missing_info_agent(chart)
-        contradictions = run_contradiction_agent(chart)
-        result = PatientAnalysisResult(
-            snapshot=snapshot_text,
-            risks=_serialize_risks(risks),
-            narrative=narrative,
-            meta={"patient_id": chart.patient_id, "source_path": str(path_obj), "mode": mode},
-            timeline=timeline,
-            missing_info=missing_info,
-            contradictions=contradictions,
+
+@traced()
+def run_chart_pipeline(
+    chart: PatientChart,
+    source_path: str,
+    *,
+    mode: Literal["mock", "llm"] = "mock",
+    enable_agents: bool = False,
+    llm_client: Optional[LLMClient] = None,
+    llm_debug: bool = False,
+    require_llm: bool = False,
+    sections: Optional[Iterable[str]] = None,
+) -> PatientAnalysisResult:
+    """Run the pipeline on an already-normalized chart (e.g. from bulk ingest).
+
+    `sections` limits the result to those sections and runs only the stages
+    they need (see packages.pipeline.sections); requesting an agent section
+    runs that agent, and verifies the result, regardless of `enable_agents`. Without it the result has
+    snapshot, risks and narrative, plus the agent sections when enabled.
+    """
+    selected = None if sections is None else tuple(sections)
+    requested = default_sections(enable_agents) if selected is None else selected
+    verify = enable_agents or bool(AGENT_STAGES.intersection(requested))
+    stages = resolve_stages(requested, verify=verify)
+    time_index = ChartTimeIndex(chart) if TIME_INDEX_STAGES.intersection(stages) else None
+    risks = run_risk_rules(chart) if "risks" in stages else []
+    snapshot = None
+    if "snapshot" in stages:
+        snapshot = build_snapshot_model(chart, time_index=time_index, risks=risks)
+    enrich_evidence(risks, chart, source_path)
+    narrative = None
+    if "narrative" in stages:
+        llm = llm_client or (LLMClient() if mode == "llm" else None)
+        narrative = generate_narrative(
+            snapshot,
+            chart.patient_id,
+            llm,
+            require_llm=require_llm,
+            llm_debug=llm_debug,
         )
-        enrich_result_evidence(result, chart, str(path_obj))
-        return verify_result(result)
 
-    return PatientAnalysisResult(
+    timeline = run_timeline_agent(chart) if "timeline" in stages else None
+    missing_info = run_missing_info_agent(chart, time_index=time_index) if "missing_info" in stages else None
+    contradictions = (
+        run_contradiction_agent(chart, time_index=time_index) if "contradictions" in stages else None
+    )
+    return assemble_result(
+        chart,
+        source_path,
+        mode=mode,
+        enable_agents=verify,
+        snapshot=snapshot,
+        risks=risks,
+        narrative=narrative,
+        timeline=timeline,
+        missing_info=missing_info,
+        contradictions=contradictions,
+        sections=selected,
+        stages=stages,
+    )
+
+
+def _keep_sections(result: PatientAnalysisResult, sections: Iterable[str], stages: Iterable[str]) -> None:
+    """Drop sections that were only computed as dependencies and record the selection in meta."""
+    keep = set(sections)
+    if "snapshot" not in keep:
+        result.snapshot = None
+        result.attach_snapshot_model(None)
+    if "risks" not in keep:
+        result.risks = []
+    if "narrative" not in keep:
+        result.narrative = None
+    for name in AGENT_STAGES:
+        if name not in keep:
+            setattr(result, name, None)
+    result.meta["sections"] = ",".join(stage for stage in STAGES if stage in keep)
+    result.meta["stages"] = ",".join(stages)
+
+
+def assemble_result(
+    chart: PatientChart,
+    source_path: str,
+    *,
+    mode: str,
+    enable_agents: bool,
+    snapshot: Optional[Snapshot | str],
+    risks: list[dict],
+    narrative: Optional[NarrativeSummary],
+    timeline: Optional[list[TimelineEntry]] = None,
+    missing_info: Optional[list[MissingInfoItem]] = None,
+    contradictions: Optional[list[ContradictionItem]] = None,
+    sections: Optional[Iterable[str]] = None,
+    stages: Optional[Iterable[str]] = None,
+) -> PatientAnalysisResult:
+    """Build the result from stage outputs; agent results are evidence-enriched and verified.
+
+    A structured Snapshot is rendered into `snapshot` and kept on the result
+    for in-process consumers such as the markdown renderer. When `sections`
+    is given, only those sections are kept and meta records the sections and
+    the `stages` that ran.
+    """
+    snapshot_text = snapshot if snapshot is None or isinstance(snapshot, str) else snapshot.text
+    result = PatientAnalysisResult(
         snapshot=snapshot_text,
         risks=_serialize_risks(risks),
         narrative=narrative,
-        meta={"patient_id": chart.patient_id, "source_path": str(path_obj), "mode": mode},
+        meta={"patient_id": chart.patient_id, "source_path": source_path, "mode": mode},
         timeline=timeline,
         missing_info=missing_info,
         contradictions=contradictions,
     )
+    if isinstance(snapshot, Snapshot):
+        result.attach_snapshot_model(snapshot)
+    if enable_agents:
+        enrich_result_evidence(result, chart, source_path)
+        result = verify_result(result)
+    if sections is not None:
+        _keep_sections(result, sections, stages if stages is not None else resolve_stages(sections))
+    return result
 
 
-__all__ = ["run_agent_pipeline"]
+__all__ = ["assemble_result", "run_agent_pipeline", "run_chart_pipeline"]
@@ -5,6 +5,10 @@ from typing import Optional
 
 from packages.core.schemas.chart import PatientChart, SourceRef
 from packages.core.schemas.result import ContradictionItem, Evidence
+from packages.core.tracing import traced
+from packages.core.utils.dates import ChartTimeIndex
+
+INPUTS = {"conditions": None}
 
 
 def _condition_label(condition) -> Optional[str]:
@@ -29,16 +33,23 @@ def _evidence_for_condition(condition) -> list[Evidence]:
     return evidence
 
 
-def run_contradiction_agent(chart: PatientChart) -> list[ContradictionItem]:
+@traced()
+def run_contradiction_agent(
+    chart: PatientChart, *, time_index: Optional[ChartTimeIndex] = None
+) -> list[ContradictionItem]:
     """Return deterministic contradictions from chart content."""
-    grouped: dict[str, list[tuple[datetime, str, list[SourceRef]]]] = {}
-    for condition in chart.conditions:
+    if time_index is None:
+        time_index = ChartTimeIndex(chart)
+    # Groups keep chart order (first appearance); conditions_by_onset is
+    # onset-ordered, so the entries within each group are too.
+    grouped: dict[str, list[tuple[datetime, str, list[SourceRef]]]] = {
+        key: [] for key in map(_condition_key, chart.conditions) if key
+    }
+    for condition in time_index.conditions_by_onset():
         key = _condition_key(condition)
         if not key:
             continue
         onset = _condition_onset(condition)
-        if not onset:
-            continue
         evidence = _evidence_for_condition(condition)
         if not evidence:
             continue
@@ -48,7 +59,6 @@ def run_contradiction_agent(chart: PatientChart) -> list[ContradictionItem]:
     for _, entries in grouped.items():
         if len(entries) < 2:
             continue
-        entries.sort(key=lambda item: item[0])
         first = entries[0]
         for candidate in entries[1:]:
             if candidate[0].date() != first[0].date():
@@ -5,32 +5,29 @@ from typing import Optional
 
 from packages.core.schemas.chart import PatientChart
 from packages.core.schemas.result import MissingInfoItem
+from packages.core.tracing import traced
+from packages.core.utils.dates import ChartTimeIndex
+from packages.ingest.code_index import CodeIndex
 
 LOINC_SYSTEM = "http://loinc.org"
 A1C_CODES = {"4548-4"}
 BP_PANEL_CODE = "85354-9"
 
+INPUTS = {"conditions": None, "encounters": None, "observations": None}
 
-def _obs_date(obs) -> Optional[datetime]:
-    return obs.effective_dt or obs.effective
 
+def _reference_date(time_index: ChartTimeIndex) -> Optional[datetime]:
+    dates = [
+        date_value
+        for date_value in (time_index.latest("observation"), time_index.latest("encounter"))
+        if date_value
+    ]
+    return max(dates) if dates else None
 
-def _reference_date(chart: PatientChart) -> Optional[datetime]:
-    dates = []
-    for obs in chart.observations:
-        date_value = _obs_date(obs)
-        if date_value:
-            dates.append(date_value)
-    for encounter in chart.encounters:
-        date_value = encounter.start or encounter.end
-        if date_value:
-            dates.append(date_value)
-    if not dates:
-        return None
-    return max(dates)
 
-
-def _has_condition_match(chart: PatientChart, tokens: tuple[str, ...]) -> bool:
+def _has_condition_match(chart: PatientChart, tokens: tuple[str, ...], index: Optional[CodeIndex]) -> bool:
+    if index is not None:
+        return any(chart.patient_id in index.match(token, resource_type="Condition") for token in tokens)
     for condition in chart.conditions:
         text = " ".join([condition.display or "", condition.code or ""]).lower()
         if any(token in text for token in tokens):
@@ -38,40 +35,40 @@ def _has_condition_match(chart: PatientChart, tokens: tuple[str, ...]) -> bool:
     return False
 
 
-def _most_recent_a1c_date(chart: PatientChart) -> Optional[datetime]:
-    candidates = []
-    for obs in chart.observations:
-        if obs.code_system != LOINC_SYSTEM or obs.code not in A1C_CODES:
-            continue
-        date_value = _obs_date(obs)
-        if date_value:
-            candidates.append(date_value)
-    return max(candidates) if candidates else None
-
-
-def _most_recent_bp_date(chart: PatientChart) -> Optional[datetime]:
-    candidates = []
-    for obs in chart.observations:
-        if obs.code_system != LOINC_SYSTEM or obs.code != BP_PANEL_CODE:
-            continue
-        date_value = _obs_date(obs)
-        if date_value:
-            candidates.append(date_value)
-    return max(candidates) if candidates else None
-
-
-def run_missing_info_agent(chart: PatientChart) -> list[MissingInfoItem]:
-    """Return deterministic missing-info items based on chart content."""
+def _most_recent_loinc_date(time_index: ChartTimeIndex, codes: set[str]) -> Optional[datetime]:
+    dates = [
+        date_value
+        for date_value in (time_index.latest("observation", code=code, system=LOINC_SYSTEM) for code in codes)
+        if date_value
+    ]
+    return max(dates) if dates else None
+
+
+@traced()
+def run_missing_info_agent(
+    chart: PatientChart,
+    *,
+    index: Optional[CodeIndex] = None,
+    time_index: Optional[ChartTimeIndex] = None,
+) -> list[MissingInfoItem]:
+    """Return deterministic missing-info items based on chart content.
+
+    `index` may be a dataset-level CodeIndex that already holds this chart
+    (without one the chart's few conditions are scanned directly) and
+    `time_index` a ChartTimeIndex shared with other stages (built when omitted).
+    """
     missing: list[MissingInfoItem] = []
-    reference_date = _reference_date(chart)
+    if time_index is None:
+        time_index = ChartTimeIndex(chart)
+    reference_date = _reference_date(time_index)
     if not reference_date:
         return missing
 
-    diabetes_present = _has_condition_match(chart, ("diabetes",))
-    hypertension_present = _has_condition_match(chart, ("hypertension", "high blood pressure", "htn"))
+    diabetes_present = _has_condition_match(chart, ("diabetes",), index)
+    hypertension_present = _has_condition_match(chart, ("hypertension", "high blood pressure", "htn"), index)
 
     if diabetes_present:
-        recent_a1c = _most_recent_a1c_date(chart)
+        recent_a1c = _most_recent_loinc_date(time_index, A1C_CODES)
         if not recent_a1c or recent_a1c < reference_date - timedelta(days=365):
             missing.append(
                 MissingInfoItem(
@@ -86,7 +83,7 @@ def run_missing_info_agent(chart: PatientChart) -> list[MissingInfoItem]:
             )
 
     if hypertension_present:
-        recent_bp = _most_recent_bp_date(chart)
+        recent_bp = _most_recent_loinc_date(time_index, {BP_PANEL_CODE})
         if not recent_bp or recent_bp < reference_date - timedelta(days=180):
             missing.append(
                 MissingInfoItem(
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+import heapq
 from datetime import datetime
+from itertools import chain
+from operator import itemgetter
 from typing import Iterable, Optional
 
 from packages.core.schemas.chart import Encounter, Observation, PatientChart
 from packages.core.schemas.result import Evidence, TimelineEntry
+from packages.core.tracing import traced
+
+INPUTS = {"encounters": None, "observations": None}
 
 
 def _parse_datetime(value: str) -> Optional[datetime]:
@@ -63,74 +69,110 @@ def _evidence(resource_type: str, resource_id: Optional[str]) -> list[Evidence]:
     return []
 
 
-def _iter_encounter_entries(
-    encounters: Iterable[Encounter],
-) -> Iterable[tuple[datetime, TimelineEntry]]:
+TimelineCursor = tuple[str, str]
+"""(entry date ISO string, tiebreak id) of the last entry of a page; see timeline_cursor."""
+
+_SortKey = tuple[datetime, str, str, str]
+_Candidate = tuple[_SortKey, str, str, object]
+
+
+def _tiebreak(sources: list, resource_id: Optional[str]) -> Optional[str]:
+    if sources:
+        return sources[0].resource_id or sources[0].doc_id
+    return resource_id or None
+
+
+def _dated(value: Optional[datetime | str]) -> Optional[tuple[datetime, str]]:
+    iso_date = _iso_date(value)
+    if not value or not iso_date:
+        return None
+    date_dt = value if isinstance(value, datetime) else _parse_datetime(iso_date)
+    if not date_dt:
+        return None
+    return date_dt, iso_date
+
+
+def _iter_encounter_candidates(encounters: Iterable[Encounter]) -> Iterable[_Candidate]:
     for encounter in encounters:
-        date_value = encounter.start or encounter.end
-        iso_date = _iso_date(date_value)
-        if not date_value or not iso_date:
-            continue
-        date_dt = date_value if isinstance(date_value, datetime) else _parse_datetime(iso_date)
-        if not date_dt:
+        dated = _dated(encounter.start or encounter.end)
+        if dated is None:
             continue
-        summary = _encounter_summary(encounter)
-        evidence = encounter.sources or _evidence("Encounter", encounter.id)
-        if not evidence:
+        tiebreak = _tiebreak(encounter.sources, encounter.id)
+        if tiebreak is None:
             continue
-        yield (
-            date_dt,
-            TimelineEntry(
-                date=iso_date,
-                type="ENCOUNTER",
-                summary=summary,
-                evidence=list(evidence),
-            ),
-        )
-
-
-def _iter_observation_entries(
-    observations: Iterable[Observation],
-) -> Iterable[tuple[datetime, TimelineEntry]]:
+        date_dt, iso_date = dated
+        yield (date_dt, "ENCOUNTER", _encounter_summary(encounter), tiebreak), iso_date, "Encounter", encounter
+
+
+def _iter_observation_candidates(observations: Iterable[Observation]) -> Iterable[_Candidate]:
     for observation in observations:
-        date_value = observation.effective_dt or observation.effective
-        iso_date = _iso_date(date_value)
-        if not date_value or not iso_date:
+        dated = _dated(observation.effective_dt or observation.effective)
+        if dated is None:
             continue
-        date_dt = date_value if isinstance(date_value, datetime) else _parse_datetime(iso_date)
-        if not date_dt:
+        tiebreak = _tiebreak(observation.sources, observation.id)
+        if tiebreak is None:
             continue
-        summary = _observation_summary(observation)
-        entry_type = _category_label(observation)
-        evidence = observation.sources or _evidence("Observation", observation.id)
-        if not evidence:
-            continue
-        yield (
-            date_dt,
-            TimelineEntry(
-                date=iso_date,
-                type=entry_type,
-                summary=summary,
-                evidence=list(evidence),
-            ),
-        )
-
-
-def run_timeline_agent(chart: PatientChart, *, max_entries: int = 20) -> list[TimelineEntry]:
-    """Return deterministic timeline entries from chart encounters/observations."""
-    entries: list[tuple[datetime, TimelineEntry]] = []
-    entries.extend(list(_iter_encounter_entries(chart.encounters)))
-    entries.extend(list(_iter_observation_entries(chart.observations)))
-    entries.sort(
-        key=lambda item: (
-            item[0],
-            item[1].type,
-            item[1].summary,
-            item[1].evidence[0].resource_id or item[1].evidence[0].doc_id,
-        ),
-        reverse=True,
-    )
-    return [entry for _, entry in entries[:max_entries]]
-
-
-__all__ = ["run_timeline_agent"]
+        date_dt, iso_date = dated
+        key = (date_dt, _category_label(observation), _observation_summary(observation), tiebreak)
+        yield key, iso_date, "Observation", observation
+
+
+def _materialize(candidate: _Candidate) -> TimelineEntry:
+    key, iso_date, resource_type, resource = candidate
+    evidence = resource.sources or _evidence(resource_type, resource.id)
+    return TimelineEntry(date=iso_date, type=key[1], summary=key[2], evidence=list(evidence))
+
+
+# Sorts after every type and summary: an anchor at (date, _LAST, _LAST, id) is
+# ordered before every entry at that date.
+_LAST = "\U0010ffff"
+
+
+def _cursor_anchor(candidates: list[_Candidate], cursor: TimelineCursor) -> tuple:
+    """Sort key the cursor points at.
+
+    When that entry is gone its type and summary are unknown, so the anchor
+    sits ahead of everything at the cursor's date: entries at that timestamp
+    are returned (again, if an earlier page had them) rather than skipped.
+    """
+    cursor_date = _parse_datetime(cursor[0])
+    if cursor_date is None:
+        raise ValueError(f"invalid timeline cursor date: {cursor[0]!r}")
+    matches = [key for key, _, _, _ in candidates if key[0] == cursor_date and key[3] == cursor[1]]
+    # With duplicate (date, id) pairs, resume after the first one so nothing is skipped.
+    return max(matches) if matches else (cursor_date, _LAST, _LAST, cursor[1])
+
+
+def timeline_cursor(entry: TimelineEntry) -> TimelineCursor:
+    """Cursor for the page after `entry` (pass the last entry of a page)."""
+    first = entry.evidence[0]
+    return entry.date, first.resource_id or first.doc_id
+
+
+@traced()
+def run_timeline_agent(
+    chart: PatientChart,
+    *,
+    max_entries: int = 20,
+    cursor: Optional[TimelineCursor] = None,
+) -> list[TimelineEntry]:
+    """Return deterministic timeline entries from chart encounters/observations.
+
+    Entries are newest first by (date, type, summary, tiebreak id); only the
+    top `max_entries` are materialized, selected with a heap. With `cursor`
+    (see timeline_cursor) only entries ordered after that entry are returned,
+    so callers can page back through history; if the cursor's entry has since
+    been removed, the page restarts at the top of the cursor's timestamp.
+    """
+    if max_entries <= 0:
+        return []
+    candidates = chain(_iter_encounter_candidates(chart.encounters), _iter_observation_candidates(chart.observations))
+    if cursor is not None:
+        candidates = list(candidates)
+        anchor = _cursor_anchor(candidates, cursor)
+        candidates = (candidate for candidate in candidates if candidate[0] < anchor)
+    top = heapq.nlargest(max_entries, candidates, key=itemgetter(0))
+    return [_materialize(candidate) for candidate in top]
+
+
+__all__ = ["TimelineCursor", "run_timeline_agent", "timeline_cursor"]
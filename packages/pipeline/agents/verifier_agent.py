@@ -3,6 +3,7 @@ from __future__ import annotations
 from typing import Iterable
 
 from packages.core.schemas.result import PatientAnalysisResult
+from packages.core.tracing import traced
 from packages.pipeline.evidence_enrich import collect_result_evidence
 
 
@@ -14,6 +15,7 @@ def _has_text(value: object) -> bool:
     return isinstance(value, str) and value.strip() != ""
 
 
+@traced()
 def verify_result(result: PatientAnalysisResult) -> PatientAnalysisResult:
     """Drop invalid agent artifacts and citations deterministically."""
     try:
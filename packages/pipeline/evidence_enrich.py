@@ -4,6 +4,7 @@ from typing import Dict, Iterable, List
 
 from packages.core.schemas.chart import Observation, PatientChart, SourceRef
 from packages.core.schemas.result import PatientAnalysisResult
+from packages.core.tracing import traced
 
 
 def build_observation_index(chart: PatientChart) -> Dict[str, Observation]:
@@ -38,6 +39,7 @@ def _normalize_evidence_list(evidence: Iterable[object]) -> list[SourceRef]:
     return normalized
 
 
+@traced()
 def enrich_evidence(risks: list[dict], chart: PatientChart, source_path: str) -> list[dict]:
     for risk in risks:
         evidence = risk.get("evidence") or []
@@ -73,6 +75,7 @@ def collect_result_evidence(result: PatientAnalysisResult) -> List[SourceRef]:
     return sources
 
 
+@traced()
 def enrich_result_evidence(
     result: PatientAnalysisResult, chart: PatientChart, source_path: str
 ) -> PatientAnalysisResult:
@@ -0,0 +1,327 @@
+"""
+Incremental re-analysis: fold newly appended FHIR resources into a normalized
+chart and patch its previous PatientAnalysisResult.
+
+The delta is normalized with the regular normalizer and merged the way a full
+bundle would order it (appended per resource type, MedicationRequest before
+MedicationStatement; a resource whose id already exists is replaced in place).
+Rules and agents declare the chart fields and codes they read (`INPUTS`);
+only those whose inputs the delta touched are re-run (unless their manifest
+says they can be skipped), the rest reuse their previous output. A rule with
+a `horizon_days` manifest also counts as touched when the delta moves the
+chart's latest date and that flips whether the horizon skips it. The snapshot
+is rebuilt from the patched risks, and the narrative is regenerated only when
+the snapshot text changed. Evidence
+enrichment and verification run over the whole result, so the output equals a
+full run_chart_pipeline over the merged chart.
+"""
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime
+from typing import Any, Iterable, Literal, Optional
+
+from packages.core.llm import LLMClient
+from packages.core.schemas.chart import PatientChart
+from packages.core.schemas.result import PatientAnalysisResult
+from packages.core.utils.dates import ChartTimeIndex
+from packages.ingest.store import get_chart, get_result, get_source_path, put_charts, put_result
+from packages.ingest.synthea.normalizer import normalize_to_patient_chart
+from packages.ingest.synthea.parser import parse_fhir_resources
+from packages.pipeline.agent_pipeline import assemble_result, run_chart_pipeline
+from packages.pipeline.agents import contradiction_agent, missing_info_agent, timeline_agent
+from packages.pipeline.evidence_enrich import enrich_evidence
+from packages.pipeline.steps.narrative import generate_narrative
+from packages.pipeline.steps.risks import (
+    as_sourceref,
+    chart_input_summary,
+    dispatch_rule_inputs,
+    execute_rule,
+    rule_skip_reason,
+)
+from packages.pipeline.steps.snapshot import build_snapshot_model
+from packages.risklib.rules import discover_rules, rule_manifests
+
+CHART_FIELDS = ("encounters", "conditions", "medications", "allergies", "observations", "notes")
+
+# field -> codes touched; a present key with an empty set still marks the field as touched
+Touched = dict[str, set[str]]
+Inputs = Optional[dict[str, Optional[frozenset[str]]]]
+
+
+def normalize_delta(resources: Iterable[dict]) -> PatientChart:
+    """Normalize loose FHIR resources (or Bundles of them) into a partial chart."""
+    items = [{"payload": resource, "file_path": None, "input_kind": "delta"} for resource in resources]
+    return normalize_to_patient_chart(parse_fhir_resources(items))
+
+
+def _item_codes(field: str, item: Any) -> set[str]:
+    if field == "observations":
+        codes = {item.code} if item.code else set()
+        codes.update(c.get("code") for c in item.components or [] if c.get("code"))
+        return codes
+    if field == "conditions":
+        return {item.code} if item.code else set()
+    return set()
+
+
+def _item_key(field: str, item: Any) -> tuple[Optional[str], str]:
+    if field == "medications":
+        source = item.sources[0] if item.sources else None
+        return (source.resource_type if source else None), item.id
+    return None, item.id
+
+
+def _merge_field(field: str, existing: list, added: list, touched: Touched) -> list:
+    merged = list(existing)
+    positions = {_item_key(field, item): index for index, item in enumerate(merged)}
+    for item in added:
+        codes = touched.setdefault(field, set())
+        codes.update(_item_codes(field, item))
+        key = _item_key(field, item)
+        if item.id and key in positions:
+            codes.update(_item_codes(field, merged[positions[key]]))
+            merged[positions[key]] = item
+            continue
+        if field == "medications" and key[0] == "MedicationRequest":
+            # the normalizer emits every MedicationRequest before any MedicationStatement
+            index = sum(1 for other in merged if _item_key(field, other)[0] == "MedicationRequest")
+            merged.insert(index, item)
+            positions = {_item_key(field, other): i for i, other in enumerate(merged)}
+            continue
+        positions[key] = len(merged)
+        merged.append(item)
+    return merged
+
+
+def apply_delta(chart: PatientChart, delta: PatientChart) -> tuple[PatientChart, Touched]:
+    """Merged copy of chart with the delta's resources, plus the fields/codes touched."""
+    touched: Touched = {}
+    updates: dict[str, Any] = {}
+    for field in CHART_FIELDS:
+        added = getattr(delta, field)
+        if added:
+            updates[field] = _merge_field(field, getattr(chart, field), added, touched)
+    if delta.patient_id != "unknown":
+        if delta.patient_id != chart.patient_id:
+            raise ValueError(f"Delta Patient {delta.patient_id} does not match chart {chart.patient_id}")
+        updates["demographics"] = delta.demographics
+        updates["sources"] = delta.sources[:1] + chart.sources[1:]
+        touched["demographics"] = set()
+    if hasattr(chart, "model_copy"):
+        return chart.model_copy(update=updates), touched
+    return chart.copy(update=updates), touched
+
+
+def is_affected(inputs: Inputs, touched: Touched) -> bool:
+    """Whether a rule/agent with these declared inputs reads anything the delta touched."""
+    if not touched:
+        return False
+    if inputs is None:
+        return True
+    for field, codes in inputs.items():
+        if field in touched and (codes is None or codes & touched[field]):
+            return True
+    return False
+
+
+def _latest_date(summary: dict) -> Optional[datetime]:
+    """Chart-wide latest date of an input summary (what rule horizons count back from)."""
+    dates = [date for codes in summary.values() for date in codes.values() if date is not None]
+    return max(dates) if dates else None
+
+
+def _copy(model: Any) -> Any:
+    if hasattr(model, "model_copy"):
+        return model.model_copy(deep=True)
+    return model.copy(deep=True)
+
+
+def _previous_risks(previous: PatientAnalysisResult) -> dict[str, list[dict]]:
+    grouped: dict[str, list[dict]] = {}
+    for risk in previous.risks or []:
+        evidence = [as_sourceref(item) for item in risk.get("evidence") or []]
+        grouped.setdefault(risk.get("rule_id", "unknown"), []).append(
+            {
+                "rule_id": risk.get("rule_id", "unknown"),
+                "severity": risk.get("severity", "medium"),
+                "message": risk.get("message", ""),
+                "evidence": [source for source in evidence if source is not None],
+            }
+        )
+    return grouped
+
+
+def reanalyze_chart(
+    chart: PatientChart,
+    previous: PatientAnalysisResult,
+    resources: Iterable[dict],
+    source_path: str,
+    *,
+    mode: Literal["mock", "llm"] = "mock",
+    enable_agents: bool = False,
+    llm_client: Optional[LLMClient] = None,
+    llm_debug: bool = False,
+    require_llm: bool = False,
+) -> tuple[PatientChart, PatientAnalysisResult, dict]:
+    """Apply a delta of FHIR resources and patch `previous` (the result for `chart`).
+
+    Returns (merged chart, result, report); the report lists which rules and
+    agents were re-run. Falls back to a full run when `previous` was produced
+    with a different mode or agent setting, or holds risks no rule module owns.
+    """
+    merged, touched = apply_delta(chart, normalize_delta(resources))
+    runners = discover_rules()
+    previous_risks = _previous_risks(previous)
+    report: dict = {
+        "patient_id": merged.patient_id,
+        "touched": {field: sorted(codes) for field, codes in sorted(touched.items())},
+        "full": False,
+        "rules_rerun": [],
+        "rules_reused": [],
+        "rules_skipped": [],
+        "agents_rerun": [],
+        "agents_reused": [],
+        "narrative_regenerated": False,
+    }
+
+    compatible = (
+        (previous.meta or {}).get("mode") == mode
+        and (previous.timeline is not None) == enable_agents
+        and set(previous_risks) <= set(runners)
+    )
+    if not compatible:
+        report["full"] = True
+        result = run_chart_pipeline(
+            merged,
+            source_path,
+            mode=mode,
+            enable_agents=enable_agents,
+            llm_client=llm_client,
+            llm_debug=llm_debug,
+            require_llm=require_llm,
+        )
+        return merged, result, report
+
+    manifests = rule_manifests()
+    buckets, summary = dispatch_rule_inputs(merged, runners, manifests)
+    previous_summary = None
+    if touched and any(manifest.get("horizon_days") is not None for manifest in manifests.values()):
+        before = chart_input_summary(chart)
+        if _latest_date(before) != _latest_date(summary):
+            previous_summary = before
+    risks: list[dict] = []
+    for rule_id, runner in sorted(runners.items()):
+        manifest = manifests.get(rule_id, {})
+        # Horizons count back from the chart-wide latest date, so a delta that
+        # moves it can start or stop a horizon skip without touching the inputs.
+        horizon_flipped = (
+            previous_summary is not None
+            and manifest.get("horizon_days") is not None
+            and bool(rule_skip_reason(manifest, previous_summary)) != bool(rule_skip_reason(manifest, summary))
+        )
+        if not horizon_flipped and not is_affected(manifest.get("inputs"), touched):
+            risks.extend(previous_risks.get(rule_id, []))
+            report["rules_reused"].append(rule_id)
+        elif rule_skip_reason(manifest, summary):
+            report["rules_skipped"].append(rule_id)
+        else:
+            risks.extend(execute_rule(rule_id, runner, merged, observations=buckets.get(rule_id))[0])
+            report["rules_rerun"].append(rule_id)
+
+    time_index = ChartTimeIndex(merged)
+    snapshot = build_snapshot_model(merged, time_index=time_index, risks=risks)
+    enrich_evidence(risks, merged, source_path)
+
+    narrative = _copy(previous.narrative) if previous.narrative is not None else None
+    if narrative is None or snapshot.text != previous.snapshot:
+        llm = llm_client or (LLMClient() if mode == "llm" else None)
+        narrative = generate_narrative(
+            snapshot,
+            merged.patient_id,
+            llm,
+            require_llm=require_llm,
+            llm_debug=llm_debug,
+        )
+        report["narrative_regenerated"] = True
+
+    agent_outputs: dict[str, Optional[list]] = {"timeline": None, "missing_info": None, "contradictions": None}
+    if enable_agents:
+        agents = {
+            "timeline": (timeline_agent.INPUTS, lambda: timeline_agent.run_timeline_agent(merged)),
+            "missing_info": (
+                missing_info_agent.INPUTS,
+                lambda: missing_info_agent.run_missing_info_agent(merged, time_index=time_index),
+            ),
+            "contradictions": (
+                contradiction_agent.INPUTS,
+                lambda: contradiction_agent.run_contradiction_agent(merged, time_index=time_index),
+            ),
+        }
+        for name, (inputs, run) in agents.items():
+            if is_affected(inputs, touched):
+                agent_outputs[name] = run()
+                report["agents_rerun"].append(name)
+            else:
+                agent_outputs[name] = [_copy(item) for item in getattr(previous, name) or []]
+                report["agents_reused"].append(name)
+
+    result = assemble_result(
+        merged,
+        source_path,
+        mode=mode,
+        enable_agents=enable_agents,
+        snapshot=snapshot,
+        risks=risks,
+        narrative=narrative,
+        **agent_outputs,
+    )
+    return merged, result, report
+
+
+def reanalyze_stored(
+    conn: sqlite3.Connection,
+    patient_id: str,
+    resources: Iterable[dict],
+    *,
+    mode: Literal["mock", "llm"] = "mock",
+    enable_agents: bool = True,
+    llm_client: Optional[LLMClient] = None,
+) -> Optional[dict]:
+    """Apply a delta to a chart in the SQLite store and replace its stored result.
+
+    Returns the re-analysis report, or None when the patient is not stored.
+    Without a stored result for this mode the merged chart is analyzed in full.
+    """
+    chart = get_chart(conn, patient_id)
+    if chart is None:
+        return None
+    source_path = get_source_path(conn, patient_id) or ""
+    previous = get_result(conn, patient_id, mode=mode, enable_agents=enable_agents)
+    resources = list(resources)
+    if previous is None:
+        merged, touched = apply_delta(chart, normalize_delta(resources))
+        result = run_chart_pipeline(
+            merged, source_path, mode=mode, enable_agents=enable_agents, llm_client=llm_client
+        )
+        report = {
+            "patient_id": patient_id,
+            "touched": {field: sorted(codes) for field, codes in sorted(touched.items())},
+            "full": True,
+        }
+    else:
+        merged, result, report = reanalyze_chart(
+            chart,
+            previous,
+            resources,
+            source_path,
+            mode=mode,
+            enable_agents=enable_agents,
+            llm_client=llm_client,
+        )
+    put_charts(conn, [(merged, source_path or None)])
+    put_result(conn, result, enable_agents=enable_agents)
+    return report
+
+
+__all__ = ["apply_delta", "is_affected", "normalize_delta", "reanalyze_chart", "reanalyze_stored"]
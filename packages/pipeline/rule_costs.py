@@ -0,0 +1,133 @@
+"""
+Per-rule cost accounting across a scan (see apps/worker/scan_risks.py --debug).
+
+Each patient contributes its ingest time, its run_risk_rules wall time and
+the per-rule timings run_risk_rules(timings=...) recorded. The report ranks
+rules by total time (with mean, p95, max and the patient behind the max) and
+patients by rule time, which shows which rules are worth moving onto the
+dispatcher/index path as the rule set grows.
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+from packages.pipeline.steps.risks import DISPATCH_TIMING
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class RuleCosts:
+    def __init__(self) -> None:
+        self._rule_times: dict[str, list[float]] = {}
+        self._rule_max: dict[str, tuple[float, Optional[str]]] = {}
+        self._patients: list[dict] = []
+        self.ingest_s = 0.0
+        self.rules_s = 0.0
+        self.dispatch_s = 0.0
+
+    def add(
+        self,
+        patient_id: Optional[str],
+        source: str,
+        *,
+        ingest_s: float,
+        rules_s: float,
+        timings: dict[str, float],
+    ) -> None:
+        """Record one patient: ingest and rule wall time plus run_risk_rules' per-rule timings."""
+        self.ingest_s += ingest_s
+        self.rules_s += rules_s
+        dispatch_s = timings.get(DISPATCH_TIMING, 0.0)
+        self.dispatch_s += dispatch_s
+        slowest: tuple[float, Optional[str]] = (0.0, None)
+        for rule_id, seconds in timings.items():
+            if rule_id == DISPATCH_TIMING:
+                continue
+            self._rule_times.setdefault(rule_id, []).append(seconds)
+            if seconds > self._rule_max.get(rule_id, (-1.0, None))[0]:
+                self._rule_max[rule_id] = (seconds, patient_id)
+            if seconds > slowest[0]:
+                slowest = (seconds, rule_id)
+        self._patients.append(
+            {
+                "patient_id": patient_id,
+                "source": source,
+                "ingest_s": ingest_s,
+                "rules_s": rules_s,
+                "dispatch_s": dispatch_s,
+                "slowest_rule": slowest[1],
+                "slowest_rule_s": slowest[0],
+            }
+        )
+
+    def rule_rows(self) -> list[dict]:
+        """Per-rule cost, slowest total first."""
+        rows = []
+        for rule_id, times in self._rule_times.items():
+            total = sum(times)
+            max_s, max_patient = self._rule_max[rule_id]
+            rows.append(
+                {
+                    "rule_id": rule_id,
+                    "runs": len(times),
+                    "total_s": total,
+                    "mean_s": total / len(times),
+                    "p95_s": _percentile(times, 0.95),
+                    "max_s": max_s,
+                    "max_patient": max_patient,
+                    "share": total / self.rules_s if self.rules_s else 0.0,
+                }
+            )
+        return sorted(rows, key=lambda row: (-row["total_s"], row["rule_id"]))
+
+    def patient_rows(self) -> list[dict]:
+        """Per-patient cost, most rule time first."""
+        return sorted(self._patients, key=lambda row: (-row["rules_s"], row["source"]))
+
+    def report(self, top: int = 10) -> dict:
+        """Totals, every rule's row and the `top` slowest patients.
+
+        `overhead_s` is rule time outside dispatch and rule bodies (registry
+        lookups, skip checks, first-call warm-up).
+        """
+        rule_bodies_s = sum(sum(times) for times in self._rule_times.values())
+        return {
+            "patients": len(self._patients),
+            "ingest_s": self.ingest_s,
+            "rules_s": self.rules_s,
+            "dispatch_s": self.dispatch_s,
+            "rule_bodies_s": rule_bodies_s,
+            "overhead_s": max(0.0, self.rules_s - self.dispatch_s - rule_bodies_s),
+            "rules": self.rule_rows(),
+            "slowest_patients": self.patient_rows()[: max(0, top)],
+        }
+
+
+def format_cost_report(report: dict, top: int = 10) -> list[str]:
+    """Printable summary and ranked tables (times in ms)."""
+    lines = [
+        f"time: ingest {report['ingest_s']:.3f}s, rules {report['rules_s']:.3f}s "
+        f"(dispatch {report['dispatch_s']:.3f}s, rule bodies {report['rule_bodies_s']:.3f}s, "
+        f"overhead {report['overhead_s']:.3f}s) over {report['patients']} patients",
+        "slowest rules: rule_id | runs | total_ms | mean_ms | p95_ms | max_ms | share | max_patient",
+    ]
+    for row in report["rules"][: max(0, top)]:
+        lines.append(
+            f"{row['rule_id']} | {row['runs']} | {row['total_s'] * 1e3:.2f} | {row['mean_s'] * 1e3:.3f} | "
+            f"{row['p95_s'] * 1e3:.3f} | {row['max_s'] * 1e3:.3f} | {row['share']:.1%} | {row['max_patient']}"
+        )
+    lines.append("slowest patients: patient_id | ingest_ms | rules_ms | slowest_rule (ms)")
+    for row in report["slowest_patients"][: max(0, top)]:
+        lines.append(
+            f"{row['patient_id']} | {row['ingest_s'] * 1e3:.2f} | {row['rules_s'] * 1e3:.2f} | "
+            f"{row['slowest_rule']} ({row['slowest_rule_s'] * 1e3:.3f})"
+        )
+    return lines
+
+
+__all__ = ["RuleCosts", "format_cost_report"]
@@ -0,0 +1,78 @@
+"""
+Result sections and the stage dependency graph behind them.
+
+Each result section is produced by the stage of the same name. A stage may
+need other stages' outputs (the snapshot lists risks; the narrative is
+written from the snapshot), so resolve_stages expands a section request to
+the stages that have to run, in execution order. When agent output is
+verified, narrative citations are checked against the evidence of every
+section, so the narrative then also needs the agent stages. Only the
+requested sections are kept on the result; dependencies run but are not
+returned.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Literal, Optional
+
+Section = Literal["risks", "snapshot", "narrative", "timeline", "missing_info", "contradictions"]
+
+# Execution order; every stage comes after its dependencies.
+STAGES: tuple[str, ...] = ("risks", "snapshot", "narrative", "timeline", "missing_info", "contradictions")
+STAGE_DEPENDENCIES: dict[str, tuple[str, ...]] = {
+    "risks": (),
+    "snapshot": ("risks",),
+    "narrative": ("snapshot",),
+    "timeline": (),
+    "missing_info": (),
+    "contradictions": (),
+}
+# Extra dependencies when the result is verified (verify_result).
+VERIFY_DEPENDENCIES: dict[str, tuple[str, ...]] = {
+    "narrative": ("timeline", "missing_info", "contradictions"),
+}
+AGENT_STAGES = frozenset({"timeline", "missing_info", "contradictions"})
+# Stages that read the shared ChartTimeIndex.
+TIME_INDEX_STAGES = frozenset({"snapshot", "missing_info", "contradictions"})
+
+
+def default_sections(enable_agents: bool) -> tuple[str, ...]:
+    """Sections produced when no selection is given."""
+    if enable_agents:
+        return STAGES
+    return tuple(stage for stage in STAGES if stage not in AGENT_STAGES)
+
+
+def resolve_stages(sections: Iterable[str], *, verify: bool = False) -> tuple[str, ...]:
+    """Stages needed for `sections` (dependencies included), in execution order."""
+    needed: set[str] = set()
+    pending = list(sections)
+    while pending:
+        stage = pending.pop()
+        if stage not in STAGE_DEPENDENCIES:
+            raise ValueError(f"unknown section: {stage!r} (expected one of {', '.join(STAGES)})")
+        if stage not in needed:
+            needed.add(stage)
+            pending.extend(STAGE_DEPENDENCIES[stage])
+            if verify:
+                pending.extend(VERIFY_DEPENDENCIES.get(stage, ()))
+    return tuple(stage for stage in STAGES if stage in needed)
+
+
+def parse_sections(value: Optional[str]) -> Optional[list[str]]:
+    """Comma-separated CLI value to a section list (None/empty = no selection)."""
+    if not value:
+        return None
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+__all__ = [
+    "AGENT_STAGES",
+    "STAGES",
+    "STAGE_DEPENDENCIES",
+    "Section",
+    "TIME_INDEX_STAGES",
+    "VERIFY_DEPENDENCIES",
+    "default_sections",
+    "parse_sections",
+    "resolve_stages",
+]
@@ -0,0 +1,203 @@
+"""
+Filesystem spool for analysis jobs (no broker).
+
+Layout under the spool root:
+
+  incoming/<job_id>.json              queued jobs (SpoolJob as JSON)
+  processing/<worker_id>/<job_id>.json  claimed by a worker
+  failed/<job_id>.json                jobs that raised or were abandoned
+
+Jobs are enqueued by writing a dotfile and renaming it into incoming/, and
+claimed by renaming them into the worker's processing directory; renames
+within one filesystem are atomic, so a job is claimed by exactly one worker.
+A result is written to the output directory atomically (temporary file,
+fsync, rename) before its job is acked (deleted), so a crash in between
+only means the job runs again and overwrites the same result. On start a
+worker requeues whatever is left in its own processing directory, and a
+pool worker does the same for the jobs in flight when one of its processes
+dies; a job that keeps taking its worker down is moved to failed/ after
+`max_attempts` claims.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel
+
+from packages.core.render.compact import compact_result
+from packages.core.render.result_json import payload_json_bytes, result_json_bytes
+from packages.pipeline.agent_pipeline import run_agent_pipeline
+from packages.pipeline.sections import Section
+
+INCOMING = "incoming"
+PROCESSING = "processing"
+FAILED = "failed"
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+class SpoolJob(BaseModel):
+    """An analysis request; the fields mirror POST /v1/analyze."""
+    path: str
+    mode: Literal["mock", "llm"] = "mock"
+    enable_agents: bool = False
+    compact: bool = False
+    sections: Optional[List[Section]] = None
+    attempts: int = 0
+
+
+class ClaimedJob:
+    __slots__ = ("job_id", "path", "queued_at", "claimed_at")
+
+    def __init__(self, job_id: str, path: Path, queued_at: float, claimed_at: float) -> None:
+        self.job_id = job_id
+        self.path = path
+        self.queued_at = queued_at
+        self.claimed_at = claimed_at
+
+
+def _dump(job: SpoolJob) -> bytes:
+    if hasattr(job, "model_dump_json"):
+        return job.model_dump_json().encode("utf-8")
+    return job.json().encode("utf-8")
+
+
+def _load(path: Path) -> SpoolJob:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if hasattr(SpoolJob, "model_validate"):
+        return SpoolJob.model_validate(data)
+    return SpoolJob.parse_obj(data)
+
+
+def write_atomic(target: Path, data: bytes) -> None:
+    """Write `data` to `target` so readers see either nothing or the whole file."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_name(f".{target.name}.{uuid.uuid4().hex}.partial")
+    try:
+        with open(partial, "wb") as handle:
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(partial, target)
+    finally:
+        if partial.exists():
+            partial.unlink()
+
+
+class Spool:
+    def __init__(self, root: str | Path, worker_id: str = "worker") -> None:
+        self.root = Path(root)
+        self.worker_id = worker_id
+        self.incoming = self.root / INCOMING
+        self.processing = self.root / PROCESSING / worker_id
+        self.failed = self.root / FAILED
+        for directory in (self.incoming, self.processing, self.failed):
+            directory.mkdir(parents=True, exist_ok=True)
+
+    def submit(self, job: SpoolJob, job_id: Optional[str] = None) -> str:
+        """Enqueue a job; returns its id (also the result file stem)."""
+        job_id = job_id or f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        partial = self.incoming / f".{job_id}.json.partial"
+        partial.write_bytes(_dump(job))
+        os.replace(partial, self.incoming / f"{job_id}.json")
+        return job_id
+
+    def pending(self) -> list[Path]:
+        """Queued job files, oldest first."""
+        jobs = []
+        for entry in os.scandir(self.incoming):
+            if entry.name.endswith(".json") and not entry.name.startswith("."):
+                try:
+                    jobs.append((entry.stat().st_mtime, entry.name, Path(entry.path)))
+                except FileNotFoundError:
+                    continue
+        return [path for _, _, path in sorted(jobs)]
+
+    def claim(self) -> Optional[ClaimedJob]:
+        """Claim the oldest queued job, or return None when the queue is empty."""
+        for path in self.pending():
+            target = self.processing / path.name
+            try:
+                queued_at = path.stat().st_mtime
+                os.rename(path, target)
+            except FileNotFoundError:
+                continue  # another worker got it first
+            return ClaimedJob(path.stem, target, queued_at, time.time())
+        return None
+
+    def load(self, claimed: ClaimedJob) -> SpoolJob:
+        return _load(claimed.path)
+
+    def ack(self, claimed: ClaimedJob) -> None:
+        claimed.path.unlink(missing_ok=True)
+
+    def fail(self, claimed: ClaimedJob) -> None:
+        os.replace(claimed.path, self.failed / claimed.path.name)
+
+    def _requeue(self, path: Path, max_attempts: int) -> bool:
+        """Count a lost attempt and requeue the job, or move it to failed/ at max_attempts."""
+        try:
+            job = _load(path)
+        except (OSError, ValueError):
+            os.replace(path, self.failed / path.name)
+            return False
+        job.attempts += 1
+        requeued = job.attempts < max_attempts
+        write_atomic((self.incoming if requeued else self.failed) / path.name, _dump(job))
+        path.unlink()
+        return requeued
+
+    def retry(self, claimed: ClaimedJob, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> bool:
+        """Requeue a claimed job whose run was lost (e.g. its worker process died).
+
+        Returns False when it reached `max_attempts` and was moved to failed/.
+        """
+        return self._requeue(claimed.path, max_attempts)
+
+    def recover(self, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> dict[str, list[str]]:
+        """Requeue jobs this worker had claimed when it stopped; give up on repeat offenders."""
+        report: dict[str, list[str]] = {"requeued": [], "failed": []}
+        for path in sorted(self.processing.glob("*.json")):
+            report["requeued" if self._requeue(path, max_attempts) else "failed"].append(path.stem)
+        return report
+
+
+def result_path(out_dir: Path, job_id: str) -> Path:
+    return out_dir / f"{job_id}.json"
+
+
+def error_path(out_dir: Path, job_id: str) -> Path:
+    return out_dir / f"{job_id}.error.json"
+
+
+def error_body(code: str, message: str, detail: Optional[dict] = None) -> bytes:
+    """Error file contents, shaped like the API's error responses."""
+    return payload_json_bytes({"error": {"code": code, "message": message, "detail": detail or {}}})
+
+
+def run_job(job: SpoolJob) -> bytes:
+    """Analyze one job and encode its result exactly as POST /v1/analyze would."""
+    path = Path(job.path)
+    if not path.is_file():
+        raise FileNotFoundError(f"Patient bundle not found: {job.path}")
+    result = run_agent_pipeline(path, mode=job.mode, enable_agents=job.enable_agents, sections=job.sections)
+    if job.compact:
+        return payload_json_bytes(compact_result(result))
+    return result_json_bytes(result)
+
+
+__all__ = [
+    "ClaimedJob",
+    "DEFAULT_MAX_ATTEMPTS",
+    "Spool",
+    "SpoolJob",
+    "error_body",
+    "error_path",
+    "result_path",
+    "run_job",
+    "write_atomic",
+]
@@ -7,6 +7,8 @@ from typing import Optional
 
 from packages.core.llm import LLMClient, ensure_openai_api_key
 from packages.core.schemas.output import NarrativeSummary
+from packages.core.schemas.snapshot import Snapshot
+from packages.core.tracing import current_span, traced
 
 
 def _split_section(snapshot_text: str) -> dict[str, list[str]]:
@@ -38,45 +40,56 @@ def _extract_srcs(line: str) -> tuple[str, list[str]]:
     return prefix, [citation] if citation else []
 
 
-def _mock_narrative(snapshot_text: str, patient_id: str) -> NarrativeSummary:
+def _text_sections(snapshot_text: str) -> dict[str, list]:
+    """Narrative inputs parsed back out of snapshot text (only for callers without a Snapshot)."""
     sections = _split_section(snapshot_text)
+    risks: list[tuple[str, list[str]]] = []
+    leading: list[str] = []
+    for line in sections["risks"]:
+        if line.startswith("  - src:"):
+            (risks[-1][1] if risks else leading).append(line.replace("  - src: ", "").strip())
+            continue
+        risks.append((line, [] if risks else leading))
+    return {
+        "problems": [_extract_srcs(line)[0] for line in sections["problems"][:3]],
+        "medications": [_extract_srcs(line)[0] for line in sections["medications"][:3]],
+        "vitals": [_extract_srcs(line) for line in sections["vitals"][:5]],
+        "risks": risks,
+    }
+
+
+def _snapshot_sections(snapshot: Snapshot) -> dict[str, list]:
+    return {
+        "problems": [entry.line() for entry in snapshot.problems[:3]],
+        "medications": [entry.line() for entry in snapshot.medications[:3]],
+        "vitals": [(item.text(), [item.source]) for item in snapshot.measurements[:5]],
+        "risks": [(risk.line(), list(risk.sources)) for risk in snapshot.risks],
+    }
+
+
+def _mock_narrative(snapshot: Snapshot | str, patient_id: str) -> NarrativeSummary:
+    sections = _text_sections(snapshot) if isinstance(snapshot, str) else _snapshot_sections(snapshot)
     citations: dict[str, list[str]] = {}
     summary_bullets: list[str] = []
     risk_bullets: list[str] = []
 
     bullet_id = 1
-    for line in sections["problems"][:3]:
-        text, _ = _extract_srcs(line)
+    for text in sections["problems"]:
         summary_bullets.append(f"Recent problem: {text}. [S{bullet_id}]")
         citations[f"S{bullet_id}"] = []
         bullet_id += 1
-    for line in sections["medications"][:3]:
-        text, _ = _extract_srcs(line)
+    for text in sections["medications"]:
         summary_bullets.append(f"Medication: {text}. [S{bullet_id}]")
         citations[f"S{bullet_id}"] = []
         bullet_id += 1
-    for line in sections["vitals"][:5]:
-        text, srcs = _extract_srcs(line)
+    for text, srcs in sections["vitals"]:
         summary_bullets.append(f"Key vital/lab: {text}. [S{bullet_id}]")
         citations[f"S{bullet_id}"] = srcs
         bullet_id += 1
 
-    risk_id = 1
-    current_risk = None
-    current_sources: list[str] = []
-    for line in sections["risks"]:
-        if line.startswith("  - src:"):
-            current_sources.append(line.replace("  - src: ", "").strip())
-            continue
-        if current_risk is not None:
-            risk_bullets.append(f"{current_risk} [R{risk_id}]")
-            citations[f"R{risk_id}"] = current_sources
-            risk_id += 1
-            current_sources = []
-        current_risk = line
-    if current_risk is not None:
-        risk_bullets.append(f"{current_risk} [R{risk_id}]")
-        citations[f"R{risk_id}"] = current_sources
+    for risk_id, (line, sources) in enumerate(sections["risks"], start=1):
+        risk_bullets.append(f"{line} [R{risk_id}]")
+        citations[f"R{risk_id}"] = sources
 
     followup_questions = []
     if not risk_bullets:
@@ -93,7 +106,8 @@ def _mock_narrative(snapshot_text: str, patient_id: str) -> NarrativeSummary:
     )
 
 
-def _llm_prompt(snapshot_text: str) -> str:
+def _llm_prompt(snapshot: Snapshot | str) -> str:
+    snapshot_text = snapshot if isinstance(snapshot, str) else snapshot.text
     return (
         "You will be given a deterministic clinical snapshot.\n"
         "Rules:\n"
@@ -133,16 +147,24 @@ def _print_llm_debug(
     )
 
 
+@traced()
 def generate_narrative(
-    snapshot_text: str,
+    snapshot: Snapshot | str,
     patient_id: str,
     llm: Optional[LLMClient],
     *,
     require_llm: bool = False,
     llm_debug: bool = False,
 ) -> Optional[NarrativeSummary]:
+    """Narrative for a snapshot; the mock path reads the Snapshot structure directly.
+
+    Plain snapshot text is still accepted and parsed for callers that only
+    have a stored result.
+    """
+    trace = current_span()
+    trace.set_attribute("narrative.llm", llm is not None)
     if llm is None:
-        return _mock_narrative(snapshot_text, patient_id)
+        return _mock_narrative(snapshot, patient_id)
 
     key_present = ensure_openai_api_key()
     attempted_call = False
@@ -151,9 +173,10 @@ def generate_narrative(
             _print_llm_debug(key_present, attempted_call)
         if require_llm:
             raise RuntimeError("OPENAI_API_KEY not set (env or .env)")
-        return _mock_narrative(snapshot_text, patient_id)
+        return _mock_narrative(snapshot, patient_id)
 
-    prompt = _llm_prompt(snapshot_text)
+    prompt = _llm_prompt(snapshot)
+    trace.set_attribute("narrative.prompt_chars", len(prompt))
     try:
         attempted_call = True
         response = llm.complete(prompt)
@@ -164,14 +187,15 @@ def generate_narrative(
             raise RuntimeError(
                 f"LLM request failed: {type(exc).__name__}: {exc}"
             ) from exc
-        return _mock_narrative(snapshot_text, patient_id)
+        return _mock_narrative(snapshot, patient_id)
 
+    trace.set_attribute("narrative.response_chars", len(response or ""))
     if not response:
         if llm_debug:
             _print_llm_debug(key_present, attempted_call)
         if require_llm:
             raise RuntimeError("LLM returned empty narrative")
-        return _mock_narrative(snapshot_text, patient_id)
+        return _mock_narrative(snapshot, patient_id)
 
     try:
         payload = json.loads(response)
@@ -185,7 +209,7 @@ def generate_narrative(
                 "LLM returned non-JSON output: "
                 f"{type(exc).__name__}: {exc}. raw_output_preview={preview!r}"
             ) from exc
-        return _mock_narrative(snapshot_text, patient_id)
+        return _mock_narrative(snapshot, patient_id)
 
     bullet_ids = set(
         re.findall(
@@ -206,7 +230,7 @@ def generate_narrative(
             _print_llm_debug(key_present, attempted_call, error)
         if require_llm:
             raise error
-        return _mock_narrative(snapshot_text, patient_id)
+        return _mock_narrative(snapshot, patient_id)
 
     invalid_citations: dict[str, list[str]] = {}
     for key, values in narrative.citations.items():
@@ -228,7 +252,7 @@ def generate_narrative(
             _print_llm_debug(key_present, attempted_call, error)
         if require_llm:
             raise error
-        return _mock_narrative(snapshot_text, patient_id)
+        return _mock_narrative(snapshot, patient_id)
 
     if llm_debug:
         _print_llm_debug(key_present, attempted_call)
@@ -1,15 +1,21 @@
 from __future__ import annotations
 
-import importlib
-from typing import Callable
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Optional
 
-from packages.core.schemas.chart import PatientChart, SourceRef
-from packages.risklib.rules import discover_rules
+from packages.core.schemas.chart import Observation, PatientChart, SourceRef
+from packages.core.tracing import span, traced
+from packages.risklib.dispatch import ObservationDispatcher, loinc_keys
+from packages.risklib.rules import discover_rules, rule_manifests, rule_module
 
 _SEVERITIES = {"low", "medium", "high"}
+_INPUT_FIELDS = ("encounters", "conditions", "medications", "allergies", "observations", "notes")
+LOINC_SYSTEM = "http://loinc.org"
+DISPATCH_TIMING = "(dispatch)"
 
 
-def _as_sourceref(value: object) -> SourceRef | None:
+def as_sourceref(value: object) -> SourceRef | None:
     if isinstance(value, SourceRef):
         return value
     if isinstance(value, dict):
@@ -47,7 +53,7 @@ def _normalize_results(default_rule_id: str, default_severity: str, raw: object)
         evidence: list[SourceRef] = []
         if isinstance(evidence_list, list):
             for entry in evidence_list:
-                source = _as_sourceref(entry)
+                source = as_sourceref(entry)
                 if source:
                     evidence.append(source)
         results.append(
@@ -61,27 +67,188 @@ def _normalize_results(default_rule_id: str, default_severity: str, raw: object)
     return results
 
 
-def run_risk_rules(chart: PatientChart, debug: bool = False) -> list[dict] | tuple[list[dict], dict]:
+def execute_rule(
+    rule_id: str,
+    runner: Callable[[PatientChart], list],
+    chart: PatientChart,
+    *,
+    observations: Optional[list[Observation]] = None,
+) -> tuple[list[dict], str]:
+    """Run one rule; returns (normalized results, debug reason). Errors yield no results.
+
+    With `observations` (the rule's routed bucket from dispatch_rule_inputs)
+    the rule's evaluate() is called instead of run(chart).
+    """
+    module = rule_module(runner)
+    default_severity = getattr(module, "SEVERITY", "medium")
+    try:
+        raw = runner(chart) if observations is None else module.evaluate(observations)
+    except Exception as exc:
+        return [], f"error: {exc}"
+    normalized = _normalize_results(rule_id, default_severity, raw)
+    if normalized:
+        return normalized, f"executed, hits={len(normalized)}"
+    reason = getattr(module, "LAST_DEBUG_REASON", None)
+    return normalized, reason or "executed, no hits"
+
+
+def _item_date(field: str, item: object) -> Optional[datetime]:
+    if field == "observations":
+        return item.effective_dt or item.effective
+    if field == "conditions":
+        return item.onset or item.abatement
+    if field == "medications":
+        return item.authored_on
+    if field == "encounters":
+        return item.start or item.end
+    if field == "allergies":
+        return item.recorded_date
+    if field == "notes":
+        return item.authored
+    return None
+
+
+def chart_input_summary(
+    chart: PatientChart, *, observations: Optional[dict[str, Optional[datetime]]] = None
+) -> dict[str, dict[str, Optional[datetime]]]:
+    """field -> code -> latest date, in one pass over the chart ("" = any item of the field).
+
+    Observation codes are recorded only for LOINC-coded observations, matching
+    how the rules filter them. `observations` is the date map already built by
+    an ObservationDispatcher pass; when given, observations are not rescanned.
+    """
+    summary: dict[str, dict[str, Optional[datetime]]] = {}
+    for field in _INPUT_FIELDS:
+        items = getattr(chart, field)
+        if not items:
+            continue
+        if field == "observations" and observations is not None:
+            summary[field] = dict(observations)
+            continue
+        codes = summary.setdefault(field, {})
+        for item in items:
+            date = _item_date(field, item)
+            keys = [""]
+            if field == "observations" and item.code and item.code_system == LOINC_SYSTEM:
+                keys.append(item.code)
+            elif field == "conditions" and item.code:
+                keys.append(item.code)
+            for key in keys:
+                latest = codes.get(key)
+                if key not in codes or (date is not None and (latest is None or date > latest)):
+                    codes[key] = date
+    return summary
+
+
+def rule_skip_reason(manifest: dict, summary: dict[str, dict[str, Optional[datetime]]]) -> Optional[str]:
+    """Why a rule can be skipped for a chart with this input summary, or None to run it."""
+    if manifest.get("noop"):
+        return "skipped: no-op rule"
+    inputs = manifest.get("inputs")
+    if inputs is None:
+        return None
+    dates: list[Optional[datetime]] = []
+    for field, codes in inputs.items():
+        present = summary.get(field, {})
+        if codes is None:
+            if "" in present:
+                dates.append(present[""])
+        else:
+            dates.extend(present[code] for code in codes if code in present)
+    if not dates:
+        return "skipped: inputs absent"
+    horizon = manifest.get("horizon_days")
+    if horizon is not None:
+        latest_any = [date for codes in summary.values() for date in codes.values() if date is not None]
+        cutoff = max(latest_any) - timedelta(days=horizon) if latest_any else None
+        if cutoff is not None and all(date is not None and date < cutoff for date in dates):
+            return f"skipped: no inputs within {horizon} days"
+    return None
+
+
+def _dispatchable(runner: Callable[[PatientChart], list], manifest: dict) -> bool:
+    inputs = manifest.get("inputs")
+    if not inputs or set(inputs) != {"observations"} or inputs["observations"] is None:
+        return False
+    return callable(getattr(rule_module(runner), "evaluate", None))
+
+
+@traced()
+def dispatch_rule_inputs(
+    chart: PatientChart,
+    runners: dict[str, Callable[[PatientChart], list]],
+    manifests: dict[str, dict],
+) -> tuple[dict[str, list[Observation]], dict[str, dict[str, Optional[datetime]]]]:
+    """Walk the observations once for all rules.
+
+    Returns (rule_id -> routed observations, chart input summary). Only rules
+    that read nothing but LOINC observations and expose evaluate() get a
+    bucket; the rest run against the whole chart. Rules reading the same codes
+    share one bucket (spec-compiled rules then share their candidate pass).
+    """
+    dispatcher = ObservationDispatcher()
+    consumers: dict[str, str] = {}
+    by_codes: dict[frozenset, str] = {}
+    for rule_id, runner in sorted(runners.items()):
+        manifest = manifests.get(rule_id, {})
+        if manifest.get("noop") or not _dispatchable(runner, manifest):
+            continue
+        codes = frozenset(manifest["inputs"]["observations"])
+        if codes not in by_codes:
+            by_codes[codes] = rule_id
+            dispatcher.subscribe(rule_id, loinc_keys(codes))
+        consumers[rule_id] = by_codes[codes]
+    buckets, observation_dates = dispatcher.dispatch(chart.observations)
+    routed = {rule_id: buckets[consumer] for rule_id, consumer in consumers.items()}
+    return routed, chart_input_summary(chart, observations=observation_dates)
+
+
+@traced()
+def run_risk_rules(
+    chart: PatientChart,
+    debug: bool = False,
+    *,
+    timings: Optional[dict[str, float]] = None,
+) -> list[dict] | tuple[list[dict], dict]:
+    """Run every discovered rule, skipping no-op rules and rules whose declared inputs are absent.
+
+    Observation rules are fed from a single dispatcher pass over the chart
+    (see dispatch_rule_inputs) rather than each scanning the observations.
+
+    With debug=True also returns rule_id -> reason; skipped rules' reasons start
+    with "skipped:" (see summarize_rule_reasons). `timings`, when given, is
+    filled with rule_id -> wall seconds for every executed rule, and the shared
+    dispatch pass under DISPATCH_TIMING.
+    """
     results: list[dict] = []
     debug_info: dict[str, str] = {}
     runners = discover_rules()
+    manifests = rule_manifests()
+    started = time.perf_counter()
+    buckets, summary = dispatch_rule_inputs(chart, runners, manifests)
+    if timings is not None:
+        timings[DISPATCH_TIMING] = time.perf_counter() - started
     for rule_id, runner in sorted(runners.items()):
-        module = importlib.import_module(runner.__module__)
-        default_severity = getattr(module, "SEVERITY", "medium")
-        try:
-            raw = runner(chart)
-        except Exception as exc:
+        skip = rule_skip_reason(manifests.get(rule_id, {}), summary)
+        if skip:
             if debug:
-                debug_info[rule_id] = f"error: {exc}"
+                debug_info[rule_id] = skip
             continue
-        normalized = _normalize_results(rule_id, default_severity, raw)
+        with span(f"rule:{rule_id}", {"rule.id": rule_id}) as rule_span:
+            started = time.perf_counter()
+            normalized, reason = execute_rule(rule_id, runner, chart, observations=buckets.get(rule_id))
+            if timings is not None:
+                timings[rule_id] = time.perf_counter() - started
+            rule_span.set_attribute("rule.hits", len(normalized))
         if debug:
-            if normalized:
-                debug_info[rule_id] = f"executed, hits={len(normalized)}"
-            else:
-                reason = getattr(module, "LAST_DEBUG_REASON", None)
-                debug_info[rule_id] = reason or "executed, no hits"
+            debug_info[rule_id] = reason
         results.extend(normalized)
     if debug:
         return results, debug_info
-    return results
\ No newline at end of file
+    return results
+
+
+def summarize_rule_reasons(debug_info: dict[str, str]) -> dict[str, int]:
+    """Executed vs skipped counts from run_risk_rules(debug=True) reasons."""
+    skipped = sum(1 for reason in debug_info.values() if reason.startswith("skipped:"))
+    return {"executed": len(debug_info) - skipped, "skipped": skipped}
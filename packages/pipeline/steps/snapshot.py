@@ -5,19 +5,17 @@ from pathlib import Path
 from typing import Optional
 
 from packages.core.schemas.chart import Observation, PatientChart
+from packages.core.schemas.snapshot import Snapshot, SnapshotEntry, SnapshotMeasurement, SnapshotRisk
+from packages.core.tracing import traced
+from packages.core.utils.dates import ChartTimeIndex
 from packages.ingest.synthea.loader import load_patient_dir
 from packages.ingest.synthea.normalizer import normalize_to_patient_chart
 from packages.ingest.synthea.parser import parse_fhir_resources
 from packages.pipeline.steps.risks import run_risk_rules
-from packages.pipeline.steps.timeline import build_timeline
 
 LOINC_SYSTEM = "http://loinc.org"
 
 
-def _format_date(value: Optional[datetime]) -> str:
-    return value.date().isoformat() if value else "unknown"
-
-
 def _parse_date(value: Optional[str]) -> Optional[date]:
     if not value:
         return None
@@ -39,20 +37,14 @@ def _obs_date(obs: Observation) -> Optional[datetime]:
 
 
 def get_most_recent_observation(
-    chart: PatientChart, loinc_code: str
+    chart: PatientChart, loinc_code: str, *, time_index: Optional[ChartTimeIndex] = None
 ) -> tuple[Optional[float], Optional[str], Optional[datetime], Optional[str]]:
-    candidates = []
-    for obs in chart.observations:
-        if obs.code_system != LOINC_SYSTEM or obs.code != loinc_code:
-            continue
-        date_value = _obs_date(obs)
-        if not date_value:
-            continue
-        candidates.append((date_value, obs))
-    if not candidates:
+    if time_index is None:
+        time_index = ChartTimeIndex(chart)
+    latest = time_index.latest_event("observation", code=loinc_code, system=LOINC_SYSTEM)
+    if latest is None:
         return None, None, None, None
-    candidates.sort(key=lambda item: item[0])
-    date_value, obs = candidates[-1]
+    date_value, obs = latest
     return obs.value, obs.unit, date_value, obs.id
 
 
@@ -85,24 +77,30 @@ def get_most_recent_bp(
     return systolic, diastolic, date_value, obs_id
 
 
-def build_snapshot_from_chart(chart: PatientChart) -> str:
-    timeline = build_timeline(chart)
-    risks = run_risk_rules(chart)
-
-    last_seen = timeline[-1]["date"] if timeline else None
+@traced()
+def build_snapshot_model(
+    chart: PatientChart,
+    *,
+    time_index: Optional[ChartTimeIndex] = None,
+    risks: Optional[list[dict]] = None,
+) -> Snapshot:
+    """Structured deterministic snapshot; `risks` may be passed when run_risk_rules already ran.
+
+    Risk evidence is captured when the snapshot is built, so later evidence
+    enrichment does not change the rendered text.
+    """
+    if time_index is None:
+        time_index = ChartTimeIndex(chart)
+    if risks is None:
+        risks = run_risk_rules(chart)
+
+    last_seen = time_index.latest()
     birth_date = _parse_date(chart.demographics.get("birth_date"))
-    age_text = ""
+    age = None
     if birth_date and last_seen:
-        age_text = str(_years_between(birth_date, last_seen.date()))
+        age = _years_between(birth_date, last_seen.date())
     sex = chart.demographics.get("gender", "unknown")
 
-    lines = []
-    patient_line = (
-        f"Patient: {chart.patient_id} | sex={sex} | "
-        f"age={age_text or 'unknown'} | last_seen={_format_date(last_seen)}"
-    )
-    lines.append(patient_line)
-
     conditions = []
     for condition in chart.conditions:
         date_value = condition.onset or condition.abatement
@@ -111,9 +109,6 @@ def build_snapshot_from_chart(chart: PatientChart) -> str:
         label = condition.display or condition.code or "condition"
         conditions.append((date_value, label))
     conditions.sort(key=lambda item: item[0], reverse=True)
-    lines.append("Recent problems:")
-    for date_value, label in conditions[:5]:
-        lines.append(f"{_format_date(date_value)} | {label}")
 
     medications = []
     for med in chart.medications:
@@ -122,15 +117,18 @@ def build_snapshot_from_chart(chart: PatientChart) -> str:
         label = med.name or "medication"
         medications.append((med.authored_on, label))
     medications.sort(key=lambda item: item[0], reverse=True)
-    lines.append("Medications:")
-    for date_value, label in medications[:8]:
-        lines.append(f"{_format_date(date_value)} | {label}")
 
-    lines.append("Key vitals/labs:")
+    measurements: list[SnapshotMeasurement] = []
     systolic, diastolic, bp_date, bp_id = get_most_recent_bp(chart)
     if systolic is not None and diastolic is not None and bp_date and bp_id:
-        lines.append(
-            f"BP (85354-9): {systolic:.0f}/{diastolic:.0f} on {_format_date(bp_date)} | src: Observation/{bp_id}"
+        measurements.append(
+            SnapshotMeasurement(
+                label="BP",
+                code="85354-9",
+                value_text=f"{systolic:.0f}/{diastolic:.0f}",
+                date=bp_date,
+                source=f"Observation/{bp_id}",
+            )
         )
     for code, label in [
         ("39156-5", "BMI"),
@@ -138,27 +136,56 @@ def build_snapshot_from_chart(chart: PatientChart) -> str:
         ("2160-0", "Creatinine"),
         ("6298-4", "Potassium"),
     ]:
-        value, unit, date_value, obs_id = get_most_recent_observation(chart, code)
+        value, unit, date_value, obs_id = get_most_recent_observation(chart, code, time_index=time_index)
         if value is None or not date_value or not obs_id:
             continue
         unit_text = f" {unit}" if unit else ""
-        lines.append(
-            f"{label} ({code}): {value}{unit_text} on {_format_date(date_value)} | src: Observation/{obs_id}"
+        measurements.append(
+            SnapshotMeasurement(
+                label=label,
+                code=code,
+                value_text=f"{value}{unit_text}",
+                date=date_value,
+                source=f"Observation/{obs_id}",
+            )
         )
 
-    lines.append("Risks:")
+    snapshot_risks: list[SnapshotRisk] = []
     for risk in risks:
-        rule_id = risk.get("rule_id", "unknown")
-        severity = risk.get("severity", "medium")
-        message = risk.get("message", "")
-        lines.append(f"{rule_id} | {severity} | {message}")
-        evidence = risk.get("evidence") or []
-        for source in evidence:
+        sources = []
+        for source in risk.get("evidence") or []:
             resource_type = getattr(source, "resource_type", None) or "unknown"
             resource_id = getattr(source, "resource_id", None) or "unknown"
-            lines.append(f"  - src: {resource_type}/{resource_id}")
+            sources.append(f"{resource_type}/{resource_id}")
+        snapshot_risks.append(
+            SnapshotRisk(
+                rule_id=f"{risk.get('rule_id', 'unknown')}",
+                severity=f"{risk.get('severity', 'medium')}",
+                message=f"{risk.get('message', '')}",
+                sources=sources,
+            )
+        )
 
-    return "\n".join(lines)
+    return Snapshot(
+        patient_id=chart.patient_id,
+        sex=f"{sex}",
+        age=age,
+        last_seen=last_seen,
+        problems=[SnapshotEntry(date=date_value, label=label) for date_value, label in conditions[:5]],
+        medications=[SnapshotEntry(date=date_value, label=label) for date_value, label in medications[:8]],
+        measurements=measurements,
+        risks=snapshot_risks,
+    )
+
+
+def build_snapshot_from_chart(
+    chart: PatientChart,
+    *,
+    time_index: Optional[ChartTimeIndex] = None,
+    risks: Optional[list[dict]] = None,
+) -> str:
+    """Deterministic snapshot text; `risks` may be passed when run_risk_rules already ran."""
+    return build_snapshot_model(chart, time_index=time_index, risks=risks).text
 
 
 def build_snapshot(patient_json_path: str) -> str:
@@ -169,4 +196,4 @@ def build_snapshot(patient_json_path: str) -> str:
     return build_snapshot_from_chart(chart)
 
 
-__all__ = ["build_snapshot", "build_snapshot_from_chart"]
+__all__ = ["build_snapshot", "build_snapshot_from_chart", "build_snapshot_model"]
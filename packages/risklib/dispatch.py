@@ -0,0 +1,81 @@
+"""
+Single-pass observation dispatcher for rules and other per-code consumers.
+
+Consumers subscribe to (code_system, code) keys; `dispatch` walks the
+observation list once and appends each observation to the bucket of every
+subscribed consumer, preserving chart order. Consumers then finalize from
+their bucket (rules expose this as `evaluate(observations)`). The same pass
+records the latest date per LOINC code, which the rule runner uses for its
+input-presence checks instead of scanning the observations again.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterable, Optional
+
+from packages.core.schemas.chart import Observation, PatientChart
+
+LOINC_SYSTEM = "http://loinc.org"
+
+ObservationKey = tuple[Optional[str], Optional[str]]
+
+
+def loinc_keys(codes: Iterable[str]) -> set[ObservationKey]:
+    return {(LOINC_SYSTEM, code) for code in codes}
+
+
+class ObservationDispatcher:
+    """Routes observations to subscribed consumers by (code_system, code)."""
+
+    def __init__(self) -> None:
+        self._routes: dict[ObservationKey, list[str]] = {}
+        self._consumers: list[str] = []
+
+    @property
+    def consumers(self) -> list[str]:
+        return list(self._consumers)
+
+    def subscribe(self, name: str, keys: Iterable[ObservationKey]) -> None:
+        if name in self._consumers:
+            raise ValueError(f"Consumer already subscribed: {name}")
+        self._consumers.append(name)
+        for key in keys:
+            self._routes.setdefault(key, []).append(name)
+
+    def dispatch(
+        self, observations: Iterable[Observation]
+    ) -> tuple[dict[str, list[Observation]], dict[str, Optional[datetime]]]:
+        """One pass: (consumer -> routed observations, LOINC code -> latest date).
+
+        The date map has an entry for every LOINC code seen ("" = any
+        observation at all); values are None when no observation of that code
+        is dated.
+        """
+        buckets: dict[str, list[Observation]] = {name: [] for name in self._consumers}
+        latest: dict[str, Optional[datetime]] = {}
+        routes = self._routes
+        for obs in observations:
+            names = routes.get((obs.code_system, obs.code))
+            if names:
+                for name in names:
+                    buckets[name].append(obs)
+            date = obs.effective_dt or obs.effective
+            keys = ("", obs.code) if obs.code and obs.code_system == LOINC_SYSTEM else ("",)
+            for key in keys:
+                if key not in latest:
+                    latest[key] = date
+                elif date is not None:
+                    current = latest[key]
+                    if current is None or date > current:
+                        latest[key] = date
+        return buckets, latest
+
+
+def observations_for(chart: PatientChart, codes: Iterable[str]) -> list[Observation]:
+    """The LOINC observations of `codes`, in chart order (a single-consumer dispatch)."""
+    dispatcher = ObservationDispatcher()
+    dispatcher.subscribe("consumer", loinc_keys(codes))
+    return dispatcher.dispatch(chart.observations)[0]["consumer"]
+
+
+__all__ = ["LOINC_SYSTEM", "ObservationDispatcher", "ObservationKey", "loinc_keys", "observations_for"]
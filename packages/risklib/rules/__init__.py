@@ -5,10 +5,11 @@ import pkgutil
 from typing import Callable
 
 from packages.core.schemas.chart import PatientChart
+from packages.risklib.specs import CompiledRule, compiled_rules
 
 
 def discover_rules() -> dict[str, Callable[[PatientChart], list]]:
-    """Discover rule runners in this package."""
+    """Discover rule runners: modules in this package plus compiled rule specs."""
     runners: dict[str, Callable[[PatientChart], list]] = {}
     for module_info in sorted(pkgutil.iter_modules(__path__), key=lambda info: info.name):
         module_name = module_info.name
@@ -17,7 +18,50 @@ def discover_rules() -> dict[str, Callable[[PatientChart], list]]:
         if not callable(runner):
             raise RuntimeError(f"Rule module {module_name} has no run()")
         runners[module_name] = runner
+    for rule_id, compiled in compiled_rules().items():
+        if rule_id in runners:
+            raise RuntimeError(f"Rule {rule_id} is defined both as a module and a spec")
+        runners[rule_id] = compiled.run
     return runners
 
 
-__all__ = ["discover_rules"]
\ No newline at end of file
+def rule_module(runner: Callable[[PatientChart], list]) -> object:
+    """The object carrying a runner's rule attributes (SEVERITY, INPUTS, LAST_DEBUG_REASON, ...).
+
+    That is the rule module, or the CompiledRule for spec-defined rules.
+    """
+    owner = getattr(runner, "__self__", None)
+    if isinstance(owner, CompiledRule):
+        return owner
+    return importlib.import_module(runner.__module__)
+
+
+def rule_manifests() -> dict[str, dict]:
+    """Declared dependency manifest per rule.
+
+    Rule modules may declare:
+      INPUTS        chart field -> codes read (None = every item of the field);
+                    fields are PatientChart list names ("observations",
+                    "conditions", ...), observation codes are LOINC
+      HORIZON_DAYS  only inputs dated within this many days of the chart's
+                    latest event matter (None = whole history)
+      NOOP          True for registered placeholders that always return []
+    Spec-defined rules (see packages.risklib.specs) carry the same attributes.
+    A module without INPUTS gets inputs=None and is treated as reading the
+    whole chart.
+    """
+    manifests: dict[str, dict] = {}
+    for rule_id, runner in discover_rules().items():
+        module = rule_module(runner)
+        inputs = getattr(module, "INPUTS", None)
+        if inputs is not None:
+            inputs = {field: None if codes is None else frozenset(codes) for field, codes in inputs.items()}
+        manifests[rule_id] = {
+            "inputs": inputs,
+            "horizon_days": getattr(module, "HORIZON_DAYS", None),
+            "noop": bool(getattr(module, "NOOP", False)),
+        }
+    return manifests
+
+
+__all__ = ["discover_rules", "rule_manifests", "rule_module"]
\ No newline at end of file
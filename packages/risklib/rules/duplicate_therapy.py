@@ -4,6 +4,8 @@ from packages.core.schemas.chart import PatientChart
 
 RULE_ID = "duplicate_therapy"
 SEVERITY = "medium"
+INPUTS = {"medications": None}
+NOOP = True  # placeholder until the check is implemented
 
 
 def run(chart: PatientChart) -> list[dict]:
@@ -4,6 +4,8 @@ from packages.core.schemas.chart import PatientChart
 
 RULE_ID = "followup_missing"
 SEVERITY = "medium"
+INPUTS = {"encounters": None, "conditions": None}
+NOOP = True  # placeholder until the check is implemented
 
 
 def run(chart: PatientChart) -> list[dict]:
@@ -4,6 +4,8 @@ from packages.core.schemas.chart import PatientChart
 
 RULE_ID = "med_allergy_conflict"
 SEVERITY = "medium"
+INPUTS = {"medications": None, "allergies": None}
+NOOP = True  # placeholder until the check is implemented
 
 
 def run(chart: PatientChart) -> list[dict]:
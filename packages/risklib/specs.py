@@ -0,0 +1,378 @@
+"""
+Declarative observation rules compiled from rule_specs.json.
+
+Each spec names the LOINC codes it reads, how to pull numeric values out of
+an observation, optional series preconditions and an ordered list of checks;
+the first check that matches produces the single risk. Check kinds:
+
+  latest  condition on the most recent dated candidate
+  scan    first candidate (chart date order) matching the condition, guarded
+          by an optional `require` on the series; evidence is the hit and its
+          neighbours
+  series  condition on series features (first/last/recent points, ratio,
+          abs_delta, rising, falling over the last three points)
+
+Messages and debug reasons are str.format templates over the check context.
+Compiled rules expose the same attributes as hand-written rule modules
+(RULE_ID, SEVERITY, INPUTS, HORIZON_DAYS, NOOP, LAST_DEBUG_REASON,
+evaluate, run), so discovery, manifests and the dispatcher treat them alike.
+Rules with the same codes and value extraction share one candidate pass.
+"""
+from __future__ import annotations
+
+import json
+import operator
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from packages.core.schemas.chart import Observation, PatientChart, SourceRef
+from packages.risklib.dispatch import LOINC_SYSTEM, observations_for
+
+DEFAULT_SPEC_PATH = Path(__file__).with_name("rule_specs.json")
+
+_CHECK_KINDS = {"latest", "scan", "series"}
+_REASON_KEYS = {"no_observations", "no_candidates", "insufficient", "unit_mismatch", "no_match"}
+_SPEC_KEYS = {"rule_id", "severity", "codes", "values", "min_points", "units", "reasons", "checks", "horizon_days"}
+_SERIES_POINTS = ("first", "last", "recent_first", "recent_mid", "recent_last")
+
+
+def _icontains(value: str, token: str) -> bool:
+    return bool(value) and token.lower() in value.lower()
+
+
+_OPS: dict[str, Callable[[Any, Any], bool]] = {
+    ">=": operator.ge,
+    ">": operator.gt,
+    "<=": operator.le,
+    "<": operator.lt,
+    "==": operator.eq,
+    "icontains": _icontains,
+}
+
+Candidate = tuple[datetime, dict[str, float], Optional[str], Observation]
+Condition = Callable[[dict], bool]
+
+
+def _compile_condition(spec: dict, where: str) -> Condition:
+    """{"field": {op: operand, ...}, ...} (all must hold) or {"any": [conditions]}."""
+    if not isinstance(spec, dict) or not spec:
+        raise ValueError(f"{where}: condition must be a non-empty object")
+    if "any" in spec:
+        if len(spec) != 1 or not isinstance(spec["any"], list) or not spec["any"]:
+            raise ValueError(f"{where}: 'any' must be the only key and a non-empty list")
+        options = [_compile_condition(item, where) for item in spec["any"]]
+        return lambda ctx: any(option(ctx) for option in options)
+    tests: list[tuple[str, Callable[[Any, Any], bool], Any]] = []
+    for field, ops in spec.items():
+        if not isinstance(ops, dict) or not ops:
+            raise ValueError(f"{where}: {field} needs an object of operators")
+        for op, operand in ops.items():
+            if op not in _OPS:
+                raise ValueError(f"{where}: unknown operator {op!r}")
+            tests.append((field, _OPS[op], operand))
+
+    def check(ctx: dict) -> bool:
+        for field, op, operand in tests:
+            value = ctx.get(field)
+            if value is None or not op(value, operand):
+                return False
+        return True
+
+    return check
+
+
+def _component_value(components: list[dict], code: str) -> Optional[float]:
+    for component in components or []:
+        if component.get("code_system") != LOINC_SYSTEM:
+            continue
+        if component.get("code") != code:
+            continue
+        value = component.get("value")
+        return value if isinstance(value, (int, float)) else None
+    return None
+
+
+def _split_text(value_text: Optional[str]) -> Optional[tuple[float, ...]]:
+    if not value_text or "/" not in value_text:
+        return None
+    parts = value_text.split("/")
+    if len(parts) < 2:
+        return None
+    try:
+        return float(parts[0].strip()), float(parts[1].strip())
+    except ValueError:
+        return None
+
+
+class _Extractor:
+    """Turns routed observations into date-sorted candidates for every rule sharing it."""
+
+    def __init__(self, values: dict[str, dict], where: str) -> None:
+        if not isinstance(values, dict) or not values:
+            raise ValueError(f"{where}: 'values' must be a non-empty object")
+        self._fields: list[tuple[str, str, Any, Optional[int]]] = []
+        for name, source in values.items():
+            if not isinstance(source, dict):
+                raise ValueError(f"{where}: value {name} must be an object")
+            if source.get("field") == "value":
+                self._fields.append((name, "field", None, None))
+            elif "component" in source:
+                text_part = source.get("text_part")
+                self._fields.append((name, "component", source["component"], text_part))
+            else:
+                raise ValueError(f"{where}: value {name} needs field='value' or a component code")
+        self._last: Optional[tuple[list, tuple[int, list[Candidate]]]] = None
+
+    def extract(self, observations: list[Observation]) -> tuple[int, list[Candidate]]:
+        # Rules subscribed to the same codes receive the same routed list
+        # object from dispatch_rule_inputs, so this reuses the first rule's pass.
+        if self._last is not None and self._last[0] is observations and self._last[1][0] == len(observations):
+            return self._last[1]
+        total = 0
+        candidates: list[Candidate] = []
+        for obs in observations:
+            total += 1
+            values = self._values(obs)
+            if values is None:
+                continue
+            date = obs.effective_dt or obs.effective
+            if not date:
+                continue
+            candidates.append((date, values, obs.unit or None, obs))
+        candidates.sort(key=lambda item: item[0])
+        self._last = (observations, (total, candidates))
+        return total, candidates
+
+    def _values(self, obs: Observation) -> Optional[dict[str, float]]:
+        values: dict[str, float] = {}
+        parsed_text: Optional[tuple[float, ...]] = None
+        text_parsed = False
+        for name, kind, code, text_part in self._fields:
+            if kind == "field":
+                if obs.value is None:
+                    return None
+                values[name] = obs.value
+                continue
+            value = _component_value(obs.components, code)
+            if value is None and text_part is not None:
+                if not text_parsed:
+                    parsed_text, text_parsed = _split_text(obs.value_text), True
+                value = parsed_text[text_part] if parsed_text else None
+            if value is None:
+                return None
+            values[name] = float(value)
+        return values
+
+
+def _point_context(prefix: str, candidate: Candidate) -> dict:
+    date, values, _, _ = candidate
+    ctx = {f"{prefix}{name}": value for name, value in values.items()}
+    ctx[f"{prefix}date"] = date.date()
+    return ctx
+
+
+def _unit_context(unit: Optional[str]) -> dict:
+    return {"unit": unit or "", "unit_text": f" {unit}" if unit else ""}
+
+
+def _neighbor_evidence(candidates: list[Candidate], index: int) -> list[SourceRef]:
+    indices = {index}
+    if index - 1 >= 0:
+        indices.add(index - 1)
+    if index + 1 < len(candidates):
+        indices.add(index + 1)
+    while len(indices) < 3 and indices:
+        if min(indices) > 0:
+            indices.add(min(indices) - 1)
+        if len(indices) < 3 and max(indices) + 1 < len(candidates):
+            indices.add(max(indices) + 1)
+    evidence: list[SourceRef] = []
+    for idx in sorted(indices)[:3]:
+        evidence.extend(candidates[idx][3].sources or [])
+    return evidence
+
+
+class CompiledRule:
+    """One spec compiled to an evaluator with the rule-module interface."""
+
+    def __init__(self, spec: dict, extractor: _Extractor) -> None:
+        self.spec = spec
+        self.RULE_ID: str = spec["rule_id"]
+        self.SEVERITY: str = spec.get("severity", "medium")
+        self.INPUTS = {"observations": set(spec["codes"])}
+        self.HORIZON_DAYS: Optional[int] = spec.get("horizon_days")
+        self.NOOP = False
+        self.LAST_DEBUG_REASON: Optional[str] = None
+        self._extractor = extractor
+        self._min_points = max(1, int(spec.get("min_points", 1)))
+        units = spec.get("units")
+        self._units_ignore_missing = None if units is None else bool(units.get("ignore_missing", False))
+        self._reasons: dict[str, str] = spec.get("reasons", {})
+        self._checks = [self._compile_check(check, index) for index, check in enumerate(spec["checks"])]
+
+    def __repr__(self) -> str:
+        return f"CompiledRule({self.RULE_ID!r})"
+
+    def _compile_check(self, check: dict, index: int) -> dict:
+        where = f"{self.RULE_ID}.checks[{index}]"
+        kind = check.get("kind")
+        if kind not in _CHECK_KINDS:
+            raise ValueError(f"{where}: kind must be one of {sorted(_CHECK_KINDS)}")
+        if not isinstance(check.get("message"), str):
+            raise ValueError(f"{where}: message template is required")
+        evidence = check.get("evidence", "latest" if kind == "latest" else None)
+        if kind == "series" and not (
+            isinstance(evidence, list) and evidence and all(point in _SERIES_POINTS for point in evidence)
+        ):
+            raise ValueError(f"{where}: series evidence must list points from {list(_SERIES_POINTS)}")
+        if kind == "scan" and evidence != "neighbors":
+            raise ValueError(f"{where}: scan evidence must be 'neighbors'")
+        return {
+            "kind": kind,
+            "when": _compile_condition(check.get("when"), where),
+            "require": _compile_condition(check["require"], where) if "require" in check else None,
+            "severity": check.get("severity", self.SEVERITY),
+            "message": check["message"],
+            "evidence": evidence,
+        }
+
+    def _stop(self, key: str, **fields: Any) -> list[dict]:
+        template = self._reasons.get(key)
+        self.LAST_DEBUG_REASON = template.format(**fields) if template else None
+        return []
+
+    def _risk(self, check: dict, ctx: dict, evidence: list[SourceRef]) -> list[dict]:
+        return [
+            {
+                "rule_id": self.RULE_ID,
+                "severity": check["severity"],
+                "message": check["message"].format(**ctx),
+                "evidence": evidence,
+            }
+        ]
+
+    @staticmethod
+    def _series_context(candidates: list[Candidate], total: int) -> dict:
+        first, last = candidates[0], candidates[-1]
+        recent = candidates[-3:]
+        points = {"first": first, "last": last, "recent_first": recent[0], "recent_last": recent[-1]}
+        if len(recent) > 1:
+            points["recent_mid"] = recent[1]
+        ctx: dict = {"total": total, "usable": len(candidates), **_unit_context(first[2])}
+        for name, candidate in points.items():
+            ctx.update(_point_context(f"{name}_", candidate))
+        first_value, last_value = first[1].get("value"), last[1].get("value")
+        if first_value is not None and last_value is not None:
+            ctx["ratio"] = last_value / first_value if first_value != 0 else None
+            ctx["abs_delta"] = abs(last_value - first_value)
+        if len(recent) == 3 and all("value" in item[1] for item in recent):
+            a, b, c = (item[1]["value"] for item in recent)
+            ctx["rising"] = a < b < c
+            ctx["falling"] = a > b > c
+        return ctx
+
+    def evaluate(self, observations: list[Observation]) -> list[dict]:
+        """Finalize from the observations routed by the dispatcher (chart order)."""
+        self.LAST_DEBUG_REASON = None
+        total, candidates = self._extractor.extract(observations)
+        if total == 0 and "no_observations" in self._reasons:
+            return self._stop("no_observations")
+        if not candidates and "no_candidates" in self._reasons:
+            return self._stop("no_candidates")
+        if len(candidates) < self._min_points:
+            return self._stop("insufficient", total=total, usable=len(candidates))
+        if self._units_ignore_missing is not None:
+            units = {unit for _, _, unit, _ in candidates if unit or not self._units_ignore_missing}
+            if len(units) > 1:
+                return self._stop("unit_mismatch", units=sorted(units, key=str))
+
+        series: Optional[dict] = None
+        for check in self._checks:
+            if check["kind"] == "latest":
+                latest = candidates[-1]
+                ctx = {**_point_context("", latest), **_unit_context(latest[2])}
+                if check["when"](ctx):
+                    return self._risk(check, ctx, list(latest[3].sources or []))
+                continue
+            if series is None:
+                series = self._series_context(candidates, total)
+            if check["require"] is not None and not check["require"](series):
+                continue
+            if check["kind"] == "series":
+                if check["when"](series):
+                    evidence: list[SourceRef] = []
+                    for point in check["evidence"]:
+                        evidence.extend(_point_obs(candidates, point).sources or [])
+                    return self._risk(check, series, evidence)
+                continue
+            for index, candidate in enumerate(candidates):
+                ctx = {**series, **_point_context("", candidate)}
+                if check["when"](ctx):
+                    return self._risk(check, ctx, _neighbor_evidence(candidates, index))
+        return self._stop("no_match", total=total, usable=len(candidates))
+
+    def run(self, chart: PatientChart) -> list[dict]:
+        return self.evaluate(observations_for(chart, self.INPUTS["observations"]))
+
+
+def _point_obs(candidates: list[Candidate], point: str) -> Observation:
+    recent = candidates[-3:]
+    index = {"first": 0, "last": -1, "recent_first": 0, "recent_mid": 1, "recent_last": -1}[point]
+    source = candidates if point in ("first", "last") else recent
+    return source[index][3]
+
+
+def _validate_spec(spec: dict, index: int) -> None:
+    where = f"rule spec [{index}]"
+    if not isinstance(spec, dict):
+        raise ValueError(f"{where}: must be an object")
+    unknown = set(spec) - _SPEC_KEYS
+    if unknown:
+        raise ValueError(f"{where}: unknown keys {sorted(unknown)}")
+    if not isinstance(spec.get("rule_id"), str) or not spec["rule_id"]:
+        raise ValueError(f"{where}: rule_id is required")
+    where = spec["rule_id"]
+    if not isinstance(spec.get("codes"), list) or not spec["codes"]:
+        raise ValueError(f"{where}: codes must be a non-empty list")
+    if not isinstance(spec.get("checks"), list) or not spec["checks"]:
+        raise ValueError(f"{where}: checks must be a non-empty list")
+    bad_reasons = set(spec.get("reasons", {})) - _REASON_KEYS
+    if bad_reasons:
+        raise ValueError(f"{where}: unknown reasons {sorted(bad_reasons)}")
+    needs_value = any(check.get("kind") in ("scan", "series") for check in spec["checks"])
+    if needs_value and "value" not in spec.get("values", {}):
+        raise ValueError(f"{where}: scan/series checks need a 'value' entry in values")
+
+
+def compile_rule_specs(specs: list[dict]) -> dict[str, CompiledRule]:
+    """Compile specs into rule_id -> CompiledRule; raises ValueError on an invalid spec."""
+    compiled: dict[str, CompiledRule] = {}
+    extractors: dict[str, _Extractor] = {}
+    for index, spec in enumerate(specs):
+        _validate_spec(spec, index)
+        if spec["rule_id"] in compiled:
+            raise ValueError(f"duplicate rule spec: {spec['rule_id']}")
+        key = json.dumps([sorted(spec["codes"]), spec["values"]], sort_keys=True)
+        extractor = extractors.get(key)
+        if extractor is None:
+            extractor = extractors[key] = _Extractor(spec["values"], spec["rule_id"])
+        compiled[spec["rule_id"]] = CompiledRule(spec, extractor)
+    return compiled
+
+
+def load_rule_specs(path: Path = DEFAULT_SPEC_PATH) -> list[dict]:
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    if not isinstance(data, list):
+        raise ValueError(f"{path}: expected a list of rule specs")
+    return data
+
+
+@lru_cache(maxsize=None)
+def compiled_rules() -> dict[str, CompiledRule]:
+    """The packaged rule specs, compiled once per process."""
+    return compile_rule_specs(load_rule_specs())
+
+
+__all__ = ["CompiledRule", "DEFAULT_SPEC_PATH", "compile_rule_specs", "compiled_rules", "load_rule_specs"]
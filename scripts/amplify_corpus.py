@@ -0,0 +1,364 @@
+"""
+Synthetic corpus amplifier for scale testing.
+
+Takes Synthea patient bundles and writes N-times-larger corpora:
+- more patients: every source bundle is cloned --factor times (or cycled until
+  --patients clones exist), each clone with fresh resource ids, a per-clone
+  timestamp shift and deterministically perturbed numeric values;
+- longer histories: resources of --history-types are repeated --history-factor
+  times, each repeat shifted back by --history-step-days.
+
+Everything is derived from --seed, so the same arguments always produce the
+same bytes. Output layouts (--layout):
+- bundles: <out>/bundles/<given>_<family>_<patient_id>.json (Synthea style)
+- ndjson:  <out>/ndjson/<ResourceType>.ndjson (FHIR Bulk Data style, relative
+  "Type/id" references)
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import sys
+import uuid
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_DATETIME_RE = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?(Z|[+-]\d{2}:\d{2})?$")
+_URN_REF_RE = re.compile(r'"reference": "urn:uuid:([0-9a-fA-F-]+)"')
+_ID_KEYS = {"id", "reference", "fullUrl"}
+
+
+def _digest(*parts: object) -> bytes:
+    payload = "\x1f".join(str(part) for part in parts).encode("utf-8")
+    return hashlib.sha256(payload).digest()
+
+
+def _rng(*parts: object) -> random.Random:
+    return random.Random(int.from_bytes(_digest(*parts)[:8], "big"))
+
+
+def mint_id(seed: str, clone: int, old_id: str, repeat: int = 0) -> str:
+    """Deterministic uuid4-shaped id for a cloned (and optionally repeated) resource."""
+    return str(uuid.UUID(bytes=_digest(seed, clone, repeat, old_id)[:16], version=4))
+
+
+def shift_timestamp(value: str, delta: timedelta) -> str:
+    """Shift an ISO date/datetime string, keeping its original precision and zone format."""
+    if _DATE_RE.match(value):
+        shifted = date.fromisoformat(value) + timedelta(days=delta.days)
+        return shifted.isoformat()
+    match = _DATETIME_RE.match(value)
+    if not match:
+        return value
+    zulu = value.endswith("Z")
+    parsed = datetime.fromisoformat(value[:-1] + "+00:00" if zulu else value)
+    timespec = "milliseconds" if match.group(1) else "seconds"
+    text = (parsed + delta).isoformat(timespec=timespec)
+    if zulu and text.endswith("+00:00"):
+        text = text[:-6] + "Z"
+    return text
+
+
+def _perturb_number(value: Any, rng: random.Random, spread: float) -> Any:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return value
+    factor = 1.0 + rng.uniform(-spread, spread)
+    if isinstance(value, int):
+        return int(round(value * factor))
+    text = repr(value)
+    decimals = len(text.split(".", 1)[1]) if "." in text and "e" not in text else 2
+    return round(value * factor, min(decimals, 6))
+
+
+class _CloneContext:
+    def __init__(
+        self,
+        *,
+        seed: str,
+        clone: int,
+        id_map: dict[str, str],
+        delta: timedelta,
+        spread: float,
+    ) -> None:
+        self.seed = seed
+        self.clone = clone
+        self.id_map = id_map
+        self.delta = delta
+        self.spread = spread
+        self.rng = _rng(seed, "values", clone)
+
+    def remap(self, text: str) -> str:
+        if text.startswith("urn:uuid:"):
+            new_id = self.id_map.get(text[len("urn:uuid:") :])
+            return f"urn:uuid:{new_id}" if new_id else text
+        if "/" in text and "?" not in text:
+            prefix, _, old_id = text.rpartition("/")
+            new_id = self.id_map.get(old_id)
+            return f"{prefix}/{new_id}" if new_id else text
+        return self.id_map.get(text, text)
+
+
+def _transform(value: Any, key: Optional[str], ctx: _CloneContext) -> Any:
+    if isinstance(value, dict):
+        out = {}
+        for child_key, child in value.items():
+            if child_key == "valueQuantity" and isinstance(child, dict):
+                quantity = _transform(child, child_key, ctx)
+                if "value" in quantity:
+                    quantity["value"] = _perturb_number(quantity["value"], ctx.rng, ctx.spread)
+                out[child_key] = quantity
+            else:
+                out[child_key] = _transform(child, child_key, ctx)
+        return out
+    if isinstance(value, list):
+        return [_transform(item, key, ctx) for item in value]
+    if isinstance(value, str):
+        if key in _ID_KEYS or value.startswith("urn:uuid:"):
+            return ctx.remap(value)
+        if value[:1].isdigit() and (_DATE_RE.match(value) or _DATETIME_RE.match(value)):
+            return shift_timestamp(value, ctx.delta)
+    return value
+
+
+def _bundle_patient(bundle: dict) -> Optional[dict]:
+    for entry in bundle.get("entry") or []:
+        resource = entry.get("resource") if isinstance(entry, dict) else None
+        if isinstance(resource, dict) and resource.get("resourceType") == "Patient":
+            return resource
+    return None
+
+
+def amplify_bundle(
+    bundle: dict,
+    *,
+    seed: str,
+    clone: int,
+    history_factor: int = 1,
+    history_types: Iterable[str] = ("Observation",),
+    history_step_days: int = 30,
+    max_shift_days: int = 365,
+    spread: float = 0.05,
+) -> dict:
+    """Return one deterministic clone of a Synthea bundle."""
+    entries = [entry for entry in bundle.get("entry") or [] if isinstance(entry, dict)]
+    history_types = set(history_types)
+    repeats = max(1, history_factor)
+    shift_rng = _rng(seed, "shift", clone)
+    base_delta = timedelta(
+        days=shift_rng.randint(-max_shift_days, max_shift_days),
+        seconds=shift_rng.randint(0, 86399),
+    )
+
+    id_maps: list[dict[str, str]] = []
+    for repeat in range(repeats):
+        id_map: dict[str, str] = {}
+        for entry in entries:
+            resource = entry.get("resource") or {}
+            old_id = resource.get("id")
+            if not isinstance(old_id, str) or not old_id:
+                continue
+            repeated = repeat > 0 and resource.get("resourceType") in history_types
+            id_map[old_id] = mint_id(seed, clone, old_id, repeat if repeated else 0)
+        id_maps.append(id_map)
+
+    out_entries = []
+    for repeat in range(repeats):
+        ctx = _CloneContext(
+            seed=f"{seed}:{repeat}",
+            clone=clone,
+            id_map=id_maps[repeat],
+            delta=base_delta - timedelta(days=history_step_days * repeat),
+            spread=spread,
+        )
+        for entry in entries:
+            resource = entry.get("resource") or {}
+            if repeat > 0 and resource.get("resourceType") not in history_types:
+                continue
+            out_entries.append(_transform(entry, None, ctx))
+
+    amplified = {key: value for key, value in bundle.items() if key != "entry"}
+    amplified["entry"] = out_entries
+    return amplified
+
+
+def _patient_filename(bundle: dict) -> str:
+    patient = _bundle_patient(bundle) or {}
+    names = patient.get("name") or [{}]
+    name = names[0] if isinstance(names[0], dict) else {}
+    given = (name.get("given") or ["patient"])[0]
+    family = name.get("family") or "unknown"
+    safe = re.sub(r"[^A-Za-z0-9'_-]+", "", f"{given}_{family}")
+    return f"{safe}_{patient.get('id', 'unknown')}.json"
+
+
+def relative_references(line: str, type_by_id: dict[str, str]) -> str:
+    """Rewrite urn:uuid references to Bulk Data style Type/id where the type is known."""
+
+    def _replace(match: re.Match[str]) -> str:
+        target = match.group(1)
+        resource_type = type_by_id.get(target)
+        if not resource_type:
+            return match.group(0)
+        return f'"reference": "{resource_type}/{target}"'
+
+    return _URN_REF_RE.sub(_replace, line)
+
+
+def iter_sources(paths: Iterable[Path]) -> Iterator[tuple[Path, dict]]:
+    for path in paths:
+        with path.open("r", encoding="utf-8") as handle:
+            payload = json.load(handle)
+        if isinstance(payload, dict) and _bundle_patient(payload) is not None:
+            yield path, payload
+
+
+def amplify_corpus(
+    sources: list[Path],
+    out_dir: Path,
+    *,
+    seed: str = "amplify",
+    factor: int = 1,
+    patients: int = 0,
+    layouts: Iterable[str] = ("bundles", "ndjson"),
+    history_factor: int = 1,
+    history_types: Iterable[str] = ("Observation",),
+    history_step_days: int = 30,
+    spread: float = 0.05,
+) -> dict:
+    """Write the amplified corpus and return a summary of what was written."""
+    layouts = set(layouts)
+    source_bundles = list(iter_sources(sorted(sources)))
+    if not source_bundles:
+        raise ValueError("no patient bundles found in sources")
+    total = patients if patients > 0 else len(source_bundles) * max(1, factor)
+
+    bundle_dir = out_dir / "bundles"
+    ndjson_dir = out_dir / "ndjson"
+    if "bundles" in layouts:
+        bundle_dir.mkdir(parents=True, exist_ok=True)
+    if "ndjson" in layouts:
+        ndjson_dir.mkdir(parents=True, exist_ok=True)
+
+    handles: dict[str, Any] = {}
+    resource_counts: dict[str, int] = {}
+    bytes_written = 0
+    try:
+        for clone in range(total):
+            _, source = source_bundles[clone % len(source_bundles)]
+            bundle = amplify_bundle(
+                source,
+                seed=seed,
+                clone=clone,
+                history_factor=history_factor,
+                history_types=history_types,
+                history_step_days=history_step_days,
+                spread=spread,
+            )
+            if "bundles" in layouts:
+                text = json.dumps(bundle)
+                (bundle_dir / _patient_filename(bundle)).write_text(text, encoding="utf-8")
+                bytes_written += len(text)
+            type_by_id = {}
+            for entry in bundle["entry"]:
+                resource = entry.get("resource") or {}
+                if isinstance(resource.get("id"), str):
+                    type_by_id[resource["id"]] = resource.get("resourceType")
+            for entry in bundle["entry"]:
+                resource = entry.get("resource") or {}
+                resource_type = resource.get("resourceType")
+                if not isinstance(resource_type, str):
+                    continue
+                resource_counts[resource_type] = resource_counts.get(resource_type, 0) + 1
+                if "ndjson" not in layouts:
+                    continue
+                handle = handles.get(resource_type)
+                if handle is None:
+                    handle = (ndjson_dir / f"{resource_type}.ndjson").open("w", encoding="utf-8")
+                    handles[resource_type] = handle
+                line = relative_references(json.dumps(resource), type_by_id)
+                handle.write(line + "\n")
+                bytes_written += len(line) + 1
+    finally:
+        for handle in handles.values():
+            handle.close()
+
+    summary = {
+        "seed": seed,
+        "sources": len(source_bundles),
+        "patients": total,
+        "history_factor": max(1, history_factor),
+        "layouts": sorted(layouts),
+        "resource_counts": {key: resource_counts[key] for key in sorted(resource_counts)},
+        "bytes_written": bytes_written,
+    }
+    (out_dir / "amplify_manifest.json").write_text(
+        json.dumps(summary, indent=2, sort_keys=True), encoding="utf-8"
+    )
+    return summary
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Amplify Synthea bundles into a larger synthetic corpus.")
+    parser.add_argument("path", type=Path, help="Directory of Synthea bundle JSON files.")
+    parser.add_argument("out", type=Path, help="Output directory.")
+    parser.add_argument("--seed", default="amplify", help="Seed string for ids, shifts and values.")
+    parser.add_argument("--factor", type=int, default=1, help="Clones per source bundle.")
+    parser.add_argument("--patients", type=int, default=0, help="Exact clone count (overrides --factor).")
+    parser.add_argument("--limit", type=int, default=0, help="Max source files (0 = no limit).")
+    parser.add_argument(
+        "--layout",
+        choices=["bundles", "ndjson", "both"],
+        default="both",
+        help="Output layout(s).",
+    )
+    parser.add_argument("--history-factor", type=int, default=1, help="Repeat history resources N times.")
+    parser.add_argument(
+        "--history-types",
+        default="Observation",
+        help="Comma-separated resource types repeated by --history-factor.",
+    )
+    parser.add_argument("--history-step-days", type=int, default=30, help="Days between history repeats.")
+    parser.add_argument("--spread", type=float, default=0.05, help="Relative value perturbation.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    if not args.path.exists() or not args.path.is_dir():
+        print(f"Directory not found: {args.path}", file=sys.stderr)
+        return 1
+    sources = sorted(args.path.glob("*.json"))
+    if args.limit > 0:
+        sources = sources[: args.limit]
+    layouts = ["bundles", "ndjson"] if args.layout == "both" else [args.layout]
+    history_types = [item.strip() for item in args.history_types.split(",") if item.strip()]
+    try:
+        summary = amplify_corpus(
+            sources,
+            args.out,
+            seed=args.seed,
+            factor=args.factor,
+            patients=args.patients,
+            layouts=layouts,
+            history_factor=args.history_factor,
+            history_types=history_types,
+            history_step_days=args.history_step_days,
+            spread=args.spread,
+        )
+    except ValueError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+    print(f"patients written: {summary['patients']} (from {summary['sources']} sources)")
+    print(f"bytes written: {summary['bytes_written']}")
+    for resource_type, count in summary["resource_counts"].items():
+        print(f"  {resource_type}: {count}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,153 @@
+"""
+Cold-cache load throughput for raw vs gzip vs zstd bundle inputs.
+
+Compressed copies of the selected bundles are written once under --work-dir.
+Before each timed read the file's pages are dropped from the OS page cache
+with posix_fadvise(DONTNEED) where the platform supports it; otherwise the
+run is warm-cache and reported as such.
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from packages.ingest.compression import list_bundle_files
+from packages.ingest.synthea.loader import load_patient_dir
+from packages.ingest.synthea.parser import parse_fhir_resources
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_DATA_DIR = REPO_ROOT / "data" / "raw" / "fhir_ehr_synthea" / "samples_100"
+DEFAULT_WORK_DIR = REPO_ROOT / "artifacts" / "bench" / "compressed"
+DEFAULT_OUT = REPO_ROOT / "artifacts" / "bench" / "compression_bench.json"
+
+
+def zstd_available() -> bool:
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _compress(source: Path, target: Path, kind: str) -> None:
+    if target.exists() and target.stat().st_mtime >= source.stat().st_mtime:
+        return
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_name(target.name + ".partial")
+    with source.open("rb") as src:
+        if kind == "gzip":
+            with gzip.open(partial, "wb", compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst)
+        else:
+            import zstandard
+
+            with partial.open("wb") as raw:
+                with zstandard.ZstdCompressor(level=3).stream_writer(raw) as dst:
+                    shutil.copyfileobj(src, dst)
+    os.replace(partial, target)
+
+
+def prepare_variants(files: list[Path], work_dir: Path) -> dict[str, list[Path]]:
+    """Return {"raw": [...], "gzip": [...], "zstd": [...]} input lists."""
+    variants = {"raw": list(files), "gzip": []}
+    for path in files:
+        target = work_dir / "gzip" / f"{path.name}.gz"
+        _compress(path, target, "gzip")
+        variants["gzip"].append(target)
+    if zstd_available():
+        variants["zstd"] = []
+        for path in files:
+            target = work_dir / "zstd" / f"{path.name}.zst"
+            _compress(path, target, "zstd")
+            variants["zstd"].append(target)
+    return variants
+
+
+def evict(path: Path) -> bool:
+    """Best-effort drop of a file's cached pages; False when unsupported."""
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+    return True
+
+
+def bench_variant(files: list[Path], payload_bytes: int, *, cold: bool = True) -> dict:
+    """Time load + parse over `files`; payload_bytes is the uncompressed input size."""
+    disk_bytes = 0
+    evicted = cold
+    seconds = 0.0
+    for path in files:
+        disk_bytes += path.stat().st_size
+        if cold:
+            evicted = evict(path) and evicted
+        start = time.perf_counter()
+        resources = load_patient_dir(path)
+        parse_fhir_resources(resources)
+        seconds += time.perf_counter() - start
+    return {
+        "files": len(files),
+        "disk_mb": disk_bytes / 1e6,
+        "payload_mb": payload_bytes / 1e6,
+        "ratio": payload_bytes / disk_bytes if disk_bytes else 0.0,
+        "seconds": seconds,
+        "files_per_s": len(files) / seconds if seconds else 0.0,
+        "payload_mb_per_s": (payload_bytes / 1e6) / seconds if seconds else 0.0,
+        "cold_cache": evicted,
+    }
+
+
+def run(files: list[Path], work_dir: Path, *, cold: bool = True) -> dict:
+    variants = prepare_variants(files, work_dir)
+    payload_bytes = sum(path.stat().st_size for path in files)
+    return {name: bench_variant(paths, payload_bytes, cold=cold) for name, paths in variants.items()}
+
+
+def print_report(report: dict) -> None:
+    print("variant | files | disk_mb | ratio | seconds | files/s | payload MB/s | cold")
+    for name, row in report.items():
+        print(
+            f"{name} | {row['files']} | {row['disk_mb']:.1f} | {row['ratio']:.1f}x | "
+            f"{row['seconds']:.2f} | {row['files_per_s']:.1f} | {row['payload_mb_per_s']:.1f} | "
+            f"{row['cold_cache']}"
+        )
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare load throughput for raw vs compressed bundles.")
+    parser.add_argument("path", nargs="?", type=Path, default=DEFAULT_DATA_DIR, help="Directory of bundle JSON files.")
+    parser.add_argument("--limit", type=int, default=0, help="Max files (0 = no limit).")
+    parser.add_argument("--work-dir", type=Path, default=DEFAULT_WORK_DIR, help="Where compressed copies are kept.")
+    parser.add_argument("--warm", action="store_true", help="Do not evict files from the page cache.")
+    parser.add_argument("--out", type=Path, default=DEFAULT_OUT, help="Where to write the JSON report.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    if not args.path.exists() or not args.path.is_dir():
+        print(f"Directory not found: {args.path}", file=sys.stderr)
+        return 1
+    files = [path for path in list_bundle_files(args.path) if path.suffix == ".json"]
+    if args.limit > 0:
+        files = files[: args.limit]
+    report = run(files, args.work_dir, cold=not args.warm)
+    print_report(report)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2, sort_keys=True), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
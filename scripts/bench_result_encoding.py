@@ -0,0 +1,152 @@
+"""
+Result payload size and serialization time: full schema vs compact encoding.
+
+Every bundle is analyzed once with agents enabled (untimed). The full path is
+result_json_bytes(); the compact path is compact_result() plus
+payload_json_bytes(); "jsonable" is the previous API path
+(jsonable_encoder + JSONResponse rendering) for reference. Sizes are reported
+raw and gzip-compressed. The script exits non-zero if
+expand_result(compact_result(x)) does not reproduce the full payload, or if
+the full bytes differ from the jsonable bytes, for any result.
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from packages.core.render.compact import compact_result, expand_result
+from packages.core.render.result_json import payload_json_bytes, result_json_bytes
+from packages.core.schemas.result import PatientAnalysisResult
+from packages.ingest.compression import list_bundle_files
+from packages.ingest.synthea.loader import load_patient_dir
+from packages.ingest.synthea.normalizer import normalize_to_patient_chart
+from packages.ingest.synthea.parser import parse_fhir_resources
+from packages.pipeline.agent_pipeline import run_chart_pipeline
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_DATA_DIR = REPO_ROOT / "data" / "raw" / "fhir_ehr_synthea" / "samples_100"
+DEFAULT_OUT = REPO_ROOT / "artifacts" / "bench" / "result_encoding_bench.json"
+
+
+def _full_json(result: PatientAnalysisResult) -> bytes:
+    return result_json_bytes(result)
+
+
+def _compact_json(result: PatientAnalysisResult) -> bytes:
+    return payload_json_bytes(compact_result(result))
+
+
+def _jsonable_json(result: PatientAnalysisResult) -> bytes:
+    return JSONResponse(content=jsonable_encoder(result)).body
+
+
+def _time(fn, results: list[PatientAnalysisResult], repeat: int) -> tuple[list[float], list[bytes]]:
+    samples: list[float] = []
+    outputs: list[bytes] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        outputs = [fn(result) for result in results]
+        samples.append(time.perf_counter() - start)
+    return samples, outputs
+
+
+def _sizes(payloads: list[bytes]) -> dict:
+    raw = [len(payload) for payload in payloads]
+    gz = [len(gzip.compress(payload, mtime=0)) for payload in payloads]
+    return {
+        "bytes": sum(raw),
+        "gzip_bytes": sum(gz),
+        "p50_bytes": statistics.median(raw) if raw else 0,
+        "max_bytes": max(raw, default=0),
+    }
+
+
+def run(files: list[Path], *, repeat: int = 5) -> dict:
+    results = []
+    for path in files:
+        chart = normalize_to_patient_chart(parse_fhir_resources(load_patient_dir(path)))
+        results.append(run_chart_pipeline(chart, str(path), enable_agents=True))
+
+    full_s, full_out = _time(_full_json, results, repeat)
+    compact_s, compact_out = _time(_compact_json, results, repeat)
+    jsonable_s, jsonable_out = _time(_jsonable_json, results, repeat)
+    round_trip = all(
+        expand_result(json.loads(compact)) == json.loads(full) for compact, full in zip(compact_out, full_out)
+    )
+
+    report = {
+        "files": len(files),
+        "repeat": repeat,
+        "round_trip": round_trip,
+        "jsonable_identical": jsonable_out == full_out,
+        "evidence_rows": sum(len(json.loads(payload)["evidence_table"]["rows"]) for payload in compact_out),
+    }
+    runs = (
+        ("full", full_s, full_out),
+        ("compact", compact_s, compact_out),
+        ("jsonable", jsonable_s, jsonable_out),
+    )
+    for name, samples, outputs in runs:
+        report[name] = {
+            **_sizes(outputs),
+            "best_s": min(samples) if samples else 0.0,
+            "median_s": statistics.median(samples) if samples else 0.0,
+        }
+    full_bytes = report["full"]["bytes"]
+    full_gzip = report["full"]["gzip_bytes"]
+    report["size_ratio"] = report["compact"]["bytes"] / full_bytes if full_bytes else 0.0
+    report["gzip_ratio"] = report["compact"]["gzip_bytes"] / full_gzip if full_gzip else 0.0
+    return report
+
+
+def print_report(report: dict) -> None:
+    print(f"results={report['files']} repeat={report['repeat']} evidence_rows={report['evidence_rows']}")
+    print("encoding | bytes | gzip_bytes | p50_bytes | best_s | median_s")
+    for name in ("full", "compact", "jsonable"):
+        row = report[name]
+        print(
+            f"{name} | {row['bytes']} | {row['gzip_bytes']} | {row['p50_bytes']:.0f} | "
+            f"{row['best_s']:.4f} | {row['median_s']:.4f}"
+        )
+    print(
+        f"size ratio: {report['size_ratio']:.2f} gzip ratio: {report['gzip_ratio']:.2f} "
+        f"round_trip: {report['round_trip']} jsonable_identical: {report['jsonable_identical']}"
+    )
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare full and compact result encodings.")
+    parser.add_argument("path", nargs="?", type=Path, default=DEFAULT_DATA_DIR, help="Directory of bundle JSON files.")
+    parser.add_argument("--limit", type=int, default=0, help="Number of bundles (0 = all).")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repetitions per encoding.")
+    parser.add_argument("--out", type=Path, default=DEFAULT_OUT, help="Where to write the JSON report.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    if not args.path.exists() or not args.path.is_dir():
+        print(f"Directory not found: {args.path}", file=sys.stderr)
+        return 1
+    files = sorted(item for item in list_bundle_files(args.path) if item.suffix == ".json")
+    if args.limit > 0:
+        files = files[: args.limit]
+    report = run(files, repeat=max(1, args.repeat))
+    print_report(report)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2, sort_keys=True), encoding="utf-8")
+    return 0 if report["round_trip"] and report["jsonable_identical"] else 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
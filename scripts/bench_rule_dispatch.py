@@ -0,0 +1,119 @@
+"""
+Rule evaluation cost: per-rule observation scans vs one dispatcher pass.
+
+The per-rule baseline calls every rule's run(chart) (each filters the full
+observation list itself) after a separate input-summary scan; the dispatched
+path is run_risk_rules, which routes observations to all rules in a single
+pass. Both paths must produce identical risks and debug reasons; the script
+exits non-zero if they differ. Bundles are taken largest-first.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from packages.ingest.compression import list_bundle_files
+from packages.ingest.synthea.loader import load_patient_dir
+from packages.ingest.synthea.normalizer import normalize_to_patient_chart
+from packages.ingest.synthea.parser import parse_fhir_resources
+from packages.pipeline.steps.risks import chart_input_summary, execute_rule, rule_skip_reason, run_risk_rules
+from packages.risklib.rules import discover_rules, rule_manifests
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_DATA_DIR = REPO_ROOT / "data" / "raw" / "fhir_ehr_synthea" / "samples_100"
+DEFAULT_OUT = REPO_ROOT / "artifacts" / "bench" / "rule_dispatch_bench.json"
+
+
+def largest_bundles(path: Path, limit: int) -> list[Path]:
+    files = [item for item in list_bundle_files(path) if item.suffix == ".json"]
+    files.sort(key=lambda item: item.stat().st_size, reverse=True)
+    return files[:limit] if limit > 0 else files
+
+
+def run_per_rule(chart) -> tuple[list[dict], dict[str, str]]:
+    """The pre-dispatcher loop: one input scan, then each rule scans the chart."""
+    results: list[dict] = []
+    debug_info: dict[str, str] = {}
+    manifests = rule_manifests()
+    summary = chart_input_summary(chart)
+    for rule_id, runner in sorted(discover_rules().items()):
+        skip = rule_skip_reason(manifests.get(rule_id, {}), summary)
+        if skip:
+            debug_info[rule_id] = skip
+            continue
+        normalized, reason = execute_rule(rule_id, runner, chart)
+        debug_info[rule_id] = reason
+        results.extend(normalized)
+    return results, debug_info
+
+
+def _time(fn, charts: list, repeat: int) -> tuple[list[float], list]:
+    samples: list[float] = []
+    outputs: list = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        outputs = [fn(chart) for chart in charts]
+        samples.append(time.perf_counter() - start)
+    return samples, outputs
+
+
+def run(files: list[Path], *, repeat: int = 5) -> dict:
+    charts = [normalize_to_patient_chart(parse_fhir_resources(load_patient_dir(path))) for path in files]
+    # Warm rule discovery/imports so neither path pays for them.
+    for chart in charts[:1]:
+        run_risk_rules(chart, debug=True)
+
+    per_rule_s, per_rule_out = _time(run_per_rule, charts, repeat)
+    dispatched_s, dispatched_out = _time(lambda chart: run_risk_rules(chart, debug=True), charts, repeat)
+
+    per_rule_best = min(per_rule_s) if per_rule_s else 0.0
+    dispatched_best = min(dispatched_s) if dispatched_s else 0.0
+    return {
+        "files": len(files),
+        "observations": sum(len(chart.observations) for chart in charts),
+        "repeat": repeat,
+        "identical": per_rule_out == dispatched_out,
+        "per_rule": {"best_s": per_rule_best, "median_s": statistics.median(per_rule_s) if per_rule_s else 0.0},
+        "dispatched": {"best_s": dispatched_best, "median_s": statistics.median(dispatched_s) if dispatched_s else 0.0},
+        "speedup": per_rule_best / dispatched_best if dispatched_best else 0.0,
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"bundles={report['files']} observations={report['observations']} repeat={report['repeat']}")
+    print("path | best_s | median_s")
+    for name in ("per_rule", "dispatched"):
+        row = report[name]
+        print(f"{name} | {row['best_s']:.4f} | {row['median_s']:.4f}")
+    print(f"speedup: {report['speedup']:.2f}x identical: {report['identical']}")
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare per-rule observation scans with the single-pass dispatcher.")
+    parser.add_argument("path", nargs="?", type=Path, default=DEFAULT_DATA_DIR, help="Directory of bundle JSON files.")
+    parser.add_argument("--limit", type=int, default=10, help="Number of largest bundles (0 = all).")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repetitions per path.")
+    parser.add_argument("--out", type=Path, default=DEFAULT_OUT, help="Where to write the JSON report.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    if not args.path.exists() or not args.path.is_dir():
+        print(f"Directory not found: {args.path}", file=sys.stderr)
+        return 1
+    report = run(largest_bundles(args.path, args.limit), repeat=max(1, args.repeat))
+    print_report(report)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2, sort_keys=True), encoding="utf-8")
+    return 0 if report["identical"] else 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
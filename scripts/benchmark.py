@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Iterable
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from packages.core.schemas.result import PatientAnalysisResult
+from packages.ingest.compression import list_bundle_files
+from packages.ingest.synthea.loader import load_patient_dir
+from packages.ingest.synthea.normalizer import normalize_to_patient_chart
+from packages.ingest.synthea.parser import parse_fhir_resources
+from packages.pipeline.agent_pipeline import _serialize_risks, run_agent_pipeline
+from packages.pipeline.agents.contradiction_agent import run_contradiction_agent
+from packages.pipeline.agents.missing_info_agent import run_missing_info_agent
+from packages.pipeline.agents.timeline_agent import run_timeline_agent
+from packages.pipeline.agents.verifier_agent import verify_result
+from packages.pipeline.evidence_enrich import enrich_evidence, enrich_result_evidence
+from packages.pipeline.steps.risks import run_risk_rules
+from packages.pipeline.steps.snapshot import build_snapshot_from_chart
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_DATA_DIR = REPO_ROOT / "data" / "raw" / "fhir_ehr_synthea" / "samples_100"
+DEFAULT_OUT = REPO_ROOT / "artifacts" / "bench" / "pipeline_bench.json"
+DEFAULT_BASELINE = REPO_ROOT / "artifacts" / "bench" / "baseline.json"
+
+STAGES = [
+    "load",
+    "parse",
+    "normalize",
+    "snapshot",
+    "risks",
+    "agents",
+    "enrich",
+    "verify",
+    "pipeline",
+]
+
+
+def _timed(timings: dict[str, float], stage: str, func: Callable, *args, **kwargs):
+    start = time.perf_counter()
+    value = func(*args, **kwargs)
+    timings[stage] = timings.get(stage, 0.0) + (time.perf_counter() - start)
+    return value
+
+
+def bench_patient(path: Path) -> dict[str, float]:
+    """Run every pipeline stage once for one bundle and return seconds per stage."""
+    timings: dict[str, float] = {}
+    resources = _timed(timings, "load", load_patient_dir, path)
+    grouped = _timed(timings, "parse", parse_fhir_resources, resources)
+    chart = _timed(timings, "normalize", normalize_to_patient_chart, grouped)
+    snapshot_text = _timed(timings, "snapshot", build_snapshot_from_chart, chart)
+    risks = _timed(timings, "risks", run_risk_rules, chart)
+
+    start = time.perf_counter()
+    timeline = run_timeline_agent(chart)
+    missing_info = run_missing_info_agent(chart)
+    contradictions = run_contradiction_agent(chart)
+    timings["agents"] = time.perf_counter() - start
+
+    _timed(timings, "enrich", enrich_evidence, risks, chart, str(path))
+    result = PatientAnalysisResult(
+        snapshot=snapshot_text,
+        risks=_serialize_risks(risks),
+        meta={"patient_id": chart.patient_id, "source_path": str(path), "mode": "mock"},
+        timeline=timeline,
+        missing_info=missing_info,
+        contradictions=contradictions,
+    )
+    _timed(timings, "enrich", enrich_result_evidence, result, chart, str(path))
+    _timed(timings, "verify", verify_result, result)
+
+    _timed(timings, "pipeline", run_agent_pipeline, path, enable_agents=True, mode="mock")
+    return timings
+
+
+def peak_memory_bytes(path: Path) -> int:
+    """Peak traced allocation for one full run_agent_pipeline call."""
+    tracemalloc.start()
+    try:
+        run_agent_pipeline(path, enable_agents=True, mode="mock")
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile (pct in 0..100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize_stage(values: list[float]) -> dict[str, float]:
+    return {
+        "count": len(values),
+        "total_s": sum(values),
+        "mean_ms": statistics.fmean(values) * 1000 if values else 0.0,
+        "p50_ms": percentile(values, 50) * 1000,
+        "p95_ms": percentile(values, 95) * 1000,
+        "max_ms": max(values) * 1000 if values else 0.0,
+    }
+
+
+def list_bundles(data_dir: Path, limit: int = 0) -> list[Path]:
+    files = list_bundle_files(data_dir)
+    if limit > 0:
+        files = files[:limit]
+    return files
+
+
+def run_benchmark(
+    files: Iterable[Path],
+    *,
+    repeat: int = 1,
+    measure_memory: bool = True,
+) -> dict:
+    files = list(files)
+    per_stage: dict[str, list[float]] = {stage: [] for stage in STAGES}
+    slowest: dict[str, tuple[float, str]] = {}
+    failures: list[dict[str, str]] = []
+    total_bytes = 0
+    patients = 0
+    for path in files:
+        try:
+            size = path.stat().st_size
+            for _ in range(max(1, repeat)):
+                timings = bench_patient(path)
+                for stage, seconds in timings.items():
+                    per_stage.setdefault(stage, []).append(seconds)
+                    if seconds > slowest.get(stage, (-1.0, ""))[0]:
+                        slowest[stage] = (seconds, path.name)
+        except Exception as exc:
+            failures.append({"file": path.name, "error": f"{type(exc).__name__}: {exc}"})
+            continue
+        patients += 1
+        total_bytes += size
+
+    peak = 0
+    if measure_memory:
+        for path in files:
+            try:
+                peak = max(peak, peak_memory_bytes(path))
+            except Exception:
+                continue
+
+    stages = {}
+    for stage, values in per_stage.items():
+        summary = summarize_stage(values)
+        summary["max_file"] = slowest.get(stage, (0.0, ""))[1]
+        stages[stage] = summary
+
+    pipeline_seconds = sum(per_stage.get("pipeline") or []) / max(1, repeat)
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "patients": patients,
+        "repeat": max(1, repeat),
+        "input_bytes": total_bytes,
+        "failures": failures,
+        "stages": stages,
+        "throughput": {
+            "patients_per_s": patients / pipeline_seconds if pipeline_seconds else 0.0,
+            "mb_per_s": (total_bytes / 1e6) / pipeline_seconds if pipeline_seconds else 0.0,
+        },
+        "peak_memory_mb": peak / 1e6 if measure_memory else None,
+    }
+
+
+def compare_results(
+    current: dict,
+    baseline: dict,
+    *,
+    threshold: float = 0.2,
+    metric: str = "p50_ms",
+    min_delta_ms: float = 1.0,
+) -> list[str]:
+    """Return one message per stage slower than baseline by more than threshold."""
+    regressions: list[str] = []
+    current_stages = current.get("stages") or {}
+    baseline_stages = baseline.get("stages") or {}
+    for stage in STAGES:
+        if stage not in current_stages or stage not in baseline_stages:
+            continue
+        now = float(current_stages[stage].get(metric, 0.0))
+        before = float(baseline_stages[stage].get(metric, 0.0))
+        if now - before < min_delta_ms:
+            continue
+        if before <= 0.0 or (now - before) / before > threshold:
+            ratio = now / before if before else float("inf")
+            regressions.append(
+                f"{stage} {metric} regressed: {before:.2f}ms -> {now:.2f}ms ({ratio:.2f}x)"
+            )
+    return regressions
+
+
+def print_report(report: dict) -> None:
+    print(f"patients: {report['patients']} | repeat: {report['repeat']}")
+    header = ["stage", "p50_ms", "p95_ms", "max_ms", "mean_ms", "max_file"]
+    print(" | ".join(header))
+    for stage in STAGES:
+        summary = report["stages"].get(stage)
+        if not summary:
+            continue
+        print(
+            " | ".join(
+                [
+                    stage,
+                    f"{summary['p50_ms']:.2f}",
+                    f"{summary['p95_ms']:.2f}",
+                    f"{summary['max_ms']:.2f}",
+                    f"{summary['mean_ms']:.2f}",
+                    summary.get("max_file") or "",
+                ]
+            )
+        )
+    throughput = report["throughput"]
+    print(
+        f"throughput: {throughput['patients_per_s']:.2f} patients/s, "
+        f"{throughput['mb_per_s']:.2f} MB/s"
+    )
+    if report.get("peak_memory_mb") is not None:
+        print(f"peak memory (traced, full pipeline): {report['peak_memory_mb']:.1f} MB")
+    for failure in report.get("failures") or []:
+        print(f"failed: {failure['file']} ({failure['error']})", file=sys.stderr)
+
+
+def write_json(path: Path, payload: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2, sort_keys=True), encoding="utf-8")
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages over a bundle directory.")
+    parser.add_argument("path", nargs="?", type=Path, default=DEFAULT_DATA_DIR, help="Directory of bundle JSON files.")
+    parser.add_argument("--limit", type=int, default=0, help="Max files to benchmark (0 = no limit).")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per file.")
+    parser.add_argument("--out", type=Path, default=DEFAULT_OUT, help="Where to write the JSON report.")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak-memory pass.")
+    parser.add_argument("--save-baseline", action="store_true", help="Also write the report to --baseline.")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Baseline JSON path.")
+    parser.add_argument("--compare", action="store_true", help="Fail if a stage regressed vs --baseline.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative slowdown (0.2 = 20%%).")
+    parser.add_argument(
+        "--metric",
+        choices=["p50_ms", "p95_ms", "max_ms", "mean_ms"],
+        default="p50_ms",
+        help="Stage metric used by --compare.",
+    )
+    parser.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=1.0,
+        help="Ignore regressions smaller than this many milliseconds.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    if not args.path.exists() or not args.path.is_dir():
+        print(f"Directory not found: {args.path}", file=sys.stderr)
+        return 1
+    files = list_bundles(args.path, args.limit)
+    report = run_benchmark(files, repeat=args.repeat, measure_memory=not args.no_memory)
+    print_report(report)
+    write_json(args.out, report)
+    if args.save_baseline:
+        write_json(args.baseline, report)
+        print(f"baseline written to {args.baseline}")
+
+    if args.compare:
+        if not args.baseline.exists():
+            print(f"Baseline not found: {args.baseline}", file=sys.stderr)
+            return 2
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = compare_results(
+            report,
+            baseline,
+            threshold=args.threshold,
+            metric=args.metric,
+            min_delta_ms=args.min_delta_ms,
+        )
+        if regressions:
+            for message in regressions:
+                print(f"REGRESSION: {message}")
+            return 1
+        print("no stage regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
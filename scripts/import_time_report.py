@@ -0,0 +1,101 @@
+"""
+Import-time report for the CLI and API entry points (`python -X importtime`).
+
+Each module is imported in a fresh interpreter with `-X importtime`; the
+report lists its total import time and the slowest top-level packages by
+cumulative time. Heavy optional dependencies (the OpenAI SDK) are expected
+to be missing from the CLI and API imports: they load on first use.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_MODULES = ("apps.worker.run_analyze", "apps.worker.run_snapshot", "apps.api.main")
+DEFAULT_OUT = REPO_ROOT / "artifacts" / "bench" / "import_time.json"
+HEAVY_OPTIONAL = ("openai",)
+
+
+def parse_importtime(stderr: str) -> list[dict]:
+    """Rows of `-X importtime` output as {"module", "self_us", "cumulative_us", "depth"}."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        stripped = name.lstrip()
+        rows.append(
+            {
+                "module": stripped,
+                "self_us": int(parts[0]),
+                "cumulative_us": int(parts[1]),
+                "depth": (len(name) - len(stripped)) // 2,
+            }
+        )
+    return rows
+
+
+def import_report(module: str, *, top: int = 10) -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=REPO_ROOT,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+    rows = parse_importtime(completed.stderr)
+    roots: dict[str, int] = {}
+    for row in rows:
+        root = row["module"].split(".")[0]
+        if row["module"] == root:
+            roots[root] = max(roots.get(root, 0), row["cumulative_us"])
+    imported = {row["module"] for row in rows}
+    return {
+        "module": module,
+        "total_s": max((row["cumulative_us"] for row in rows), default=0) / 1e6,
+        "modules": len(rows),
+        "slowest": [
+            {"package": name, "cumulative_s": micros / 1e6}
+            for name, micros in sorted(roots.items(), key=lambda item: item[1], reverse=True)[:top]
+        ],
+        "heavy_optional_loaded": [name for name in HEAVY_OPTIONAL if name in imported],
+    }
+
+
+def print_report(reports: list[dict]) -> None:
+    for report in reports:
+        print(
+            f"{report['module']}: {report['total_s']:.3f}s over {report['modules']} modules; "
+            f"heavy optional loaded: {report['heavy_optional_loaded'] or 'none'}"
+        )
+        for row in report["slowest"]:
+            print(f"  {row['package']:<24} {row['cumulative_s']:.3f}s")
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Import-time report for the CLI and API entry points.")
+    parser.add_argument("modules", nargs="*", default=list(DEFAULT_MODULES), help="Modules to import.")
+    parser.add_argument("--top", type=int, default=10, help="Slowest top-level packages listed per module.")
+    parser.add_argument("--out", type=Path, default=DEFAULT_OUT, help="Where to write the JSON report.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    reports = [import_report(module, top=args.top) for module in args.modules]
+    print_report(reports)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(reports, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,200 @@
+"""
+Load test for /v1/analyze admission control: small-request tail latency under huge bundles.
+
+Huge bundles are made by repeating the observation history of the largest
+sample (amplify_corpus.amplify_bundle). Three scenarios drive the app in
+process with FastAPI's TestClient from client threads:
+
+  baseline   small requests only
+  admission  small requests while other threads keep posting huge bundles
+  unbounded  the same mix with admission control disabled
+
+Reported per scenario: small-request latency p50/p95/p99/max, status counts
+for both kinds, and the admission settings used. Refused huge requests are
+retried after their Retry-After hint (capped by --retry-cap-s).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+
+from amplify_corpus import amplify_bundle
+from apps.api.admission import get_admission_controller
+from apps.api.main import app
+from packages.ingest.compression import list_bundle_files
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_DATA_DIR = REPO_ROOT / "data" / "raw" / "fhir_ehr_synthea" / "samples_100"
+DEFAULT_OUT = REPO_ROOT / "artifacts" / "bench" / "admission_load.json"
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def make_huge_bundle(source: Path, out_dir: Path, history_factor: int) -> Path:
+    bundle = json.loads(source.read_text(encoding="utf-8"))
+    huge = amplify_bundle(bundle, seed="load-test", clone=0, history_factor=history_factor)
+    path = out_dir / f"huge_{source.stem}.json"
+    path.write_text(json.dumps(huge), encoding="utf-8")
+    return path
+
+
+def _post(client: TestClient, path: Path) -> tuple[int, float, str | None]:
+    start = time.perf_counter()
+    response = client.post("/v1/analyze", json={"path": str(path), "mode": "mock"})
+    return response.status_code, time.perf_counter() - start, response.headers.get("retry-after")
+
+
+def run_scenario(
+    small_files: list[Path],
+    huge_files: list[Path],
+    *,
+    small_clients: int,
+    huge_clients: int,
+    rounds: int,
+    retry_cap_s: float,
+) -> dict:
+    get_admission_controller().shutdown()
+    get_admission_controller.cache_clear()
+    controller = get_admission_controller()
+    client = TestClient(app)
+    small_latencies: list[float] = []
+    small_status: Counter = Counter()
+    huge_status: Counter = Counter()
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def small_worker(worker: int) -> None:
+        for index in range(rounds):
+            path = small_files[(worker + index * small_clients) % len(small_files)]
+            status, elapsed, _ = _post(client, path)
+            with lock:
+                small_status[status] += 1
+                if status == 200:
+                    small_latencies.append(elapsed)
+
+    def huge_worker(worker: int) -> None:
+        index = worker
+        while not done.is_set():
+            status, _, retry_after = _post(client, huge_files[index % len(huge_files)])
+            index += 1
+            with lock:
+                huge_status[status] += 1
+            if retry_after is not None:
+                done.wait(min(float(retry_after), retry_cap_s))
+
+    huge_threads = [threading.Thread(target=huge_worker, args=(i,), daemon=True) for i in range(huge_clients)]
+    small_threads = [threading.Thread(target=small_worker, args=(i,)) for i in range(small_clients)]
+    start = time.perf_counter()
+    for thread in huge_threads:
+        thread.start()
+    if huge_threads:
+        time.sleep(0.5)  # let the huge requests get admitted first
+    for thread in small_threads:
+        thread.start()
+    for thread in small_threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    done.set()
+    for thread in huge_threads:
+        thread.join()
+    controller.shutdown()
+
+    settings = controller.settings
+    return {
+        "settings": settings.model_dump() if hasattr(settings, "model_dump") else settings.dict(),
+        "wall_s": wall,
+        "small": {
+            "requests": sum(small_status.values()),
+            "status": {str(code): count for code, count in sorted(small_status.items())},
+            "p50_s": statistics.median(small_latencies) if small_latencies else 0.0,
+            "p95_s": _percentile(small_latencies, 0.95),
+            "p99_s": _percentile(small_latencies, 0.99),
+            "max_s": max(small_latencies, default=0.0),
+        },
+        "huge": {"status": {str(code): count for code, count in sorted(huge_status.items())}},
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"huge bundle bytes={report['huge_bytes']} small bundles={report['small_files']}")
+    print("scenario | small p50_s | p95_s | p99_s | max_s | small status | huge status")
+    for name in ("baseline", "admission", "unbounded"):
+        row = report["scenarios"][name]
+        small = row["small"]
+        print(
+            f"{name} | {small['p50_s']:.3f} | {small['p95_s']:.3f} | {small['p99_s']:.3f} | "
+            f"{small['max_s']:.3f} | {small['status']} | {row['huge']['status']}"
+        )
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Small-request latency under huge bundles, with and without admission control.")
+    parser.add_argument("path", nargs="?", type=Path, default=DEFAULT_DATA_DIR, help="Directory of bundle JSON files.")
+    parser.add_argument("--history-factor", type=int, default=60, help="Observation history repeats for the huge bundle.")
+    parser.add_argument("--small-limit", type=int, default=20, help="Number of smallest bundles used as small requests.")
+    parser.add_argument("--small-clients", type=int, default=4, help="Concurrent small-request clients.")
+    parser.add_argument("--huge-clients", type=int, default=4, help="Concurrent huge-bundle clients.")
+    parser.add_argument("--rounds", type=int, default=10, help="Small requests per small client.")
+    parser.add_argument("--retry-cap-s", type=float, default=1.0, help="Longest wait honoured from Retry-After.")
+    parser.add_argument("--out", type=Path, default=DEFAULT_OUT, help="Where to write the JSON report.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    if not args.path.exists() or not args.path.is_dir():
+        print(f"Directory not found: {args.path}", file=sys.stderr)
+        return 1
+    files = sorted((item for item in list_bundle_files(args.path) if item.suffix == ".json"), key=lambda item: item.stat().st_size)
+    if not files:
+        print(f"No bundles in {args.path}", file=sys.stderr)
+        return 1
+    small_files = files[: max(1, args.small_limit)]
+    common = {
+        "small_clients": args.small_clients,
+        "huge_clients": args.huge_clients,
+        "rounds": args.rounds,
+        "retry_cap_s": args.retry_cap_s,
+    }
+    previous = os.environ.get("ANALYZE_ADMISSION")
+    with tempfile.TemporaryDirectory() as tmp:
+        huge = make_huge_bundle(files[-1], Path(tmp), args.history_factor)
+        report = {"huge_bytes": huge.stat().st_size, "small_files": len(small_files), "scenarios": {}}
+        try:
+            os.environ["ANALYZE_ADMISSION"] = "1"
+            report["scenarios"]["baseline"] = run_scenario(small_files, [huge], **{**common, "huge_clients": 0})
+            report["scenarios"]["admission"] = run_scenario(small_files, [huge], **common)
+            os.environ["ANALYZE_ADMISSION"] = "0"
+            report["scenarios"]["unbounded"] = run_scenario(small_files, [huge], **common)
+        finally:
+            if previous is None:
+                os.environ.pop("ANALYZE_ADMISSION", None)
+            else:
+                os.environ["ANALYZE_ADMISSION"] = previous
+            get_admission_controller().shutdown()
+            get_admission_controller.cache_clear()
+    print_report(report)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(report, indent=2, sort_keys=True), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -25,7 +25,10 @@ STEPS: list[GateStep] = [
         "Pytest (filename conventions phase 8)",
         [sys.executable, "-m", "pytest", "-q", "tests/test_filename_conventions_phase8.py"],
     ),
-    GateStep("Eval (mock)", [sys.executable, "-m", "eval.run_eval", "--modes", "mock", "--quiet"]),
+    GateStep(
+        "Eval (mock)",
+        [sys.executable, "-m", "eval.run_eval", "--modes", "mock", "--quiet", "--cache"],
+    ),
 ]
 
 
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import importlib.util
+import json
+from datetime import timedelta
+from pathlib import Path
+
+from packages.ingest.synthea.loader import load_patient_dir
+from packages.ingest.synthea.normalizer import normalize_to_patient_chart
+from packages.ingest.synthea.parser import parse_fhir_resources
+
+SAMPLE_PATH = Path(
+    "data/raw/fhir_ehr_synthea/samples_100/"
+    "Kris249_Moore224_45dff467-def6-2132-a03a-5950e203b5c8.json"
+)
+
+
+def _load_amplifier():
+    root = Path(__file__).resolve().parents[1]
+    path = root / "scripts" / "amplify_corpus.py"
+    spec = importlib.util.spec_from_file_location("amplify_corpus", path)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load amplify_corpus module.")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _count(bundle: dict, resource_type: str) -> int:
+    return sum(1 for entry in bundle["entry"] if entry["resource"].get("resourceType") == resource_type)
+
+
+def test_shift_timestamp_keeps_format() -> None:
+    amp = _load_amplifier()
+    delta = timedelta(days=2, hours=1)
+    assert amp.shift_timestamp("2020-01-30", delta) == "2020-02-01"
+    assert amp.shift_timestamp("2020-01-30T23:00:00+00:00", delta) == "2020-02-02T00:00:00+00:00"
+    assert amp.shift_timestamp("2020-01-30T10:00:00.123+00:00", delta) == "2020-02-01T11:00:00.123+00:00"
+    assert amp.shift_timestamp("2020-01-30T10:00:00Z", delta) == "2020-02-01T11:00:00Z"
+    assert amp.shift_timestamp("not a date", delta) == "not a date"
+
+
+def test_amplify_bundle_is_deterministic_and_rewrites_ids() -> None:
+    amp = _load_amplifier()
+    source = json.loads(SAMPLE_PATH.read_text(encoding="utf-8"))
+    first = amp.amplify_bundle(source, seed="s", clone=0, history_factor=3)
+    again = amp.amplify_bundle(source, seed="s", clone=0, history_factor=3)
+    other = amp.amplify_bundle(source, seed="s", clone=1, history_factor=3)
+    assert json.dumps(first) == json.dumps(again)
+    assert json.dumps(first) != json.dumps(other)
+
+    assert _count(first, "Observation") == 3 * _count(source, "Observation")
+    assert _count(first, "Patient") == 1
+    assert _count(first, "Encounter") == _count(source, "Encounter")
+
+    old_ids = {entry["resource"]["id"] for entry in source["entry"]}
+    new_ids = [entry["resource"]["id"] for entry in first["entry"]]
+    assert len(new_ids) == len(set(new_ids))
+    assert not old_ids & set(new_ids)
+    text = json.dumps(first)
+    assert not any(f"urn:uuid:{old_id}" in text for old_id in old_ids)
+
+
+def test_amplified_bundle_normalizes(tmp_path: Path) -> None:
+    amp = _load_amplifier()
+    source = json.loads(SAMPLE_PATH.read_text(encoding="utf-8"))
+    bundle = amp.amplify_bundle(source, seed="s", clone=0, history_factor=2)
+    path = tmp_path / "clone.json"
+    path.write_text(json.dumps(bundle), encoding="utf-8")
+
+    chart = normalize_to_patient_chart(parse_fhir_resources(load_patient_dir(path)))
+    original = normalize_to_patient_chart(parse_fhir_resources(load_patient_dir(SAMPLE_PATH)))
+    assert chart.patient_id != original.patient_id
+    assert len(chart.observations) == 2 * len(original.observations)
+
+
+def test_amplify_corpus_writes_layouts(tmp_path: Path) -> None:
+    amp = _load_amplifier()
+    summary = amp.amplify_corpus([SAMPLE_PATH], tmp_path, seed="s", patients=3)
+    assert summary["patients"] == 3
+    assert len(list((tmp_path / "bundles").glob("*.json"))) == 3
+    patient_lines = (tmp_path / "ndjson" / "Patient.ndjson").read_text(encoding="utf-8").splitlines()
+    assert len(patient_lines) == 3
+    observation = json.loads(
+        (tmp_path / "ndjson" / "Observation.ndjson").read_text(encoding="utf-8").splitlines()[0]
+    )
+    assert observation["subject"]["reference"].startswith("Patient/")
+    manifest = json.loads((tmp_path / "amplify_manifest.json").read_text(encoding="utf-8"))
+    assert manifest["resource_counts"]["Patient"] == 3
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from apps.api.main import app
+from apps.worker import run_analyze
+from packages.pipeline import agent_pipeline
+from packages.pipeline.agent_pipeline import run_agent_pipeline
+from packages.pipeline.sections import default_sections, resolve_stages
+
+SAMPLE_PATH = Path(
+    "data/raw/fhir_ehr_synthea/samples_100/"
+    "Berna338_Moore224_f4159279-94bf-1bfc-701b-502b2a3131b4.json"
+)
+
+
+def _require_sample() -> None:
+    if not SAMPLE_PATH.exists():
+        pytest.skip("sample data not available")
+
+
+def test_resolve_stages_follows_dependencies() -> None:
+    assert resolve_stages(["risks"]) == ("risks",)
+    assert resolve_stages(["narrative"]) == ("risks", "snapshot", "narrative")
+    assert resolve_stages(["timeline", "risks"]) == ("risks", "timeline")
+    assert resolve_stages(["narrative"], verify=True) == resolve_stages(default_sections(True))
+    assert resolve_stages(default_sections(False)) == ("risks", "snapshot", "narrative")
+    with pytest.raises(ValueError, match="unknown section"):
+        resolve_stages(["vitals"])
+
+
+@pytest.mark.parametrize("enable_agents", [False, True])
+def test_selected_sections_match_full_run(enable_agents: bool) -> None:
+    _require_sample()
+    full = json.loads(run_agent_pipeline(SAMPLE_PATH, enable_agents=enable_agents).model_dump_json())
+    assert "stages" not in full["meta"]
+    for section in default_sections(enable_agents):
+        partial = json.loads(
+            run_agent_pipeline(SAMPLE_PATH, enable_agents=enable_agents, sections=[section]).model_dump_json()
+        )
+        assert partial[section] == full[section]
+        assert partial["meta"]["sections"] == section
+        others = {key: value for key, value in partial.items() if key not in (section, "meta")}
+        assert all(value in (None, []) for value in others.values())
+
+
+def test_only_needed_stages_run(monkeypatch: pytest.MonkeyPatch) -> None:
+    _require_sample()
+
+    def _not_needed(*args, **kwargs):
+        raise AssertionError("stage should not run")
+
+    monkeypatch.setattr(agent_pipeline, "run_risk_rules", _not_needed)
+    monkeypatch.setattr(agent_pipeline, "generate_narrative", _not_needed)
+    monkeypatch.setattr(agent_pipeline, "run_contradiction_agent", _not_needed)
+    result = run_agent_pipeline(SAMPLE_PATH, sections=["timeline", "missing_info"])
+    assert result.meta["stages"] == "timeline,missing_info"
+    assert result.timeline and result.missing_info is not None
+    assert result.snapshot is None and result.snapshot_model() is None
+
+
+def test_api_and_cli_sections(capsys: pytest.CaptureFixture[str], monkeypatch: pytest.MonkeyPatch) -> None:
+    _require_sample()
+    client = TestClient(app)
+    body = {"path": str(SAMPLE_PATH), "mode": "mock", "sections": ["narrative"]}
+    payload = client.post("/v1/analyze", json=body).json()
+    assert payload["narrative"] is not None and payload["snapshot"] is None and payload["risks"] == []
+    assert payload["meta"]["stages"] == "risks,snapshot,narrative"
+    assert client.post("/v1/analyze", json={**body, "sections": ["vitals"]}).status_code == 422
+
+    monkeypatch.setattr(sys, "argv", ["run_analyze.py", str(SAMPLE_PATH), "--json", "--sections", "risks"])
+    assert run_analyze.main() == 0
+    output = json.loads(capsys.readouterr().out)
+    assert output["meta"]["stages"] == "risks" and output["risks"]
+
+    monkeypatch.setattr(sys, "argv", ["run_analyze.py", str(SAMPLE_PATH), "--sections", "vitals"])
+    assert run_analyze.main() == 2
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from apps.api.admission import AdmissionController, AdmissionRejected, bundle_cost, get_admission_controller
+from apps.api.main import app
+from apps.api.settings import AdmissionSettings, admission_settings
+
+SAMPLE_PATH = Path(
+    "data/raw/fhir_ehr_synthea/samples_100/"
+    "Berna338_Moore224_f4159279-94bf-1bfc-701b-502b2a3131b4.json"
+)
+
+
+@pytest.fixture
+def configure(monkeypatch: pytest.MonkeyPatch):
+    def apply(**env: object) -> AdmissionController:
+        for name, value in env.items():
+            monkeypatch.setenv(name, str(value))
+        get_admission_controller().shutdown()
+        get_admission_controller.cache_clear()
+        return get_admission_controller()
+
+    yield apply
+    get_admission_controller().shutdown()
+    get_admission_controller.cache_clear()
+
+
+def _settings(**values: object) -> AdmissionSettings:
+    defaults = {
+        "large_bundle_bytes": 100,
+        "small_concurrency": 2,
+        "large_concurrency": 1,
+        "inflight_byte_budget": 1000,
+    }
+    return AdmissionSettings(**{**defaults, **values})
+
+
+def test_pools_and_byte_budget() -> None:
+    controller = AdmissionController(_settings())
+    small = [controller.admit(50), controller.admit(99)]
+    assert {ticket.pool for ticket in small} == {"small"}
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.admit(10)
+    assert (rejected.value.status, rejected.value.retry_after) == (429, 1)
+
+    large = controller.admit(700)
+    assert large.pool == "large"
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.admit(100)
+    assert (rejected.value.status, rejected.value.retry_after) == (429, 5)
+
+    controller.release(small[0])
+    assert controller.admit(10).pool == "small"
+    assert controller.stats()["in_flight_bytes"] == {"small": 109, "large": 700}
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.admit(801)
+    assert rejected.value.status == 413 and rejected.value.detail["limit_bytes"] == 800
+
+
+def test_large_bundles_share_budget_left_after_small_reserve() -> None:
+    controller = AdmissionController(_settings(large_concurrency=3))
+    controller.admit(500)
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.admit(400)
+    assert rejected.value.status == 503 and rejected.value.code == "over_capacity"
+    assert controller.admit(99).pool == "small" and controller.admit(99).pool == "small"
+
+
+def test_small_pool_uses_its_retry_hint_and_bundle_limit() -> None:
+    controller = AdmissionController(_settings(small_concurrency=3, inflight_byte_budget=150))
+    controller.admit(99)
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.admit(60)
+    assert (rejected.value.status, rejected.value.retry_after) == (503, 1)
+
+    controller = AdmissionController(_settings(max_bundle_bytes=40))
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.admit(41)
+    assert rejected.value.status == 413 and rejected.value.detail["limit_bytes"] == 40
+    assert controller.admit(40).pool == "small"
+
+
+def test_disabled_admits_everything() -> None:
+    controller = AdmissionController(_settings(enabled=False, small_concurrency=0))
+    for _ in range(5):
+        controller.admit(10**9)
+    assert controller.stats()["active"] == {"small": 0, "large": 0}
+
+
+def test_settings_from_environment(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("ANALYZE_SMALL_CONCURRENCY", "3")
+    monkeypatch.setenv("ANALYZE_ADMISSION", "off")
+    monkeypatch.setenv("ANALYZE_MAX_BUNDLE_BYTES", "")
+    settings = admission_settings()
+    assert settings.small_concurrency == 3 and settings.enabled is False
+    assert settings.max_bundle_bytes is None
+
+    packed = tmp_path / "bundle.json.gz"
+    packed.write_bytes(b"x" * 10)
+    assert bundle_cost(packed, settings) == 100
+
+
+def test_route_refuses_with_retry_after(configure) -> None:
+    if not SAMPLE_PATH.exists():
+        pytest.skip("sample data not available")
+    configure(ANALYZE_SMALL_CONCURRENCY=0, ANALYZE_RETRY_AFTER_S=7)
+    client = TestClient(app)
+    response = client.post("/v1/analyze", json={"path": str(SAMPLE_PATH)})
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "7"
+    assert response.json()["error"]["code"] == "too_many_requests"
+
+    configure(ANALYZE_SMALL_CONCURRENCY=8, ANALYZE_LARGE_BUNDLE_BYTES=1, ANALYZE_MAX_BUNDLE_BYTES=10)
+    response = client.post("/v1/analyze", json={"path": str(SAMPLE_PATH)})
+    assert response.status_code == 413
+    assert "retry-after" not in response.headers
+
+
+def test_large_bundle_runs_in_worker_process(configure) -> None:
+    if not SAMPLE_PATH.exists():
+        pytest.skip("sample data not available")
+    client = TestClient(app)
+    body = {"path": str(SAMPLE_PATH), "enable_agents": True}
+    expected = client.post("/v1/analyze", json=body).content
+
+    controller = configure(ANALYZE_LARGE_BUNDLE_BYTES=1)
+    response = client.post("/v1/analyze", json=body)
+    assert response.status_code == 200
+    assert response.content == expected
+    assert controller._executor is not None
+    assert controller.stats()["active"] == {"small": 0, "large": 0}
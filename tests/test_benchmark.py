@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+SAMPLE_PATH = Path(
+    "data/raw/fhir_ehr_synthea/samples_100/"
+    "Kris249_Moore224_45dff467-def6-2132-a03a-5950e203b5c8.json"
+)
+
+
+def _load_benchmark():
+    root = Path(__file__).resolve().parents[1]
+    path = root / "scripts" / "benchmark.py"
+    spec = importlib.util.spec_from_file_location("benchmark", path)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load benchmark module.")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_percentile_nearest_rank() -> None:
+    bench = _load_benchmark()
+    values = [float(value) for value in range(1, 21)]
+    assert bench.percentile(values, 50) == 10.0
+    assert bench.percentile(values, 95) == 19.0
+    assert bench.percentile(values, 100) == 20.0
+    assert bench.percentile([], 50) == 0.0
+
+
+def test_compare_results_flags_regressions() -> None:
+    bench = _load_benchmark()
+    baseline = {"stages": {"load": {"p50_ms": 10.0}, "risks": {"p50_ms": 0.2}}}
+    current = {"stages": {"load": {"p50_ms": 15.0}, "risks": {"p50_ms": 0.6}}}
+    regressions = bench.compare_results(current, baseline, threshold=0.2)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("load p50_ms regressed")
+    assert bench.compare_results(current, baseline, threshold=0.6) == []
+
+
+def test_run_benchmark_report_shape() -> None:
+    if not SAMPLE_PATH.exists():
+        pytest.skip("sample data not available")
+    bench = _load_benchmark()
+    report = bench.run_benchmark([SAMPLE_PATH], measure_memory=False)
+    assert report["patients"] == 1
+    assert report["failures"] == []
+    assert set(bench.STAGES) <= set(report["stages"])
+    for summary in report["stages"].values():
+        assert summary["p50_ms"] <= summary["p95_ms"] <= summary["max_ms"]
+    assert report["throughput"]["patients_per_s"] > 0
+    assert report["input_bytes"] == SAMPLE_PATH.stat().st_size
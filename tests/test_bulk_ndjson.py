@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from packages.ingest.bulk.ndjson import iter_bulk_charts, iter_bulk_groups, patient_key
+from packages.ingest.synthea.loader import load_patient_dir
+from packages.ingest.synthea.normalizer import normalize_to_patient_chart
+from packages.ingest.synthea.parser import parse_fhir_resources
+from packages.pipeline.agent_pipeline import run_chart_pipeline
+
+SAMPLE_DIR = Path("data/raw/fhir_ehr_synthea/samples_100")
+SAMPLES = [
+    SAMPLE_DIR / "Kris249_Moore224_45dff467-def6-2132-a03a-5950e203b5c8.json",
+    SAMPLE_DIR / "Berna338_Moore224_f4159279-94bf-1bfc-701b-502b2a3131b4.json",
+]
+
+
+def _write_export(bundles: list[Path], out_dir: Path) -> None:
+    handles = {}
+    try:
+        for bundle_path in bundles:
+            bundle = json.loads(bundle_path.read_text(encoding="utf-8"))
+            for entry in bundle["entry"]:
+                resource = entry["resource"]
+                resource_type = resource["resourceType"]
+                if resource_type not in handles:
+                    handles[resource_type] = (out_dir / f"{resource_type}.ndjson").open("w", encoding="utf-8")
+                handles[resource_type].write(json.dumps(resource) + "\n")
+    finally:
+        for handle in handles.values():
+            handle.close()
+
+
+def _bundle_chart(path: Path):
+    return normalize_to_patient_chart(parse_fhir_resources(load_patient_dir(path)))
+
+
+def test_patient_key_handles_reference_styles() -> None:
+    assert patient_key({"resourceType": "Patient", "id": "p1"}) == "p1"
+    assert patient_key({"resourceType": "Observation", "subject": {"reference": "Patient/p1"}}) == "p1"
+    assert patient_key({"resourceType": "Condition", "subject": {"reference": "urn:uuid:p2"}}) == "p2"
+    assert patient_key({"resourceType": "AllergyIntolerance", "patient": {"reference": "Patient/p3"}}) == "p3"
+    assert patient_key({"resourceType": "Medication", "code": {}}) is None
+
+
+def test_bulk_charts_match_bundle_charts(tmp_path: Path) -> None:
+    _write_export(SAMPLES, tmp_path)
+    charts = {chart.patient_id: chart for chart in iter_bulk_charts(tmp_path)}
+    assert len(charts) == len(SAMPLES)
+    for bundle_path in SAMPLES:
+        expected = _bundle_chart(bundle_path)
+        chart = charts[expected.patient_id]
+        assert chart.demographics == expected.demographics
+        assert [obs.id for obs in chart.observations] == [obs.id for obs in expected.observations]
+        assert [cond.id for cond in chart.conditions] == [cond.id for cond in expected.conditions]
+        assert len(chart.medications) == len(expected.medications)
+        assert len(chart.allergies) == len(expected.allergies)
+
+
+def test_partitioned_grouping_matches_in_memory(tmp_path: Path) -> None:
+    export_dir = tmp_path / "export"
+    export_dir.mkdir()
+    _write_export(SAMPLES, export_dir)
+    in_memory = dict(iter_bulk_groups(export_dir))
+    partitioned = dict(iter_bulk_groups(export_dir, max_memory_bytes=1, work_dir=tmp_path))
+    assert sorted(in_memory) == sorted(partitioned)
+    for key, grouped in in_memory.items():
+        for resource_type, items in grouped.items():
+            assert [item["resource"]["id"] for item in items] == [
+                item["resource"]["id"] for item in partitioned[key][resource_type]
+            ]
+    assert [path.name for path in tmp_path.iterdir()] == ["export"]
+
+
+def test_bulk_chart_runs_through_pipeline(tmp_path: Path) -> None:
+    _write_export(SAMPLES[:1], tmp_path)
+    chart = next(iter_bulk_charts(tmp_path))
+    result = run_chart_pipeline(chart, str(tmp_path), enable_agents=True)
+    assert result.meta["patient_id"] == chart.patient_id
+    assert result.meta["source_path"] == str(tmp_path)
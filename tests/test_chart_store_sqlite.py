@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from apps.api.main import app
+from apps.worker import build_chart_db
+from packages.ingest import store
+from packages.ingest.store import (
+    connect,
+    count_patients,
+    get_chart,
+    get_result,
+    iter_directory_charts,
+    load_directory,
+    patients_with_condition,
+    patients_with_observation,
+    patients_with_rule,
+    put_result,
+)
+from packages.pipeline.agent_pipeline import run_chart_pipeline
+
+SAMPLE_PATH = Path(
+    "data/raw/fhir_ehr_synthea/samples_100/"
+    "Kris249_Moore224_45dff467-def6-2132-a03a-5950e203b5c8.json"
+)
+
+
+def _load_sample(db_path: Path, tmp_path: Path):
+    data_dir = tmp_path / "bundles"
+    data_dir.mkdir()
+    (data_dir / SAMPLE_PATH.name).write_bytes(SAMPLE_PATH.read_bytes())
+    conn = connect(db_path)
+    assert load_directory(conn, data_dir) == 1
+    chart, source_path = next(iter_directory_charts(data_dir))
+    return conn, chart, source_path
+
+
+def test_store_round_trip_and_indexes(tmp_path: Path) -> None:
+    db_path = tmp_path / "charts.db"
+    conn, chart, source_path = _load_sample(db_path, tmp_path)
+    try:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        stored = get_chart(conn, chart.patient_id)
+        assert stored is not None
+        assert [obs.id for obs in stored.observations] == [obs.id for obs in chart.observations]
+
+        a1c = [obs for obs in chart.observations if obs.code == "4548-4"]
+        assert patients_with_observation(conn, "4548-4") == [chart.patient_id]
+        future = datetime(2100, 1, 1, tzinfo=timezone.utc)
+        assert patients_with_observation(conn, "4548-4", since=future) == []
+        assert a1c
+
+        condition_code = chart.conditions[0].code
+        assert patients_with_condition(conn, condition_code) == [chart.patient_id]
+
+        result = run_chart_pipeline(chart, source_path, enable_agents=True)
+        put_result(conn, result, enable_agents=True)
+        put_result(conn, result, enable_agents=True)
+        stored_result = get_result(conn, chart.patient_id)
+        assert stored_result is not None
+        assert [risk["message"] for risk in stored_result.risks] == [
+            risk["message"] for risk in result.risks
+        ]
+        for risk in result.risks:
+            assert patients_with_rule(conn, risk["rule_id"]) == [chart.patient_id]
+
+        assert count_patients(conn) == 1
+    finally:
+        conn.close()
+
+
+def test_build_chart_db_batches_results(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    data_dir = tmp_path / "bundles"
+    data_dir.mkdir()
+    samples = sorted(SAMPLE_PATH.parent.glob("*.json"))[:3]
+    for sample in samples:
+        (data_dir / sample.name).write_bytes(sample.read_bytes())
+    transactions: list[int] = []
+    write_results = store._write_results
+
+    def counting_write_results(conn, batch, *, enable_agents):
+        transactions.append(len(batch))
+        write_results(conn, batch, enable_agents=enable_agents)
+
+    monkeypatch.setattr(store, "_write_results", counting_write_results)
+    db_path = tmp_path / "charts.db"
+    argv = ["build_chart_db.py", str(data_dir), "--db", str(db_path), "--analyze", "--batch-size", "2"]
+    monkeypatch.setattr("sys.argv", argv)
+    assert build_chart_db.main() == 0
+    assert transactions == [2, 1]
+
+    conn = connect(db_path)
+    try:
+        for chart, source_path in iter_directory_charts(data_dir):
+            stored = get_result(conn, chart.patient_id)
+            assert stored is not None
+            expected = run_chart_pipeline(chart, source_path, mode="mock", enable_agents=True)
+            assert [risk["rule_id"] for risk in stored.risks] == [risk["rule_id"] for risk in expected.risks]
+            for risk in expected.risks:
+                assert chart.patient_id in patients_with_rule(conn, risk["rule_id"])
+    finally:
+        conn.close()
+
+
+def test_patients_router_reads_store(tmp_path: Path, monkeypatch) -> None:
+    db_path = tmp_path / "charts.db"
+    conn, chart, source_path = _load_sample(db_path, tmp_path)
+    put_result(conn, run_chart_pipeline(chart, source_path, enable_agents=True), enable_agents=True)
+    conn.close()
+    monkeypatch.setenv("CHART_DB_PATH", str(db_path))
+    client = TestClient(app)
+
+    listing = client.get("/v1/patients").json()
+    assert listing["total"] == 1
+    assert listing["patients"][0]["patient_id"] == chart.patient_id
+
+    detail = client.get(f"/v1/patients/{chart.patient_id}")
+    assert detail.status_code == 200
+    assert detail.json()["patient_id"] == chart.patient_id
+
+    result = client.get(f"/v1/patients/{chart.patient_id}/result")
+    assert result.status_code == 200
+    assert result.json()["meta"]["patient_id"] == chart.patient_id
+
+    assert client.get("/v1/patients/missing").status_code == 404
+
+
+def test_patients_router_without_store(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("CHART_DB_PATH", str(tmp_path / "absent.db"))
+    response = TestClient(app).get("/v1/patients")
+    assert response.status_code == 503
+    assert response.json()["error"]["code"] == "store_unavailable"
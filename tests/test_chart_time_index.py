@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta
+
+from packages.core.schemas.chart import Condition, Encounter, Note, Observation, PatientChart
+from packages.core.utils.dates import ChartTimeIndex
+
+LOINC = "http://loinc.org"
+BASE = datetime(2020, 1, 1)
+
+
+def _day(n: int) -> datetime:
+    return BASE + timedelta(days=n)
+
+
+def _random_chart(seed: int) -> PatientChart:
+    rng = random.Random(seed)
+    conditions = []
+    for i in range(60):
+        onset = _day(rng.randint(0, 400)) if rng.random() > 0.1 else None
+        abatement = None
+        if onset is not None and rng.random() < 0.6:
+            abatement = onset + timedelta(days=rng.randint(-5, 120))
+        conditions.append(Condition(id=f"c{i}", code=str(i % 7), onset=onset, abatement=abatement))
+    observations = [
+        Observation(
+            id=f"o{i}",
+            code=rng.choice(["4548-4", "85354-9", "2160-0"]),
+            code_system=LOINC,
+            effective_dt=_day(rng.randint(0, 400)),
+        )
+        for i in range(80)
+    ]
+    encounters = [Encounter(id=f"e{i}", start=_day(rng.randint(0, 420))) for i in range(20)]
+    return PatientChart(
+        patient_id=f"p{seed}",
+        conditions=conditions,
+        observations=observations,
+        encounters=encounters,
+        notes=[Note(id="n0", authored=_day(390))],
+    )
+
+
+def test_active_conditions_match_linear_scan() -> None:
+    for seed in range(5):
+        chart = _random_chart(seed)
+        index = ChartTimeIndex(chart)
+        for day in range(-5, 530, 3):
+            at = _day(day)
+            expected = sorted(
+                (
+                    condition
+                    for condition in chart.conditions
+                    if condition.onset is not None
+                    and condition.onset <= at
+                    and (condition.abatement is None or at < condition.abatement)
+                ),
+                key=lambda condition: condition.onset,
+            )
+            assert [c.id for c in index.active_conditions(at)] == [c.id for c in expected]
+
+
+def test_windows_and_latest_match_linear_scan() -> None:
+    chart = _random_chart(7)
+    index = ChartTimeIndex(chart)
+    for start, end in [(0, 30), (100, 100), (350, 500), (-10, -1)]:
+        expected = sorted(
+            obs.id
+            for obs in chart.observations
+            if obs.code == "4548-4" and _day(start) <= obs.effective_dt <= _day(end)
+        )
+        found = index.events("observation", _day(start), _day(end), code="4548-4", system=LOINC)
+        assert sorted(obs.id for _, obs in found) == expected
+        assert [date for date, _ in found] == sorted(date for date, _ in found)
+
+    assert index.latest("observation", code="2160-0", system=LOINC) == max(
+        obs.effective_dt for obs in chart.observations if obs.code == "2160-0"
+    )
+    assert index.latest("observation", code="2160-0") is None
+    assert index.latest() == max(
+        [e.start for e in chart.encounters]
+        + [o.effective_dt for o in chart.observations]
+        + [c.onset or c.abatement for c in chart.conditions if c.onset or c.abatement]
+        + [_day(390)]
+    )
+    onsets = [c.onset for c in index.conditions_by_onset()]
+    assert onsets == sorted(onsets)
+    assert len(onsets) == sum(1 for c in chart.conditions if c.onset)
+
+
+def test_empty_chart() -> None:
+    index = ChartTimeIndex(PatientChart(patient_id="empty"))
+    assert index.latest() is None
+    assert index.events("encounter") == []
+    assert index.active_conditions(BASE) == []
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from apps.api.main import app
+from packages.core.schemas.chart import Condition, Medication, Observation, PatientChart
+from packages.ingest.code_index import CodeIndex, build_chart_index, parse_term, tokenize
+from packages.ingest.store import connect, patients_with_term, put_charts, term_resources
+from packages.pipeline.agents.missing_info_agent import run_missing_info_agent
+
+
+def _chart(patient_id: str, conditions: list[tuple[str, str]]) -> PatientChart:
+    when = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return PatientChart(
+        patient_id=patient_id,
+        conditions=[
+            Condition(id=f"{patient_id}-c{i}", code=code, display=display)
+            for i, (code, display) in enumerate(conditions)
+        ],
+        medications=[Medication(id=f"{patient_id}-m", name="Metformin 500 MG Oral Tablet")],
+        observations=[
+            Observation(
+                id=f"{patient_id}-o",
+                code="4548-4",
+                code_system="http://loinc.org",
+                display="Hemoglobin A1c/Hemoglobin.total in Blood",
+                value=6.1,
+                effective=when,
+                effective_dt=when,
+            )
+        ],
+    )
+
+
+def _charts() -> list[PatientChart]:
+    return [
+        _chart("a", [("44054006", "Diabetes mellitus type 2 (disorder)")]),
+        _chart("b", [("714628002", "Prediabetes (finding)")]),
+        _chart("c", [("59621000", "Essential hypertension (disorder)"), ("1", "High blood pressure")]),
+    ]
+
+
+def _substring_match(chart: PatientChart, fragment: str) -> bool:
+    return any(
+        fragment in " ".join([condition.display or "", condition.code or ""]).lower()
+        for condition in chart.conditions
+    )
+
+
+def test_tokenize_and_parse_term() -> None:
+    assert tokenize("Diabetes mellitus type 2 (disorder)") == ["diabetes", "mellitus", "type", "2", "disorder"]
+    assert parse_term("code=44054006") == ("code", "44054006")
+    assert parse_term("Diabetes") == ("text", "diabetes")
+    with pytest.raises(ValueError):
+        parse_term("loinc=4548-4")
+
+
+def test_index_lookups_and_incremental_updates() -> None:
+    index = CodeIndex()
+    assert index.add_charts(_charts()) == 3
+    assert index.patients("code=44054006") == ["a"]
+    assert index.patients("text=metformin") == ["a", "b", "c"]
+    assert index.resources("code", "4548-4", patient_id="b") == ["b-o"]
+
+    index.add_chart(_chart("a", [("38341003", "Hypertensive disorder")]))
+    assert index.patients("code=44054006") == []
+    index.remove_patient("c")
+    assert index.patients("text=hypertension") == []
+    assert len(index) == 2
+
+    restored = CodeIndex.from_dict(index.to_dict())
+    assert restored.patients("code=38341003") == ["a"]
+    assert restored.match("hypertensive disorder") == index.match("hypertensive disorder")
+
+
+def test_match_keeps_substring_semantics() -> None:
+    charts = _charts()
+    index = CodeIndex()
+    index.add_charts(charts)
+    fragments = ("diabetes", "high blood pressure", "htn", "(disorder)", "type 2", "4405", "blood", "iabet", "054", "ension (dis")
+    for fragment in fragments:
+        matched = index.match(fragment, resource_type="Condition")
+        for chart in charts:
+            assert (chart.patient_id in matched) == _substring_match(chart, fragment), fragment
+    assert index.match("Diabetes", resource_type="Condition")["b"] == {("Condition", "b-c0")}
+    index.remove_patient("b")
+    assert "b" not in index.match("diabetes")
+
+
+def test_missing_info_agent_accepts_shared_index(monkeypatch) -> None:
+    charts = _charts()
+    index = CodeIndex()
+    index.add_charts(charts)
+    for chart in charts:
+        expected = run_missing_info_agent(chart)
+        assert run_missing_info_agent(chart, index=index) == expected
+        assert run_missing_info_agent(chart, index=build_chart_index(chart)) == expected
+
+    def no_index_build(*args, **kwargs):
+        raise AssertionError("agent indexed the chart without a shared index")
+
+    monkeypatch.setattr(CodeIndex, "add_chart", no_index_build)
+    assert [item.id for item in run_missing_info_agent(charts[2])] == ["missing_bp_recent"]
+
+
+def test_store_search_and_api(tmp_path: Path, monkeypatch) -> None:
+    db_path = tmp_path / "charts.db"
+    conn = connect(db_path)
+    put_charts(conn, [(chart, None) for chart in _charts()])
+    assert patients_with_term(conn, "code=44054006") == ["a"]
+    assert patients_with_term(conn, "text=diabetes") == ["a"]
+    assert term_resources(conn, "text=hypertension", patient_id="c") == [
+        {"resource_type": "Condition", "resource_id": "c-c0"}
+    ]
+    put_charts(conn, [(_chart("a", []), None)])
+    assert patients_with_term(conn, "code=44054006") == []
+    conn.close()
+
+    monkeypatch.setenv("CHART_DB_PATH", str(db_path))
+    client = TestClient(app)
+    response = client.get("/v1/patients/search", params={"text": "Prediabetes"})
+    assert response.status_code == 200
+    assert response.json() == {"query": "text=Prediabetes", "patients": ["b"]}
+    assert client.get("/v1/patients/search").status_code == 400
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from packages.cohort.features import materialize_features, patient_features, trend_of
+from packages.cohort.query import aggregate_cohort, parse_filter, select_cohort
+from packages.core.schemas.chart import Condition, Observation, PatientChart
+from packages.ingest.store import connect
+
+LOINC = "http://loinc.org"
+AS_OF = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _obs(obs_id: str, code: str, value, days_ago: int, components=None) -> Observation:
+    when = AS_OF - timedelta(days=days_ago)
+    return Observation(
+        id=obs_id,
+        code=code,
+        code_system=LOINC,
+        value=value,
+        effective=when,
+        effective_dt=when,
+        components=components or [],
+    )
+
+
+def _bp(obs_id: str, days_ago: int) -> Observation:
+    components = [
+        {"code": "8480-6", "code_system": LOINC, "display": "sys", "value": 150.0, "unit": "mm[Hg]"},
+        {"code": "8462-4", "code_system": LOINC, "display": "dia", "value": 95.0, "unit": "mm[Hg]"},
+    ]
+    return _obs(obs_id, "85354-9", None, days_ago, components)
+
+
+def _charts() -> list[PatientChart]:
+    return [
+        PatientChart(
+            patient_id="a",
+            demographics={"gender": "female", "birth_date": "1950-06-01"},
+            observations=[_obs("a1", "4548-4", 7.0, 400), _obs("a2", "4548-4", 8.4, 100), _bp("a3", 400)],
+            conditions=[Condition(id="c1", code="44054006", clinical_status="active")],
+        ),
+        PatientChart(
+            patient_id="b",
+            demographics={"gender": "male", "birth_date": "1990-01-01"},
+            observations=[_obs("b1", "4548-4", 9.0, 30), _bp("b2", 20)],
+        ),
+        PatientChart(
+            patient_id="c",
+            demographics={"gender": "male", "birth_date": "1960-01-01"},
+            observations=[
+                _obs("c1", "2160-0", 1.0, 300),
+                _obs("c2", "2160-0", 1.1, 200),
+                _obs("c3", "2160-0", 1.3, 100),
+                _obs("c4", "4548-4", 9.5, 800),
+            ],
+        ),
+    ]
+
+
+@pytest.fixture()
+def conn(tmp_path: Path):
+    connection = connect(tmp_path / "charts.db")
+    materialize_features(connection, _charts())
+    yield connection
+    connection.close()
+
+
+def test_patient_features_follow_rule_conventions() -> None:
+    features = patient_features(_charts()[0])
+    assert features["observations"]["4548-4"]["latest_value"] == 8.4
+    assert features["observations"]["8480-6"]["latest_value"] == 150.0
+    assert features["observations"]["85354-9"]["latest_value"] is None
+    assert features["conditions"] == {"44054006": True}
+    assert "lab_a1c_elevated" in features["risks"]
+    assert trend_of([1.0, 1.1, 1.3]) == "rising"
+    assert trend_of([1.0, 1.1]) is None
+
+
+def test_select_cohort_filters(conn) -> None:
+    high_a1c_no_bp = [parse_filter("lab:4548-4>8/365d"), parse_filter("no-lab:85354-9/180d")]
+    assert select_cohort(conn, high_a1c_no_bp, as_of=AS_OF) == ["a"]
+    assert select_cohort(conn, [parse_filter("lab:4548-4>8")], as_of=AS_OF) == ["a", "b", "c"]
+    assert select_cohort(conn, [parse_filter("trend:2160-0=rising")], as_of=AS_OF) == ["c"]
+    assert select_cohort(conn, [parse_filter("active-condition:44054006")], as_of=AS_OF) == ["a"]
+    assert select_cohort(conn, [parse_filter("no-condition:44054006")], as_of=AS_OF) == ["b", "c"]
+    assert select_cohort(conn, [parse_filter("age>=64")], as_of=AS_OF) == ["a", "c"]
+    assert select_cohort(conn, [parse_filter("age=64")], as_of=AS_OF) == ["c"]
+    assert select_cohort(conn, [parse_filter("gender:male"), parse_filter("risk:vitals_bp_elevated")], as_of=AS_OF) == ["b"]
+
+
+def test_aggregate_cohort(conn) -> None:
+    summary = aggregate_cohort(
+        conn, [parse_filter("lab:4548-4>8")], as_of=AS_OF, group_by="gender", stat_code="4548-4"
+    )
+    assert summary["count"] == 3
+    assert summary["groups"] == {"male": 2, "female": 1}
+    assert summary["stat"]["max"] == 9.5
+
+
+def test_parse_filter_rejects_unknown() -> None:
+    with pytest.raises(ValueError):
+        parse_filter("lab:4548-4~8")
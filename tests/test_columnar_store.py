@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from apps.worker import scan_risks
+from packages.core.schemas.chart import Observation, PatientChart, SourceRef
+from packages.ingest.columnar import ChartStore, decode_time, encode_time, write_chart_store
+from packages.ingest.synthea.loader import load_patient_dir
+from packages.ingest.synthea.normalizer import normalize_to_patient_chart
+from packages.ingest.synthea.parser import parse_fhir_resources
+from packages.pipeline.steps.risks import run_risk_rules
+
+SAMPLE_DIR = Path("data/raw/fhir_ehr_synthea/samples_100")
+SAMPLES = [
+    SAMPLE_DIR / "Kris249_Moore224_45dff467-def6-2132-a03a-5950e203b5c8.json",
+    SAMPLE_DIR / "Berna338_Moore224_f4159279-94bf-1bfc-701b-502b2a3131b4.json",
+]
+
+
+def _chart(path: Path) -> PatientChart:
+    return normalize_to_patient_chart(parse_fhir_resources(load_patient_dir(path)))
+
+
+def test_time_encoding_round_trips() -> None:
+    values = [
+        None,
+        datetime(2020, 1, 2, 3, 4, 5, 678000, tzinfo=timezone.utc),
+        datetime(2020, 1, 2, 3, 4, 5, tzinfo=timezone(timedelta(hours=-5))),
+        datetime(1950, 6, 1, 12, 0),
+    ]
+    for value in values:
+        decoded = decode_time(*encode_time(value))
+        assert decoded == value
+        if value is not None:
+            assert decoded.utcoffset() == value.utcoffset()
+
+
+def test_store_round_trips_charts(tmp_path: Path) -> None:
+    charts = [_chart(path) for path in SAMPLES]
+    extra = PatientChart(
+        patient_id="p-extra",
+        observations=[
+            Observation(id="o1", value_text="120/80", sources=[]),
+            Observation(
+                id="o2",
+                code="x",
+                value=1.5,
+                sources=[SourceRef(doc_id="custom", resource_type="Observation", resource_id="other")],
+            ),
+        ],
+    )
+    charts.append(extra)
+    meta = write_chart_store(charts, tmp_path / "store")
+    assert meta["patients"] == 3
+    with ChartStore(tmp_path / "store") as store:
+        assert store.patient_ids() == [chart.patient_id for chart in charts]
+        for index, chart in enumerate(charts):
+            restored = store.to_chart(index)
+            assert restored.model_dump() == chart.model_dump()
+
+
+def test_store_charts_give_same_risks(tmp_path: Path) -> None:
+    charts = [_chart(path) for path in SAMPLES]
+    write_chart_store(charts, tmp_path / "store")
+    with ChartStore(tmp_path / "store") as store:
+        for chart, restored in zip(charts, store.iter_charts()):
+            expected = [(risk["rule_id"], risk["message"]) for risk in run_risk_rules(chart)]
+            actual = [(risk["rule_id"], risk["message"]) for risk in run_risk_rules(restored)]
+            assert actual == expected
+
+
+def test_columns_scan_without_decoding(tmp_path: Path) -> None:
+    chart = _chart(SAMPLES[0])
+    write_chart_store([chart], tmp_path / "store")
+    with ChartStore(tmp_path / "store") as store:
+        code_id = store.term_id("4548-4")
+        codes = store.column("obs_code")
+        values = store.column("obs_value")
+        hits = [values[row] for row in store.observation_range(0) if codes[row] == code_id]
+        expected = [obs.value for obs in chart.observations if obs.code == "4548-4"]
+        assert hits == expected
+
+
+def test_scan_risks_closes_store(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    write_chart_store([_chart(SAMPLES[0])], tmp_path / "store")
+    opened: list[ChartStore] = []
+
+    class RecordingStore(ChartStore):
+        def __init__(self, path: str | Path) -> None:
+            super().__init__(path)
+            opened.append(self)
+
+    monkeypatch.setattr(scan_risks, "ChartStore", RecordingStore)
+    monkeypatch.setattr("sys.argv", ["scan_risks.py", str(tmp_path / "store"), "--store"])
+    assert scan_risks.main() == 0
+    assert "total files scanned: 1" in capsys.readouterr().out
+
+    def fail(*args: object, **kwargs: object) -> None:
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(scan_risks, "RuleCosts", fail)
+    monkeypatch.setattr("sys.argv", ["scan_risks.py", str(tmp_path / "store"), "--store", "--debug"])
+    with pytest.raises(KeyboardInterrupt):
+        scan_risks.main()
+    assert len(opened) == 2 and all(store._maps == [] for store in opened)
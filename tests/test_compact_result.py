@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from apps.api.main import app
+from packages.core.render.compact import compact_result, expand_result, is_compact
+from packages.ingest.synthea.loader import load_patient_dir
+from packages.ingest.synthea.normalizer import normalize_to_patient_chart
+from packages.ingest.synthea.parser import parse_fhir_resources
+from packages.pipeline.agent_pipeline import run_chart_pipeline
+
+SAMPLE_PATH = Path(
+    "data/raw/fhir_ehr_synthea/samples_100/"
+    "Berna338_Moore224_f4159279-94bf-1bfc-701b-502b2a3131b4.json"
+)
+
+
+def _sample_result():
+    if not SAMPLE_PATH.exists():
+        pytest.skip("sample data not available")
+    chart = normalize_to_patient_chart(parse_fhir_resources(load_patient_dir(SAMPLE_PATH)))
+    return run_chart_pipeline(chart, str(SAMPLE_PATH), enable_agents=True)
+
+
+def test_compact_round_trips_sample_result() -> None:
+    result = _sample_result()
+    full = result.model_dump(mode="json")
+    compact = compact_result(result)
+    assert is_compact(compact) and not is_compact(full)
+    assert json.dumps(expand_result(compact)) == json.dumps(full)
+    assert len(json.dumps(compact)) < len(json.dumps(full))
+
+    table = compact["evidence_table"]
+    assert table["files"] == [str(SAMPLE_PATH)]
+    assert len({tuple(row) for row in table["rows"]}) == len(table["rows"])
+    indexes = [ref for section in ("risks", "timeline") for item in compact[section] for ref in item["evidence"]]
+    assert indexes and all(isinstance(ref, int) for ref in indexes)
+    assert compact_result(compact) is compact
+    assert expand_result(full) is full
+
+
+def test_irregular_evidence_stays_inline() -> None:
+    citation = {
+        "doc_id": "note-1",
+        "resource_type": "Observation",
+        "resource_id": "o1",
+        "file_path": None,
+        "timestamp": "2024-01-01T00:00:00",
+    }
+    extra = {**citation, "note": "kept"}
+    payload = {
+        "snapshot": "s",
+        "risks": [{"rule_id": "r", "evidence": [citation, extra, "Observation/o2", citation]}],
+        "narrative": None,
+        "timeline": None,
+    }
+    compact = compact_result(payload)
+    assert compact["risks"][0]["evidence"] == [0, extra, "Observation/o2", 0]
+    assert compact["evidence_table"]["rows"] == [["Observation", "o1", None, "2024-01-01T00:00:00", "note-1"]]
+    assert expand_result(compact) == payload
+    assert "encoding" not in payload
+
+    with pytest.raises(ValueError):
+        expand_result({**compact, "encoding_version": 99})
+
+
+def test_api_compact_is_opt_in() -> None:
+    if not SAMPLE_PATH.exists():
+        pytest.skip("sample data not available")
+    client = TestClient(app)
+    body = {"path": str(SAMPLE_PATH), "mode": "mock", "enable_agents": True}
+    full = client.post("/v1/analyze", json=body).json()
+    compact = client.post("/v1/analyze", json={**body, "compact": True}).json()
+    assert not is_compact(full)
+    assert is_compact(compact)
+    assert expand_result(compact) == full
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+
+from packages.ingest.bulk import ndjson
+from packages.ingest.bulk.ndjson import iter_bulk_charts, iter_bulk_groups
+from packages.ingest.compression import estimated_size, list_bundle_files, logical_stem
+from packages.ingest.synthea.loader import load_patient_dir
+from packages.ingest.synthea.normalizer import normalize_to_patient_chart
+from packages.ingest.synthea.parser import parse_fhir_resources
+
+SAMPLE_PATH = Path(
+    "data/raw/fhir_ehr_synthea/samples_100/"
+    "Kris249_Moore224_45dff467-def6-2132-a03a-5950e203b5c8.json"
+)
+
+
+def _chart(path: Path):
+    return normalize_to_patient_chart(parse_fhir_resources(load_patient_dir(path)))
+
+
+def test_gzip_bundle_loads_like_raw(tmp_path: Path) -> None:
+    target = tmp_path / f"{SAMPLE_PATH.name}.gz"
+    target.write_bytes(gzip.compress(SAMPLE_PATH.read_bytes()))
+    expected = _chart(SAMPLE_PATH)
+    chart = _chart(target)
+    assert chart.patient_id == expected.patient_id
+    assert [obs.id for obs in chart.observations] == [obs.id for obs in expected.observations]
+
+
+def test_zstd_bundle_loads_like_raw(tmp_path: Path) -> None:
+    zstandard = pytest.importorskip("zstandard")
+    target = tmp_path / f"{SAMPLE_PATH.name}.zst"
+    target.write_bytes(zstandard.ZstdCompressor().compress(SAMPLE_PATH.read_bytes()))
+    expected = _chart(SAMPLE_PATH)
+    chart = _chart(target)
+    assert chart.patient_id == expected.patient_id
+    assert len(chart.observations) == len(expected.observations)
+
+
+def test_list_bundle_files_includes_compressed(tmp_path: Path) -> None:
+    for name in ["a.json", "b.json.gz", "c.json.zst", "d.ndjson.gz", "e.txt", "f.gz"]:
+        (tmp_path / name).write_bytes(b"")
+    assert [path.name for path in list_bundle_files(tmp_path)] == ["a.json", "b.json.gz", "c.json.zst"]
+    assert logical_stem(Path("Observation.ndjson.zst")) == "Observation"
+    assert logical_stem(Path("Patient.ndjson")) == "Patient"
+
+
+def test_list_bundle_files_keeps_one_variant_per_input(tmp_path: Path) -> None:
+    for name in ["a.json", "a.json.gz", "a.json.zst", "b.json.zst", "b.json.gz", "c.json.zst", "d.ndjson"]:
+        (tmp_path / name).write_bytes(b"")
+    assert [path.name for path in list_bundle_files(tmp_path)] == ["a.json", "b.json.gz", "c.json.zst"]
+
+
+def _write_gzip_export(export_dir: Path) -> None:
+    """Write the sample as a Bulk Data export of gzip NDJSON files."""
+    bundle = json.loads(SAMPLE_PATH.read_text(encoding="utf-8"))
+    lines: dict[str, list[str]] = {}
+    for entry in bundle["entry"]:
+        resource = entry["resource"]
+        lines.setdefault(resource["resourceType"], []).append(json.dumps(resource))
+    for resource_type, rows in lines.items():
+        payload = ("\n".join(rows) + "\n").encode("utf-8")
+        (export_dir / f"{resource_type}.ndjson.gz").write_bytes(gzip.compress(payload))
+
+
+def test_bulk_export_reads_gzip_ndjson(tmp_path: Path) -> None:
+    _write_gzip_export(tmp_path)
+    charts = list(iter_bulk_charts(tmp_path))
+    assert len(charts) == 1
+    assert len(charts[0].observations) == len(_chart(SAMPLE_PATH).observations)
+
+
+def test_compressed_export_is_budgeted_at_decoded_size(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    export_dir = tmp_path / "export"
+    export_dir.mkdir()
+    _write_gzip_export(export_dir)
+    files = ndjson.list_ndjson_files(export_dir)
+    raw_bytes = sum(len(gzip.decompress(path.read_bytes())) for path in files)
+    estimate = sum(estimated_size(path) for path in files)
+    assert estimate >= raw_bytes  # gzip trailers are exact; tiny files count at the factor
+    budget = raw_bytes - 1  # the compressed files fit, the decoded export does not
+    assert sum(path.stat().st_size for path in files) <= budget
+
+    calls: list[int] = []
+    partition_export = ndjson.partition_export
+
+    def recording_partition_export(files, work_dir, partitions):
+        calls.append(partitions)
+        return partition_export(files, work_dir, partitions)
+
+    monkeypatch.setattr(ndjson, "partition_export", recording_partition_export)
+    grouped = dict(iter_bulk_groups(export_dir, max_memory_bytes=budget, work_dir=tmp_path))
+    assert len(grouped) == 1 and calls == [-(-estimate // budget) * 2]
+
+    calls.clear()
+    assert dict(iter_bulk_groups(export_dir, max_memory_bytes=estimate)).keys() == grouped.keys()
+    assert calls == []
+
+
+def test_estimated_size_scales_compressed_files(tmp_path: Path) -> None:
+    for name in ("a.ndjson", "a.ndjson.zst", "a.ndjson.gz"):
+        (tmp_path / name).write_bytes(b"x" * 100)
+    assert estimated_size(tmp_path / "a.ndjson") == 100
+    assert estimated_size(tmp_path / "a.ndjson.zst") == 1000
+    assert estimated_size(tmp_path / "a.ndjson.zst", expansion=4.0) == 400
+    # a corrupt trailer claims more than the factor; the larger figure wins
+    assert estimated_size(tmp_path / "a.ndjson.gz") == int.from_bytes(b"xxxx", "little")
@@ -1,5 +1,7 @@
+from datetime import datetime
 from pathlib import Path
 
+from packages.core.schemas.chart import Condition, PatientChart, SourceRef
 from packages.ingest.synthea.loader import load_patient_dir
 from packages.ingest.synthea.normalizer import normalize_to_patient_chart
 from packages.ingest.synthea.parser import parse_fhir_resources
@@ -21,3 +23,26 @@ def test_contradiction_agent_detects_conflict() -> None:
     assert len(item.evidence) >= 2
     assert "should" not in item.message.lower()
     assert "recommend" not in item.message.lower()
+
+
+def test_contradiction_agent_reports_first_conflict_in_chart_order() -> None:
+    def condition(condition_id: str, display: str, year: int) -> Condition:
+        return Condition(
+            id=condition_id,
+            display=display,
+            onset=datetime(year, 1, 1),
+            sources=[SourceRef(doc_id="bundle", resource_id=condition_id)],
+        )
+
+    chart = PatientChart(
+        patient_id="p1",
+        conditions=[
+            condition("a2", "Asthma", 2015),
+            condition("b1", "Bronchitis", 2000),
+            condition("a1", "Asthma", 2010),
+            condition("b2", "Bronchitis", 2005),
+        ],
+    )
+    (item,) = run_contradiction_agent(chart)
+    assert "'Asthma'" in item.message
+    assert [ref.resource_id for ref in item.evidence] == ["a1", "a2"]
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from eval import cache as eval_cache
+from eval import run_eval
+from eval.cache import EvalCache, bundle_hash, cache_key, source_tree_hash
+
+SAMPLE_PATH = Path(
+    "data/raw/fhir_ehr_synthea/samples_100/"
+    "Kris249_Moore224_45dff467-def6-2132-a03a-5950e203b5c8.json"
+)
+
+
+def _write_manifest(tmp_path: Path, bundle_path: Path, expects: dict) -> Path:
+    manifest = {
+        "version": "test",
+        "mode": "mock",
+        "enable_agents": True,
+        "gates": {},
+        "patients": [{"name": "Kris249", "path": str(bundle_path), "expects": expects}],
+    }
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(json.dumps(manifest), encoding="utf-8")
+    return manifest_path
+
+
+def test_cache_key_changes_with_inputs() -> None:
+    base = {
+        "bundle_digest": "a",
+        "expects": {"risks": []},
+        "tree_digest": "t",
+        "mode": "mock",
+        "enable_agents": True,
+    }
+    key = cache_key(**base)
+    assert key == cache_key(**base)
+    for field, value in [
+        ("bundle_digest", "b"),
+        ("expects", {"risks": ["lab_a1c_elevated"]}),
+        ("tree_digest", "u"),
+        ("mode", "llm"),
+        ("enable_agents", False),
+    ]:
+        assert cache_key(**{**base, field: value}) != key
+
+
+def test_source_tree_hash_tracks_content(tmp_path: Path) -> None:
+    (tmp_path / "rules").mkdir()
+    (tmp_path / "rules" / "a.py").write_text("x = 1\n", encoding="utf-8")
+    first = source_tree_hash(tmp_path)
+    (tmp_path / "rules" / "__pycache__").mkdir()
+    (tmp_path / "rules" / "__pycache__" / "a.cpython.pyc").write_bytes(b"junk")
+    assert source_tree_hash(tmp_path) == first
+    (tmp_path / "rules" / "a.py").write_text("x = 2\n", encoding="utf-8")
+    assert source_tree_hash(tmp_path) != first
+
+
+def test_default_tree_hash_covers_eval_modules(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    for relative in ("packages/core.py", "eval/run_eval.py", "eval/manifest.json"):
+        (tmp_path / relative).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / relative).write_text("x = 1\n", encoding="utf-8")
+    monkeypatch.setattr(eval_cache, "REPO_ROOT", tmp_path)
+    first = source_tree_hash()
+    (tmp_path / "eval" / "manifest.json").write_text("{}", encoding="utf-8")
+    assert source_tree_hash() == first  # manifest entries are part of the key already
+    (tmp_path / "eval" / "run_eval.py").write_text("x = 2\n", encoding="utf-8")
+    assert source_tree_hash() != first
+
+
+def test_bundle_hash_missing_path_is_none(tmp_path: Path) -> None:
+    assert bundle_hash(tmp_path / "nope.json") is None
+
+
+def test_eval_cache_reuses_metrics(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    if not SAMPLE_PATH.exists():
+        pytest.skip("sample data not available")
+    bundle_path = tmp_path / SAMPLE_PATH.name
+    shutil.copyfile(SAMPLE_PATH, bundle_path)
+    manifest_path = _write_manifest(tmp_path, bundle_path, {"risks": []})
+    cache_path = tmp_path / "eval_cache.json"
+
+    first = run_eval.evaluate_manifest(manifest_path, cache=EvalCache(cache_path))
+    assert first["cache_hits"] == 0
+    assert first["recomputed"] == ["Kris249"]
+    assert cache_path.exists()
+
+    calls = {"count": 0}
+    original = run_eval._run_pipeline
+
+    def _counting_run(*args: object, **kwargs: object):
+        calls["count"] += 1
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(run_eval, "_run_pipeline", _counting_run)
+    second = run_eval.evaluate_manifest(manifest_path, cache=EvalCache(cache_path))
+    assert calls["count"] == 0
+    assert second["cache_hits"] == 1
+    assert second["recomputed"] == []
+    assert second["patients"][0]["cached"] is True
+    for key in ("risk_precision", "risk_recall", "actual_risks", "patient_pass"):
+        assert second["patients"][0][key] == first["patients"][0][key]
+
+    manifest_path = _write_manifest(tmp_path, bundle_path, {"risks": ["vitals_bp_elevated"]})
+    third = run_eval.evaluate_manifest(manifest_path, cache=EvalCache(cache_path))
+    assert calls["count"] == 1
+    assert third["recomputed"] == ["Kris249"]
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import copy
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from packages.core.schemas.chart import PatientChart
+from packages.core.schemas.result import PatientAnalysisResult
+from packages.ingest.store import connect, get_chart, get_result, put_charts, put_result
+from packages.ingest.synthea.normalizer import normalize_to_patient_chart
+from packages.ingest.synthea.parser import parse_fhir_resources
+from packages.risklib.rules import rule_manifests
+from packages.pipeline.agent_pipeline import run_chart_pipeline
+from packages.pipeline import incremental
+from packages.pipeline.steps import risks as risk_step
+from packages.pipeline.incremental import (
+    apply_delta,
+    is_affected,
+    normalize_delta,
+    reanalyze_chart,
+    reanalyze_stored,
+)
+
+SAMPLE_DIR = Path("data/raw/fhir_ehr_synthea/samples_100")
+SAMPLES = [
+    "Kris249_Moore224_45dff467-def6-2132-a03a-5950e203b5c8.json",
+    "Berna338_Moore224_f4159279-94bf-1bfc-701b-502b2a3131b4.json",
+]
+SOURCE = "bundle.json"
+
+
+def _entries(name: str) -> tuple[dict, list[dict]]:
+    bundle = json.loads((SAMPLE_DIR / name).read_text(encoding="utf-8"))
+    patient = next(e for e in bundle["entry"] if e["resource"]["resourceType"] == "Patient")
+    rest = [e for e in bundle["entry"] if e is not patient]
+    return patient, rest
+
+
+def _chart(patient: dict, entries: list[dict]) -> PatientChart:
+    payload = {"resourceType": "Bundle", "type": "collection", "entry": [patient] + entries}
+    grouped = parse_fhir_resources([{"payload": payload, "file_path": SOURCE, "input_kind": "file"}])
+    return normalize_to_patient_chart(grouped)
+
+
+def _round_trip(result: PatientAnalysisResult) -> PatientAnalysisResult:
+    return PatientAnalysisResult.model_validate_json(result.model_dump_json())
+
+
+def _dump(result: PatientAnalysisResult) -> dict:
+    return result.model_dump(mode="json")
+
+
+def _split(seed: int, entries: list[dict]) -> tuple[list[dict], list[dict], list[dict]]:
+    """(base entries, delta resources, full entries) for a random append + in-place update."""
+    rng = random.Random(seed)
+    size = rng.randint(1, 25)
+    delta_positions = set(rng.sample(range(len(entries)), size))
+    base = [e for i, e in enumerate(entries) if i not in delta_positions]
+    appended = [entries[i] for i in sorted(delta_positions)]
+    full = list(base)
+    updates: list[dict] = []
+    observations = [i for i, e in enumerate(base) if e["resource"]["resourceType"] == "Observation"]
+    if observations and rng.random() < 0.5:
+        index = rng.choice(observations)
+        changed = copy.deepcopy(base[index])
+        quantity = changed["resource"].get("valueQuantity")
+        if quantity and isinstance(quantity.get("value"), (int, float)):
+            quantity["value"] = round(quantity["value"] * 1.5, 2)
+        changed["resource"]["effectiveDateTime"] = "2030-01-01T00:00:00+00:00"
+        full[index] = changed
+        updates.append(changed)
+    full.extend(appended)
+    return base, [e["resource"] for e in updates + appended], full
+
+
+@pytest.mark.parametrize("name", SAMPLES)
+@pytest.mark.parametrize("enable_agents", [True, False])
+def test_incremental_matches_full_recompute(name: str, enable_agents: bool) -> None:
+    patient, entries = _entries(name)
+    for seed in range(12):
+        base, delta, full = _split(seed, entries)
+        base_chart = _chart(patient, base)
+        previous = _round_trip(run_chart_pipeline(base_chart, SOURCE, enable_agents=enable_agents))
+        stored_chart = PatientChart.model_validate_json(base_chart.model_dump_json())
+
+        merged, result, report = reanalyze_chart(
+            stored_chart, previous, delta, SOURCE, enable_agents=enable_agents
+        )
+        expected = run_chart_pipeline(_chart(patient, full), SOURCE, enable_agents=enable_agents)
+        assert _dump(result) == _dump(expected), (seed, report)
+        assert not report["full"]
+
+        # a second increment on top of the patched result stays consistent
+        _, again, report = reanalyze_chart(merged, _round_trip(result), [], SOURCE, enable_agents=enable_agents)
+        assert _dump(again) == _dump(expected)
+        assert report["rules_rerun"] == [] and report["agents_rerun"] == []
+
+
+def test_merged_chart_matches_full_normalization() -> None:
+    patient, entries = _entries(SAMPLES[0])
+    for seed in range(20):
+        base, delta, full = _split(seed, entries)
+        merged, touched = apply_delta(_chart(patient, base), normalize_delta(delta))
+        assert touched
+        expected = _chart(patient, full)
+        assert merged.model_dump(exclude={"created_at"}) == expected.model_dump(exclude={"created_at"})
+
+
+def test_only_touched_rules_rerun() -> None:
+    patient, entries = _entries(SAMPLES[0])
+    encounters = [e for e in entries if e["resource"]["resourceType"] == "Encounter"]
+    base = [e for e in entries if e is not encounters[-1]]
+    chart = _chart(patient, base)
+    previous = _round_trip(run_chart_pipeline(chart, SOURCE, enable_agents=True))
+    _, _, report = reanalyze_chart(chart, previous, [encounters[-1]["resource"]], SOURCE, enable_agents=True)
+    assert report["rules_rerun"] == []
+    assert report["rules_skipped"] == ["followup_missing"]
+    assert "lab_a1c_elevated" in report["rules_reused"]
+    assert report["agents_reused"] == ["contradictions"]
+
+    assert is_affected({"observations": frozenset({"4548-4"})}, {"observations": {"4548-4"}})
+    assert not is_affected({"observations": frozenset({"4548-4"})}, {"observations": {"2160-0"}})
+    assert is_affected(None, {"notes": set()})
+    assert not is_affected(None, {})
+
+
+def test_horizon_rules_follow_a_moved_latest_date(monkeypatch: pytest.MonkeyPatch) -> None:
+    def with_horizon() -> dict[str, dict]:
+        return {
+            rule_id: {**manifest, "horizon_days": 365} if manifest["inputs"] else manifest
+            for rule_id, manifest in rule_manifests().items()
+        }
+
+    monkeypatch.setattr(incremental, "rule_manifests", with_horizon)
+    monkeypatch.setattr(risk_step, "rule_manifests", with_horizon)
+    name = "Adela471_Danica886_Schmitt836_0c1a1859-29c7-4f11-f21c-20a7099e8613.json"
+    patient, entries = _entries(name)
+    chart = _chart(patient, entries)
+    previous = _round_trip(run_chart_pipeline(chart, SOURCE))
+    assert "vitals_bp_elevated" in {risk["rule_id"] for risk in previous.risks}
+    height = {
+        "resourceType": "Observation",
+        "id": "height-2099",
+        "status": "final",
+        "code": {"coding": [{"system": "http://loinc.org", "code": "8302-2", "display": "Body Height"}]},
+        "subject": {"reference": f"urn:uuid:{patient['resource']['id']}"},
+        "effectiveDateTime": "2099-01-01T00:00:00+00:00",
+        "valueQuantity": {"value": 170, "unit": "cm"},
+    }
+
+    merged, result, report = reanalyze_chart(chart, previous, [height], SOURCE)
+    assert _dump(result) == _dump(run_chart_pipeline(merged, SOURCE))
+    assert result.risks == [] and "vitals_bp_elevated" in report["rules_skipped"]
+
+    # replacing the 2099 observation moves the latest date back: the rule runs again
+    back = {**height, "effectiveDateTime": "2000-01-01T00:00:00+00:00"}
+    restored, again, report = reanalyze_chart(merged, _round_trip(result), [back], SOURCE)
+    assert _dump(again) == _dump(run_chart_pipeline(restored, SOURCE))
+    assert "vitals_bp_elevated" in report["rules_rerun"]
+
+
+def test_mode_mismatch_falls_back_to_full_run() -> None:
+    patient, entries = _entries(SAMPLES[1])
+    chart = _chart(patient, entries[:-1])
+    previous = _round_trip(run_chart_pipeline(chart, SOURCE, enable_agents=False))
+    _, result, report = reanalyze_chart(chart, previous, [entries[-1]["resource"]], SOURCE, enable_agents=True)
+    assert report["full"]
+    assert _dump(result) == _dump(run_chart_pipeline(_chart(patient, entries), SOURCE, enable_agents=True))
+
+
+def test_reanalyze_stored_patches_result(tmp_path: Path) -> None:
+    patient, entries = _entries(SAMPLES[0])
+    chart = _chart(patient, entries[:-3])
+    conn = connect(tmp_path / "charts.db")
+    put_charts(conn, [(chart, SOURCE)])
+    put_result(conn, run_chart_pipeline(chart, SOURCE, enable_agents=True), enable_agents=True)
+
+    report = reanalyze_stored(conn, chart.patient_id, [e["resource"] for e in entries[-3:]])
+    assert report is not None and not report["full"]
+    expected = run_chart_pipeline(_chart(patient, entries), SOURCE, enable_agents=True)
+    assert _dump(get_result(conn, chart.patient_id)) == _dump(expected)
+    assert len(get_chart(conn, chart.patient_id).observations) == len(_chart(patient, entries).observations)
+    assert reanalyze_stored(conn, "absent", []) is None
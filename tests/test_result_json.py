@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from apps.api.main import app
+from apps.worker import run_analyze
+from packages.core.render.compact import compact_result
+from packages.core.render.result_json import payload_json_bytes, result_json_bytes
+from packages.core.schemas.chart import SourceRef
+from packages.core.schemas.result import PatientAnalysisResult, TimelineEntry
+from packages.ingest.store import connect, get_result_json, put_result
+from packages.pipeline.agent_pipeline import run_agent_pipeline
+
+SAMPLE_PATH = Path(
+    "data/raw/fhir_ehr_synthea/samples_100/"
+    "Kris249_Moore224_45dff467-def6-2132-a03a-5950e203b5c8.json"
+)
+
+
+def _legacy_body(payload) -> bytes:
+    return JSONResponse(content=jsonable_encoder(payload)).body
+
+
+def _edge_result() -> PatientAnalysisResult:
+    when = datetime(2024, 5, 1, 8, 30, 15, 120000, tzinfo=timezone(timedelta(hours=2)))
+    source = SourceRef(
+        doc_id="Observation/ö1", resource_type="Observation", resource_id="ö1", timestamp=when
+    )
+    return PatientAnalysisResult(
+        snapshot="Patient: p | café — 5.9 %\nRisks:",
+        risks=[{"rule_id": "r", "severity": "high", "message": "Δ ≥ 2", "evidence": [source]}],
+        timeline=[TimelineEntry(date=when.isoformat(), type="Observation", summary="naïve", evidence=[source])],
+        meta={"patient_id": "p", "mode": "mock", "note": "größer"},
+    )
+
+
+def test_result_bytes_match_previous_encodings() -> None:
+    result = _edge_result()
+    body = result_json_bytes(result)
+    assert body == _legacy_body(result)
+    assert body == result.model_dump_json().encode("utf-8")
+    assert "café".encode("utf-8") in body
+
+    compact = compact_result(result)
+    assert payload_json_bytes(compact) == _legacy_body(compact)
+
+
+def test_payload_bytes_reject_what_json_response_rejects() -> None:
+    for payload in ({"value": float("nan")}, {"value": float("inf")}):
+        with pytest.raises(ValueError):
+            _legacy_body(payload)
+        with pytest.raises(ValueError):
+            payload_json_bytes(payload)
+    assert payload_json_bytes({1: "a"}) == _legacy_body({1: "a"})
+
+
+def test_sample_bytes_match_api_and_goldens() -> None:
+    if not SAMPLE_PATH.exists():
+        pytest.skip("sample data not available")
+    result = run_agent_pipeline(str(SAMPLE_PATH), enable_agents=True, mode="mock")
+    assert result_json_bytes(result) == _legacy_body(result)
+
+    client = TestClient(app)
+    response = client.post("/v1/analyze", json={"path": str(SAMPLE_PATH), "mode": "mock", "enable_agents": True})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    golden = json.loads(Path("tests/golden/Kris249_Moore224_api_phase5_mock_agents.json").read_text(encoding="utf-8"))
+    assert sorted(json.loads(response.content)) == sorted(golden)
+
+
+def test_stored_result_bytes_served_verbatim(tmp_path: Path, monkeypatch) -> None:
+    db_path = tmp_path / "charts.db"
+    conn = connect(db_path)
+    put_result(conn, _edge_result(), enable_agents=True)
+    stored = get_result_json(conn, "p")
+    conn.close()
+    assert stored is not None
+    monkeypatch.setenv("CHART_DB_PATH", str(db_path))
+
+    client = TestClient(app)
+    response = client.get("/v1/patients/p/result")
+    assert response.status_code == 200
+    assert response.content == stored.encode("utf-8")
+    assert response.content == _legacy_body(PatientAnalysisResult.model_validate_json(stored))
+    compact = client.get("/v1/patients/p/result", params={"compact": True})
+    assert compact.json()["evidence_table"]["rows"]
+    assert client.get("/v1/patients/p/result", params={"mode": "llm"}).status_code == 404
+
+
+def test_cli_json_output_unchanged(capsys: pytest.CaptureFixture[str], monkeypatch: pytest.MonkeyPatch) -> None:
+    if not SAMPLE_PATH.exists():
+        pytest.skip("sample data not available")
+    monkeypatch.setattr(sys, "argv", ["run_analyze.py", str(SAMPLE_PATH), "--json", "--phase5"])
+    assert run_analyze.main() == 0
+    out = capsys.readouterr().out
+    payload = json.loads(out)
+    result = PatientAnalysisResult.model_validate(payload)
+    assert out == result.model_dump_json() + "\n"
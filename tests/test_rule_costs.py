@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+from apps.worker import scan_risks
+from packages.ingest.synthea.loader import load_patient_dir
+from packages.ingest.synthea.normalizer import normalize_to_patient_chart
+from packages.ingest.synthea.parser import parse_fhir_resources
+from packages.pipeline.rule_costs import RuleCosts, format_cost_report
+from packages.pipeline.steps.risks import DISPATCH_TIMING, run_risk_rules
+
+SAMPLES = [
+    Path("data/raw/fhir_ehr_synthea/samples_100/Berna338_Moore224_f4159279-94bf-1bfc-701b-502b2a3131b4.json"),
+    Path("data/raw/fhir_ehr_synthea/samples_100/Kris249_Moore224_45dff467-def6-2132-a03a-5950e203b5c8.json"),
+]
+
+
+def _require_samples() -> None:
+    if not all(path.exists() for path in SAMPLES):
+        pytest.skip("sample data not available")
+
+
+def test_rule_costs_rank_rules_and_patients() -> None:
+    costs = RuleCosts()
+    costs.add("p1", "a.json", ingest_s=0.5, rules_s=0.010, timings={DISPATCH_TIMING: 0.002, "fast": 0.001, "slow": 0.004})
+    costs.add("p2", "b.json", ingest_s=0.3, rules_s=0.020, timings={DISPATCH_TIMING: 0.003, "slow": 0.012})
+    report = costs.report(top=1)
+
+    assert [row["rule_id"] for row in report["rules"]] == ["slow", "fast"]
+    slow = report["rules"][0]
+    assert slow["runs"] == 2 and slow["max_patient"] == "p2"
+    assert slow["total_s"] == pytest.approx(0.016) and slow["p95_s"] == pytest.approx(0.012)
+    assert report["dispatch_s"] == pytest.approx(0.005)
+    assert report["overhead_s"] == pytest.approx(0.030 - 0.005 - 0.017)
+    assert [row["patient_id"] for row in report["slowest_patients"]] == ["p2"]
+    assert report["slowest_patients"][0]["slowest_rule"] == "slow"
+    assert format_cost_report(report, top=1)[2].startswith("slow | 2 |")
+
+
+def test_run_risk_rules_times_executed_rules() -> None:
+    _require_samples()
+    chart = normalize_to_patient_chart(parse_fhir_resources(load_patient_dir(SAMPLES[0])))
+    timings: dict[str, float] = {}
+    risks, debug_info = run_risk_rules(chart, debug=True, timings=timings)
+    executed = {rule_id for rule_id, reason in debug_info.items() if not reason.startswith("skipped:")}
+    assert set(timings) == executed | {DISPATCH_TIMING}
+    assert all(seconds >= 0 for seconds in timings.values())
+    assert risks == run_risk_rules(chart)
+
+
+def test_scan_risks_debug_writes_cost_report(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    _require_samples()
+    data_dir = tmp_path / "bundles"
+    data_dir.mkdir()
+    for sample in SAMPLES:
+        shutil.copy(sample, data_dir / sample.name)
+    out = tmp_path / "costs.json"
+    monkeypatch.setattr(
+        sys, "argv", ["scan_risks.py", str(data_dir), "--debug", "--top", "1", "--cost-json", str(out)]
+    )
+    assert scan_risks.main() == 0
+    printed = capsys.readouterr().out
+    assert "slowest rules:" in printed and "slowest patients:" in printed
+
+    report = json.loads(out.read_text(encoding="utf-8"))
+    assert report["patients"] == 2 and len(report["slowest_patients"]) == 1
+    assert report["ingest_s"] > 0 and report["rules"]
+    assert {"total_s", "mean_s", "p95_s", "max_s", "max_patient"} <= set(report["rules"][0])
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from packages.core.schemas.chart import Observation
+from packages.ingest.store import iter_directory_charts
+from packages.pipeline.steps.risks import chart_input_summary, execute_rule, rule_skip_reason, run_risk_rules
+from packages.risklib.dispatch import LOINC_SYSTEM, ObservationDispatcher, loinc_keys
+from packages.risklib.rules import discover_rules, rule_manifests
+
+SAMPLE_DIR = Path("data/raw/fhir_ehr_synthea/samples_100")
+
+
+def _obs(obs_id: str, code: str, system: str = LOINC_SYSTEM, when: datetime | None = None) -> Observation:
+    return Observation(id=obs_id, code=code, code_system=system, value=1.0, effective_dt=when)
+
+
+def test_dispatch_routes_by_system_and_code_in_chart_order() -> None:
+    dispatcher = ObservationDispatcher()
+    dispatcher.subscribe("a", loinc_keys({"1-1", "2-2"}))
+    dispatcher.subscribe("b", loinc_keys({"2-2"}))
+    dispatcher.subscribe("c", loinc_keys({"9-9"}))
+    observations = [
+        _obs("o1", "2-2", when=datetime(2020, 1, 1)),
+        _obs("o2", "1-1", system="http://snomed.info/sct"),
+        _obs("o3", "1-1", when=datetime(2021, 1, 1)),
+        _obs("o4", "2-2"),
+    ]
+    buckets, latest = dispatcher.dispatch(observations)
+    assert [obs.id for obs in buckets["a"]] == ["o1", "o3", "o4"]
+    assert [obs.id for obs in buckets["b"]] == ["o1", "o4"]
+    assert buckets["c"] == []
+    assert latest == {"": datetime(2021, 1, 1), "2-2": datetime(2020, 1, 1), "1-1": datetime(2021, 1, 1)}
+
+
+def test_duplicate_consumer_rejected() -> None:
+    dispatcher = ObservationDispatcher()
+    dispatcher.subscribe("a", loinc_keys({"1-1"}))
+    with pytest.raises(ValueError):
+        dispatcher.subscribe("a", loinc_keys({"2-2"}))
+
+
+@pytest.mark.skipif(not SAMPLE_DIR.exists(), reason="samples_100 not available")
+def test_dispatched_rules_match_per_rule_scans() -> None:
+    runners = discover_rules()
+    manifests = rule_manifests()
+    for chart, _ in iter_directory_charts(SAMPLE_DIR):
+        summary = chart_input_summary(chart)
+        expected: list[dict] = []
+        expected_debug: dict[str, str] = {}
+        for rule_id, runner in sorted(runners.items()):
+            skip = rule_skip_reason(manifests[rule_id], summary)
+            if skip:
+                expected_debug[rule_id] = skip
+                continue
+            normalized, reason = execute_rule(rule_id, runner, chart)
+            expected_debug[rule_id] = reason
+            expected.extend(normalized)
+        assert run_risk_rules(chart, debug=True) == (expected, expected_debug)
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from datetime import datetime
+from pathlib import Path
+
+from packages.core.schemas.chart import Observation, PatientChart
+from packages.ingest.store import iter_directory_charts
+from packages.pipeline.steps.risks import (
+    chart_input_summary,
+    execute_rule,
+    rule_skip_reason,
+    run_risk_rules,
+    summarize_rule_reasons,
+)
+from packages.risklib.rules import discover_rules, rule_manifests
+
+SAMPLE_DIR = Path("data/raw/fhir_ehr_synthea/samples_100")
+LOINC = "http://loinc.org"
+
+
+def _obs(code: str, when: datetime, system: str = LOINC) -> Observation:
+    return Observation(id=f"{code}-{when.date()}", code=code, code_system=system, value=1.0, effective_dt=when)
+
+
+def test_every_rule_declares_a_manifest() -> None:
+    manifests = rule_manifests()
+    assert set(manifests) == set(discover_rules())
+    for manifest in manifests.values():
+        assert manifest["inputs"] is not None
+    assert manifests["lab_trend_potassium"]["inputs"] == {"observations": frozenset({"6298-4"})}
+    assert {rule_id for rule_id, m in manifests.items() if m["noop"]} == {
+        "duplicate_therapy",
+        "followup_missing",
+        "med_allergy_conflict",
+    }
+
+
+def test_skip_reasons() -> None:
+    chart = PatientChart(
+        patient_id="p",
+        observations=[_obs("6298-4", datetime(2020, 1, 1)), _obs("4548-4", datetime(2024, 1, 1), system="other")],
+    )
+    summary = chart_input_summary(chart)
+    potassium = {"inputs": {"observations": frozenset({"6298-4"})}, "horizon_days": None, "noop": False}
+    a1c = {"inputs": {"observations": frozenset({"4548-4"})}, "horizon_days": None, "noop": False}
+    assert rule_skip_reason(potassium, summary) is None
+    assert rule_skip_reason(a1c, summary) == "skipped: inputs absent"
+    assert rule_skip_reason({**potassium, "noop": True}, summary) == "skipped: no-op rule"
+    assert rule_skip_reason({"inputs": None}, summary) is None
+
+    chart.observations.append(_obs("2160-0", datetime(2024, 6, 1)))
+    summary = chart_input_summary(chart)
+    assert rule_skip_reason({**potassium, "horizon_days": 365}, summary) == "skipped: no inputs within 365 days"
+    assert rule_skip_reason({**potassium, "horizon_days": 2000}, summary) is None
+
+
+def test_skipping_does_not_change_results() -> None:
+    runners = discover_rules()
+    for chart, _ in iter_directory_charts(SAMPLE_DIR, limit=25):
+        unconditional = []
+        for rule_id, runner in sorted(runners.items()):
+            unconditional.extend(execute_rule(rule_id, runner, chart)[0])
+        results, reasons = run_risk_rules(chart, debug=True)
+        assert [(r["rule_id"], r["message"]) for r in results] == [
+            (r["rule_id"], r["message"]) for r in unconditional
+        ]
+        counts = summarize_rule_reasons(reasons)
+        assert counts["skipped"] >= 3
+        assert counts["executed"] + counts["skipped"] == len(runners)
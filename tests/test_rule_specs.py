@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+
+from packages.core.schemas.chart import Observation, PatientChart, SourceRef
+from packages.pipeline.steps.risks import dispatch_rule_inputs
+from packages.risklib.rules import discover_rules, rule_manifests, rule_module
+from packages.risklib.specs import compile_rule_specs, compiled_rules, load_rule_specs
+
+LOINC = "http://loinc.org"
+
+
+def _obs(obs_id: str, code: str, value: float, day: int, unit: str | None = "mg/dL") -> Observation:
+    return Observation(
+        id=obs_id,
+        code=code,
+        code_system=LOINC,
+        value=value,
+        unit=unit,
+        effective_dt=datetime(2024, 1, day),
+        sources=[SourceRef(doc_id=f"Observation/{obs_id}")],
+    )
+
+
+def _glucose_spec(rule_id: str, threshold: float) -> dict:
+    return {
+        "rule_id": rule_id,
+        "codes": ["2345-7"],
+        "values": {"value": {"field": "value"}},
+        "reasons": {"no_observations": "no glucose", "no_match": "normal"},
+        "checks": [
+            {
+                "kind": "latest",
+                "when": {"value": {">=": threshold}},
+                "message": "glucose {value}{unit_text} on {date}",
+            }
+        ],
+    }
+
+
+def test_packaged_specs_compile_to_discovered_rules() -> None:
+    compiled = compiled_rules()
+    assert set(compiled) == {
+        "lab_a1c_elevated",
+        "lab_trend_creatinine",
+        "lab_trend_potassium",
+        "vitals_bmi_obesity",
+        "vitals_bp_elevated",
+    }
+    runners = discover_rules()
+    manifests = rule_manifests()
+    for rule_id, rule in compiled.items():
+        assert rule_module(runners[rule_id]) is rule
+        assert manifests[rule_id]["inputs"] == {"observations": frozenset(rule.INPUTS["observations"])}
+        assert manifests[rule_id]["noop"] is False
+
+
+def test_new_lab_rule_is_spec_only() -> None:
+    rule = compile_rule_specs([_glucose_spec("lab_glucose_high", 126)])["lab_glucose_high"]
+    chart = PatientChart(
+        patient_id="p",
+        observations=[_obs("g1", "2345-7", 140, 1), _obs("g2", "2345-7", 130, 2)],
+    )
+    assert rule.run(chart) == [
+        {
+            "rule_id": "lab_glucose_high",
+            "severity": "medium",
+            "message": "glucose 130.0 mg/dL on 2024-01-02",
+            "evidence": [SourceRef(doc_id="Observation/g2")],
+        }
+    ]
+    assert rule.run(PatientChart(patient_id="p")) == []
+    assert rule.LAST_DEBUG_REASON == "no glucose"
+
+
+def test_series_and_scan_checks() -> None:
+    rule = compiled_rules()["lab_trend_potassium"]
+    rising = [_obs(f"k{day}", "6298-4", value, day, "mmol/L") for day, value in ((1, 4.0), (2, 4.2), (3, 4.4))]
+    result = rule.evaluate(rising)
+    assert result[0]["message"] == "potassium trend from 4.0 on 2024-01-01 to 4.4 on 2024-01-03"
+    assert [ref.doc_id for ref in result[0]["evidence"]] == ["Observation/k1", "Observation/k2", "Observation/k3"]
+
+    out_of_range = [_obs(f"k{day}", "6298-4", value, day, "mmol/L") for day, value in ((1, 4.0), (2, 6.1), (3, 4.1), (4, 4.0))]
+    result = rule.evaluate(out_of_range)
+    assert result[0]["severity"] == "high"
+    assert result[0]["message"] == "potassium out of range: 6.1 mmol/L"
+    assert [ref.doc_id for ref in result[0]["evidence"]] == ["Observation/k1", "Observation/k2", "Observation/k3"]
+
+    mixed = [_obs("k1", "6298-4", 4.0, 1, "mmol/L"), _obs("k2", "6298-4", 4.0, 2, "mEq/L"), _obs("k3", "6298-4", 4.0, 3, None)]
+    assert rule.evaluate(mixed) == []
+    assert rule.LAST_DEBUG_REASON == "unit mismatch (units=['mEq/L', 'mmol/L'])"
+
+
+def test_rules_on_the_same_codes_share_one_pass() -> None:
+    compiled = compile_rule_specs([_glucose_spec("glucose_a", 126), _glucose_spec("glucose_b", 200)])
+    runners = {rule_id: rule.run for rule_id, rule in compiled.items()}
+    manifests = {rule_id: {"inputs": {"observations": frozenset(rule.INPUTS["observations"])}} for rule_id, rule in compiled.items()}
+    chart = PatientChart(patient_id="p", observations=[_obs("g1", "2345-7", 150, 1)])
+    buckets, _ = dispatch_rule_inputs(chart, runners, manifests)
+    assert buckets["glucose_a"] is buckets["glucose_b"]
+    assert compiled["glucose_a"]._extractor is compiled["glucose_b"]._extractor
+    assert len(compiled["glucose_a"].evaluate(buckets["glucose_a"])) == 1
+    assert compiled["glucose_b"].evaluate(buckets["glucose_b"]) == []
+    assert compiled["glucose_b"].LAST_DEBUG_REASON == "normal"
+
+
+@pytest.mark.parametrize(
+    "mutate, error",
+    [
+        (lambda spec: spec.update(checks=[]), "checks"),
+        (lambda spec: spec["checks"][0].update(kind="median"), "kind"),
+        (lambda spec: spec["checks"][0].update(when={"value": {"~": 1}}), "operator"),
+        (lambda spec: spec.update(colour="red"), "unknown keys"),
+        (lambda spec: spec["reasons"].update(empty="x"), "unknown reasons"),
+    ],
+)
+def test_invalid_specs_are_rejected(mutate, error: str) -> None:
+    spec = _glucose_spec("bad", 1)
+    mutate(spec)
+    with pytest.raises(ValueError, match=error):
+        compile_rule_specs([spec])
+
+
+def test_duplicate_spec_ids_rejected() -> None:
+    with pytest.raises(ValueError, match="duplicate"):
+        compile_rule_specs([_glucose_spec("dup", 1), _glucose_spec("dup", 2)])
+
+
+def test_packaged_spec_file_loads() -> None:
+    specs = load_rule_specs()
+    assert [spec["rule_id"] for spec in specs] == sorted(compiled_rules())
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+from apps.worker import run_analyze
+from packages.core.render.result_json import result_json_bytes
+from packages.pipeline.agent_pipeline import run_agent_pipeline
+
+SAMPLE_DIR = Path("data/raw/fhir_ehr_synthea/samples_100")
+SAMPLES = [
+    SAMPLE_DIR / "Berna338_Moore224_f4159279-94bf-1bfc-701b-502b2a3131b4.json",
+    SAMPLE_DIR / "Kris249_Moore224_45dff467-def6-2132-a03a-5950e203b5c8.json",
+]
+
+
+def _require_samples() -> None:
+    if not all(path.exists() for path in SAMPLES):
+        pytest.skip("sample data not available")
+
+
+def _run(monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str], *args: str) -> tuple[int, list, str]:
+    monkeypatch.setattr(sys, "argv", ["run_analyze.py", *args])
+    code = run_analyze.main()
+    captured = capsys.readouterr()
+    return code, [json.loads(line) for line in captured.out.splitlines()], captured.err
+
+
+def test_batch_streams_jsonl_with_error_records(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str], tmp_path: Path
+) -> None:
+    _require_samples()
+    missing = str(tmp_path / "missing.json")
+    code, lines, err = _run(
+        monkeypatch, capsys, str(SAMPLES[0]), missing, str(SAMPLE_DIR / "Kris249_*.json"), "--phase5"
+    )
+    assert code == 1
+    assert [line.get("error", {}).get("code") for line in lines] == [None, "not_found", None]
+    assert lines[1]["path"] == missing
+    for sample, line in zip(SAMPLES, (lines[0], lines[2])):
+        assert line == json.loads(result_json_bytes(run_agent_pipeline(sample, enable_agents=True)))
+    assert "batch: 3 inputs, 2 ok, 1 errors" in err
+
+
+def test_batch_workers_keep_input_order(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    _require_samples()
+    inputs = [str(path) for path in SAMPLES * 2]
+    code, inline, _ = _run(monkeypatch, capsys, *inputs, "--sections", "risks")
+    assert code == 0
+    code, pooled, err = _run(monkeypatch, capsys, *inputs, "--sections", "risks", "--workers", "2")
+    assert code == 0 and pooled == inline and "workers=2" in err
+    assert [line["meta"]["source_path"] for line in pooled] == inputs
+
+
+def test_batch_markdown_reports(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str], tmp_path: Path
+) -> None:
+    _require_samples()
+    code, lines, _ = _run(monkeypatch, capsys, str(SAMPLES[0]), "--jsonl", "--out-dir", str(tmp_path))
+    assert code == 0
+    report = Path(lines[0]["report"])
+    assert report == tmp_path / f"{SAMPLES[0].stem}.md"
+    assert report.read_text(encoding="utf-8").strip()
+
+    code, _, err = _run(monkeypatch, capsys, *map(str, SAMPLES), "--format", "md", "--out", str(tmp_path / "r.md"))
+    assert code == 2 and "--out-dir" in err
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from packages.core.render.markdown import render_patient_report_md
+from packages.core.schemas.chart import Condition, PatientChart, SourceRef
+from packages.core.schemas.result import PatientAnalysisResult
+from packages.ingest.synthea.loader import load_patient_dir
+from packages.ingest.synthea.normalizer import normalize_to_patient_chart
+from packages.ingest.synthea.parser import parse_fhir_resources
+from packages.pipeline.agent_pipeline import run_chart_pipeline
+from packages.pipeline.steps.narrative import generate_narrative
+from packages.pipeline.steps.snapshot import build_snapshot_from_chart, build_snapshot_model
+
+SAMPLE_PATH = Path(
+    "data/raw/fhir_ehr_synthea/samples_100/"
+    "Berna338_Moore224_f4159279-94bf-1bfc-701b-502b2a3131b4.json"
+)
+
+
+def _sample_chart() -> PatientChart:
+    if not SAMPLE_PATH.exists():
+        pytest.skip("sample data not available")
+    return normalize_to_patient_chart(parse_fhir_resources(load_patient_dir(SAMPLE_PATH)))
+
+
+def test_snapshot_model_renders_existing_text() -> None:
+    chart = _sample_chart()
+    snapshot = build_snapshot_model(chart)
+    assert snapshot.text == build_snapshot_from_chart(chart)
+    assert snapshot.text.splitlines()[0] == snapshot.header_line()
+    assert snapshot.patient_id == chart.patient_id
+    assert len(snapshot.problems) <= 5 and len(snapshot.medications) <= 8
+    assert all(item.source.startswith("Observation/") for item in snapshot.measurements)
+    assert snapshot.risks
+
+
+def test_consumers_match_text_parsing() -> None:
+    chart = _sample_chart()
+    result = run_chart_pipeline(chart, str(SAMPLE_PATH), enable_agents=True)
+    snapshot = result.snapshot_model()
+    assert snapshot is not None and snapshot.text == result.snapshot
+
+    assert generate_narrative(snapshot, chart.patient_id, None) == generate_narrative(
+        result.snapshot, chart.patient_id, None
+    )
+
+    assert PatientAnalysisResult.model_validate_json(result.model_dump_json()).snapshot_model() is None
+    text_only = PatientAnalysisResult(**dict(result))
+    assert text_only.snapshot_model() is None
+    assert render_patient_report_md(result) == render_patient_report_md(text_only)
+
+
+def test_snapshot_sources_fixed_at_build_time() -> None:
+    chart = PatientChart(
+        patient_id="p",
+        demographics={"gender": "female", "birth_date": "1980-06-01"},
+        conditions=[
+            Condition(id="c1", display="Asthma", onset=datetime(2020, 1, 1)),
+            Condition(id="c2", display="Asthma", onset=datetime(2022, 5, 1)),
+        ],
+    )
+    source = SourceRef(doc_id="Observation/x")
+    risks = [{"rule_id": "r", "severity": "high", "message": "m", "evidence": [source]}]
+    snapshot = build_snapshot_model(chart, risks=risks)
+    before = snapshot.text
+    source.resource_type, source.resource_id = "Observation", "x"
+    assert snapshot.text == before
+    assert snapshot.risks[0].sources == ["unknown/unknown"]
+    assert snapshot.age == 41
+
+    result = PatientAnalysisResult(snapshot=snapshot.text, meta={"patient_id": "p"})
+    result.attach_snapshot_model(snapshot)
+    report = render_patient_report_md(result)
+    assert "- Asthma (most recent: 2022-05-01)" in report
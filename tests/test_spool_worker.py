@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from apps.worker import run_worker
+from packages.pipeline.spool import Spool, SpoolJob, run_job
+
+SAMPLE_PATH = Path(
+    "data/raw/fhir_ehr_synthea/samples_100/"
+    "Berna338_Moore224_f4159279-94bf-1bfc-701b-502b2a3131b4.json"
+)
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+def _require_sample() -> None:
+    if not SAMPLE_PATH.exists():
+        pytest.skip("sample data not available")
+
+
+def test_drain_writes_results_and_errors(tmp_path: Path) -> None:
+    _require_sample()
+    spool = Spool(tmp_path / "spool")
+    job = SpoolJob(path=str(SAMPLE_PATH), enable_agents=True)
+    ok = spool.submit(job)
+    missing = spool.submit(SpoolJob(path=str(tmp_path / "missing.json")))
+    (spool.incoming / "broken.json").write_text("{", encoding="utf-8")
+
+    out_dir = tmp_path / "out"
+    assert run_worker.main([str(spool.root), "--out-dir", str(out_dir), "--drain"]) == 0
+
+    assert (out_dir / f"{ok}.json").read_bytes() == run_job(job)
+    error = json.loads((out_dir / f"{missing}.error.json").read_text(encoding="utf-8"))
+    assert error["error"]["code"] == "job_failed"
+    assert json.loads((out_dir / "broken.error.json").read_text(encoding="utf-8"))["error"]["code"] == "invalid_job"
+    assert sorted(path.stem for path in spool.failed.iterdir()) == sorted([missing, "broken"])
+    assert not list(spool.incoming.iterdir()) and not list(spool.processing.iterdir())
+    assert not [path for path in out_dir.iterdir() if path.name.startswith(".")]
+
+
+def test_claims_are_exclusive(tmp_path: Path) -> None:
+    first = Spool(tmp_path, worker_id="a")
+    second = Spool(tmp_path, worker_id="b")
+    job_id = first.submit(SpoolJob(path="bundle.json"))
+    claimed = second.claim()
+    assert claimed is not None and claimed.job_id == job_id
+    assert claimed.path.parent == tmp_path / "processing" / "b"
+    assert first.claim() is None
+
+
+def test_recover_requeues_then_gives_up(tmp_path: Path) -> None:
+    spool = Spool(tmp_path)
+    job_id = spool.submit(SpoolJob(path="bundle.json"))
+    for attempt in (1, 2):
+        claimed = spool.claim()  # the worker "crashes" holding the claim
+        assert claimed is not None and spool.load(claimed).attempts == attempt - 1
+        assert Spool(tmp_path).recover(max_attempts=3) == {"requeued": [job_id], "failed": []}
+    assert spool.claim() is not None
+    assert spool.recover(max_attempts=3) == {"requeued": [], "failed": [job_id]}
+    assert (spool.failed / f"{job_id}.json").exists()
+
+
+def _crash_or_succeed(job: SpoolJob) -> tuple[bytes, float]:
+    """Pool task for the crash test: "crash" jobs kill their process, others succeed."""
+    if "crash" in job.path:
+        time.sleep(0.2)  # let the sibling job start first
+        os._exit(1)
+    if job.attempts == 0:
+        time.sleep(2)  # first attempt is still running when the sibling crashes
+    return b'{"ok": true}', 0.0
+
+
+def test_pool_crash_requeues_in_flight_jobs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(run_worker, "_execute", _crash_or_succeed)
+    spool = Spool(tmp_path / "spool")
+    spool.submit(SpoolJob(path="ok.json"), job_id="a-ok")
+    spool.submit(SpoolJob(path="crash.json"), job_id="b-crash")
+    out_dir = tmp_path / "out"
+    worker = run_worker.Worker(spool, out_dir, workers=2, poll_interval=0.01, max_attempts=3)
+
+    assert worker.serve(drain=True) == {"done": 1, "failed": 1}
+    assert (out_dir / "a-ok.json").read_bytes() == b'{"ok": true}'
+    assert not (out_dir / "a-ok.error.json").exists()
+    error = json.loads((out_dir / "b-crash.error.json").read_text(encoding="utf-8"))
+    assert error["error"]["code"] == "worker_crashed"
+    assert [path.name for path in spool.failed.iterdir()] == ["b-crash.json"]
+    assert spool.load(run_worker.ClaimedJob("b-crash", spool.failed / "b-crash.json", 0, 0)).attempts == 3
+    assert not list(spool.incoming.iterdir()) and not list(spool.processing.iterdir())
+
+
+def test_sigterm_finishes_in_flight_job(tmp_path: Path) -> None:
+    _require_sample()
+    spool = Spool(tmp_path / "spool")
+    env = {**os.environ, "PYTHONPATH": str(REPO_ROOT)}
+    process = subprocess.Popen(
+        [sys.executable, "apps/worker/run_worker.py", str(spool.root), "--poll-interval", "0.05"],
+        cwd=REPO_ROOT,
+        env=env,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        job_id = spool.submit(SpoolJob(path=str(REPO_ROOT / SAMPLE_PATH)))
+        result = spool.root / "results" / f"{job_id}.json"
+        deadline = time.monotonic() + 60
+        # Stop as soon as the job is claimed: it must still be finished and acked.
+        while not (any(spool.processing.iterdir()) or result.exists()) and time.monotonic() < deadline:
+            time.sleep(0.005)
+        process.send_signal(signal.SIGTERM)
+        _, stderr = process.communicate(timeout=60)
+    finally:
+        if process.poll() is None:
+            process.kill()
+    assert process.returncode == 0, stderr
+    events = [json.loads(line)["event"] for line in stderr.splitlines()]
+    assert events[0] == "started" and events[-1] == "stopped"
+    assert sorted(events[1:-1]) == ["job", "stopping"]
+    assert json.loads(result.read_text(encoding="utf-8"))["meta"]["source_path"]
+    assert not any(spool.processing.iterdir())
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from apps.api.main import app
+from apps.api.warmup import WARMUP_STEPS, warm_up
+
+
+def _load_report_module():
+    root = Path(__file__).resolve().parents[1]
+    path = root / "scripts" / "import_time_report.py"
+    spec = importlib.util.spec_from_file_location("import_time_report", path)
+    if spec is None or spec.loader is None:
+        raise RuntimeError("Unable to load import_time_report module.")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize("module", ["apps.worker.run_analyze", "apps.worker.run_snapshot", "apps.api.main"])
+def test_entry_points_skip_heavy_optional_imports(module: str) -> None:
+    report = _load_report_module().import_report(module)
+    assert report["modules"] > 0 and report["total_s"] > 0
+    assert report["heavy_optional_loaded"] == []
+
+
+def test_parse_importtime() -> None:
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |     json.decoder\n"
+        "import time:       300 |        420 |   json\n"
+    )
+    rows = _load_report_module().parse_importtime(stderr)
+    assert rows == [
+        {"module": "json.decoder", "self_us": 120, "cumulative_us": 120, "depth": 2},
+        {"module": "json", "self_us": 300, "cumulative_us": 420, "depth": 1},
+    ]
+
+
+def test_warm_up_runs_every_step() -> None:
+    report = warm_up()
+    assert set(report["steps"]) == set(WARMUP_STEPS)
+    assert report["errors"] == {}
+
+
+def test_api_warms_up_at_startup(monkeypatch: pytest.MonkeyPatch) -> None:
+    with TestClient(app) as client:
+        assert client.get("/readyz").json() == {"status": "ok"}
+        assert set(app.state.warmup["steps"]) == set(WARMUP_STEPS)
+
+    monkeypatch.setenv("API_WARMUP", "0")
+    with TestClient(app):
+        assert app.state.warmup is None
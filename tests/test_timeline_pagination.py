@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from apps.api.main import app
+from packages.core.schemas.chart import Encounter, Observation, PatientChart
+from packages.ingest.store import connect, load_directory
+from packages.ingest.synthea.loader import load_patient_dir
+from packages.ingest.synthea.normalizer import normalize_to_patient_chart
+from packages.ingest.synthea.parser import parse_fhir_resources
+from packages.pipeline.agents.timeline_agent import run_timeline_agent, timeline_cursor
+
+SAMPLE_PATH = Path(
+    "data/raw/fhir_ehr_synthea/samples_100/"
+    "Kris249_Moore224_45dff467-def6-2132-a03a-5950e203b5c8.json"
+)
+ALL = 10**6
+
+
+def _sample_chart() -> PatientChart:
+    if not SAMPLE_PATH.exists():
+        pytest.skip("sample data not available")
+    return normalize_to_patient_chart(parse_fhir_resources(load_patient_dir(SAMPLE_PATH)))
+
+
+def _pages(chart: PatientChart, size: int) -> list[list]:
+    pages: list[list] = []
+    cursor = None
+    while True:
+        page = run_timeline_agent(chart, max_entries=size, cursor=cursor)
+        if not page:
+            return pages
+        pages.append(page)
+        cursor = timeline_cursor(page[-1])
+
+
+def test_top_k_is_prefix_of_full_order() -> None:
+    chart = _sample_chart()
+    full = run_timeline_agent(chart, max_entries=ALL)
+    assert len(full) > 40
+    assert run_timeline_agent(chart, max_entries=15) == full[:15]
+    assert run_timeline_agent(chart) == full[:20]
+    assert run_timeline_agent(chart, max_entries=0) == []
+
+
+def test_cursor_pages_cover_history_once() -> None:
+    chart = _sample_chart()
+    full = run_timeline_agent(chart, max_entries=ALL)
+    pages = _pages(chart, 7)
+    assert [entry for page in pages for entry in page] == full
+    assert all(len(page) == 7 for page in pages[:-1])
+
+
+def test_cursor_ties_and_missing_anchor() -> None:
+    when = datetime(2024, 3, 1, 9, 0)
+    chart = PatientChart(
+        patient_id="p",
+        encounters=[Encounter(id="e1", start=when, type="checkup")],
+        observations=[
+            Observation(id="o1", code="x", display="Weight", value=70.0, effective_dt=when),
+            Observation(id="o2", code="x", display="Height", value=170.0, effective_dt=when),
+            Observation(id="o3", code="x", display="Weight", value=71.0, effective_dt=datetime(2023, 1, 1)),
+        ],
+    )
+    full = run_timeline_agent(chart, max_entries=ALL)
+    assert [entry.evidence[0].resource_id for entry in full] == ["o1", "o2", "e1", "o3"]
+    assert [entry for page in _pages(chart, 1) for entry in page] == full
+
+    # A vanished anchor repeats its timestamp's entries instead of dropping them.
+    gone = run_timeline_agent(chart, cursor=(when.isoformat(), "deleted"))
+    assert [entry.evidence[0].resource_id for entry in gone] == ["o1", "o2", "e1", "o3"]
+    first_page = run_timeline_agent(chart, max_entries=1)
+    chart.observations = [obs for obs in chart.observations if obs.id != "o1"]
+    resumed = run_timeline_agent(chart, cursor=timeline_cursor(first_page[-1]))
+    assert [entry.evidence[0].resource_id for entry in resumed] == ["o2", "e1", "o3"]
+
+    with pytest.raises(ValueError):
+        run_timeline_agent(chart, cursor=("yesterday", "o1"))
+
+
+def test_timeline_route_pages(tmp_path: Path, monkeypatch) -> None:
+    chart = _sample_chart()
+    data_dir = tmp_path / "bundles"
+    data_dir.mkdir()
+    (data_dir / SAMPLE_PATH.name).write_bytes(SAMPLE_PATH.read_bytes())
+    db_path = tmp_path / "charts.db"
+    conn = connect(db_path)
+    load_directory(conn, data_dir)
+    conn.close()
+    monkeypatch.setenv("CHART_DB_PATH", str(db_path))
+    client = TestClient(app)
+
+    first = client.get(f"/v1/patients/{chart.patient_id}/timeline", params={"limit": 5}).json()
+    assert len(first["entries"]) == 5
+    second = client.get(
+        f"/v1/patients/{chart.patient_id}/timeline", params={"limit": 5, **first["next_cursor"]}
+    ).json()
+    full = run_timeline_agent(chart, max_entries=10)
+    assert [entry["summary"] for entry in first["entries"] + second["entries"]] == [entry.summary for entry in full]
+
+    partial = client.get(f"/v1/patients/{chart.patient_id}/timeline", params={"before_id": "x"})
+    assert partial.status_code == 400
+    assert client.get("/v1/patients/missing/timeline").status_code == 404
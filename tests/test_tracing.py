@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from apps.api.admission import get_admission_controller
+from apps.api.main import app
+from packages.core import tracing
+from packages.pipeline.steps.narrative import generate_narrative
+
+SAMPLE_PATH = Path(
+    "data/raw/fhir_ehr_synthea/samples_100/"
+    "Berna338_Moore224_f4159279-94bf-1bfc-701b-502b2a3131b4.json"
+)
+REMOTE_PARENT = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+
+@pytest.fixture
+def spans_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    path = tmp_path / "spans.jsonl"
+    monkeypatch.setenv("TRACE_EXPORTER", f"file:{path}")
+    tracing.configure_tracing()
+
+    def read() -> list[dict]:
+        if not path.exists():
+            return []
+        return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+    yield read
+    tracing.configure_tracing("none")
+
+
+def test_noop_by_default() -> None:
+    assert not tracing.tracing_enabled()
+    with tracing.span("anything", {"a": 1}) as current:
+        current.set_attribute("b", 2)
+        assert current is tracing.NOOP_SPAN
+        assert tracing.current_traceparent() is None
+
+
+def test_spans_nest_and_record_errors(spans_file) -> None:
+    with tracing.span("outer", traceparent=REMOTE_PARENT) as outer:
+        with pytest.raises(ValueError):
+            with tracing.span("inner"):
+                raise ValueError("boom")
+        assert tracing.current_traceparent() == outer.traceparent
+    inner, outer_record = spans_file()
+    assert outer_record["trace_id"] == inner["trace_id"] == "0af7651916cd43dd8448eb211c80319c"
+    assert outer_record["parent_span_id"] == "b7ad6b7169203331"
+    assert inner["parent_span_id"] == outer_record["span_id"]
+    assert inner["status"] == "ERROR" and inner["attributes"]["exception.type"] == "ValueError"
+    assert tracing.parse_traceparent("00-abc-def-01") is None
+
+
+def test_narrative_span_records_prompt_and_response_sizes(spans_file, monkeypatch: pytest.MonkeyPatch) -> None:
+    class EmptyLLM:
+        def complete(self, prompt: str) -> str:
+            return ""
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    assert generate_narrative("Patient: p1", "p1", EmptyLLM()) is not None
+    (record,) = spans_file()
+    assert record["name"] == "generate_narrative"
+    assert record["attributes"]["narrative.prompt_chars"] > 0
+    assert record["attributes"]["narrative.response_chars"] == 0
+
+
+def _require_sample() -> None:
+    if not SAMPLE_PATH.exists():
+        pytest.skip("sample data not available")
+
+
+def test_request_span_parents_pipeline_spans(spans_file) -> None:
+    _require_sample()
+    client = TestClient(app)
+    body = {"path": str(SAMPLE_PATH), "enable_agents": True}
+    response = client.post("/v1/analyze", json=body, headers={"traceparent": REMOTE_PARENT})
+    assert response.status_code == 200
+    spans = spans_file()
+    names = {record["name"] for record in spans}
+    assert {
+        "POST /v1/analyze",
+        "load_patient_dir",
+        "parse_fhir_resources",
+        "normalize_to_patient_chart",
+        "run_risk_rules",
+        "run_timeline_agent",
+        "run_missing_info_agent",
+        "run_contradiction_agent",
+        "generate_narrative",
+        "verify_result",
+    } <= names
+    assert any(name.startswith("rule:") for name in names)
+    assert {record["trace_id"] for record in spans} == {"0af7651916cd43dd8448eb211c80319c"}
+    (root,) = [record for record in spans if record["parent_span_id"] == "b7ad6b7169203331"]
+    assert root["name"] == "POST /v1/analyze" and root["attributes"]["http.status_code"] == 200
+    assert response.headers["traceparent"].split("-")[2] == root["span_id"]
+
+
+def test_trace_continues_in_large_bundle_worker(spans_file, monkeypatch: pytest.MonkeyPatch) -> None:
+    _require_sample()
+    monkeypatch.setenv("ANALYZE_LARGE_BUNDLE_BYTES", "1")
+    get_admission_controller().shutdown()
+    get_admission_controller.cache_clear()
+    try:
+        response = TestClient(app).post("/v1/analyze", json={"path": str(SAMPLE_PATH)})
+    finally:
+        get_admission_controller().shutdown()
+        get_admission_controller.cache_clear()
+    assert response.status_code == 200
+    spans = spans_file()
+    (root,) = [record for record in spans if record["name"] == "POST /v1/analyze"]
+    (analyze,) = [record for record in spans if record["name"] == "analyze"]
+    assert analyze["parent_span_id"] == root["span_id"] and analyze["trace_id"] == root["trace_id"]
+    assert analyze["resource"]["process.pid"] != root["resource"]["process.pid"]